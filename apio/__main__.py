@@ -78,6 +78,12 @@ def main():
         # -- an exit message for debugging.
         atexit.register(on_exit, "Apio main(): scons process exit")
 
+        # -- If APIO_TRACE is defined, record a timeline trace of this
+        # -- scons process.
+        from apio.common import apio_trace
+
+        apio_trace.init(is_scons_process=True)
+
         # -- Import and initialize scons only when running the scons
         # -- subprocess.
         from SCons.Script.Main import main as scons_main
@@ -116,9 +122,16 @@ def main():
         # -- an exit message for debugging.
         atexit.register(on_exit, "Apio main(): apio process exit")
 
+        # -- If APIO_TRACE is defined, record a timeline trace of this
+        # -- command, including its scons subprocess.
+        from apio.common import apio_trace
+
+        apio_trace.init(is_scons_process=False)
+
         # -- Import the apio CLI only when running the apio process
         # -- (as opposed to the scons sub process).
-        from apio.commands.apio import apio_top_cli
+        with apio_trace.span("import apio commands"):
+            from apio.commands.apio import apio_top_cli
 
         # -- Due to the Click decorations of apio_top_cli() and the Click
         # -- magic, this function is not really invoked but Click dispatches
@@ -8,12 +8,14 @@
 
 import os
 import sys
+import copy
 import json
 import platform
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
 from typing import List, Optional, Dict, Set, Tuple
+from apio.common import apio_trace
 from apio.common.apio_console import cout, cerror, cstyle
 from apio.common.apio_styles import INFO, EMPH1, EMPH2, EMPH3
 from apio.common.common_util import env_build_path
@@ -273,40 +275,42 @@ class ApioContext:
             ), "project_dir_arg specified for project policy None"
 
         # -- Determine apio home and packages dirs
-        self.apio_home_dir: Path = util.resolve_home_dir()
-        self.apio_packages_dir: Path = util.resolve_packages_dir(
-            self.apio_home_dir
-        )
+        with apio_trace.span("config load", cat="context"):
+            self.apio_home_dir: Path = util.resolve_home_dir()
+            self.apio_packages_dir: Path = util.resolve_packages_dir(
+                self.apio_home_dir
+            )
 
-        # -- Get the jsonc source dirs.
-        resources_dir = util.get_path_in_apio_package(RESOURCES_DIR)
+            # -- Get the jsonc source dirs.
+            resources_dir = util.get_path_in_apio_package(RESOURCES_DIR)
 
-        # -- Read and validate the config information
-        self.config, _ = self._load_resource(CONFIG_JSONC, resources_dir)
-        validate_config(self.config)
+            # -- Read and validate the config information
+            self.config, _ = self._load_resource(CONFIG_JSONC, resources_dir)
+            validate_config(self.config)
 
-        # -- Read the user profile from ~/.apio/profile.json.
-        self.profile = Profile(
-            self.apio_home_dir,
-        )
+            # -- Read the user profile from ~/.apio/profile.json.
+            self.profile = Profile(
+                self.apio_home_dir,
+            )
 
         # -- Read remote config information, from local cache or remotely..
-        remote_config_url = env_options.get(
-            env_options.APIO_REMOTE_CONFIG_URL,
-            default=self.config["remote-config-url"],
-        )
-        remote_config_ttl_days = self.config["remote-config-ttl-days"]
-        remote_config_retry_minutes = self.config[
-            "remote-config-retry-minutes"
-        ]
-
-        self.remote_config = RemoteConfig(
-            self.apio_home_dir,
-            str(remote_config_url),
-            remote_config_ttl_days,
-            remote_config_retry_minutes,
-            remote_config_policy,
-        )
+        with apio_trace.span("remote config", cat="context"):
+            remote_config_url = env_options.get(
+                env_options.APIO_REMOTE_CONFIG_URL,
+                default=self.config["remote-config-url"],
+            )
+            remote_config_ttl_days = self.config["remote-config-ttl-days"]
+            remote_config_retry_minutes = self.config[
+                "remote-config-retry-minutes"
+            ]
+
+            self.remote_config = RemoteConfig(
+                self.apio_home_dir,
+                str(remote_config_url),
+                remote_config_ttl_days,
+                remote_config_retry_minutes,
+                remote_config_policy,
+            )
 
         # -- Get the underlying platform information.
         self.platform: ApioPlatform = apio_platforms.get_apio_platform()
@@ -357,30 +361,32 @@ class ApioContext:
             # -- required by self.package_manager are already initialized.
             # --
             # -- TODO: Set verbose=True if APIO_DEBUG is above some level.
-            self.package_manager.install_missing_packages_on_the_fly(
-                verbose=False
-            )
+            with apio_trace.span("package scan", cat="context"):
+                self.package_manager.install_missing_packages_on_the_fly(
+                    verbose=False
+                )
 
             # -- Load the definitions from the definitions file with possible
             # -- override by the optional project file.
-            definitions_dir = self.apio_packages_dir / "definitions"
-            boards, custom_boards_ids = self._load_resource(
-                BOARDS_JSONC, definitions_dir, self._project_dir
-            )
-            fpgas, custom_fpgas_ids = self._load_resource(
-                FPGAS_JSONC, definitions_dir, self._project_dir
-            )
-            programmers, custom_programmers_ids = self._load_resource(
-                PROGRAMMERS_JSONC, definitions_dir, self._project_dir
-            )
-            self._definitions = ApioDefinitions(
-                boards,
-                custom_boards_ids,
-                fpgas,
-                custom_fpgas_ids,
-                programmers,
-                custom_programmers_ids,
-            )
+            with apio_trace.span("definitions load", cat="context"):
+                definitions_dir = self.apio_packages_dir / "definitions"
+                boards, custom_boards_ids = self._load_resource(
+                    BOARDS_JSONC, definitions_dir, self._project_dir
+                )
+                fpgas, custom_fpgas_ids = self._load_resource(
+                    FPGAS_JSONC, definitions_dir, self._project_dir
+                )
+                programmers, custom_programmers_ids = self._load_resource(
+                    PROGRAMMERS_JSONC, definitions_dir, self._project_dir
+                )
+                self._definitions = ApioDefinitions(
+                    boards,
+                    custom_boards_ids,
+                    fpgas,
+                    custom_fpgas_ids,
+                    programmers,
+                    custom_programmers_ids,
+                )
 
         # -- If we determined that we need to load the project, load the
         # -- apio.ini data.
@@ -389,26 +395,54 @@ class ApioContext:
 
         if self._project_dir:
             # -- Load the project object
-            self._project = load_project_from_file(
-                self._project_dir, env_arg, self.boards
-            )
-            assert self.has_project, "init(): project not loaded"
-            # -- Inform the user about the active env, if needed..
-            if report_env:
-                self.report_env()
-            # -- Collect and validate the project resources.
-            # -- The project is already validated to have the required "board.
-            self._project_resources = collect_project_resources(
-                self._project.get_str_option("board"),
-                self.boards,
-                self.fpgas,
-                self.programmers,
-            )
-            # -- Validate the project resources.
-            validate_project_resources(self._project_resources)
+            with apio_trace.span("project load", cat="context"):
+                self._project = load_project_from_file(
+                    self._project_dir, env_arg, self.boards
+                )
+                assert self.has_project, "init(): project not loaded"
+                # -- Inform the user about the active env, if needed..
+                if report_env:
+                    self.report_env()
+                # -- Collect and validate the project resources. The project
+                # -- is already validated to have the required "board.
+                self._project_resources = collect_project_resources(
+                    self._project.get_str_option("board"),
+                    self.boards,
+                    self.fpgas,
+                    self.programmers,
+                )
+                # -- Validate the project resources.
+                validate_project_resources(self._project_resources)
         else:
             assert not self.has_project, "init(): project loaded"
 
+    def with_env(self, env_name: str) -> "ApioContext":
+        """Returns a shallow copy of this context with the given apio.ini env
+        as the active env. This allows commands such as 'apio build
+        --all-envs' to process multiple envs while loading the project and
+        the definitions only once. Asserts that the project is loaded."""
+
+        # -- Do not call if project is not loaded.
+        assert self.has_project, "with_env(): project is not loaded"
+
+        # -- Collect and validate the resources of the selected env.
+        project = self.project.with_env(env_name)
+        project_resources = collect_project_resources(
+            project.get_str_option("board"),
+            self.boards,
+            self.fpgas,
+            self.programmers,
+        )
+        validate_project_resources(project_resources)
+
+        # -- The copy shares the definitions, packages and config with this
+        # -- context and differs only by its project env and resources.
+        # pylint: disable=protected-access
+        result = copy.copy(self)
+        result._project = project
+        result._project_resources = project_resources
+        return result
+
     def report_env(self):
         """Report to the user the env and board used. Asserts that the
         project is loaded."""
@@ -634,6 +668,14 @@ class ApioContext:
             tmp_dir.mkdir(parents=True, exist_ok=True)
         return tmp_dir
 
+    def get_cache_dir(self, create: bool = True) -> Path:
+        """Return the cache dir under the apio home dir. If 'create' is true
+        create the dir and its parents if they do not exist."""
+        cache_dir = self.apio_home_dir / "cache"
+        if create:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+        return cache_dir
+
     @staticmethod
     def _determine_scons_shell_id(apio_platform: ApioPlatform) -> str:
         """
@@ -829,6 +871,11 @@ class ApioContext:
         # -- cannot be combined.
         assert not (quiet and verbose), "Can't have both quite and verbose."
 
+        # -- Nothing to do if already set, e.g. by the context that this
+        # -- context was forked from by with_env().
+        if self.env_was_already_set and not verbose:
+            return
+
         # -- Collect the env mutations for all packages.
         mutations = self._get_env_mutations_for_packages()
 
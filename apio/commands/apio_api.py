@@ -214,10 +214,10 @@ def _get_system_cli(
 
 # -- Text in the rich-text format of the python rich library.
 APIO_API_GET_BUILD_REPORT_HELP = """
-The command 'apio api get-build-report' provides utilization and max \
-clock information from a built project. The information is extracted \
-from the file 'hardware.pnr' that is generated by Apio when building \
-the project.
+The command 'apio api get-build-report' provides utilization, max \
+clock and critical paths information from a built project. The \
+information is extracted from the file 'hardware.pnr' that is generated \
+by Apio when building the project.
 
 The optional flag '--timestamp' allows the caller to embed in the JSON \
 document a known timestamp that allows to verify that the JSON document \
@@ -254,6 +254,8 @@ def _get_build_report_cli(
 ):
     """Implements the 'apio apio get-build-report' command."""
 
+    # pylint: disable=too-many-locals
+
     apio_ctx = ApioContext(
         project_policy=ProjectPolicy.PROJECT_REQUIRED,
         remote_config_policy=RemoteConfigPolicy.CACHED_OK,
@@ -269,8 +271,10 @@ def _get_build_report_cli(
     # -- The build process generates this report file.
     pnr_json_file = apio_ctx.env_build_path / "hardware.pnr"
 
-    # -- Read the report
-    report = build_report.read_build_report(pnr_json_file)
+    # -- Read the report. The file is parsed once for both the build and the
+    # -- timing reports.
+    pnr_json = build_report.read_pnr_json(pnr_json_file)
+    report = build_report.read_build_report(pnr_json_file, pnr_json)
 
     # -- The top dict that we will emit as json.
     top_dict = {}
@@ -298,6 +302,37 @@ def _get_build_report_cli(
 
     section_dict["clocks"] = clocks_dict
 
+    # -- Add the critical paths, worst first, and the delays by module and
+    # -- by net, largest first.
+    timing_report = build_report.read_timing_report(pnr_json_file, pnr_json)
+    paths_list = []
+    for path in timing_report.paths:
+        paths_list.append(
+            {
+                "from": path.from_clock,
+                "to": path.to_clock,
+                "delay_ns": path.delay_ns,
+                "cell_delay_ns": path.cell_delay_ns,
+                "routing_delay_ns": path.routing_delay_ns,
+                "steps": [
+                    {
+                        "type": step.kind,
+                        "cell": step.cell,
+                        "net": step.net,
+                        "module": step.module,
+                        "delay_ns": step.delay_ns,
+                    }
+                    for step in path.steps
+                ],
+            }
+        )
+
+    section_dict["timing"] = {
+        "critical_paths": paths_list,
+        "module_delays": {d.name: d.delay_ns for d in timing_report.modules},
+        "net_delays": {d.name: d.delay_ns for d in timing_report.nets},
+    }
+
     # -- Add section
     top_dict["build-report"] = section_dict
 
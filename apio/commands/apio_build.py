@@ -7,14 +7,22 @@
 # -- License GPLv2
 """Implementation of 'apio build' command"""
 
+import os
 import sys
-from typing import Optional
+from typing import Optional, Set
 from pathlib import Path
 import click
-from apio.utils import cmd_util
+from apio.common import apio_events
+from apio.common.apio_console import cout
+from apio.utils import cmd_util, watch_util
 from apio.managers.scons_manager import SConsManager
 from apio.commands import options
-from apio.common.proto.apio_pb2 import Verbosity
+from apio.common.proto.apio_pb2 import (
+    Verbosity,
+    BuildParams,
+    FMAX,
+    UTILIZATION,
+)
 from apio.apio_context import (
     ApioContext,
     PackagesPolicy,
@@ -24,6 +32,40 @@ from apio.apio_context import (
 
 # ------------ apio build
 
+all_envs_option = click.option(
+    "all_envs",  # Var name.
+    "--all-envs",
+    is_flag=True,
+    help="Build all the envs in apio.ini.",
+    cls=cmd_util.ApioOption,
+)
+
+jobs_option = click.option(
+    "jobs",  # Var name.
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    metavar="N",
+    help="Max number of concurrent builds (with --all-envs).",
+    cls=cmd_util.ApioOption,
+)
+seed_sweep_option = click.option(
+    "seed_sweep",  # Var name.
+    "--seed-sweep",
+    type=click.IntRange(min=1),
+    metavar="N",
+    help="Place and route with N seeds and keep the best.",
+    cls=cmd_util.ApioOption,
+)
+
+sweep_metric_option = click.option(
+    "sweep_metric",  # Var name.
+    "--sweep-metric",
+    type=click.Choice(["fmax", "utilization"], case_sensitive=True),
+    help="Select the best seed by fmax (default) or utilization.",
+    cls=cmd_util.ApioOption,
+)
+
 # -- Text in the rich-text format of the python rich library.
 APIO_BUILD_HELP = """
 The command 'apio build' processes the project’s synthesis source files and \
@@ -34,7 +76,11 @@ Examples:[code]
   apio build -e debug          # Set the apio.ini env.
   apio build -v                # Verbose info (all)
   apio build --verbose-synth   # Verbose synthesis info
-  apio build --verbose-pnr     # Verbose place and route info[/code]
+  apio build --verbose-pnr     # Verbose place and route info
+  apio build --all-envs        # Build all the envs concurrently.
+  apio build --all-envs -j 2   # At most two concurrent env builds.
+  apio build --seed-sweep 8    # Keep the best fmax of 8 nextpnr seeds.
+  apio build --watch           # Rebuild on changes of project files.[/code]
 
 NOTES:
 * The files are sorted in a deterministic lexicographic order.
@@ -42,6 +88,13 @@ NOTES:
 * The build command ignores testbench files (*_tb.v, and *_tb.sv).
 * It is unnecessary to run 'apio build' before 'apio upload'.
 * To force a rebuild from scratch use the command 'apio clean' first.
+* With '--all-envs', each env is built in its own '_build/<env>' directory \
+and the output of each env is printed when its build completes.
+* With '--seed-sweep', the design is synthesized once and placed and \
+routed in parallel with different nextpnr seeds.
+* With '--watch', the command keeps running and rebuilds the project when \
+its files change, until you hit Ctrl-C. Changes of testbenches only don't \
+trigger a rebuild, and changes of apio.ini require a restart.
 """
 
 
@@ -53,24 +106,54 @@ NOTES:
 )
 @click.pass_context
 @options.env_option_gen()
+@all_envs_option
+@jobs_option
+@seed_sweep_option
+@sweep_metric_option
 @options.project_dir_option
+@options.output_format_option
 @options.verbose_option
 @options.verbose_synth_option
 @options.verbose_pnr_option
+@options.watch_option
 def cli(
-    _: click.Context,
+    cmd_ctx: click.Context,
     *,
     # Options
     env: Optional[str],
+    all_envs: bool,
+    jobs: Optional[int],
+    seed_sweep: Optional[int],
+    sweep_metric: Optional[str],
     project_dir: Optional[Path],
+    output_format: str,
     verbose: bool,
     verbose_synth: bool,
     verbose_pnr: bool,
+    watch: bool,
 ):
     """Implements the apio build command. It invokes the toolchain
     to synthesize the source files into a bitstream file.
     """
 
+    # pylint: disable=too-many-arguments
+    # pylint: disable=too-many-locals
+
+    # -- Sanity check the options.
+    cmd_util.check_at_most_one_param(cmd_ctx, ["env", "all_envs"])
+    cmd_util.check_at_most_one_param(cmd_ctx, ["all_envs", "watch"])
+    if jobs is not None and not all_envs:
+        cmd_util.fatal_usage_error(
+            cmd_ctx, "--jobs can be used only with --all-envs."
+        )
+    if sweep_metric is not None and seed_sweep is None:
+        cmd_util.fatal_usage_error(
+            cmd_ctx, "--sweep-metric can be used only with --seed-sweep."
+        )
+
+    # -- Select the output format, before any output.
+    apio_events.configure(output_format)
+
     # -- Create the apio context.
     apio_ctx = ApioContext(
         project_policy=ProjectPolicy.PROJECT_REQUIRED,
@@ -83,10 +166,48 @@ def cli(
     # -- Create the scons manager.
     scons = SConsManager(apio_ctx)
 
+    # -- Construct the verbosity.
+    verbosity = Verbosity(all=verbose, synth=verbose_synth, pnr=verbose_pnr)
+
+    # -- Construct the build params of the optional seed sweep.
+    build_params = None
+    if seed_sweep:
+        build_params = BuildParams(
+            seed_sweep=seed_sweep,
+            seed_sweep_metric=(
+                UTILIZATION if sweep_metric == "utilization" else FMAX
+            ),
+        )
+
+    # -- Handle the case of building all the envs.
+    if all_envs:
+        # -- By default, run as many concurrent builds as cpu cores.
+        max_jobs = jobs or os.cpu_count() or 1
+        exit_code = scons.build_all_envs(
+            verbosity, max_jobs=max_jobs, build_params=build_params
+        )
+        sys.exit(exit_code)
+
+    # -- Handle the watch mode. The apio context and the scons manager are
+    # -- reused by all the builds.
+    if watch:
+
+        def build_on_changes(changes: Optional[Set[str]]) -> None:
+            """Called initially with None and then with the changed files."""
+            if changes is not None:
+                watch_util.warn_if_project_file_changed(changes)
+                if watch_util.changed_testbenches(changes):
+                    cout("Only testbenches changed, nothing to build.")
+                    return
+            scons.build(verbosity, build_params)
+
+        watch_util.watch_loop(
+            watch_util.create_watcher(apio_ctx.project_dir), build_on_changes
+        )
+        sys.exit(0)
+
     # -- Build the project with the given parameters
-    exit_code = scons.build(
-        Verbosity(all=verbose, synth=verbose_synth, pnr=verbose_pnr),
-    )
+    exit_code = scons.build(verbosity, build_params)
 
     # -- Done!
     sys.exit(exit_code)
@@ -10,12 +10,11 @@
 import sys
 import os
 from pathlib import Path
-from glob import glob
 from typing import Tuple, List, Optional
 import click
 from apio.common.apio_console import cout, cerror, cstyle
 from apio.common.apio_styles import EMPH3, SUCCESS, INFO, ERROR
-from apio.common.common_util import PROJECT_BUILD_PATH, sort_files
+from apio.common.common_util import find_project_files, sort_files
 from apio.apio_context import (
     ApioContext,
     PackagesPolicy,
@@ -23,7 +22,7 @@ from apio.apio_context import (
     RemoteConfigPolicy,
 )
 from apio.commands import options
-from apio.utils import util, cmd_util
+from apio.utils import util, cmd_util, format_util
 
 
 # -------------- apio format
@@ -38,7 +37,13 @@ files by default.
 Examples:[code]
   apio format                    # Format all source files.
   apio format -v                 # Same but with verbose output.
-  apio format main.v main_tb.v   # Format the two files.[/code]
+  apio format main.v main_tb.v   # Format the two files.
+  apio format --check            # Only check that files are formatted.[/code]
+
+Files are formatted in parallel and files that were already formatted by \
+a previous invocation with the same options are skipped. With the \
+'--check' option, the files are not modified and the command fails if any \
+of them is not formatted, which is useful for example in pre-commit hooks.
 
 [NOTE] The file arguments are relative to the project directory, even if \
 the --project-dir option is used.
@@ -68,6 +73,37 @@ online or use the command 'apio raw -- verible-verilog-format --helpfull'.
 _FILE_TYPES = [".v", ".sv", ".vh", ".svh"]
 
 
+check_option = click.option(
+    "check",  # Var name
+    "--check",
+    is_flag=True,
+    help="Check the files without modifying them.",
+    cls=cmd_util.ApioOption,
+)
+
+
+def _report_results(
+    results: List[format_util.FormatResult], cache: format_util.FormatCache
+) -> Tuple[int, int]:
+    """Reports the files that failed or are not formatted and adds the
+    formatted files to the cache. Returns the number of failed files and
+    the number of unformatted files."""
+    failures = 0
+    unformatted = 0
+    for result in results:
+        if not result.ok:
+            cerror(f"Formatting of '{result.file}' failed")
+            if result.error:
+                cout(result.error)
+            failures += 1
+        elif result.needs_formatting:
+            cout(f"'{result.file}' is not formatted.", style=ERROR)
+            unformatted += 1
+        else:
+            cache.files[result.file] = format_util.file_digest(result.file)
+    return failures, unformatted
+
+
 @click.command(
     name="format",
     cls=cmd_util.ApioCommand,
@@ -75,6 +111,7 @@ _FILE_TYPES = [".v", ".sv", ".vh", ".svh"]
     help=APIO_FORMAT_HELP,
 )
 @click.argument("files", nargs=-1, required=False)
+@check_option
 @options.env_option_gen()
 @options.project_dir_option
 @options.verbose_option
@@ -82,6 +119,7 @@ def cli(
     *,
     # Arguments
     files: Tuple[str],
+    check: bool,
     env: Optional[str],
     project_dir: Optional[Path],
     verbose: bool,
@@ -90,6 +128,8 @@ def cli(
     files to format.
     """
 
+    # pylint: disable=too-many-locals
+
     # -- Create an apio context with a project object.
     apio_ctx = ApioContext(
         project_policy=ProjectPolicy.PROJECT_REQUIRED,
@@ -104,10 +144,6 @@ def cli(
         "format-verible-options", default=[]
     )
 
-    # -- Add verbose option if needed.
-    if verbose and "--verbose" not in cmd_options:
-        cmd_options.append("--verbose")
-
     # -- Prepare the packages for use.
     apio_ctx.set_env_for_packages(quiet=not verbose)
 
@@ -120,13 +156,8 @@ def cli(
     # -- If user didn't specify files to format, all all source files to
     # -- the list.
     if not _files:
-        for ext in _FILE_TYPES:
-            _files.extend(glob("**/*" + ext, recursive=True))
-
-        # -- Filter out files that are under the _build directory.
-        _files = [
-            f for f in _files if PROJECT_BUILD_PATH not in Path(f).parents
-        ]
+        # -- Files under the _build directory are excluded.
+        _files = find_project_files(_FILE_TYPES)
 
         # -- Error if no file to format.
         if not _files:
@@ -136,43 +167,47 @@ def cli(
     # -- Sort files, case insensitive.
     _files = sort_files(_files)
 
-    # -- Iterate the files and format one at a time. We could format
-    # -- all of them at once but this way we can make the output more
-    # -- user friendly.
-    failures = 0
+    # -- Check the files before we start.
     for f in _files:
-        # -- Convert to a Path object.
-        path = Path(f)
-
         # -- Check the file extension.
-        _, ext = os.path.splitext(path)
+        _, ext = os.path.splitext(f)
         if ext not in _FILE_TYPES:
             cerror(f"'{f}' has an unexpected extension.")
             cout(f"Should be one of {_FILE_TYPES}", style=INFO)
             sys.exit(1)
 
         # -- Check that the file exists and is a file.
-        if not path.is_file():
+        if not Path(f).is_file():
             cerror(f"'{f}' is not a file.")
             sys.exit(1)
 
-        # -- Print file name.
-        styled_f = cstyle(f, style=EMPH3)
-        cout(f"Formatting {styled_f}")
+    # -- Skip the files that are known to be formatted with these options.
+    verible_args = format_util.verible_options(cmd_options)
+    cache = format_util.load_format_cache(verible_args)
+    pending_files = [
+        f
+        for f in _files
+        if not cache.is_formatted(f, format_util.file_digest(f))
+    ]
+    skipped = len(_files) - len(pending_files)
 
-        # -- Construct the formatter command line.
-        command = (
-            "verible-verilog-format --nofailsafe_success --inplace "
-            f' {" ".join(cmd_options)} "{f}"'
-        )
-        if verbose:
-            cout(command)
+    for f in _files:
+        styled_f = cstyle(f, style=EMPH3)
+        if f in pending_files:
+            cout(f"{'Checking' if check else 'Formatting'} {styled_f}")
+        elif verbose:
+            cout(f"Skipping {styled_f}, already formatted")
+    if verbose:
+        cout(f"Verible options: {verible_args}")
+
+    # -- Format or check the files, in batches and in parallel.
+    results = format_util.format_files(
+        pending_files, verible_args, check=check
+    )
 
-        # -- Execute the formatter command line.
-        exit_code = os.system(command)
-        if exit_code != 0:
-            cerror(f"Formatting of '{f}' failed")
-            failures += 1
+    # -- Report the results and update the cache.
+    failures, unformatted = _report_results(results, cache)
+    format_util.save_format_cache(cache)
 
     # -- Report failures, if eny.
     if failures:
@@ -183,6 +218,22 @@ def cli(
         )
         sys.exit(1)
 
+    # -- In check mode, fail if any file is not formatted.
+    if unformatted:
+        cout()
+        cout(
+            f"Found {util.plurality(unformatted, 'unformatted file')}.",
+            style=ERROR,
+        )
+        cout("Run 'apio format' to format them.", style=INFO)
+        sys.exit(1)
+
+    if skipped:
+        cout(
+            f"Skipped {util.plurality(skipped, 'file')} that were already "
+            "formatted."
+        )
+
     # -- All done ok.
     cout(f"Processed {util.plurality(_files, 'file')}.", style=SUCCESS)
     sys.exit(0)
@@ -20,6 +20,7 @@ from apio.apio_context import (
     RemoteConfigPolicy,
 )
 from apio.utils import cmd_util
+from apio.common import apio_events
 from apio.common.proto.apio_pb2 import GraphOutputType, GraphParams, Verbosity
 
 
@@ -58,6 +59,32 @@ no_viewer_option = click.option(
     cls=cmd_util.ApioOption,
 )
 
+per_module_option = click.option(
+    "per_module",  # Var name.
+    "--per-module",
+    is_flag=True,
+    help="Generate a graph per module of the hierarchy.",
+    cls=cmd_util.ApioOption,
+)
+
+max_depth_option = click.option(
+    "max_depth",  # Var name.
+    "--max-depth",
+    type=click.IntRange(min=0),
+    metavar="N",
+    help="Graph modules up to N levels below the top (with --per-module).",
+    cls=cmd_util.ApioOption,
+)
+
+filter_option = click.option(
+    "module_filter",  # Var name.
+    "--filter",
+    type=str,
+    metavar="pattern",
+    help="Graph only modules matching the pattern (with --per-module).",
+    cls=cmd_util.ApioOption,
+)
+
 # -- Text in the rich-text format of the python rich library.
 APIO_GRAPH_HELP = """
 The command 'apio graph' generates a graphical representation of the design \
@@ -69,7 +96,16 @@ Examples:[code]
   apio graph --svg         # Generate a svg file.
   apio graph --pdf         # Generate a pdf file.
   apio graph --png         # Generate a png file.
-  apio graph -t my_module  # Graph my_module module.[/code]
+  apio graph -t my_module  # Graph my_module module.
+  apio graph --per-module  # Graph each module of the hierarchy.
+  apio graph --per-module --max-depth 1 --filter "uart_*"[/code]
+
+Graphs are regenerated only if their source files, the graphed module or \
+the output type changed. With '--per-module', a graph is generated, in \
+parallel, for each module of the top module hierarchy, in \
+'_build/<env>/graphs/<module>.<type>'. The graphed modules can be pruned \
+with '--max-depth', where the top module has depth 0, and with '--filter' \
+which accepts a glob pattern such as 'uart_*'.
 
 
 [b][Hint][/b] On Windows, type 'explorer _build/default/graph.svg' to view \
@@ -90,10 +126,14 @@ env is different than 'default' change the commands accordingly).
 @pdf_option
 @options.env_option_gen()
 @options.project_dir_option
+@options.output_format_option
 @options.top_module_option_gen(
     short_help="Set the name of the top module to graph."
 )
 @no_viewer_option
+@per_module_option
+@max_depth_option
+@filter_option
 @options.verbose_option
 def cli(
     cmd_ctx: click.Context,
@@ -104,19 +144,31 @@ def cli(
     pdf: bool,
     env: Optional[str],
     project_dir: Optional[Path],
+    output_format: str,
     top_module: str,
     no_viewer: bool,
+    per_module: bool,
+    max_depth: Optional[int],
+    module_filter: Optional[str],
     verbose: bool,
 ):
     """Implements the apio graph command."""
 
     # pylint: disable=too-many-arguments
+    # pylint: disable=too-many-locals
 
     # -- Make pylint happy.
     _ = (svg,)
 
     # -- Sanity check the options.
     cmd_util.check_at_most_one_param(cmd_ctx, ["svg", "png", "pdf"])
+    if (max_depth is not None or module_filter) and not per_module:
+        cmd_util.fatal_usage_error(
+            cmd_ctx, "--max-depth and --filter require --per-module."
+        )
+
+    # -- Select the output format, before any output.
+    apio_events.configure(output_format)
 
     # -- Create the apio context.
     apio_ctx = ApioContext(
@@ -145,6 +197,12 @@ def cli(
     )
     if top_module:
         graph_params.top_module = top_module
+    if per_module:
+        graph_params.per_module = True
+        if max_depth is not None:
+            graph_params.max_depth = max_depth
+        if module_filter:
+            graph_params.module_filter = module_filter
 
     # -- Construct the verbosity
     verbosity = Verbosity(all=verbose)
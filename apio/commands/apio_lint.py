@@ -19,6 +19,7 @@ from apio.apio_context import (
     ProjectPolicy,
     RemoteConfigPolicy,
 )
+from apio.common import apio_events
 from apio.common.proto.apio_pb2 import LintParams
 
 
@@ -32,6 +33,14 @@ nosynth_option = click.option(
     cls=cmd_util.ApioOption,
 )
 
+incremental_option = click.option(
+    "incremental",  # Var name
+    "--incremental",
+    is_flag=True,
+    help="Lint only what changed since the last run.",
+    cls=cmd_util.ApioOption,
+)
+
 novlt_option = click.option(
     "novlt",  # Var name
     "--novlt",
@@ -55,12 +64,19 @@ Examples:[code]
   apio lint -t my_module
   apio lint file1.v file2.v
   apio lint --nosynth
-  apio lint --novlt[/code]
+  apio lint --novlt
+  apio lint --incremental[/code]
 
 By default, 'apio lint' injects the 'SYNTHESIS' macro to lint the \
 synthesizable portion of the design. To lint code that is hidden by \
 'SYNTHESIS', use the '--nosynth' option.
 
+With the '--incremental' option, the top module and each of the \
+testbenches are linted separately, in parallel, with the files of the \
+modules they instantiate. The results are cached and units whose files \
+didn't change are not linted again and their cached results are reported \
+instead.
+
 To customize the behavior of the 'verilator' linter, add the option \
 'verilator-extra-option' in the project file 'apio.ini' with the extra \
 options you would like to use.
@@ -77,27 +93,37 @@ options you would like to use.
 @click.argument("files", nargs=-1, required=False)
 @nosynth_option
 @novlt_option
+@incremental_option
 @options.top_module_option_gen(
     short_help="Restrict linting to this module and its dependencies."
 )
 @options.env_option_gen()
 @options.project_dir_option
+@options.output_format_option
 def cli(
-    _: click.Context,
+    cmd_ctx: click.Context,
     *,
     # Args
     files,
     # Options
     nosynth: bool,
     novlt: bool,
+    incremental: bool,
     top_module: str,
     env: Optional[str],
     project_dir: Optional[Path],
+    output_format: str,
 ):
     """Lint the source code."""
 
     # pylint: disable=too-many-arguments
 
+    # -- Incremental linting applies to the entire project.
+    cmd_util.check_at_most_one_param(cmd_ctx, ["incremental", "files"])
+
+    # -- Select the output format, before any output.
+    apio_events.configure(output_format)
+
     # -- Create the apio context.
     apio_ctx = ApioContext(
         project_policy=ProjectPolicy.PROJECT_REQUIRED,
@@ -116,6 +142,7 @@ def cli(
         nosynth=nosynth,
         novlt=novlt,
         file_names=files,
+        incremental=incremental,
     )
 
     assert lint_params.IsInitialized(), lint_params
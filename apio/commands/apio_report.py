@@ -8,9 +8,22 @@
 """Implementation of 'apio' report' command"""
 
 import sys
-from typing import Optional
+import sqlite3
+from typing import List, Optional
 from pathlib import Path
 import click
+from rich.table import Table
+from rich import box
+from apio.common import apio_events
+from apio.common.apio_console import cout, cerror, ctable
+from apio.common.apio_styles import BORDER, ERROR, INFO
+from apio.common.build_history import (
+    BUILD_HISTORY_FILE_NAME,
+    BuildHistory,
+    BuildRecord,
+    regression_thresholds,
+    find_regressions,
+)
 from apio.managers.scons_manager import SConsManager
 from apio.commands import options
 from apio.apio_context import (
@@ -19,7 +32,7 @@ from apio.apio_context import (
     ProjectPolicy,
     RemoteConfigPolicy,
 )
-from apio.common.proto.apio_pb2 import Verbosity
+from apio.common.proto.apio_pb2 import ReportParams, Verbosity
 from apio.utils import cmd_util
 
 # ---------- apio report
@@ -33,11 +46,160 @@ verifying that the design can operate at the desired clock speed.
 The '--verbose' option prints additional information such as as unused \
 resources and critical nets.
 
+The '--timing' option adds a timing analysis with the critical paths of \
+the design, worst first, with the split of their delays between the cells \
+and the routing, and the modules and nets that contribute the most delay \
+to them. The option '--top' sets the number of the reported paths, \
+modules and nets, and with '--verbose' the steps of each path are also \
+listed.
+
+The '--history' option prints instead the utilization and fmax of the last \
+builds of the env, as recorded by the successful builds, and flags the \
+builds that regressed beyond the thresholds that are set by the apio.ini \
+options 'fmax-regression-threshold' and \
+'utilization-regression-threshold'.
+
 Examples:[code]
   apio report            # Print report.
-  apio report --verbose  # Print extra information.[/code]
+  apio report --verbose  # Print extra information.
+  apio report --timing   # Print also the critical paths.
+  apio report --timing --top 10  # Print the 10 worst paths.
+  apio report --history  # Print the builds history.[/code]
 """
 
+# -- The max number of builds that 'apio report --history' shows.
+HISTORY_SIZE = 20
+
+# -- The default number of the paths, modules and nets that
+# -- 'apio report --timing' shows.
+DEFAULT_TOP = 5
+
+timing_option = click.option(
+    "timing",  # Var name.
+    "--timing",
+    is_flag=True,
+    help="Show also the critical paths.",
+    cls=cmd_util.ApioOption,
+)
+
+top_option = click.option(
+    "top",  # Var name.
+    "--top",
+    type=click.IntRange(min=1),
+    metavar="N",
+    help="Number of paths, modules and nets to show (with --timing).",
+    cls=cmd_util.ApioOption,
+)
+
+history_option = click.option(
+    "history",  # Var name.
+    "--history",
+    is_flag=True,
+    help="Show the history of the builds.",
+    cls=cmd_util.ApioOption,
+)
+
+
+def _print_history(apio_ctx: ApioContext) -> None:
+    """Prints the recorded builds of the env with their utilization and
+    fmax trends and regressions."""
+
+    # pylint: disable=too-many-locals
+
+    env_name = apio_ctx.project.env_name
+    thresholds = regression_thresholds(
+        apio_ctx.project.get_str_option("fmax-regression-threshold"),
+        apio_ctx.project.get_str_option("utilization-regression-threshold"),
+    )
+
+    # -- Read one extra build, for the trends and regressions of the
+    # -- first build that we show.
+    db_path = apio_ctx.apio_home_dir / BUILD_HISTORY_FILE_NAME
+    try:
+        with BuildHistory(db_path) as history:
+            records: List[BuildRecord] = history.records(
+                apio_ctx.project_dir, env_name, HISTORY_SIZE + 1
+            )
+    except sqlite3.Error as e:
+        cerror(f"Failed to read the build history {db_path}")
+        cerror(str(e))
+        sys.exit(1)
+
+    if not records:
+        cout(f"No builds of env '{env_name}' were recorded yet.", style=INFO)
+        return
+
+    table = Table(
+        show_header=True,
+        show_lines=False,
+        box=box.SQUARE,
+        border_style=BORDER,
+        title=f"Build history of env '{env_name}'",
+        title_justify="left",
+        padding=(0, 2),
+    )
+
+    table.add_column("DATE", no_wrap=True)
+    table.add_column("COMMIT", no_wrap=True)
+    table.add_column("SEED", no_wrap=True, justify="right")
+    table.add_column("TIME", no_wrap=True, justify="right")
+    table.add_column("MAX USED RESOURCE", no_wrap=True)
+    table.add_column("MIN FMAX", no_wrap=True, justify="right")
+    table.add_column("REGRESSIONS")
+
+    regressed_builds = 0
+    first = 1 if len(records) > HISTORY_SIZE else 0
+    for i in range(first, len(records)):
+        record = records[i]
+        previous = records[i - 1] if i > 0 else None
+
+        resource_str = ""
+        resource = record.report.max_used_resource()
+        if resource:
+            resource_str = f"{resource.name} {resource.percentage:.0f}%"
+
+        fmax_str = ""
+        clock = record.report.min_fmax_clock()
+        if clock:
+            fmax_str = f"{clock.fmax_mhz:.2f} MHz"
+            prev_clock = previous.report.min_fmax_clock() if previous else None
+            if prev_clock and prev_clock.fmax_mhz:
+                change = (
+                    100
+                    * (clock.fmax_mhz - prev_clock.fmax_mhz)
+                    / prev_clock.fmax_mhz
+                )
+                fmax_str += f" ({change:+.1f}%)"
+
+        regressions = (
+            find_regressions(previous.report, record.report, thresholds)
+            if previous
+            else []
+        )
+        if regressions:
+            regressed_builds += 1
+
+        table.add_row(
+            record.timestamp.replace("T", " "),
+            record.git_commit or "",
+            "" if record.seed is None else str(record.seed),
+            "" if record.total_sec is None else f"{record.total_sec:.1f}s",
+            resource_str,
+            fmax_str,
+            "\n".join(r.summary() for r in regressions),
+            style=ERROR if regressions else None,
+        )
+
+    cout()
+    ctable(table)
+    shown = len(records) - first
+    cout(
+        f"{shown} builds, {regressed_builds} with regressions "
+        f"(thresholds: fmax {thresholds.fmax_pct:g}%, "
+        f"utilization {thresholds.utilization_pct:g} pts).",
+        style=INFO,
+    )
+
 
 @click.command(
     name="report",
@@ -48,17 +210,38 @@ Examples:[code]
 @click.pass_context
 @options.env_option_gen()
 @options.project_dir_option
+@options.output_format_option
 @options.verbose_option
+@timing_option
+@top_option
+@history_option
 def cli(
-    _: click.Context,
+    cmd_ctx: click.Context,
     *,
     # Options
     env: Optional[str],
     project_dir: Optional[Path],
+    output_format: str,
     verbose: bool,
+    timing: bool,
+    top: Optional[int],
+    history: bool,
 ):
     """Analyze the design and report timing."""
 
+    # pylint: disable=too-many-arguments
+
+    # -- Sanity check the options.
+    cmd_util.check_at_most_one_param(cmd_ctx, ["history", "verbose"])
+    cmd_util.check_at_most_one_param(cmd_ctx, ["history", "timing"])
+    if top is not None and not timing:
+        cmd_util.fatal_usage_error(
+            cmd_ctx, "--top can be used only with --timing."
+        )
+
+    # -- Select the output format, before any output.
+    apio_events.configure(output_format)
+
     # -- Create the apio context.
     apio_ctx = ApioContext(
         project_policy=ProjectPolicy.PROJECT_REQUIRED,
@@ -68,11 +251,19 @@ def cli(
         env_arg=env,
     )
 
+    # -- The history is read from the database, without building.
+    if history:
+        _print_history(apio_ctx)
+        sys.exit(0)
+
     # -- Create the scons manager.
     scons = SConsManager(apio_ctx)
 
     # Run scons with the report target.
     exit_code = scons.report(
+        report_params=ReportParams(
+            timing=timing, max_paths=top or DEFAULT_TOP
+        ),
         verbosity=Verbosity(pnr=verbose),
     )
 
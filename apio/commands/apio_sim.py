@@ -11,6 +11,7 @@ import sys
 from typing import Optional
 from pathlib import Path
 import click
+from apio.common import apio_events
 from apio.common.apio_console import cout
 from apio.common.apio_styles import EMPH1
 from apio.managers.scons_manager import SConsManager
@@ -112,6 +113,7 @@ detach_option = click.option(
 @no_gtkw_wave_option
 @detach_option
 @options.project_dir_option
+@options.output_format_option
 def cli(
     _: click.Context,
     *,
@@ -123,6 +125,7 @@ def cli(
     no_gtkwave: bool,
     detach: bool,
     project_dir: Optional[Path],
+    output_format: str,
 ):
     """Implements the apio sim command. It simulates a single testbench
     file and shows graphically the signal graphs.
@@ -130,6 +133,9 @@ def cli(
 
     # pylint: disable=too-many-arguments
 
+    # -- Select the output format, before any output.
+    apio_events.configure(output_format)
+
     # -- Create the apio context.
     apio_ctx = ApioContext(
         project_policy=ProjectPolicy.PROJECT_REQUIRED,
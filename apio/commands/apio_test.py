@@ -7,16 +7,18 @@
 # -- License GPLv2
 """Implementation of 'apio test' command"""
 
+import re
 import sys
-from typing import Optional
+from typing import Optional, Set, Tuple
 from pathlib import Path
 import click
+from apio.common import apio_events
 from apio.common.apio_console import cout
 from apio.common.apio_styles import EMPH1
 from apio.managers.scons_manager import SConsManager
 from apio.commands import options
 from apio.common.proto.apio_pb2 import ApioTestParams
-from apio.utils import cmd_util
+from apio.utils import cmd_util, watch_util
 from apio.apio_context import (
     ApioContext,
     PackagesPolicy,
@@ -40,7 +42,11 @@ Examples:[code]
   apio test my_module_tb.v   # Run a single testbench.
   apio test my_module_tb.sv  # Run a single System Verilog testbench.
   apio test util/led_tb.v    # Run a testbench in a sub-folder.
-  apio test --default        # Run only the default testbench.[/code]
+  apio test --default        # Run only the default testbench.
+  apio test --no-dump        # Dump signals only of failing testbenches.
+  apio test --junit-xml t.xml # Write a JUnit XML report.
+  apio test --shard 2/4      # Run the 2nd of 4 shards of the testbenches.
+  apio test --watch          # Re-run on changes of the project files.[/code]
 
 [NOTE] Testbench specification is always the testbench file path relative to \
 the project directory, even if using the '--project-dir' option.
@@ -49,6 +55,11 @@ the project directory, even if using the '--project-dir' option.
 testbenches, as this may override the default name and location Apio sets \
 for the generated .vcd file.
 
+With the '--no-dump' option, or the 'test-dump = on-failure' option in \
+'apio.ini', the testbenches are run without dumping their signals, which \
+is typically faster, and testbenches that fail are run again with dumping \
+to generate their signals file for debugging.
+
 The default testbench is the same that is used by the 'apio sim' command \
 which is the one specified in 'apio.ini' using the 'default-testbench' \
 option, or the only testbench, if the project contains exactly one \
@@ -57,6 +68,29 @@ testbnech.
 For a sample testbench compatible with Apio features, see: \
 https://github.com/FPGAwars/apio-examples/tree/master/upduino31/testbench
 
+With the '--junit-xml' option, the output, the duration and the result \
+of each testbench are captured and written to the given file as a JUnit \
+XML report, for CI systems. The failure message of a failing testbench is \
+its first output line that starts with 'ERROR' or 'FATAL', such as the \
+line that the EXPECT_EQ macro prints. All the testbenches are run, also \
+after a failure, and a testbench that didn't run, e.g. because it failed \
+to compile, is reported as an error.
+
+With the '--shard i/N' option, the testbenches are partitioned into N \
+disjoint shards and only the i'th shard is tested, so N CI machines can \
+share the testbenches. The partition is deterministic and the results of \
+the shards can be merged, e.g. using '--junit-xml'. With '--balanced', the \
+shards are balanced by the durations of the testbenches, as recorded in \
+the build directory by previous runs, and with '--durations', by the \
+durations in the given file, e.g. a copy of the recorded durations that \
+all the machines share. All the machines must use the same durations and \
+they print the fingerprint of the durations they used.
+
+With the '--watch' option, the command keeps running and re-runs the \
+tests when the project files change, until you hit Ctrl-C. If only \
+testbenches changed, only these testbenches are re-run. Changes of \
+apio.ini require a restart.
+
 [b][Hint][/b] To simulate a testbench with a graphical visualization \
 of the signals, refer to the 'apio sim' command.
 """
@@ -71,6 +105,69 @@ option_default = click.option(
 )
 
 
+option_no_dump = click.option(
+    "no_dump",
+    "--no-dump",
+    is_flag=True,
+    help="Dump signals only of failing testbenches.",
+    cls=cmd_util.ApioOption,
+)
+
+
+option_junit_xml = click.option(
+    "junit_xml",
+    "--junit-xml",
+    type=Path,
+    metavar="path",
+    help="Write the results to a JUnit XML file.",
+    cls=cmd_util.ApioOption,
+)
+
+
+option_shard = click.option(
+    "shard",
+    "--shard",
+    type=str,
+    metavar="i/N",
+    help="Test only the i'th of N shards of the testbenches.",
+    cls=cmd_util.ApioOption,
+)
+
+
+option_balanced = click.option(
+    "balanced",
+    "--balanced",
+    is_flag=True,
+    help="Balance the shards by the testbenches durations.",
+    cls=cmd_util.ApioOption,
+)
+
+
+option_durations = click.option(
+    "durations",
+    "--durations",
+    type=Path,
+    metavar="path",
+    help="Balance the shards by the durations in a file.",
+    cls=cmd_util.ApioOption,
+)
+
+
+def _parse_shard(cmd_ctx: click.Context, shard: str) -> Tuple[int, int]:
+    """Parses the value of the --shard option into a (i, N) tuple. Fatal
+    usage error if invalid."""
+    match = re.fullmatch(r"(\d+)/(\d+)", shard.strip())
+    if match:
+        index, count = int(match.group(1)), int(match.group(2))
+        if 1 <= index <= count:
+            return (index, count)
+    cmd_util.fatal_usage_error(
+        cmd_ctx, f"Invalid --shard '{shard}', expecting i/N with 1 <= i <= N."
+    )
+    # -- Not reached.
+    return (0, 0)
+
+
 @click.command(
     name="test",
     cls=cmd_util.ApioCommand,
@@ -85,8 +182,15 @@ option_default = click.option(
     required=False,
 )
 @option_default
+@option_no_dump
+@option_junit_xml
+@option_shard
+@option_balanced
+@option_durations
 @options.env_option_gen()
 @options.project_dir_option
+@options.output_format_option
+@options.watch_option
 def cli(
     cmd_ctx: click.Context,
     *,
@@ -94,12 +198,48 @@ def cli(
     testbench_path: str,
     # Options
     default: bool,
+    no_dump: bool,
+    junit_xml: Optional[Path],
+    shard: Optional[str],
+    balanced: bool,
+    durations: Optional[Path],
     env: Optional[str],
     project_dir: Optional[Path],
+    output_format: str,
+    watch: bool,
 ):
     """Implements the test command."""
 
+    # pylint: disable=too-many-arguments
+    # pylint: disable=too-many-locals
+
     cmd_util.check_at_most_one_param(cmd_ctx, ["default", "testbench_path"])
+    cmd_util.check_at_most_one_param(cmd_ctx, ["shard", "testbench_path"])
+    cmd_util.check_at_most_one_param(cmd_ctx, ["shard", "default"])
+    if balanced and not shard:
+        cmd_util.fatal_usage_error(
+            cmd_ctx, "--balanced can be used only with --shard."
+        )
+    if durations and not shard:
+        cmd_util.fatal_usage_error(
+            cmd_ctx, "--durations can be used only with --shard."
+        )
+    if durations and not durations.is_file():
+        cmd_util.fatal_usage_error(
+            cmd_ctx, f"Durations file '{durations}' not found."
+        )
+    shard_index, shard_count = (
+        _parse_shard(cmd_ctx, shard) if shard else (0, 0)
+    )
+
+    # -- Select the output format, before any output.
+    apio_events.configure(output_format)
+
+    # -- The path is relative to the current dir, not to the project dir.
+    if junit_xml:
+        junit_xml = junit_xml.absolute()
+    if durations:
+        durations = durations.absolute()
 
     # -- Create the apio context.
     apio_ctx = ApioContext(
@@ -125,11 +265,48 @@ def cli(
         if testbench_path:
             cout(f"Using default testbench: {testbench_path}", style=EMPH1)
 
+    # -- The apio.ini 'test-dump' option is equivalent to --no-dump.
+    if apio_ctx.project.get_str_option("test-dump", None) == "on-failure":
+        no_dump = True
+
     # -- Construct the test params
     test_params = ApioTestParams(
         testbench_path=testbench_path if testbench_path else None,
         default_option=default,
+        no_dump=no_dump,
+        shard_index=shard_index,
+        shard_count=shard_count,
+        balance_shards=balanced or bool(durations),
+        durations_file=str(durations) if durations else None,
     )
 
-    exit_code = scons.test(test_params)
+    # -- Handle the watch mode. The apio context and the scons manager are
+    # -- reused by all the runs.
+    if watch:
+
+        def test_on_changes(changes: Optional[Set[str]]) -> None:
+            """Called initially with None and then with the changed files."""
+            params = test_params
+            if changes is not None:
+                watch_util.warn_if_project_file_changed(changes)
+                # -- If a single testbench changed, and the user didn't
+                # -- select a testbench, run only the changed testbench.
+                testbenches = watch_util.changed_testbenches(changes)
+                if (
+                    not test_params.testbench_path
+                    and testbenches
+                    and len(testbenches) == 1
+                    and Path(testbenches[0]).is_file()
+                ):
+                    params = ApioTestParams(
+                        testbench_path=testbenches[0], no_dump=no_dump
+                    )
+            scons.test(params, junit_xml)
+
+        watch_util.watch_loop(
+            watch_util.create_watcher(apio_ctx.project_dir), test_on_changes
+        )
+        sys.exit(0)
+
+    exit_code = scons.test(test_params, junit_xml)
     sys.exit(exit_code)
@@ -7,8 +7,9 @@
 # -- License GPLv2
 """Implementation of 'apio upload' command"""
 
+import os
 import sys
-from typing import Optional
+from typing import Optional, Tuple
 from pathlib import Path
 import click
 from apio.managers.scons_manager import SConsManager
@@ -20,8 +21,12 @@ from apio.apio_context import (
     ProjectPolicy,
     RemoteConfigPolicy,
 )
-from apio.managers.programmers import construct_programmer_cmd
-from apio.common.proto.apio_pb2 import UploadParams
+from apio.managers.programmers import (
+    construct_programmer_cmd,
+    construct_programmer_cmds,
+)
+from apio.common import apio_events
+from apio.common.proto.apio_pb2 import UploadParams, DeviceUpload
 
 
 # --------- apio upload
@@ -41,8 +46,35 @@ serial_num_option = click.option(
     "-n",
     "--serial-num",
     type=str,
+    multiple=True,
     metavar="serial-num",
-    help="Select the device's USB serial number.",
+    help="Select the device's USB serial number (repeatable).",
+    cls=cmd_util.ApioOption,
+)
+
+all_matching_option = click.option(
+    "all_matching",  # Var name.
+    "--all-matching",
+    is_flag=True,
+    help="Upload to all the matching devices.",
+    cls=cmd_util.ApioOption,
+)
+
+skip_if_current_option = click.option(
+    "skip_if_current",  # Var name.
+    "--skip-if-current",
+    is_flag=True,
+    help="Skip devices that already hold the bitstream.",
+    cls=cmd_util.ApioOption,
+)
+
+jobs_option = click.option(
+    "jobs",  # Var name.
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    metavar="N",
+    help="Max number of concurrent uploads to multiple devices.",
     cls=cmd_util.ApioOption,
 )
 
@@ -55,12 +87,28 @@ The command 'apio upload' builds the bitstream file (similar to the \
 Examples:[code]
   apio upload                            # Typical invocation
   apio upload -s /dev/cu.usbserial-1300  # Select serial port
-  apio upload -n FTXYA34Z                # Select serial number[/code]
+  apio upload -n FTXYA34Z                # Select serial number
+  apio upload -n FTXYA34Z -n FTXYA35Z    # Upload to two boards
+  apio upload --all-matching             # Upload to all matching boards
+  apio upload --all-matching -j 4        # At most 4 concurrent uploads
+  apio upload --skip-if-current          # Skip if already uploaded[/code]
 
 Typically the simple form 'apio upload' is sufficient to locate and program \
 the FPGA board. The optional flags '--serial-port' and '--serial-num' allows \
 to select the desired board if more than one matching board is detected.
 
+To program multiple boards at once, pass the '--serial-num' flag once per \
+board or use '--all-matching' to program all the matching boards. The \
+bitstream is built once and uploaded to the boards concurrently, and a \
+summary with the status and the upload time of each board is printed at \
+the end.
+
+With '--skip-if-current', the upload to a device is skipped if the last \
+bitstream that apio uploaded to it successfully, as identified by the \
+device's USB serial number, is identical to the current bitstream. Use \
+'--force' to upload anyway, e.g. if the device was programmed by other \
+means or lost its content.
+
 [HINT] You can use the command 'apio devices' to list the connected USB and \
 serial devices and the command 'apio drivers' to install and uninstall device \
 drivers.
@@ -79,19 +127,48 @@ the apio.ini option 'programmer-cmd'.
 @click.pass_context
 @serial_port_option
 @serial_num_option
+@all_matching_option
+@jobs_option
+@skip_if_current_option
+@options.force_option_gen(short_help="Upload even if already current.")
 @options.env_option_gen()
 @options.project_dir_option
+@options.output_format_option
 def cli(
-    _: click.Context,
+    cmd_ctx: click.Context,
     *,
     # Options
     serial_port: str,
-    serial_num: str,
+    serial_num: Tuple[str, ...],
+    all_matching: bool,
+    jobs: Optional[int],
+    skip_if_current: bool,
+    force: bool,
     env: Optional[str],
     project_dir: Optional[Path],
+    output_format: str,
 ):
     """Implements the upload command."""
 
+    # pylint: disable=too-many-arguments
+    # pylint: disable=too-many-locals
+
+    # -- Sanity check the options.
+    cmd_util.check_at_most_one_param(cmd_ctx, ["serial_num", "all_matching"])
+    multiple_devices = all_matching or len(serial_num) > 1
+    if multiple_devices and serial_port:
+        cmd_util.fatal_usage_error(
+            cmd_ctx,
+            "--serial-port can't be used when uploading to multiple devices.",
+        )
+    if jobs is not None and not multiple_devices:
+        cmd_util.fatal_usage_error(
+            cmd_ctx, "--jobs can be used only with multiple devices."
+        )
+
+    # -- Select the output format, before any output.
+    apio_events.configure(output_format)
+
     # -- Create a apio context.
     apio_ctx = ApioContext(
         project_policy=ProjectPolicy.PROJECT_REQUIRED,
@@ -104,13 +181,38 @@ def cli(
     # -- Set the shell env.
     apio_ctx.set_env_for_packages()
 
-    # -- Get the programmer command.
-    programmer_cmd = construct_programmer_cmd(
-        apio_ctx, serial_port_flag=serial_port, serial_num_flag=serial_num
-    )
-
-    # Construct the scons upload params.
-    upload_params = UploadParams(programmer_cmd=programmer_cmd)
+    # -- Construct the scons upload params with the programmer command, or
+    # -- with the programmer command of each device.
+    if multiple_devices:
+        device_cmds = construct_programmer_cmds(
+            apio_ctx, list(serial_num), all_matching
+        )
+        upload_params = UploadParams(
+            devices=[
+                DeviceUpload(
+                    device=d.device,
+                    programmer_cmd=d.programmer_cmd,
+                    serial_num=d.serial_num,
+                )
+                for d in device_cmds
+            ],
+            # -- By default, one upload per cpu core.
+            max_jobs=jobs or os.cpu_count() or 1,
+        )
+    else:
+        device_cmd = construct_programmer_cmd(
+            apio_ctx,
+            serial_port_flag=serial_port,
+            serial_num_flag=serial_num[0] if serial_num else None,
+        )
+        upload_params = UploadParams(
+            programmer_cmd=device_cmd.programmer_cmd,
+            serial_num=device_cmd.serial_num,
+        )
+
+    # -- The --force flag overrides --skip-if-current, e.g. when the latter
+    # -- is used by a script.
+    upload_params.skip_if_current = skip_if_current and not force
 
     # -- Create the scons manager
     scons = SConsManager(apio_ctx)
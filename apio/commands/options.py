@@ -9,6 +9,7 @@
 
 from pathlib import Path
 import click
+from apio.common import apio_events
 from apio.utils import cmd_util
 
 
@@ -113,6 +114,15 @@ docs_format_option = click.option(
     cls=cmd_util.ApioOption,
 )
 
+output_format_option = click.option(
+    "output_format",  # Var name.
+    "--output-format",
+    type=click.Choice(apio_events.OUTPUT_FORMATS, case_sensitive=True),
+    default=apio_events.TEXT_FORMAT,
+    help="Set the output format, text (default) or jsonl events.",
+    cls=cmd_util.ApioOption,
+)
+
 project_dir_option = click.option(
     "project_dir",  # Var name.
     "-p",
@@ -150,3 +160,13 @@ verbose_synth_option = click.option(
     help="Show detailed synth stage output.",
     cls=cmd_util.ApioOption,
 )
+
+
+watch_option = click.option(
+    "watch",  # Var name.
+    "-w",
+    "--watch",
+    is_flag=True,
+    help="Re-run on changes of the project files.",
+    cls=cmd_util.ApioOption,
+)
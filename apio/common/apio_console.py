@@ -70,8 +70,10 @@ def configure(
     *,
     terminal_mode: TerminalMode | None = None,
     theme_name: str | None = None,
+    use_stderr: bool = False,
 ) -> None:
-    """Change the apio console settings."""
+    """Change the apio console settings. If use_stderr is True, the
+    console writes to stderr instead of stdout."""
 
     # pylint: disable=global-statement
 
@@ -122,6 +124,7 @@ def configure(
         color_system=color_system,
         force_terminal=force_terminal,
         theme=Theme(theme.styles, inherit=False),
+        stderr=use_stderr,
     )
 
     # -- Construct the helper decoder.
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2025 FPGAwars
+# -- License GPLv2
+"""The machine readable output of the scons based commands. With
+'--output-format jsonl', the apio process writes to stdout a stream of
+events, one compact json object per line, and the human readable text that
+it prints otherwise goes to stderr.
+
+The scons subprocess writes to its stdout a marker line with a stage_start
+and a stage_end event around each of the commands it runs. The apio process
+forwards these events and converts the other output lines of the subprocess
+to log, warning and error events.
+
+Each event has an 'event' field with its type and a 'time' field with the
+unix time in seconds. The event types are command_start, stage_start,
+stage_end, testbench, log, warning, error, utilization and command_end.
+
+This module is used by both the apio and the scons processes."""
+
+import sys
+import json
+import time
+import threading
+from typing import Any, Optional
+from apio.common import apio_console
+
+# -- The values of the --output-format option.
+TEXT_FORMAT = "text"
+JSONL_FORMAT = "jsonl"
+OUTPUT_FORMATS = [TEXT_FORMAT, JSONL_FORMAT]
+
+# -- The prefix of the event lines that the scons subprocess writes to its
+# -- stdout.
+_MARKER = "@apio-event "
+
+# -- True if the events output is enabled in this process.
+_enabled: bool = False
+
+# -- Events are written from the threads of the stdout and stderr pipes of
+# -- the scons subprocess.
+_lock = threading.Lock()
+
+
+def configure(output_format: str) -> None:
+    """Sets the output format of the current command. Called by the scons
+    based commands before they print anything. With the jsonl format, the
+    apio console writes to stderr instead of stdout."""
+
+    # pylint: disable=global-statement
+    global _enabled
+
+    assert output_format in OUTPUT_FORMATS, output_format
+    _enabled = output_format == JSONL_FORMAT
+    apio_console.configure(use_stderr=_enabled)
+
+
+def is_enabled() -> bool:
+    """Returns True if the events output is enabled."""
+    return _enabled
+
+
+def event_json(event: str, **fields: Any) -> str:
+    """Returns the single line json text of an event."""
+    return json.dumps(
+        {"event": event, "time": round(time.time(), 3), **fields},
+        separators=(",", ":"),
+    )
+
+
+def emit(event: str, **fields: Any) -> None:
+    """Writes an event to stdout."""
+    write_json(event_json(event, **fields))
+
+
+def write_json(json_text: str) -> None:
+    """Writes the single line json text of an event to stdout."""
+    with _lock:
+        sys.stdout.write(json_text + "\n")
+        sys.stdout.flush()
+
+
+def marker_line(event: str, **fields: Any) -> str:
+    """Returns the marker line of an event, as written by the scons
+    subprocess."""
+    return _MARKER + event_json(event, **fields)
+
+
+def is_marker_line(line: str) -> bool:
+    """Returns True if the line starts as a marker line."""
+    return line.startswith(_MARKER)
+
+
+def parse_marker_line(line: str) -> Optional[dict]:
+    """Returns the event of a marker line, or None if the line is not a
+    marker line or its event is corrupted, e.g. by output that the scons
+    subprocess interleaved with it."""
+    if not is_marker_line(line):
+        return None
+    try:
+        event = json.loads(line.removeprefix(_MARKER))
+    except ValueError:
+        return None
+    return event if isinstance(event, dict) else None
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2025 FPGAwars
+# -- License GPLv2
+"""A lightweight recorder of timeline events in the Chrome trace event
+format, which can be viewed with chrome://tracing or https://ui.perfetto.dev.
+
+Tracing is enabled by setting the env var APIO_TRACE to the path of the
+output json file. Both the apio process and the scons subprocess record
+events. The scons subprocess writes its events to a temporary part file
+next to the output file and the apio process merges them into the output
+file when it exits. The timestamps are absolute so the events of the two
+processes share the same timeline.
+
+This module is used by both the apio and the scons processes and is
+initialized from apio/__main__.py, before any other apio module."""
+
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+from pathlib import Path
+from dataclasses import dataclass, field
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Any
+
+# -- The env var with the path of the trace file. Same as
+# -- env_options.APIO_TRACE. We don't import env_options since this module
+# -- is also loaded by the scons subprocess before anything else.
+APIO_TRACE = "APIO_TRACE"
+
+# -- The suffix of the part files that the scons subprocesses write.
+_PART_SUFFIX = ".part"
+
+
+@dataclass
+class TraceState:
+    """Contains the state of the tracer of this process."""
+
+    # -- The absolute path of the trace file.
+    trace_path: Path
+    # -- True if this is the scons subprocess, False if the apio process.
+    is_scons_process: bool
+    # -- The events recorded so far by this process. Events are appended
+    # -- from multiple threads so we protect the list with a lock.
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+# -- The tracer state, or None if tracing is disabled.
+_state: TraceState | None = None
+
+
+def init(*, is_scons_process: bool) -> None:
+    """Enables tracing if APIO_TRACE is defined. Called once by main(), for
+    both the apio process and the scons subprocess."""
+
+    # pylint: disable=global-statement
+    global _state
+
+    # -- For windows benefit, remove optional quotes, same as
+    # -- env_options.get() does.
+    value = os.environ.get(APIO_TRACE, "")
+    if value.startswith('"') and value.endswith('"'):
+        value = value[1:-1]
+    if not value:
+        return
+
+    _state = TraceState(
+        trace_path=Path(value).absolute(), is_scons_process=is_scons_process
+    )
+
+    # -- The apio process deletes part files left from a previous
+    # -- interrupted command before it spawns any scons subprocess.
+    if not is_scons_process:
+        for part in _part_files():
+            part.unlink(missing_ok=True)
+
+    # -- Name the process in the trace viewer.
+    _append(
+        {
+            "name": "process_name",
+            "ph": "M",
+            "args": {"name": "scons" if is_scons_process else "apio"},
+        }
+    )
+
+    # -- Mark the process's start, e.g. to see the python and imports
+    # -- startup time of the scons subprocess.
+    instant("process start", args={"argv": sys.argv})
+
+    # -- Write the events on exit.
+    atexit.register(_on_exit)
+
+
+def is_enabled() -> bool:
+    """Returns True if tracing is enabled."""
+    return _state is not None
+
+
+def now_us() -> int:
+    """Returns the current time in the trace time units (micro seconds)."""
+    return time.time_ns() // 1000
+
+
+def begin(name: str, *, cat: str = "apio", args: Dict = None) -> None:
+    """Starts a span event. Must be followed by an end() with the same name
+    in the same thread."""
+    if _state:
+        _append(_event(name, "B", cat, now_us(), args))
+
+
+def end(name: str, *, cat: str = "apio", args: Dict = None) -> None:
+    """Ends a span event that was started with begin()."""
+    if _state:
+        _append(_event(name, "E", cat, now_us(), args))
+
+
+@contextmanager
+def span(name: str, *, cat: str = "apio", args: Dict = None):
+    """A context manager that records a span event of the code it wraps."""
+    begin(name, cat=cat, args=args)
+    try:
+        yield
+    finally:
+        end(name, cat=cat)
+
+
+def complete(
+    name: str,
+    *,
+    start_us: int,
+    cat: str = "apio",
+    args: Dict = None,
+) -> None:
+    """Records a span event that started at start_us and ends now. Useful
+    when the span details are known only at its end."""
+    if _state:
+        event = _event(name, "X", cat, start_us, args)
+        event["dur"] = now_us() - start_us
+        _append(event)
+
+
+def instant(name: str, *, cat: str = "apio", args: Dict = None) -> None:
+    """Records a point in time event."""
+    if _state:
+        event = _event(name, "i", cat, now_us(), args)
+        event["s"] = "t"
+        _append(event)
+
+
+def _event(
+    name: str, ph: str, cat: str, ts: int, args: Optional[Dict]
+) -> Dict[str, Any]:
+    """Returns a new trace event of the current thread."""
+    event = {"name": name, "ph": ph, "cat": cat, "ts": ts}
+    if args:
+        event["args"] = args
+    return event
+
+
+def _append(event: Dict[str, Any]) -> None:
+    """Adds the event to the list of events of this process."""
+    event["pid"] = os.getpid()
+    event["tid"] = threading.get_native_id()
+    with _state.lock:
+        _state.events.append(event)
+
+
+def _part_files() -> List[Path]:
+    """Returns the scons part files of the trace file."""
+    trace_path = _state.trace_path
+    return sorted(trace_path.parent.glob(f"{trace_path.name}.*{_PART_SUFFIX}"))
+
+
+def _on_exit() -> None:
+    """Called on process exit to write the trace events."""
+
+    # pylint: disable=broad-exception-caught
+
+    # -- Tracing should never break the command, so we report errors
+    # -- and continue. The console may not be available at this point, so
+    # -- we write directly to stderr.
+    try:
+        instant("process exit")
+        trace_path = _state.trace_path
+        if _state.is_scons_process:
+            # -- Write the events of this scons process to a part file.
+            part = trace_path.with_name(
+                f"{trace_path.name}.{os.getpid()}{_PART_SUFFIX}"
+            )
+            part.write_text(json.dumps(_state.events), encoding="utf-8")
+        else:
+            # -- Merge the events of the scons processes with the events of
+            # -- this process and write the trace file.
+            events = list(_state.events)
+            for part in _part_files():
+                events.extend(json.loads(part.read_text(encoding="utf-8")))
+                part.unlink()
+            trace_path.parent.mkdir(parents=True, exist_ok=True)
+            trace_path.write_text(
+                json.dumps({"traceEvents": events}), encoding="utf-8"
+            )
+    except Exception as e:
+        print(
+            f"Warning: failed to write the apio trace file: {e}",
+            file=sys.stderr,
+        )
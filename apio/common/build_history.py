@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2025 FPGAwars
+# -- License GPLv2
+"""Utilities related to the build history database build-history.db. The apio
+process appends to it the build report of each successful build, with the
+git commit, the nextpnr seed and the stage timings of the build, and
+'apio report --history' shows the utilization and fmax trends and the
+regressions of an env. The database is an SQLite file in the apio home dir,
+so it's preserved by 'apio clean', and it holds the builds of all the
+projects, keyed by the project dir."""
+
+import sys
+import json
+import sqlite3
+import hashlib
+import subprocess
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, List, Optional
+from apio.common.apio_console import cerror
+from apio.common.build_report import BuildReport, ResourceReport, ClockReport
+from apio.common.build_profile import BuildProfile
+
+# -- The name of the history database file in the apio home dir.
+BUILD_HISTORY_FILE_NAME = "build-history.db"
+
+# -- The file in the env build dir with the seed that 'apio build
+# -- --seed-sweep' selected.
+SEED_SWEEP_FILE_NAME = "seed-sweep.json"
+
+# -- Increment when the schema of the database changes.
+_SCHEMA_VERSION = 1
+
+# -- The default regression thresholds. A clock regresses if its fmax
+# -- dropped by more than this percentage and a resource regresses if its
+# -- utilization increased by more than these percentage points.
+DEFAULT_FMAX_THRESHOLD = 5.0
+DEFAULT_UTILIZATION_THRESHOLD = 5.0
+
+_CREATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+  id INTEGER PRIMARY KEY,
+  project_dir TEXT NOT NULL,
+  env_name TEXT NOT NULL,
+  board_id TEXT NOT NULL,
+  timestamp TEXT NOT NULL,
+  git_commit TEXT,
+  seed INTEGER,
+  total_sec REAL,
+  stages TEXT NOT NULL,
+  resources TEXT NOT NULL,
+  clocks TEXT NOT NULL,
+  pnr_sha256 TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS builds_by_env ON builds (project_dir, env_name, id);
+"""
+
+
+@dataclass(frozen=True)
+class BuildRecord:
+    """A single build in the history. git_commit, seed and total_sec are
+    None if not known. stages_sec maps the build stages, such as 'synth'
+    and 'pnr', to the time they took, and includes only the stages that
+    were executed by the build."""
+
+    # pylint: disable=too-many-instance-attributes
+
+    env_name: str
+    board_id: str
+    timestamp: str
+    git_commit: Optional[str]
+    seed: Optional[int]
+    total_sec: Optional[float]
+    stages_sec: Dict[str, float]
+    report: BuildReport
+    pnr_sha256: str
+
+
+@dataclass(frozen=True)
+class RegressionThresholds:
+    """The thresholds beyond which a change is a regression."""
+
+    # -- Max fmax drop of a clock, in percents of its previous fmax.
+    fmax_pct: float = DEFAULT_FMAX_THRESHOLD
+    # -- Max utilization increase of a resource, in percentage points.
+    utilization_pct: float = DEFAULT_UTILIZATION_THRESHOLD
+
+
+@dataclass(frozen=True)
+class Regression:
+    """A clock or a resource that regressed between two builds."""
+
+    # -- "fmax" or "utilization".
+    kind: str
+    # -- The clock or resource name.
+    name: str
+    previous: float
+    current: float
+
+    def summary(self) -> str:
+        """Returns a user friendly short description of the regression."""
+        if self.kind == "fmax":
+            change = 100 * (self.current - self.previous) / self.previous
+            return (
+                f"{self.name} fmax {self.previous:.2f} -> "
+                f"{self.current:.2f} MHz ({change:+.1f}%)"
+            )
+        return (
+            f"{self.name} {self.previous:.0f}% -> {self.current:.0f}% "
+            f"({self.current - self.previous:+.1f} pts)"
+        )
+
+
+def regression_thresholds(
+    fmax_option: Optional[str], utilization_option: Optional[str]
+) -> RegressionThresholds:
+    """Returns the regression thresholds that are set by the apio.ini
+    options 'fmax-regression-threshold' and
+    'utilization-regression-threshold', given their values or None if not
+    set. Fatal error if a value is not a non negative number."""
+
+    def parse(option: str, value: Optional[str], default: float) -> float:
+        if value is None:
+            return default
+        try:
+            result = float(value)
+        except ValueError:
+            result = -1
+        if result < 0:
+            cerror(
+                f"Invalid {option} value '{value}', "
+                "expecting a non negative number."
+            )
+            sys.exit(1)
+        return result
+
+    return RegressionThresholds(
+        fmax_pct=parse(
+            "fmax-regression-threshold", fmax_option, DEFAULT_FMAX_THRESHOLD
+        ),
+        utilization_pct=parse(
+            "utilization-regression-threshold",
+            utilization_option,
+            DEFAULT_UTILIZATION_THRESHOLD,
+        ),
+    )
+
+
+def find_regressions(
+    previous: BuildReport,
+    current: BuildReport,
+    thresholds: RegressionThresholds,
+) -> List[Regression]:
+    """Returns the clocks and the resources of the current build that
+    regressed beyond the thresholds compared to the previous build. Clocks
+    and resources that appear only in one of the builds are ignored."""
+
+    result: List[Regression] = []
+
+    previous_clocks = {c.name: c.fmax_mhz for c in previous.clocks}
+    for clock in current.clocks:
+        prev_fmax = previous_clocks.get(clock.name)
+        if not prev_fmax:
+            continue
+        drop_pct = 100 * (prev_fmax - clock.fmax_mhz) / prev_fmax
+        if drop_pct > thresholds.fmax_pct:
+            result.append(
+                Regression("fmax", clock.name, prev_fmax, clock.fmax_mhz)
+            )
+
+    previous_resources = {r.name: r.percentage for r in previous.resources}
+    for resource in current.resources:
+        prev_pct = previous_resources.get(resource.name)
+        if prev_pct is None:
+            continue
+        if resource.percentage - prev_pct > thresholds.utilization_pct:
+            result.append(
+                Regression(
+                    "utilization", resource.name, prev_pct, resource.percentage
+                )
+            )
+
+    return result
+
+
+def stage_durations(profile: Optional[BuildProfile]) -> Dict[str, float]:
+    """Returns the total wall time of each of the stages in the build
+    profile."""
+    result: Dict[str, float] = {}
+    if profile:
+        for action in profile.actions:
+            result[action.stage] = (
+                result.get(action.stage, 0) + action.wall_sec
+            )
+    return result
+
+
+def nextpnr_seed(nextpnr_options: List[str]) -> Optional[int]:
+    """Returns the seed that is set by the apio.ini nextpnr-extra-options,
+    or None if it's not set. nextpnr uses its default seed in that case."""
+    tokens = " ".join(nextpnr_options).split()
+    seed = None
+    for i, token in enumerate(tokens):
+        value = None
+        if token == "--seed" and i + 1 < len(tokens):
+            value = tokens[i + 1]
+        elif token.startswith("--seed="):
+            value = token.split("=", 1)[1]
+        if value is not None and value.lstrip("-").isdigit():
+            seed = int(value)
+    return seed
+
+
+def write_sweep_seed(path: Path, seed: int, pnr_sha256: str) -> None:
+    """Writes the seed that a seed sweep selected, with the sha256 of its
+    hardware.pnr file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        json.dumps({"seed": seed, "pnr_sha256": pnr_sha256}) + "\n",
+        encoding="utf-8",
+    )
+
+
+def read_sweep_seed(path: Path, pnr_sha256: str) -> Optional[int]:
+    """Returns the seed that a seed sweep selected for the hardware.pnr file
+    with the given sha256, or None if the file doesn't exist, is invalid,
+    or was written for another hardware.pnr, e.g. by an older sweep."""
+
+    # pylint: disable=broad-exception-caught
+
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data["pnr_sha256"] != pnr_sha256:
+            return None
+        return int(data["seed"])
+    except Exception:
+        return None
+
+
+def git_commit(project_dir: Path) -> Optional[str]:
+    """Returns the short hash of the git commit of the project dir, with
+    a '+' suffix if there are uncommitted changes, or None if the project
+    is not in a git repository or git is not available."""
+    try:
+        head = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=project_dir,
+            capture_output=True,
+            text=True,
+            timeout=5,
+            check=True,
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=project_dir,
+            capture_output=True,
+            text=True,
+            timeout=5,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return head + ("+" if status else "") if head else None
+
+
+def file_sha256(file_path: Path) -> str:
+    """Returns the sha256 hex digest of the given file."""
+    return hashlib.sha256(file_path.read_bytes()).hexdigest()
+
+
+class BuildHistory:
+    """The build history database. Raises sqlite3.Error on database
+    errors."""
+
+    def __init__(self, db_path: Path):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        # -- The timeout handles concurrent apio processes.
+        self._conn = sqlite3.connect(str(db_path), timeout=10)
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, _SCHEMA_VERSION):
+            # -- A database of a newer or an older apio. We start fresh
+            # -- rather than failing the build.
+            self._conn.execute("DROP TABLE IF EXISTS builds")
+        self._conn.executescript(_CREATE_SCHEMA)
+        self._conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        self._conn.commit()
+
+    def close(self) -> None:
+        """Closes the database."""
+        self._conn.close()
+
+    def __enter__(self) -> "BuildHistory":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def add(self, project_dir: Path, record: BuildRecord) -> None:
+        """Appends a build to the history of its env."""
+        self._conn.execute(
+            "INSERT INTO builds (project_dir, env_name, board_id, timestamp, "
+            "git_commit, seed, total_sec, stages, resources, clocks, "
+            "pnr_sha256) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                str(project_dir.resolve()),
+                record.env_name,
+                record.board_id,
+                record.timestamp,
+                record.git_commit,
+                record.seed,
+                record.total_sec,
+                json.dumps(record.stages_sec),
+                json.dumps([asdict(r) for r in record.report.resources]),
+                json.dumps([asdict(c) for c in record.report.clocks]),
+                record.pnr_sha256,
+            ),
+        )
+        self._conn.commit()
+
+    def records(
+        self, project_dir: Path, env_name: str, limit: int
+    ) -> List[BuildRecord]:
+        """Returns the last builds of the given env, up to limit builds,
+        oldest first."""
+        rows = self._conn.execute(
+            "SELECT env_name, board_id, timestamp, git_commit, seed, "
+            "total_sec, stages, resources, clocks, pnr_sha256 FROM builds "
+            "WHERE project_dir = ? AND env_name = ? ORDER BY id DESC LIMIT ?",
+            (str(project_dir.resolve()), env_name, limit),
+        ).fetchall()
+        result = [
+            BuildRecord(
+                env_name=row[0],
+                board_id=row[1],
+                timestamp=row[2],
+                git_commit=row[3],
+                seed=row[4],
+                total_sec=row[5],
+                stages_sec=json.loads(row[6]),
+                report=BuildReport(
+                    resources=[
+                        ResourceReport(**r) for r in json.loads(row[7])
+                    ],
+                    clocks=[ClockReport(**c) for c in json.loads(row[8])],
+                ),
+                pnr_sha256=row[9],
+            )
+            for row in rows
+        ]
+        result.reverse()
+        return result
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2025 FPGAwars
+# -- License GPLv2
+"""Utilities related to the build profile file build-profile.json. The file is
+written by the scons process with the wall time, cpu time and peak memory
+of each action it executed and is completed by the apio process with the
+total time of the command. It's shared by the apio and scons processes."""
+
+import json
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# -- The name of the profile file in the env build directory.
+BUILD_PROFILE_FILE_NAME = "build-profile.json"
+
+# -- Maps tool names to the apio stage they implement. Tools that are not
+# -- listed here are reported with their tool name as the stage.
+_TOOLS_STAGES = {
+    "yosys": "synth",
+    "nextpnr-ice40": "pnr",
+    "nextpnr-ecp5": "pnr",
+    "nextpnr-himbaechel": "pnr",
+    "nextpnr-xilinx": "pnr",
+    "icepack": "bitstream",
+    "ecppack": "bitstream",
+    "gowin_pack": "bitstream",
+    "fasm2frames": "bitstream",
+    "xc7frames2bit": "bitstream",
+    "iverilog": "testbench compile",
+    "vvp": "testbench run",
+    "verilator": "lint",
+    "verilator_bin": "lint",
+    "dot": "graph render",
+}
+
+
+@dataclass(frozen=True)
+class ActionProfile:
+    """The resources used by a single scons command action. cpu_sec and
+    peak_rss_mb are None if not available on this platform."""
+
+    stage: str
+    tool: str
+    wall_sec: float
+    cpu_sec: Optional[float]
+    peak_rss_mb: Optional[float]
+    exit_code: int
+
+
+@dataclass(frozen=True)
+class BuildProfile:
+    """The content of a build-profile.json file. total_sec is the duration
+    of the scons subprocess as measured by the apio process and is None
+    until the apio process fills it in."""
+
+    env_name: str
+    scons_target: str
+    timestamp: str
+    actions: List[ActionProfile]
+    total_sec: Optional[float] = None
+
+    @property
+    def actions_wall_sec(self) -> float:
+        """The sum of the wall times of all the actions."""
+        return sum(a.wall_sec for a in self.actions)
+
+
+def classify_action(cmd: str) -> Tuple[str, str]:
+    """Returns a (stage, tool) tuple for the given command line of an scons
+    action."""
+
+    # -- Get the first token, without scons's '@' and '-' prefixes, and
+    # -- extract the tool name from its path.
+    tokens = cmd.split()
+    first = tokens[0].lstrip("@-") if tokens else ""
+    tool = Path(first.strip("\"'")).name
+    if tool.lower().endswith(".exe"):
+        tool = tool[:-4]
+
+    # -- Yosys is used also to generate the 'apio graph' .dot file.
+    if tool == "yosys" and "show -format dot" in cmd:
+        return ("graph", tool)
+
+    # -- A testbench that verilator compiled into an executable.
+    if tool.endswith(".out"):
+        return ("testbench run", tool)
+
+    return (_TOOLS_STAGES.get(tool, tool), tool)
+
+
+def action_testbench(cmd: str) -> Optional[str]:
+    """Returns the path of the compiled testbench .out file that the given
+    command line of an scons action runs, or None if it doesn't run a
+    testbench."""
+    if classify_action(cmd)[0] != "testbench run":
+        return None
+    for token in cmd.split():
+        token = token.strip("\"'")
+        if token.endswith(".out"):
+            return token
+    return None
+
+
+def new_build_profile(env_name: str, scons_target: str) -> BuildProfile:
+    """Returns an empty build profile with the current time."""
+    return BuildProfile(
+        env_name=env_name,
+        scons_target=scons_target,
+        timestamp=datetime.now().isoformat(timespec="seconds"),
+        actions=[],
+    )
+
+
+def write_build_profile(path: Path, profile: BuildProfile) -> None:
+    """Writes the build profile to the given json file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        json.dumps(asdict(profile), indent=2) + "\n", encoding="utf-8"
+    )
+
+
+def read_build_profile(path: Path) -> Optional[BuildProfile]:
+    """Reads a build profile json file. Returns None if the file doesn't
+    exist or is not a valid profile file."""
+
+    # pylint: disable=broad-exception-caught
+
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return BuildProfile(
+            env_name=data["env_name"],
+            scons_target=data["scons_target"],
+            timestamp=data["timestamp"],
+            actions=[ActionProfile(**a) for a in data["actions"]],
+            total_sec=data.get("total_sec"),
+        )
+    except Exception:
+        return None
@@ -13,7 +13,7 @@ import sys
 import json
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, List, Optional
 from apio.common.apio_console import cout, cerror
 from apio.common.apio_styles import INFO
 
@@ -43,14 +43,104 @@ class BuildReport:
     resources: List[ResourceReport]
     clocks: List[ClockReport]
 
+    def min_fmax_clock(self) -> Optional[ClockReport]:
+        """Returns the clock with the lowest max speed, which is the worst
+        case fmax of the design, or None if there are no clocks."""
+        if not self.clocks:
+            return None
+        return min(self.clocks, key=lambda c: c.fmax_mhz)
 
-def read_build_report(pnr_json_file_path: Path) -> BuildReport:
-    """Read the given hardware.pnr file, parse it, and return
-    a summary in the form of a BuildReport object. Fatal error on any
-    error. The resources and the clocks in the result are sorted
-    alphabetically by name, case insensitive"""
+    def max_used_resource(self) -> Optional[ResourceReport]:
+        """Returns the resource with the highest utilization percentage, or
+        None if there are no resources."""
+        if not self.resources:
+            return None
+        return max(self.resources, key=lambda r: r.percentage)
+
+
+@dataclass(frozen=True)
+class PathStepReport:
+    """Represents a single step of a critical path."""
+
+    # -- The nextpnr step type, e.g. 'clk-to-q', 'logic', 'routing' or
+    # -- 'setup'.
+    kind: str
+    # -- The cell at the end of the step.
+    cell: str
+    # -- The routed net, for routing steps, otherwise "".
+    net: str
+    # -- The module instance of the cell, "" for the top module.
+    module: str
+    delay_ns: float
+
+    @property
+    def is_routing(self) -> bool:
+        """True if this is a routing delay, otherwise it's a cell delay."""
+        return self.kind == "routing"
+
+
+@dataclass(frozen=True)
+class CriticalPathReport:
+    """Represents the critical path between two clock edges."""
+
+    from_clock: str
+    to_clock: str
+    steps: List[PathStepReport]
+
+    @property
+    def delay_ns(self) -> float:
+        """The total delay of the path."""
+        return sum(step.delay_ns for step in self.steps)
+
+    @property
+    def routing_delay_ns(self) -> float:
+        """The part of the delay that is spent in the routing."""
+        return sum(step.delay_ns for step in self.steps if step.is_routing)
+
+    @property
+    def cell_delay_ns(self) -> float:
+        """The part of the delay that is spent in the cells."""
+        return self.delay_ns - self.routing_delay_ns
+
+
+@dataclass(frozen=True)
+class DelayReport:
+    """Represents the total delay that a module or a net contributes to the
+    critical paths."""
+
+    name: str
+    delay_ns: float
+
+
+@dataclass(frozen=True)
+class TimingReport:
+    """Represents the critical paths of the design and the delays that
+    the modules and the nets contribute to them."""
+
+    # -- Sorted by delay, worst first.
+    paths: List[CriticalPathReport]
+    # -- The cell and routing delays by the module of their cells, sorted
+    # -- by delay, largest first.
+    modules: List[DelayReport]
+    # -- The routing delays by net, sorted by delay, largest first.
+    nets: List[DelayReport]
+
+
+def cell_module(cell_name: str) -> str:
+    """Returns the module instance of a cell of the flattened netlist, e.g.
+    'uart0.tx' for 'uart0.tx.shift_SB_DFF_Q', or "" for the top module.
+    Names that yosys generates, such as '$abc$12$auto$blifparse.cc:396$34',
+    may contain dots after the first '$' which are not hierarchy
+    separators."""
+    name_prefix = cell_name.split("$", 1)[0]
+    return name_prefix.rpartition(".")[0]
+
+
+def read_pnr_json(pnr_json_file_path: Path) -> Dict[str, Any]:
+    """Reads and parses the given hardware.pnr file. Fatal error on any
+    error. The result can be passed to read_build_report() and
+    read_timing_report() to parse the file only once."""
 
-    # pylint: disable=too-many-locals
     # pylint: disable=broad-exception-caught
 
     # -- Sanity checks
@@ -72,11 +162,36 @@ def read_build_report(pnr_json_file_path: Path) -> BuildReport:
     # -- Parse the json text into a dict.
     try:
         json_dict = json.loads(json_text)
+        if not isinstance(json_dict, dict):
+            raise ValueError("The json text is not an object.")
     except Exception as e:
         cerror(f"Failed parsing json file: {str(pnr_json_file_path)}")
         cerror(str(e))
         sys.exit(1)
 
+    return json_dict
+
+
+def read_build_report(
+    pnr_json_file_path: Path, pnr_json: Optional[Dict[str, Any]] = None
+) -> BuildReport:
+    """Read the given hardware.pnr file, parse it, and return
+    a summary in the form of a BuildReport object. Fatal error on any
+    error. The resources and the clocks in the result are sorted
+    alphabetically by name, case insensitive. If pnr_json is specified, it
+    is the already parsed file, see read_pnr_json()."""
+
+    # pylint: disable=too-many-locals
+
+    json_dict = (
+        read_pnr_json(pnr_json_file_path) if pnr_json is None else pnr_json
+    )
+
+    for section in ("utilization", "fmax"):
+        if section not in json_dict:
+            cerror(f"Missing '{section}' in {str(pnr_json_file_path)}")
+            sys.exit(1)
+
     # -- ECP5 (TRELLIS project) has a slightly different format of internal
     # -- net name. We detect it by the existence of "TRELLIS" in at least
     # -- one resource name.
@@ -123,3 +238,67 @@ def read_build_report(pnr_json_file_path: Path) -> BuildReport:
 
     result = BuildReport(resources, clocks)
     return result
+
+
+def read_timing_report(
+    pnr_json_file_path: Path, pnr_json: Optional[Dict[str, Any]] = None
+) -> TimingReport:
+    """Read the critical paths from the given hardware.pnr file and return
+    them, with the delays that they spend in each module and net, in the
+    form of a TimingReport object. Fatal error on any error. The report is
+    empty if the file has no critical paths, e.g. if the design has no
+    clocks. If pnr_json is specified, it is the already parsed file, see
+    read_pnr_json()."""
+
+    json_dict = (
+        read_pnr_json(pnr_json_file_path) if pnr_json is None else pnr_json
+    )
+
+    paths: List[CriticalPathReport] = []
+    module_delays: Dict[str, float] = {}
+    net_delays: Dict[str, float] = {}
+    try:
+        for path in json_dict.get("critical_paths", []):
+            steps: List[PathStepReport] = []
+            for step in path["path"]:
+                cell = step["to"]["cell"]
+                step_report = PathStepReport(
+                    kind=step["type"],
+                    cell=cell,
+                    net=step.get("net", ""),
+                    module=cell_module(cell),
+                    delay_ns=step["delay"],
+                )
+                steps.append(step_report)
+
+                # -- Aggregate the delays.
+                module_delays[step_report.module] = (
+                    module_delays.get(step_report.module, 0)
+                    + step_report.delay_ns
+                )
+                if step_report.is_routing and step_report.net:
+                    net_delays[step_report.net] = (
+                        net_delays.get(step_report.net, 0)
+                        + step_report.delay_ns
+                    )
+            paths.append(CriticalPathReport(path["from"], path["to"], steps))
+    except (KeyError, TypeError) as e:
+        cerror(f"Invalid critical paths in {str(pnr_json_file_path)}")
+        cerror(f"{type(e).__name__}: {e}")
+        sys.exit(1)
+
+    def sorted_delays(delays: Dict[str, float]) -> List[DelayReport]:
+        """Returns the delays, largest first."""
+        return [
+            DelayReport(name, delay_ns)
+            for name, delay_ns in sorted(
+                delays.items(), key=lambda x: (-x[1], x[0])
+            )
+        ]
+
+    paths.sort(key=lambda p: -p.delay_ns)
+    return TimingReport(
+        paths=paths,
+        modules=sorted_delays(module_delays),
+        nets=sorted_delays(net_delays),
+    )
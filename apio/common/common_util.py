@@ -12,18 +12,46 @@ scons (child) process."""
 
 import os
 import sys
+import json
+import time
 from pathlib import Path
-from glob import glob
-from typing import List, Union, Any, Tuple
+from typing import List, Union, Any, Tuple, Dict, Optional
 import debugpy
 
 # -- A list with the file extensions of the source files.
 SRC_SUFFIXES = [".v", ".sv"]
 
+# -- The values of the apio.ini 'waveform-format' option. Each format is
+# -- also the suffix of the simulation output file and the name of the
+# -- vvp extended flag that selects it, e.g. 'vvp main_tb.out -fst'.
+WAVEFORM_FORMATS = ["vcd", "fst", "lxt2"]
+
+# -- The default value of the 'waveform-format' option.
+DEFAULT_WAVEFORM_FORMAT = "vcd"
+
+# -- The values of the apio.ini 'sim-engine' option, the simulators that
+# -- 'apio test' can use to run the testbenches.
+SIM_ENGINES = ["iverilog", "verilator"]
+
+# -- The default value of the 'sim-engine' option.
+DEFAULT_SIM_ENGINE = "iverilog"
+
 # -- The root dir of all the env build directory. Relative to the
 # -- project dir. 'ALL' to distinguish from individual env build dirs.
 PROJECT_BUILD_PATH = Path("_build")
 
+# -- A cache file with the result of the last scan of the project files.
+# -- Relative to the project dir. See get_project_files().
+PROJECT_FILES_CACHE_PATH = PROJECT_BUILD_PATH / "project-files.json"
+
+# -- Incremented when the format of the project files cache changes.
+_PROJECT_FILES_CACHE_VERSION = 1
+
+# -- Directories that were modified less than this time before a scan may
+# -- be modified again without a visible change of their mtime (coarse
+# -- file system timestamps), so we don't cache the results of such scans.
+_RACY_MTIME_NS = 2_000_000_000
+
 
 def env_build_path(env_name: str) -> Path:
     """Given an env name, return a relative path from the project dir to the
@@ -98,30 +126,127 @@ def sort_files(files: List[str]) -> List[str]:
     return sorted(files, key=file_sort_key_func)
 
 
+def _scan_project_files() -> Tuple[List[str], Dict[str, int]]:
+    """Walks the directory tree under the current directory in a single
+    pass and returns the list of the files and a dict with the mtimes of
+    the scanned directories. Hidden files and directories (e.g. .git) are
+    skipped, same as with glob("**"), and so is the top _build directory."""
+
+    files: List[str] = []
+    dir_mtimes: Dict[str, int] = {}
+    pending_dirs: List[str] = ["."]
+    while pending_dirs:
+        dir_path = pending_dirs.pop()
+        try:
+            dir_mtimes[dir_path] = os.stat(dir_path).st_mtime_ns
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    if entry.name.startswith("."):
+                        continue
+                    # -- Paths are relative, without a './' prefix, same
+                    # -- as glob() returns.
+                    path = (
+                        entry.name
+                        if dir_path == "."
+                        else os.path.join(dir_path, entry.name)
+                    )
+                    if entry.is_dir():
+                        if path != str(PROJECT_BUILD_PATH):
+                            pending_dirs.append(path)
+                    else:
+                        files.append(path)
+        except OSError:
+            # -- Unreadable directories are ignored, same as with glob().
+            continue
+
+    return (files, dir_mtimes)
+
+
+def _read_project_files_cache() -> Optional[List[str]]:
+    """Returns the cached list of project files if the cache exists and
+    none of the scanned directories changed since, otherwise None."""
+
+    # pylint: disable=broad-exception-caught
+
+    try:
+        data = json.loads(PROJECT_FILES_CACHE_PATH.read_text(encoding="utf-8"))
+        if data["version"] != _PROJECT_FILES_CACHE_VERSION:
+            return None
+        # -- Adding, deleting, or renaming a file or a directory changes the
+        # -- mtime of its parent directory.
+        for dir_path, mtime in data["dir-mtimes"].items():
+            if os.stat(dir_path).st_mtime_ns != mtime:
+                return None
+        return data["files"]
+    except Exception:
+        return None
+
+
+def get_project_files(*, use_cache: bool = True) -> List[str]:
+    """Returns the unsorted list of the files in the directory tree under the
+    current directory, excluding hidden files and directories and the
+    _build directory. If use_cache is True and the _build directory exists,
+    the result of the scan is cached in _build and reused until a directory
+    of the project is modified."""
+
+    # -- Try the cache first.
+    if use_cache:
+        cached_files = _read_project_files_cache()
+        if cached_files is not None:
+            return cached_files
+
+    # -- Scan the project tree.
+    scan_time_ns = time.time_ns()
+    files, dir_mtimes = _scan_project_files()
+
+    # -- Update the cache. We skip it if _build doesn't exist, to not create
+    # -- it as a side effect, or if a directory was just modified and its
+    # -- mtime may not reflect a following modification.
+    if (
+        use_cache
+        and PROJECT_BUILD_PATH.is_dir()
+        and all(m < scan_time_ns - _RACY_MTIME_NS for m in dir_mtimes.values())
+    ):
+        data = {
+            "version": _PROJECT_FILES_CACHE_VERSION,
+            "dir-mtimes": dir_mtimes,
+            "files": files,
+        }
+        try:
+            PROJECT_FILES_CACHE_PATH.write_text(
+                json.dumps(data), encoding="utf-8"
+            )
+        except OSError:
+            # -- The cache is optional.
+            pass
+
+    return files
+
+
+def find_project_files(suffixes: List[str]) -> List[str]:
+    """Returns the sorted list of the project files with one of the given
+    suffixes (e.g. ".v"). See get_project_files() for the files that are
+    included."""
+    files = [
+        f for f in get_project_files() if os.path.splitext(f)[1] in suffixes
+    ]
+    return sort_files(files)
+
+
 def get_project_source_files() -> Tuple[List[str], List[str]]:
     """Get the list of source files in the directory tree under the current
     directory, splitted into synth and testbench lists.
     If source file has the suffix _tb it's is classified st a testbench,
     otherwise as a synthesis file.
     """
-    # -- Get a list of all source files in the project dir.
-    # -- Ideally we should use the scons env.Glob() method but it doesn't
-    # -- work with the recursive=True option. So we use the glob() function
-    # -- instead.
-    files: List[str] = []
-    for ext in SRC_SUFFIXES:
-        files.extend(glob(f"**/*{ext}", recursive=True))
-
-    # -- Sort the files by directory and then by file name.
-    files = sort_files(files)
+    # -- Get a sorted list of all source files in the project dir, excluding
+    # -- the _build directory.
+    files: List[str] = find_project_files(SRC_SUFFIXES)
 
     # -- Split file names to synth files and testbench file lists
     synth_srcs = []
     test_srcs = []
     for file in files:
-        if PROJECT_BUILD_PATH in Path(file).parents:
-            # -- Ignore source files from the _build directory.
-            continue
         if has_testbench_name(file):
             # -- Handle a testbench file.
             test_srcs.append(file)
@@ -27,19 +27,21 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\napio.proto\x12\x11\x61pio.common.proto\"0\n\x0fIce40FpgaParams\x12\x0c\n\x04type\x18\x01 \x02(\t\x12\x0f\n\x07package\x18\x02 \x02(\t\">\n\x0e\x45\x63p5FpgaParams\x12\x0c\n\x04type\x18\x01 \x02(\t\x12\x0f\n\x07package\x18\x02 \x02(\t\x12\r\n\x05speed\x18\x03 \x02(\t\"Z\n\x0fGowinFpgaParams\x12\x16\n\x0cyosys_family\x18\x01 \x01(\t:\x00\x12\x18\n\x0enextpnr_family\x18\x02 \x01(\t:\x00\x12\x15\n\rpacker_device\x18\x03 \x02(\t\"X\n\x10XilinxFpgaParams\x12\x10\n\x06\x66\x61mily\x18\x01 \x02(\t:\x00\x12\x12\n\nyosys_arch\x18\x02 \x02(\t\x12\x0f\n\x07package\x18\x03 \x02(\t\x12\r\n\x05speed\x18\x04 \x02(\t\"\xb3\x02\n\x08\x46pgaInfo\x12\x0f\n\x07\x66pga_id\x18\x01 \x02(\t\x12\x10\n\x08part_num\x18\x02 \x02(\t\x12\x0c\n\x04size\x18\x03 \x02(\t\x12:\n\x0cice40_params\x18\n \x01(\x0b\x32\".apio.common.proto.Ice40FpgaParamsH\x00\x12\x38\n\x0b\x65\x63p5_params\x18\x0b \x01(\x0b\x32!.apio.common.proto.Ecp5FpgaParamsH\x00\x12:\n\x0cgowin_params\x18\x0c \x01(\x0b\x32\".apio.common.proto.GowinFpgaParamsH\x00\x12<\n\rxilinx_params\x18\r \x01(\x0b\x32#.apio.common.proto.XilinxFpgaParamsH\x00\x42\x06\n\x04\x61rch\"I\n\tVerbosity\x12\x12\n\x03\x61ll\x18\x01 \x01(\x08:\x05\x66\x61lse\x12\x14\n\x05synth\x18\x02 \x01(\x08:\x05\x66\x61lse\x12\x12\n\x03pnr\x18\x03 \x01(\x08:\x05\x66\x61lse\"\x95\x02\n\x0b\x45nvironment\x12\x13\n\x0bplatform_id\x18\x01 \x02(\t\x12\x12\n\nis_windows\x18\x02 \x02(\x08\x12\x36\n\rterminal_mode\x18\x03 \x02(\x0e\x32\x1f.apio.common.proto.TerminalMode\x12\x12\n\ntheme_name\x18\x04 \x02(\t\x12\x13\n\x0b\x64\x65\x62ug_level\x18\x05 \x02(\x05\x12\x12\n\nyosys_path\x18\x06 \x02(\t\x12\x14\n\x0ctrellis_path\x18\x07 \x02(\t\x12\x16\n\x0escons_shell_id\x18\x08 \x02(\t\x12\x1e\n\x16xilinx_prjxray_db_path\x18\t \x02(\t\x12\x1a\n\x12xilinx_chipdb_path\x18\n \x02(\t\"\xef\x01\n\rApioEnvParams\x12\x10\n\x08\x65nv_name\x18\x01 \x02(\t\x12\x10\n\x08\x62oard_id\x18\x02 \x02(\t\x12\x12\n\ntop_module\x18\x03 \x02(\t\x12\x0f\n\x07\x64\x65\x66ines\x18\x04 \x03(\t\x12\x1b\n\x13yosys_extra_options\x18\x05 \x03(\t\x12\x1d\n\x15nextpnr_extra_options\x18\x06 \x03(\t\x12\x1d\n\x15gtkwave_extra_options\x18\x07 \x03(\t\x12\x1f\n\x17verilator_extra_options\x18\x08 \x03(\t\x12\x19\n\x0f\x63onstraint_file\x18\t \x01(\t:\x00\"d\n\nLintParams\x12\x14\n\ntop_module\x18\x01 \x01(\t:\x00\x12\x16\n\x07nosynth\x18\x02 \x01(\x08:\x05\x66\x61lse\x12\x14\n\x05novlt\x18\x03 \x01(\x08:\x05\x66\x61lse\x12\x12\n\nfile_names\x18\x04 \x03(\t\"o\n\x0bGraphParams\x12\x37\n\x0boutput_type\x18\x01 \x02(\x0e\x32\".apio.common.proto.GraphOutputType\x12\x12\n\ntop_module\x18\x02 \x01(\t\x12\x13\n\x0bopen_viewer\x18\x03 \x02(\x08\"d\n\tSimParams\x12\x18\n\x0etestbench_path\x18\x01 \x01(\t:\x00\x12\x11\n\tforce_sim\x18\x02 \x02(\x08\x12\x12\n\nno_gtkwave\x18\x03 \x02(\x08\x12\x16\n\x0e\x64\x65tach_gtkwave\x18\x04 \x02(\x08\"B\n\x0e\x41pioTestParams\x12\x18\n\x0etestbench_path\x18\x01 \x01(\t:\x00\x12\x16\n\x0e\x64\x65\x66\x61ult_option\x18\x02 \x02(\x08\"&\n\x0cUploadParams\x12\x16\n\x0eprogrammer_cmd\x18\x01 \x01(\t\"\x8b\x02\n\x0cTargetParams\x12-\n\x04lint\x18\x01 \x01(\x0b\x32\x1d.apio.common.proto.LintParamsH\x00\x12/\n\x05graph\x18\x02 \x01(\x0b\x32\x1e.apio.common.proto.GraphParamsH\x00\x12+\n\x03sim\x18\x03 \x01(\x0b\x32\x1c.apio.common.proto.SimParamsH\x00\x12\x31\n\x04test\x18\x04 \x01(\x0b\x32!.apio.common.proto.ApioTestParamsH\x00\x12\x31\n\x06upload\x18\x05 \x01(\x0b\x32\x1f.apio.common.proto.UploadParamsH\x00\x42\x08\n\x06target\"\xcd\x02\n\x0bSconsParams\x12\x11\n\ttimestamp\x18\x01 \x02(\t\x12)\n\x04\x61rch\x18\x02 \x02(\x0e\x32\x1b.apio.common.proto.ApioArch\x12.\n\tfpga_info\x18\x03 \x02(\x0b\x32\x1b.apio.common.proto.FpgaInfo\x12/\n\tverbosity\x18\x04 \x01(\x0b\x32\x1c.apio.common.proto.Verbosity\x12\x33\n\x0b\x65nvironment\x18\x05 \x02(\x0b\x32\x1e.apio.common.proto.Environment\x12\x39\n\x0f\x61pio_env_params\x18\x06 \x02(\x0b\x32 .apio.common.proto.ApioEnvParams\x12/\n\x06target\x18\x07 \x01(\x0b\x32\x1f.apio.common.proto.TargetParams*L\n\x08\x41pioArch\x12\x14\n\x10\x41RCH_UNSPECIFIED\x10\x00\x12\t\n\x05ICE40\x10\x01\x12\x08\n\x04\x45\x43P5\x10\x02\x12\t\n\x05GOWIN\x10\x03\x12\n\n\x06XILINX\x10\x04*_\n\x0cTerminalMode\x12\x18\n\x14TERMINAL_UNSPECIFIED\x10\x00\x12\x11\n\rAUTO_TERMINAL\x10\x01\x12\x12\n\x0e\x46ORCE_TERMINAL\x10\x02\x12\x0e\n\nFORCE_PIPE\x10\x03*B\n\x0fGraphOutputType\x12\x14\n\x10TYPE_UNSPECIFIED\x10\x00\x12\x07\n\x03SVG\x10\x01\x12\x07\n\x03PNG\x10\x02\x12\x07\n\x03PDF\x10\x03')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\napio.proto\x12\x11\x61pio.common.proto\"0\n\x0fIce40FpgaParams\x12\x0c\n\x04type\x18\x01 \x02(\t\x12\x0f\n\x07package\x18\x02 \x02(\t\">\n\x0e\x45\x63p5FpgaParams\x12\x0c\n\x04type\x18\x01 \x02(\t\x12\x0f\n\x07package\x18\x02 \x02(\t\x12\r\n\x05speed\x18\x03 \x02(\t\"Z\n\x0fGowinFpgaParams\x12\x16\n\x0cyosys_family\x18\x01 \x01(\t:\x00\x12\x18\n\x0enextpnr_family\x18\x02 \x01(\t:\x00\x12\x15\n\rpacker_device\x18\x03 \x02(\t\"X\n\x10XilinxFpgaParams\x12\x10\n\x06\x66\x61mily\x18\x01 \x02(\t:\x00\x12\x12\n\nyosys_arch\x18\x02 \x02(\t\x12\x0f\n\x07package\x18\x03 \x02(\t\x12\r\n\x05speed\x18\x04 \x02(\t\"\xb3\x02\n\x08\x46pgaInfo\x12\x0f\n\x07\x66pga_id\x18\x01 \x02(\t\x12\x10\n\x08part_num\x18\x02 \x02(\t\x12\x0c\n\x04size\x18\x03 \x02(\t\x12:\n\x0cice40_params\x18\n \x01(\x0b\x32\".apio.common.proto.Ice40FpgaParamsH\x00\x12\x38\n\x0b\x65\x63p5_params\x18\x0b \x01(\x0b\x32!.apio.common.proto.Ecp5FpgaParamsH\x00\x12:\n\x0cgowin_params\x18\x0c \x01(\x0b\x32\".apio.common.proto.GowinFpgaParamsH\x00\x12<\n\rxilinx_params\x18\r \x01(\x0b\x32#.apio.common.proto.XilinxFpgaParamsH\x00\x42\x06\n\x04\x61rch\"I\n\tVerbosity\x12\x12\n\x03\x61ll\x18\x01 \x01(\x08:\x05\x66\x61lse\x12\x14\n\x05synth\x18\x02 \x01(\x08:\x05\x66\x61lse\x12\x12\n\x03pnr\x18\x03 \x01(\x08:\x05\x66\x61lse\"\xc6\x02\n\x0b\x45nvironment\x12\x13\n\x0bplatform_id\x18\x01 \x02(\t\x12\x12\n\nis_windows\x18\x02 \x02(\x08\x12\x36\n\rterminal_mode\x18\x03 \x02(\x0e\x32\x1f.apio.common.proto.TerminalMode\x12\x12\n\ntheme_name\x18\x04 \x02(\t\x12\x13\n\x0b\x64\x65\x62ug_level\x18\x05 \x02(\x05\x12\x12\n\nyosys_path\x18\x06 \x02(\t\x12\x14\n\x0ctrellis_path\x18\x07 \x02(\t\x12\x16\n\x0escons_shell_id\x18\x08 \x02(\t\x12\x1e\n\x16xilinx_prjxray_db_path\x18\t \x02(\t\x12\x1a\n\x12xilinx_chipdb_path\x18\n \x02(\t\x12\x11\n\tcache_dir\x18\x0b \x01(\t\x12\x1c\n\routput_events\x18\x0c \x01(\x08:\x05\x66\x61lse\"\xab\x02\n\rApioEnvParams\x12\x10\n\x08\x65nv_name\x18\x01 \x02(\t\x12\x10\n\x08\x62oard_id\x18\x02 \x02(\t\x12\x12\n\ntop_module\x18\x03 \x02(\t\x12\x0f\n\x07\x64\x65\x66ines\x18\x04 \x03(\t\x12\x1b\n\x13yosys_extra_options\x18\x05 \x03(\t\x12\x1d\n\x15nextpnr_extra_options\x18\x06 \x03(\t\x12\x1d\n\x15gtkwave_extra_options\x18\x07 \x03(\t\x12\x1f\n\x17verilator_extra_options\x18\x08 \x03(\t\x12\x19\n\x0f\x63onstraint_file\x18\t \x01(\t:\x00\x12\x1c\n\x0fwaveform_format\x18\n \x01(\t:\x03vcd\x12\x1c\n\nsim_engine\x18\x0b \x01(\t:\x08iverilog\"\x80\x01\n\nLintParams\x12\x14\n\ntop_module\x18\x01 \x01(\t:\x00\x12\x16\n\x07nosynth\x18\x02 \x01(\x08:\x05\x66\x61lse\x12\x14\n\x05novlt\x18\x03 \x01(\x08:\x05\x66\x61lse\x12\x12\n\nfile_names\x18\x04 \x03(\t\x12\x1a\n\x0bincremental\x18\x05 \x01(\x08:\x05\x66\x61lse\"\xb4\x01\n\x0bGraphParams\x12\x37\n\x0boutput_type\x18\x01 \x02(\x0e\x32\".apio.common.proto.GraphOutputType\x12\x12\n\ntop_module\x18\x02 \x01(\t\x12\x13\n\x0bopen_viewer\x18\x03 \x02(\x08\x12\x19\n\nper_module\x18\x04 \x01(\x08:\x05\x66\x61lse\x12\x11\n\tmax_depth\x18\x05 \x01(\r\x12\x15\n\rmodule_filter\x18\x06 \x01(\t\"d\n\tSimParams\x12\x18\n\x0etestbench_path\x18\x01 \x01(\t:\x00\x12\x11\n\tforce_sim\x18\x02 \x02(\x08\x12\x12\n\nno_gtkwave\x18\x03 \x02(\x08\x12\x16\n\x0e\x64\x65tach_gtkwave\x18\x04 \x02(\x08\"\xe2\x01\n\x0e\x41pioTestParams\x12\x18\n\x0etestbench_path\x18\x01 \x01(\t:\x00\x12\x16\n\x0e\x64\x65\x66\x61ult_option\x18\x02 \x02(\x08\x12\x16\n\x07no_dump\x18\x03 \x01(\x08:\x05\x66\x61lse\x12\x1d\n\x0erecord_results\x18\x04 \x01(\x08:\x05\x66\x61lse\x12\x16\n\x0bshard_index\x18\x05 \x01(\r:\x01\x30\x12\x16\n\x0bshard_count\x18\x06 \x01(\r:\x01\x30\x12\x1d\n\x0e\x62\x61lance_shards\x18\x07 \x01(\x08:\x05\x66\x61lse\x12\x18\n\x0e\x64urations_file\x18\x08 \x01(\t:\x00\"L\n\x0c\x44\x65viceUpload\x12\x0e\n\x06\x64\x65vice\x18\x01 \x02(\t\x12\x16\n\x0eprogrammer_cmd\x18\x02 \x02(\t\x12\x14\n\nserial_num\x18\x03 \x01(\t:\x00\"\xa0\x01\n\x0cUploadParams\x12\x16\n\x0eprogrammer_cmd\x18\x01 \x01(\t\x12\x30\n\x07\x64\x65vices\x18\x02 \x03(\x0b\x32\x1f.apio.common.proto.DeviceUpload\x12\x10\n\x08max_jobs\x18\x03 \x01(\r\x12\x14\n\nserial_num\x18\x04 \x01(\t:\x00\x12\x1e\n\x0fskip_if_current\x18\x05 \x01(\x08:\x05\x66\x61lse\"i\n\x0b\x42uildParams\x12\x15\n\nseed_sweep\x18\x01 \x01(\x05:\x01\x30\x12\x43\n\x11seed_sweep_metric\x18\x02 \x01(\x0e\x32\".apio.common.proto.SeedSweepMetric:\x04\x46MAX\";\n\x0cReportParams\x12\x15\n\x06timing\x18\x01 \x01(\x08:\x05\x66\x61lse\x12\x14\n\tmax_paths\x18\x02 \x01(\r:\x01\x35\"\xef\x02\n\x0cTargetParams\x12-\n\x04lint\x18\x01 \x01(\x0b\x32\x1d.apio.common.proto.LintParamsH\x00\x12/\n\x05graph\x18\x02 \x01(\x0b\x32\x1e.apio.common.proto.GraphParamsH\x00\x12+\n\x03sim\x18\x03 \x01(\x0b\x32\x1c.apio.common.proto.SimParamsH\x00\x12\x31\n\x04test\x18\x04 \x01(\x0b\x32!.apio.common.proto.ApioTestParamsH\x00\x12\x31\n\x06upload\x18\x05 \x01(\x0b\x32\x1f.apio.common.proto.UploadParamsH\x00\x12/\n\x05\x62uild\x18\x06 \x01(\x0b\x32\x1e.apio.common.proto.BuildParamsH\x00\x12\x31\n\x06report\x18\x07 \x01(\x0b\x32\x1f.apio.common.proto.ReportParamsH\x00\x42\x08\n\x06target\"\xcd\x02\n\x0bSconsParams\x12\x11\n\ttimestamp\x18\x01 \x02(\t\x12)\n\x04\x61rch\x18\x02 \x02(\x0e\x32\x1b.apio.common.proto.ApioArch\x12.\n\tfpga_info\x18\x03 \x02(\x0b\x32\x1b.apio.common.proto.FpgaInfo\x12/\n\tverbosity\x18\x04 \x01(\x0b\x32\x1c.apio.common.proto.Verbosity\x12\x33\n\x0b\x65nvironment\x18\x05 \x02(\x0b\x32\x1e.apio.common.proto.Environment\x12\x39\n\x0f\x61pio_env_params\x18\x06 \x02(\x0b\x32 .apio.common.proto.ApioEnvParams\x12/\n\x06target\x18\x07 \x01(\x0b\x32\x1f.apio.common.proto.TargetParams*L\n\x08\x41pioArch\x12\x14\n\x10\x41RCH_UNSPECIFIED\x10\x00\x12\t\n\x05ICE40\x10\x01\x12\x08\n\x04\x45\x43P5\x10\x02\x12\t\n\x05GOWIN\x10\x03\x12\n\n\x06XILINX\x10\x04*_\n\x0cTerminalMode\x12\x18\n\x14TERMINAL_UNSPECIFIED\x10\x00\x12\x11\n\rAUTO_TERMINAL\x10\x01\x12\x12\n\x0e\x46ORCE_TERMINAL\x10\x02\x12\x0e\n\nFORCE_PIPE\x10\x03*B\n\x0fGraphOutputType\x12\x14\n\x10TYPE_UNSPECIFIED\x10\x00\x12\x07\n\x03SVG\x10\x01\x12\x07\n\x03PNG\x10\x02\x12\x07\n\x03PDF\x10\x03*,\n\x0fSeedSweepMetric\x12\x08\n\x04\x46MAX\x10\x00\x12\x0f\n\x0bUTILIZATION\x10\x01')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'apio_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
-  _globals['_APIOARCH']._serialized_start=2267
-  _globals['_APIOARCH']._serialized_end=2343
-  _globals['_TERMINALMODE']._serialized_start=2345
-  _globals['_TERMINALMODE']._serialized_end=2440
-  _globals['_GRAPHOUTPUTTYPE']._serialized_start=2442
-  _globals['_GRAPHOUTPUTTYPE']._serialized_end=2508
+  _globals['_APIOARCH']._serialized_start=3105
+  _globals['_APIOARCH']._serialized_end=3181
+  _globals['_TERMINALMODE']._serialized_start=3183
+  _globals['_TERMINALMODE']._serialized_end=3278
+  _globals['_GRAPHOUTPUTTYPE']._serialized_start=3280
+  _globals['_GRAPHOUTPUTTYPE']._serialized_end=3346
+  _globals['_SEEDSWEEPMETRIC']._serialized_start=3348
+  _globals['_SEEDSWEEPMETRIC']._serialized_end=3392
   _globals['_ICE40FPGAPARAMS']._serialized_start=33
   _globals['_ICE40FPGAPARAMS']._serialized_end=81
   _globals['_ECP5FPGAPARAMS']._serialized_start=83
@@ -53,21 +55,27 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_VERBOSITY']._serialized_start=639
   _globals['_VERBOSITY']._serialized_end=712
   _globals['_ENVIRONMENT']._serialized_start=715
-  _globals['_ENVIRONMENT']._serialized_end=992
-  _globals['_APIOENVPARAMS']._serialized_start=995
-  _globals['_APIOENVPARAMS']._serialized_end=1234
-  _globals['_LINTPARAMS']._serialized_start=1236
-  _globals['_LINTPARAMS']._serialized_end=1336
-  _globals['_GRAPHPARAMS']._serialized_start=1338
-  _globals['_GRAPHPARAMS']._serialized_end=1449
-  _globals['_SIMPARAMS']._serialized_start=1451
-  _globals['_SIMPARAMS']._serialized_end=1551
-  _globals['_APIOTESTPARAMS']._serialized_start=1553
-  _globals['_APIOTESTPARAMS']._serialized_end=1619
-  _globals['_UPLOADPARAMS']._serialized_start=1621
-  _globals['_UPLOADPARAMS']._serialized_end=1659
-  _globals['_TARGETPARAMS']._serialized_start=1662
-  _globals['_TARGETPARAMS']._serialized_end=1929
-  _globals['_SCONSPARAMS']._serialized_start=1932
-  _globals['_SCONSPARAMS']._serialized_end=2265
+  _globals['_ENVIRONMENT']._serialized_end=1041
+  _globals['_APIOENVPARAMS']._serialized_start=1044
+  _globals['_APIOENVPARAMS']._serialized_end=1343
+  _globals['_LINTPARAMS']._serialized_start=1346
+  _globals['_LINTPARAMS']._serialized_end=1474
+  _globals['_GRAPHPARAMS']._serialized_start=1477
+  _globals['_GRAPHPARAMS']._serialized_end=1657
+  _globals['_SIMPARAMS']._serialized_start=1659
+  _globals['_SIMPARAMS']._serialized_end=1759
+  _globals['_APIOTESTPARAMS']._serialized_start=1762
+  _globals['_APIOTESTPARAMS']._serialized_end=1988
+  _globals['_DEVICEUPLOAD']._serialized_start=1990
+  _globals['_DEVICEUPLOAD']._serialized_end=2066
+  _globals['_UPLOADPARAMS']._serialized_start=2069
+  _globals['_UPLOADPARAMS']._serialized_end=2229
+  _globals['_BUILDPARAMS']._serialized_start=2231
+  _globals['_BUILDPARAMS']._serialized_end=2336
+  _globals['_REPORTPARAMS']._serialized_start=2338
+  _globals['_REPORTPARAMS']._serialized_end=2397
+  _globals['_TARGETPARAMS']._serialized_start=2400
+  _globals['_TARGETPARAMS']._serialized_end=2767
+  _globals['_SCONSPARAMS']._serialized_start=2770
+  _globals['_SCONSPARAMS']._serialized_end=3103
 # @@protoc_insertion_point(module_scope)
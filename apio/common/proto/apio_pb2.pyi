@@ -31,6 +31,11 @@ class GraphOutputType(int, metaclass=_enum_type_wrapper.EnumTypeWrapper):
     SVG: _ClassVar[GraphOutputType]
     PNG: _ClassVar[GraphOutputType]
     PDF: _ClassVar[GraphOutputType]
+
+class SeedSweepMetric(int, metaclass=_enum_type_wrapper.EnumTypeWrapper):
+    __slots__ = ()
+    FMAX: _ClassVar[SeedSweepMetric]
+    UTILIZATION: _ClassVar[SeedSweepMetric]
 ARCH_UNSPECIFIED: ApioArch
 ICE40: ApioArch
 ECP5: ApioArch
@@ -44,6 +49,8 @@ TYPE_UNSPECIFIED: GraphOutputType
 SVG: GraphOutputType
 PNG: GraphOutputType
 PDF: GraphOutputType
+FMAX: SeedSweepMetric
+UTILIZATION: SeedSweepMetric
 
 class Ice40FpgaParams(_message.Message):
     __slots__ = ("type", "package")
@@ -114,7 +121,7 @@ class Verbosity(_message.Message):
     def __init__(self, all: bool = ..., synth: bool = ..., pnr: bool = ...) -> None: ...
 
 class Environment(_message.Message):
-    __slots__ = ("platform_id", "is_windows", "terminal_mode", "theme_name", "debug_level", "yosys_path", "trellis_path", "scons_shell_id", "xilinx_prjxray_db_path", "xilinx_chipdb_path")
+    __slots__ = ("platform_id", "is_windows", "terminal_mode", "theme_name", "debug_level", "yosys_path", "trellis_path", "scons_shell_id", "xilinx_prjxray_db_path", "xilinx_chipdb_path", "cache_dir", "output_events")
     PLATFORM_ID_FIELD_NUMBER: _ClassVar[int]
     IS_WINDOWS_FIELD_NUMBER: _ClassVar[int]
     TERMINAL_MODE_FIELD_NUMBER: _ClassVar[int]
@@ -125,6 +132,8 @@ class Environment(_message.Message):
     SCONS_SHELL_ID_FIELD_NUMBER: _ClassVar[int]
     XILINX_PRJXRAY_DB_PATH_FIELD_NUMBER: _ClassVar[int]
     XILINX_CHIPDB_PATH_FIELD_NUMBER: _ClassVar[int]
+    CACHE_DIR_FIELD_NUMBER: _ClassVar[int]
+    OUTPUT_EVENTS_FIELD_NUMBER: _ClassVar[int]
     platform_id: str
     is_windows: bool
     terminal_mode: TerminalMode
@@ -135,10 +144,12 @@ class Environment(_message.Message):
     scons_shell_id: str
     xilinx_prjxray_db_path: str
     xilinx_chipdb_path: str
-    def __init__(self, platform_id: _Optional[str] = ..., is_windows: bool = ..., terminal_mode: _Optional[_Union[TerminalMode, str]] = ..., theme_name: _Optional[str] = ..., debug_level: _Optional[int] = ..., yosys_path: _Optional[str] = ..., trellis_path: _Optional[str] = ..., scons_shell_id: _Optional[str] = ..., xilinx_prjxray_db_path: _Optional[str] = ..., xilinx_chipdb_path: _Optional[str] = ...) -> None: ...
+    cache_dir: str
+    output_events: bool
+    def __init__(self, platform_id: _Optional[str] = ..., is_windows: bool = ..., terminal_mode: _Optional[_Union[TerminalMode, str]] = ..., theme_name: _Optional[str] = ..., debug_level: _Optional[int] = ..., yosys_path: _Optional[str] = ..., trellis_path: _Optional[str] = ..., scons_shell_id: _Optional[str] = ..., xilinx_prjxray_db_path: _Optional[str] = ..., xilinx_chipdb_path: _Optional[str] = ..., cache_dir: _Optional[str] = ..., output_events: bool = ...) -> None: ...
 
 class ApioEnvParams(_message.Message):
-    __slots__ = ("env_name", "board_id", "top_module", "defines", "yosys_extra_options", "nextpnr_extra_options", "gtkwave_extra_options", "verilator_extra_options", "constraint_file")
+    __slots__ = ("env_name", "board_id", "top_module", "defines", "yosys_extra_options", "nextpnr_extra_options", "gtkwave_extra_options", "verilator_extra_options", "constraint_file", "waveform_format", "sim_engine")
     ENV_NAME_FIELD_NUMBER: _ClassVar[int]
     BOARD_ID_FIELD_NUMBER: _ClassVar[int]
     TOP_MODULE_FIELD_NUMBER: _ClassVar[int]
@@ -148,6 +159,8 @@ class ApioEnvParams(_message.Message):
     GTKWAVE_EXTRA_OPTIONS_FIELD_NUMBER: _ClassVar[int]
     VERILATOR_EXTRA_OPTIONS_FIELD_NUMBER: _ClassVar[int]
     CONSTRAINT_FILE_FIELD_NUMBER: _ClassVar[int]
+    WAVEFORM_FORMAT_FIELD_NUMBER: _ClassVar[int]
+    SIM_ENGINE_FIELD_NUMBER: _ClassVar[int]
     env_name: str
     board_id: str
     top_module: str
@@ -157,29 +170,39 @@ class ApioEnvParams(_message.Message):
     gtkwave_extra_options: _containers.RepeatedScalarFieldContainer[str]
     verilator_extra_options: _containers.RepeatedScalarFieldContainer[str]
     constraint_file: str
-    def __init__(self, env_name: _Optional[str] = ..., board_id: _Optional[str] = ..., top_module: _Optional[str] = ..., defines: _Optional[_Iterable[str]] = ..., yosys_extra_options: _Optional[_Iterable[str]] = ..., nextpnr_extra_options: _Optional[_Iterable[str]] = ..., gtkwave_extra_options: _Optional[_Iterable[str]] = ..., verilator_extra_options: _Optional[_Iterable[str]] = ..., constraint_file: _Optional[str] = ...) -> None: ...
+    waveform_format: str
+    sim_engine: str
+    def __init__(self, env_name: _Optional[str] = ..., board_id: _Optional[str] = ..., top_module: _Optional[str] = ..., defines: _Optional[_Iterable[str]] = ..., yosys_extra_options: _Optional[_Iterable[str]] = ..., nextpnr_extra_options: _Optional[_Iterable[str]] = ..., gtkwave_extra_options: _Optional[_Iterable[str]] = ..., verilator_extra_options: _Optional[_Iterable[str]] = ..., constraint_file: _Optional[str] = ..., waveform_format: _Optional[str] = ..., sim_engine: _Optional[str] = ...) -> None: ...
 
 class LintParams(_message.Message):
-    __slots__ = ("top_module", "nosynth", "novlt", "file_names")
+    __slots__ = ("top_module", "nosynth", "novlt", "file_names", "incremental")
     TOP_MODULE_FIELD_NUMBER: _ClassVar[int]
     NOSYNTH_FIELD_NUMBER: _ClassVar[int]
     NOVLT_FIELD_NUMBER: _ClassVar[int]
     FILE_NAMES_FIELD_NUMBER: _ClassVar[int]
+    INCREMENTAL_FIELD_NUMBER: _ClassVar[int]
     top_module: str
     nosynth: bool
     novlt: bool
     file_names: _containers.RepeatedScalarFieldContainer[str]
-    def __init__(self, top_module: _Optional[str] = ..., nosynth: bool = ..., novlt: bool = ..., file_names: _Optional[_Iterable[str]] = ...) -> None: ...
+    incremental: bool
+    def __init__(self, top_module: _Optional[str] = ..., nosynth: bool = ..., novlt: bool = ..., file_names: _Optional[_Iterable[str]] = ..., incremental: bool = ...) -> None: ...
 
 class GraphParams(_message.Message):
-    __slots__ = ("output_type", "top_module", "open_viewer")
+    __slots__ = ("output_type", "top_module", "open_viewer", "per_module", "max_depth", "module_filter")
     OUTPUT_TYPE_FIELD_NUMBER: _ClassVar[int]
     TOP_MODULE_FIELD_NUMBER: _ClassVar[int]
     OPEN_VIEWER_FIELD_NUMBER: _ClassVar[int]
+    PER_MODULE_FIELD_NUMBER: _ClassVar[int]
+    MAX_DEPTH_FIELD_NUMBER: _ClassVar[int]
+    MODULE_FILTER_FIELD_NUMBER: _ClassVar[int]
     output_type: GraphOutputType
     top_module: str
     open_viewer: bool
-    def __init__(self, output_type: _Optional[_Union[GraphOutputType, str]] = ..., top_module: _Optional[str] = ..., open_viewer: bool = ...) -> None: ...
+    per_module: bool
+    max_depth: int
+    module_filter: str
+    def __init__(self, output_type: _Optional[_Union[GraphOutputType, str]] = ..., top_module: _Optional[str] = ..., open_viewer: bool = ..., per_module: bool = ..., max_depth: _Optional[int] = ..., module_filter: _Optional[str] = ...) -> None: ...
 
 class SimParams(_message.Message):
     __slots__ = ("testbench_path", "force_sim", "no_gtkwave", "detach_gtkwave")
@@ -194,32 +217,82 @@ class SimParams(_message.Message):
     def __init__(self, testbench_path: _Optional[str] = ..., force_sim: bool = ..., no_gtkwave: bool = ..., detach_gtkwave: bool = ...) -> None: ...
 
 class ApioTestParams(_message.Message):
-    __slots__ = ("testbench_path", "default_option")
+    __slots__ = ("testbench_path", "default_option", "no_dump", "record_results", "shard_index", "shard_count", "balance_shards", "durations_file")
     TESTBENCH_PATH_FIELD_NUMBER: _ClassVar[int]
     DEFAULT_OPTION_FIELD_NUMBER: _ClassVar[int]
+    NO_DUMP_FIELD_NUMBER: _ClassVar[int]
+    RECORD_RESULTS_FIELD_NUMBER: _ClassVar[int]
+    SHARD_INDEX_FIELD_NUMBER: _ClassVar[int]
+    SHARD_COUNT_FIELD_NUMBER: _ClassVar[int]
+    BALANCE_SHARDS_FIELD_NUMBER: _ClassVar[int]
+    DURATIONS_FILE_FIELD_NUMBER: _ClassVar[int]
     testbench_path: str
     default_option: bool
-    def __init__(self, testbench_path: _Optional[str] = ..., default_option: bool = ...) -> None: ...
+    no_dump: bool
+    record_results: bool
+    shard_index: int
+    shard_count: int
+    balance_shards: bool
+    durations_file: str
+    def __init__(self, testbench_path: _Optional[str] = ..., default_option: bool = ..., no_dump: bool = ..., record_results: bool = ..., shard_index: _Optional[int] = ..., shard_count: _Optional[int] = ..., balance_shards: bool = ..., durations_file: _Optional[str] = ...) -> None: ...
+
+class DeviceUpload(_message.Message):
+    __slots__ = ("device", "programmer_cmd", "serial_num")
+    DEVICE_FIELD_NUMBER: _ClassVar[int]
+    PROGRAMMER_CMD_FIELD_NUMBER: _ClassVar[int]
+    SERIAL_NUM_FIELD_NUMBER: _ClassVar[int]
+    device: str
+    programmer_cmd: str
+    serial_num: str
+    def __init__(self, device: _Optional[str] = ..., programmer_cmd: _Optional[str] = ..., serial_num: _Optional[str] = ...) -> None: ...
 
 class UploadParams(_message.Message):
-    __slots__ = ("programmer_cmd",)
+    __slots__ = ("programmer_cmd", "devices", "max_jobs", "serial_num", "skip_if_current")
     PROGRAMMER_CMD_FIELD_NUMBER: _ClassVar[int]
+    DEVICES_FIELD_NUMBER: _ClassVar[int]
+    MAX_JOBS_FIELD_NUMBER: _ClassVar[int]
+    SERIAL_NUM_FIELD_NUMBER: _ClassVar[int]
+    SKIP_IF_CURRENT_FIELD_NUMBER: _ClassVar[int]
     programmer_cmd: str
-    def __init__(self, programmer_cmd: _Optional[str] = ...) -> None: ...
+    devices: _containers.RepeatedCompositeFieldContainer[DeviceUpload]
+    max_jobs: int
+    serial_num: str
+    skip_if_current: bool
+    def __init__(self, programmer_cmd: _Optional[str] = ..., devices: _Optional[_Iterable[_Union[DeviceUpload, _Mapping]]] = ..., max_jobs: _Optional[int] = ..., serial_num: _Optional[str] = ..., skip_if_current: bool = ...) -> None: ...
+
+class BuildParams(_message.Message):
+    __slots__ = ("seed_sweep", "seed_sweep_metric")
+    SEED_SWEEP_FIELD_NUMBER: _ClassVar[int]
+    SEED_SWEEP_METRIC_FIELD_NUMBER: _ClassVar[int]
+    seed_sweep: int
+    seed_sweep_metric: SeedSweepMetric
+    def __init__(self, seed_sweep: _Optional[int] = ..., seed_sweep_metric: _Optional[_Union[SeedSweepMetric, str]] = ...) -> None: ...
+
+class ReportParams(_message.Message):
+    __slots__ = ("timing", "max_paths")
+    TIMING_FIELD_NUMBER: _ClassVar[int]
+    MAX_PATHS_FIELD_NUMBER: _ClassVar[int]
+    timing: bool
+    max_paths: int
+    def __init__(self, timing: bool = ..., max_paths: _Optional[int] = ...) -> None: ...
 
 class TargetParams(_message.Message):
-    __slots__ = ("lint", "graph", "sim", "test", "upload")
+    __slots__ = ("lint", "graph", "sim", "test", "upload", "build", "report")
     LINT_FIELD_NUMBER: _ClassVar[int]
     GRAPH_FIELD_NUMBER: _ClassVar[int]
     SIM_FIELD_NUMBER: _ClassVar[int]
     TEST_FIELD_NUMBER: _ClassVar[int]
     UPLOAD_FIELD_NUMBER: _ClassVar[int]
+    BUILD_FIELD_NUMBER: _ClassVar[int]
+    REPORT_FIELD_NUMBER: _ClassVar[int]
     lint: LintParams
     graph: GraphParams
     sim: SimParams
     test: ApioTestParams
     upload: UploadParams
-    def __init__(self, lint: _Optional[_Union[LintParams, _Mapping]] = ..., graph: _Optional[_Union[GraphParams, _Mapping]] = ..., sim: _Optional[_Union[SimParams, _Mapping]] = ..., test: _Optional[_Union[ApioTestParams, _Mapping]] = ..., upload: _Optional[_Union[UploadParams, _Mapping]] = ...) -> None: ...
+    build: BuildParams
+    report: ReportParams
+    def __init__(self, lint: _Optional[_Union[LintParams, _Mapping]] = ..., graph: _Optional[_Union[GraphParams, _Mapping]] = ..., sim: _Optional[_Union[SimParams, _Mapping]] = ..., test: _Optional[_Union[ApioTestParams, _Mapping]] = ..., upload: _Optional[_Union[UploadParams, _Mapping]] = ..., build: _Optional[_Union[BuildParams, _Mapping]] = ..., report: _Optional[_Union[ReportParams, _Mapping]] = ...) -> None: ...
 
 class SconsParams(_message.Message):
     __slots__ = ("timestamp", "arch", "fpga_info", "verbosity", "environment", "apio_env_params", "target")
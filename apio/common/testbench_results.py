@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2025 FPGAwars
+# -- License GPLv2
+"""The results of the testbenches of 'apio test --junit-xml'. The scons
+process captures the output of each testbench it runs and writes its result
+to a json file in the env's test-results dir, and the apio process converts
+these results to a JUnit XML report for CI systems.
+
+The scons process also writes the list of the testbenches it selected to
+run, so the testbenches that didn't produce a result, e.g. because they
+failed to compile, are reported as errors.
+
+The scons process also records the duration of each testbench run in the
+env's testbench-durations.json file, for 'apio test --shard i/N
+--balanced' and 'apio test --shard i/N --durations <file>'.
+
+This module is used by both the apio and the scons processes."""
+
+import os
+import re
+import json
+import hashlib
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, List, Sequence
+from xml.etree import ElementTree
+
+# -- The dir of the testbench result files, relative to the env build dir.
+TEST_RESULTS_DIR_NAME = "test-results"
+
+# -- The file with the testbenches that were selected to run, relative to
+# -- the env build dir.
+SELECTED_TESTBENCHES_FILE_NAME = "test-selected-testbenches.json"
+
+# -- The testbench durations file, relative to the env build dir.
+TESTBENCH_DURATIONS_FILE_NAME = "testbench-durations.json"
+
+# -- Matches the lines that report the failure of a testbench, such as the
+# -- 'ERROR: EXPECT_EQ failed ...' line of the apio EXPECT_EQ macro, the
+# -- 'FATAL: ...' line of iverilog's $fatal and the '%Error: ...' line of
+# -- verilator's $fatal.
+_FAILURE_LINE_REGEX = re.compile(r"^\s*%?(error|fatal)\b.*$", re.I | re.M)
+
+# -- Matches the ANSI color codes that testbenches may print.
+_ANSI_CODE_REGEX = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+
+# -- Characters that are not allowed in XML 1.0 documents.
+_INVALID_XML_CHARS_REGEX = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _plain_text(text: str) -> str:
+    """Returns the text without ANSI color codes and without characters that
+    are not allowed in XML documents."""
+    return _INVALID_XML_CHARS_REGEX.sub("", _ANSI_CODE_REGEX.sub("", text))
+
+
+@dataclass(frozen=True)
+class TestbenchResult:
+    """The result of running a single testbench."""
+
+    # -- Prevent pytest from collecting this class as a test class.
+    __test__ = False
+
+    # -- The testbench path relative to the env build dir, without suffix,
+    # -- e.g. 'main_tb' or 'tests/uart_tb'.
+    testbench: str
+    exit_code: int
+    duration_sec: float
+    # -- The stdout and stderr of the testbench.
+    output: str
+
+    @property
+    def passed(self) -> bool:
+        """True if the testbench passed."""
+        return self.exit_code == 0
+
+    @property
+    def failure_message(self) -> str:
+        """Returns the first failure line of the output, or a generic
+        message if there is none."""
+        match = _FAILURE_LINE_REGEX.search(_plain_text(self.output))
+        if match:
+            return match.group(0).strip()
+        return f"Testbench exited with code {self.exit_code}."
+
+
+def write_testbench_result(results_dir: Path, result: TestbenchResult) -> None:
+    """Writes the result file of a testbench. If the testbench already has a
+    result, e.g. when 'apio test --no-dump' runs a failing testbench again
+    to dump its signals, the first result is kept."""
+    path = results_dir / (result.testbench + ".json")
+    if path.exists():
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(asdict(result), indent=2), encoding="utf-8")
+
+
+def read_testbench_results(results_dir: Path) -> List[TestbenchResult]:
+    """Returns the results in the given dir, sorted by testbench. Returns
+    an empty list if the dir doesn't exist."""
+    results = [
+        TestbenchResult(**json.loads(path.read_text(encoding="utf-8")))
+        for path in results_dir.rglob("*.json")
+    ]
+    results.sort(key=lambda r: r.testbench)
+    return results
+
+
+def write_selected_testbenches(
+    selected_file: Path, testbenches: List[str]
+) -> None:
+    """Writes the list of the testbenches that were selected to run, as
+    testbench paths relative to the env build dir, without suffix."""
+    selected_file.parent.mkdir(parents=True, exist_ok=True)
+    selected_file.write_text(json.dumps(testbenches), encoding="utf-8")
+
+
+def read_selected_testbenches(selected_file: Path) -> List[str]:
+    """Returns the testbenches that were selected to run. Returns an empty
+    list if there is no valid selected testbenches file."""
+    try:
+        data = json.loads(selected_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+    if not isinstance(data, list):
+        return []
+    return [str(tb) for tb in data]
+
+
+def junit_xml(
+    suite_name: str,
+    results: List[TestbenchResult],
+    missing: Sequence[str] = (),
+) -> str:
+    """Returns the text of a JUnit XML report of the given testbench
+    results, with a single test suite with the given name. The missing
+    testbenches, which were selected to run but have no result, are
+    reported as errors."""
+
+    failures = sum(1 for r in results if not r.passed)
+    total_sec = sum(r.duration_sec for r in results)
+    tests = len(results) + len(missing)
+
+    testsuites = ElementTree.Element(
+        "testsuites",
+        name="apio test",
+        tests=str(tests),
+        failures=str(failures),
+        errors=str(len(missing)),
+        time=f"{total_sec:.3f}",
+    )
+    testsuite = ElementTree.SubElement(
+        testsuites,
+        "testsuite",
+        name=suite_name,
+        tests=str(tests),
+        failures=str(failures),
+        errors=str(len(missing)),
+        skipped="0",
+        time=f"{total_sec:.3f}",
+    )
+    for result in results:
+        testcase = ElementTree.SubElement(
+            testsuite,
+            "testcase",
+            classname=suite_name,
+            name=result.testbench,
+            time=f"{result.duration_sec:.3f}",
+        )
+        if not result.passed:
+            failure = ElementTree.SubElement(
+                testcase,
+                "failure",
+                message=result.failure_message,
+                type="failure",
+            )
+            failure.text = f"Exit code {result.exit_code}"
+        system_out = ElementTree.SubElement(testcase, "system-out")
+        system_out.text = _plain_text(result.output)
+    for testbench in missing:
+        testcase = ElementTree.SubElement(
+            testsuite,
+            "testcase",
+            classname=suite_name,
+            name=testbench,
+            time="0.000",
+        )
+        ElementTree.SubElement(
+            testcase,
+            "error",
+            message="The testbench didn't run, e.g. it failed to compile.",
+            type="error",
+        )
+
+    ElementTree.indent(testsuites)
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        + ElementTree.tostring(testsuites, encoding="unicode")
+        + "\n"
+    )
+
+
+def read_testbench_durations(durations_file: Path) -> Dict[str, float]:
+    """Returns the recorded durations of the testbenches, in secs, keyed by
+    the testbench path relative to the env build dir, without suffix.
+    Returns an empty dict if there is no valid durations file."""
+    try:
+        data = json.loads(durations_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {
+        k: float(v) for k, v in data.items() if isinstance(v, (int, float))
+    }
+
+
+def durations_fingerprint(durations: Dict[str, float]) -> str:
+    """Returns a short hash of the testbenches durations. Shards that print
+    the same fingerprint were balanced by the same durations."""
+    text = json.dumps(durations, sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:8]
+
+
+def record_testbench_duration(
+    durations_file: Path, testbench: str, duration_sec: float
+) -> None:
+    """Records the duration of a testbench run in the durations file,
+    replacing its previous duration. Failures are ignored since the
+    durations are used only to balance the shards."""
+    durations = read_testbench_durations(durations_file)
+    durations[testbench] = round(duration_sec, 3)
+    try:
+        durations_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = durations_file.with_name(
+            f"{durations_file.name}.{os.getpid()}.tmp"
+        )
+        tmp_file.write_text(
+            json.dumps(durations, indent=2, sort_keys=True), encoding="utf-8"
+        )
+        os.replace(tmp_file, durations_file)
+    except OSError:
+        pass
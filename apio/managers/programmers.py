@@ -7,10 +7,11 @@
 # -- License GPLv2
 
 import sys
-from typing import Optional, List, Dict
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Tuple
 from apio.common.apio_console import cout, cerror, cwarning
 from apio.common.apio_styles import INFO
-from apio.utils import util, serial_util, usb_util
+from apio.utils import util, serial_util, usb_util, device_cache_util
 from apio.utils.serial_util import SerialDevice, SerialDeviceFilter
 from apio.utils.usb_util import UsbDevice, UsbDeviceFilter
 from apio.apio_context import ApioContext
@@ -39,51 +40,93 @@ ALL_VARS = USB_VARS + SERIAL_VARS + [BIN_FILE_VAR]
 
 
 class _DeviceScanner:
-    """Provides usb and serial devices scanning, with caching."""
+    """Provides usb and serial devices scanning, with caching. The scans
+    are also cached for a short time in the apio home dir, until a device
+    is plugged or unplugged, so subsequent uploads can skip them."""
 
     def __init__(self, apio_ctx: ApioContext):
         self._apio_ctx: ApioContext = apio_ctx
-        self._usb_devices: List[UsbDevice] | None = None
+        # -- The persistent scans cache, loaded on first use.
+        self._scan_cache: Optional[device_cache_util.DeviceScanCache] = None
+        # -- The scanned usb devices, keyed by the VID/PID of the filter.
+        self._usb_devices: Dict[
+            Tuple[Optional[str], Optional[str]], List[UsbDevice]
+        ] = {}
         self._serial_devices: List[SerialDevice] | None = None
 
-    def get_usb_devices(self) -> List[UsbDevice]:
-        """Scan usb devices, with caching."""
-        if self._usb_devices is None:
-            self._usb_devices = usb_util.scan_usb_devices(self._apio_ctx)
-            assert isinstance(self._usb_devices, list)
-        return self._usb_devices
+    def _get_scan_cache(self) -> device_cache_util.DeviceScanCache:
+        """Returns the persistent scans cache."""
+        if self._scan_cache is None:
+            self._scan_cache = device_cache_util.load_device_scan_cache(
+                self._apio_ctx
+            )
+        return self._scan_cache
+
+    def get_usb_devices(self, usb_filter: UsbDeviceFilter) -> List[UsbDevice]:
+        """Scan usb devices, with caching. Only the devices that pass the
+        VID/PID constraints of the filter are scanned, the rest of the
+        filter should be applied by the caller."""
+        key = usb_filter.ids()
+        if key not in self._usb_devices:
+            cache_key = device_cache_util.usb_scan_key(key)
+            devices = self._get_scan_cache().get_usb_devices(cache_key)
+            if devices is None:
+                devices = usb_util.scan_usb_devices(self._apio_ctx, usb_filter)
+                self._get_scan_cache().put_usb_devices(cache_key, devices)
+                self._get_scan_cache().save()
+            assert isinstance(devices, list)
+            self._usb_devices[key] = devices
+        return self._usb_devices[key]
 
     def get_serial_devices(self) -> List[SerialDevice]:
         """Scan serial devices, with caching."""
         if self._serial_devices is None:
-            self._serial_devices = serial_util.scan_serial_devices(
-                self._apio_ctx
-            )
-            assert isinstance(self._serial_devices, list)
+            devices = self._get_scan_cache().get_serial_devices()
+            if devices is None:
+                devices = serial_util.scan_serial_devices(self._apio_ctx)
+                self._get_scan_cache().put_serial_devices(devices)
+                self._get_scan_cache().save()
+            assert isinstance(devices, list)
+            self._serial_devices = devices
         return self._serial_devices
 
 
+@dataclass(frozen=True)
+class DeviceProgrammerCmd:
+    """The programmer command of a single device."""
+
+    # -- A user friendly identifier of the device, e.g. its serial number.
+    device: str
+    # -- The resolved programmer command.
+    programmer_cmd: str
+    # -- The USB serial number of the device, or "" if unknown, e.g. if the
+    # -- command doesn't select a specific device.
+    serial_num: str = ""
+
+
 def construct_programmer_cmd(
     apio_ctx: ApioContext,
     serial_port_flag: Optional[str],
     serial_num_flag: Optional[str],
-) -> str:
-    """Construct the programmer command for an 'apio upload' command."""
+) -> DeviceProgrammerCmd:
+    """Construct the programmer command for an 'apio upload' command, and
+    identify the device it programs, if it selects a specific device."""
 
     # -- This is a thin wrapper to allow injecting test scanners in tests.
     scanner = _DeviceScanner(apio_ctx)
-    return _construct_programmer_cmd(
+    return _construct_device_programmer_cmd(
         apio_ctx, scanner, serial_port_flag, serial_num_flag
     )
 
 
-def _construct_programmer_cmd(
+def _construct_device_programmer_cmd(
     apio_ctx: ApioContext,
     scanner: _DeviceScanner,
     serial_port_flag: Optional[str],
     serial_num_flag: Optional[str],
-) -> str:
-    """Construct the programmer command for an 'apio upload' command."""
+) -> DeviceProgrammerCmd:
+    """Construct the programmer command for an 'apio upload' command and
+    identify the device it programs."""
 
     # -- Construct the programmer cmd template for the board. It may or may not
     # -- contain ${} vars.
@@ -96,33 +139,29 @@ def _construct_programmer_cmd(
     cmd_template = cmd_template.replace(BIN_FILE_VAR, BIN_FILE_VALUE)
 
     # -- Determine how to resolve this template.
-    has_usb_vars = any(s in cmd_template for s in USB_VARS)
-    has_serial_vars = any(s in cmd_template for s in SERIAL_VARS)
-
-    if util.is_debug(1):
-        cout(f"Template has usb vars: {has_usb_vars}]")
-        cout(f"Template has serial vars: {has_serial_vars}]")
-
-    # -- Can't have both serial and usb vars (OK to have none).
-    if has_usb_vars and has_serial_vars:
-        board = apio_ctx.project.get_str_option("board")
-        cerror(
-            f"The programmer cmd template of the board '{board}' has "
-            "both usb and serial ${} vars. "
-        )
-        cout(f"Cmd template: {cmd_template}", style=INFO)
-        sys.exit(1)
+    has_usb_vars, has_serial_vars = _get_template_vars_types(
+        apio_ctx, cmd_template
+    )
 
     # -- Dispatch to the appropriate template resolver.
     if has_serial_vars:
-        cmd = _resolve_serial_cmd_template(
-            apio_ctx, scanner, serial_port_flag, serial_num_flag, cmd_template
+        serial_device = _match_serial_device(
+            apio_ctx, scanner, serial_port_flag, serial_num_flag
+        )
+        device_cmd = DeviceProgrammerCmd(
+            device=serial_device.port,
+            programmer_cmd=_serial_device_cmd(cmd_template, serial_device),
+            serial_num=serial_device.serial_number,
         )
 
     elif has_usb_vars:
         _report_unused_flag("--serial-port", str(serial_port_flag))
-        cmd = _resolve_usb_cmd_template(
-            apio_ctx, scanner, serial_num_flag, cmd_template
+        usb_device = _match_usb_device(apio_ctx, scanner, serial_num_flag)
+        device_cmd = DeviceProgrammerCmd(
+            device=usb_device.serial_number
+            or f"{usb_device.bus}:{usb_device.device}",
+            programmer_cmd=_usb_device_cmd(cmd_template, usb_device),
+            serial_num=usb_device.serial_number,
         )
 
     else:
@@ -135,13 +174,155 @@ def _construct_programmer_cmd(
         _check_device_presence(apio_ctx, scanner)
 
         # -- Template has no vars, we just use it as is.
-        cmd = cmd_template
+        device_cmd = DeviceProgrammerCmd(
+            device="", programmer_cmd=cmd_template
+        )
 
     # -- At this point, all vars should be resolved.
-    assert not any(s in cmd for s in ALL_VARS), cmd_template
+    assert not any(
+        s in device_cmd.programmer_cmd for s in ALL_VARS
+    ), cmd_template
 
     # -- Return the resolved command.
-    return cmd
+    return device_cmd
+
+
+def construct_programmer_cmds(
+    apio_ctx: ApioContext,
+    serial_nums: List[str],
+    all_matching: bool,
+) -> List[DeviceProgrammerCmd]:
+    """Construct the programmer commands of an 'apio upload' to multiple
+    devices, either the devices with the given serial numbers or, with
+    all_matching, all the devices that match the board."""
+
+    # -- This is a thin wrapper to allow injecting test scanners in tests.
+    scanner = _DeviceScanner(apio_ctx)
+    return _construct_programmer_cmds(
+        apio_ctx, scanner, serial_nums, all_matching
+    )
+
+
+def _construct_programmer_cmds(
+    apio_ctx: ApioContext,
+    scanner: _DeviceScanner,
+    serial_nums: List[str],
+    all_matching: bool,
+) -> List[DeviceProgrammerCmd]:
+    """Construct the programmer commands of an 'apio upload' to multiple
+    devices."""
+
+    # -- Exactly one of the two selection methods.
+    assert bool(serial_nums) != all_matching, (serial_nums, all_matching)
+
+    # -- Construct the programmer cmd template, as for a single device.
+    cmd_template = _construct_cmd_template(apio_ctx)
+    cmd_template = cmd_template.replace(BIN_FILE_VAR, BIN_FILE_VALUE)
+    has_usb_vars, _ = _get_template_vars_types(apio_ctx, cmd_template)
+
+    # -- Each device needs its own command, so the template should have
+    # -- vars that identify a specific device. A template with only the
+    # -- VID/PID vars, or with no vars, programs whatever device the
+    # -- programmer finds.
+    if not _identifies_device(cmd_template):
+        cerror(
+            "The programmer command of this board doesn't select a "
+            "specific device."
+        )
+        cout(
+            "Uploading to multiple devices requires a programmer command "
+            f"with {SERIAL_NUM_VAR}, {BUS_VAR} and {DEV_VAR}, or "
+            f"{SERIAL_PORT_VAR} vars.",
+            style=INFO,
+        )
+        sys.exit(1)
+
+    # -- Each serial number should match exactly one device. Duplicates
+    # -- are ignored.
+    serial_nums = list(dict.fromkeys(serial_nums))
+
+    if has_usb_vars:
+        if all_matching:
+            usb_devices = _match_usb_devices(apio_ctx, scanner, None)
+        else:
+            usb_devices = [
+                _match_usb_device(apio_ctx, scanner, sn) for sn in serial_nums
+            ]
+        device_cmds = [
+            DeviceProgrammerCmd(
+                device=d.serial_number or f"{d.bus}:{d.device}",
+                programmer_cmd=_usb_device_cmd(cmd_template, d),
+                serial_num=d.serial_number,
+            )
+            for d in usb_devices
+        ]
+    else:
+        if all_matching:
+            serial_devices = _match_serial_devices(
+                apio_ctx, scanner, None, None
+            )
+        else:
+            serial_devices = [
+                _match_serial_device(apio_ctx, scanner, None, sn)
+                for sn in serial_nums
+            ]
+        device_cmds = [
+            DeviceProgrammerCmd(
+                device=d.port,
+                programmer_cmd=_serial_device_cmd(cmd_template, d),
+                serial_num=d.serial_number,
+            )
+            for d in serial_devices
+        ]
+
+    # -- The commands should program different devices, e.g. devices with
+    # -- no serial numbers and a template with only ${SERIAL_NUM} get the
+    # -- same command.
+    programmer_cmds = [c.programmer_cmd for c in device_cmds]
+    if len(set(programmer_cmds)) != len(programmer_cmds):
+        cerror("Some of the devices have the same programmer command.")
+        for device_cmd in device_cmds:
+            cout(f"{device_cmd.device}: {device_cmd.programmer_cmd}")
+        sys.exit(1)
+
+    return device_cmds
+
+
+def _identifies_device(cmd_template: str) -> bool:
+    """Returns True if the given template has vars that identify a specific
+    device, the usb serial number, the usb bus and device numbers, or the
+    serial port."""
+    return (
+        SERIAL_NUM_VAR in cmd_template
+        or (BUS_VAR in cmd_template and DEV_VAR in cmd_template)
+        or SERIAL_PORT_VAR in cmd_template
+    )
+
+
+def _get_template_vars_types(
+    apio_ctx: ApioContext, cmd_template: str
+) -> Tuple[bool, bool]:
+    """Returns a tuple with two booleans that indicate if the template has
+    usb vars and serial vars. Exits with an error if it has both."""
+
+    has_usb_vars = any(s in cmd_template for s in USB_VARS)
+    has_serial_vars = any(s in cmd_template for s in SERIAL_VARS)
+
+    if util.is_debug(1):
+        cout(f"Template has usb vars: {has_usb_vars}]")
+        cout(f"Template has serial vars: {has_serial_vars}]")
+
+    # -- Can't have both serial and usb vars (OK to have none).
+    if has_usb_vars and has_serial_vars:
+        board = apio_ctx.project.get_str_option("board")
+        cerror(
+            f"The programmer cmd template of the board '{board}' has "
+            "both usb and serial ${} vars. "
+        )
+        cout(f"Cmd template: {cmd_template}", style=INFO)
+        sys.exit(1)
+
+    return has_usb_vars, has_serial_vars
 
 
 def _report_unused_flag(flag_name: str, flag_value: str):
@@ -198,19 +379,9 @@ def _construct_cmd_template(apio_ctx: ApioContext) -> str:
     return cmd_template
 
 
-def _resolve_serial_cmd_template(
-    apio_ctx: ApioContext,
-    scanner: _DeviceScanner,
-    serial_port_arg: Optional[str],
-    serial_port_num: Optional[str],
-    cmd_template: str,
-) -> str:
-    """Resolves a programmer command template for a serial device."""
-
-    # -- Match to a single serial device.
-    device: SerialDevice = _match_serial_device(
-        apio_ctx, scanner, serial_port_arg, serial_port_num
-    )
+def _serial_device_cmd(cmd_template: str, device: SerialDevice) -> str:
+    """Resolves a programmer command template for the given serial
+    device."""
 
     # -- Resolve serial port var.
     cmd_template = cmd_template.replace(SERIAL_PORT_VAR, device.port)
@@ -222,16 +393,8 @@ def _resolve_serial_cmd_template(
     return cmd_template
 
 
-def _resolve_usb_cmd_template(
-    apio_ctx: ApioContext,
-    scanner: _DeviceScanner,
-    serial_num_flag: Optional[str],
-    cmd_template: str,
-) -> str:
-    """Resolves a programmer command template for an USB device."""
-
-    # -- Match to a single usb device.
-    device: UsbDevice = _match_usb_device(apio_ctx, scanner, serial_num_flag)
+def _usb_device_cmd(cmd_template: str, device: UsbDevice) -> str:
+    """Resolves a programmer command template for the given usb device."""
 
     # -- Substitute vars.
     cmd_template = cmd_template.replace(VID_VAR, device.vendor_id)
@@ -257,6 +420,33 @@ def _match_serial_device(
     device. Exits with an error if none or multiple matching devices.
     """
 
+    matching = _match_serial_devices(
+        apio_ctx, scanner, serial_port_flag, serial_num_flag
+    )
+
+    # -- Error more than one match
+    if len(matching) > 1:
+        cerror("Found multiple matching serial devices.")
+        cout(
+            "Type 'apio devices scan-serial' for available serial devices.",
+            style=INFO,
+        )
+        sys.exit(1)
+
+    # -- All done. We have a single match.
+    return matching[0]
+
+
+def _match_serial_devices(
+    apio_ctx: ApioContext,
+    scanner: _DeviceScanner,
+    serial_port_flag: Optional[str],
+    serial_num_flag: Optional[str],
+) -> List[SerialDevice]:
+    """Scans the serial devices and returns the matching devices. Exits
+    with an error if no matching devices.
+    """
+
     # -- Get project resources
     pr = apio_ctx.project_resources
 
@@ -296,7 +486,7 @@ def _match_serial_device(
     if util.is_debug(1):
         cout(f"Matching serial devices: {matching}")
 
-    # -- Error if not exactly one match.
+    # -- Error if no match.
     if not matching:
         cerror("No matching serial device.")
         cout(
@@ -305,11 +495,23 @@ def _match_serial_device(
         )
         sys.exit(1)
 
+    return matching
+
+
+def _match_usb_device(
+    apio_ctx: ApioContext, scanner, serial_num_flag: Optional[str]
+) -> UsbDevice:
+    """Scans the USB devices and selects and returns a single matching
+    device. Exits with an error if none or multiple matching devices.
+    """
+
+    matching = _match_usb_devices(apio_ctx, scanner, serial_num_flag)
+
     # -- Error more than one match
     if len(matching) > 1:
-        cerror("Found multiple matching serial devices.")
+        cerror("Found multiple matching usb devices.")
         cout(
-            "Type 'apio devices scan-serial' for available serial devices.",
+            "Type 'apio devices scan-usb' for available usb device.",
             style=INFO,
         )
         sys.exit(1)
@@ -318,19 +520,16 @@ def _match_serial_device(
     return matching[0]
 
 
-def _match_usb_device(
+def _match_usb_devices(
     apio_ctx: ApioContext, scanner, serial_num_flag: Optional[str]
-) -> UsbDevice:
-    """Scans the USB devices and selects and returns a single matching
-    device. Exits with an error if none or multiple matching devices.
+) -> List[UsbDevice]:
+    """Scans the USB devices and returns the matching devices. Exits with
+    an error if no matching devices.
     """
 
     # -- Get project resources.
     pr = apio_ctx.project_resources
 
-    # -- Scan for all serial devices.
-    all_devices: List[UsbDevice] = scanner.get_usb_devices()
-
     # -- Get board optional usb constraints
     usb_info = pr.board_info.get("usb", {})
 
@@ -349,7 +548,8 @@ def _match_usb_device(
     cout("Scanning for a USB device:")
     cout(f"- FILTER {usb_filter.summary()}")
 
-    # -- Get matching devices
+    # -- Scan the candidate usb devices and get the matching devices.
+    all_devices: List[UsbDevice] = scanner.get_usb_devices(usb_filter)
     matching: List[UsbDevice] = usb_filter.filter(all_devices)
 
     for dev in matching:
@@ -362,7 +562,7 @@ def _match_usb_device(
     if util.is_debug(1):
         cout(f"Matching usb devices: {matching}")
 
-    # -- Error if not exactly one match.
+    # -- Error if no match.
     if not matching:
         cerror("No matching USB device.")
         cout(
@@ -371,17 +571,7 @@ def _match_usb_device(
         )
         sys.exit(1)
 
-    # -- Error more than one match
-    if len(matching) > 1:
-        cerror("Found multiple matching usb devices.")
-        cout(
-            "Type 'apio devices scan-usb' for available usb device.",
-            style=INFO,
-        )
-        sys.exit(1)
-
-    # -- All done. We have a single match.
-    return matching[0]
+    return matching
 
 
 def _check_device_presence(apio_ctx: ApioContext, scanner: _DeviceScanner):
@@ -416,7 +606,7 @@ def _check_device_presence(apio_ctx: ApioContext, scanner: _DeviceScanner):
     cout(f"- FILTER {usb_filter.summary()}")
 
     # -- Scan the USB devices and filter by the filter.
-    all_devices = scanner.get_usb_devices()
+    all_devices = scanner.get_usb_devices(usb_filter)
     matching_devices = usb_filter.filter(all_devices)
 
     for device in matching_devices:
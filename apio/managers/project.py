@@ -11,6 +11,7 @@
 
 import sys
 import re
+import copy
 from dataclasses import dataclass
 import configparser
 from collections import OrderedDict
@@ -20,7 +21,11 @@ from configobj import ConfigObj
 from apio.utils import util
 from apio.common.apio_console import cout, cerror, cwarning
 from apio.common.apio_styles import INFO, SUCCESS, EMPH2
-from apio.common.common_util import PROJECT_BUILD_PATH
+from apio.common.common_util import (
+    PROJECT_BUILD_PATH,
+    WAVEFORM_FORMATS,
+    SIM_ENGINES,
+)
 
 
 DEFAULT_TOP_MODULE = "main"
@@ -56,7 +61,14 @@ class EnvOptionSpec:
     name: str
     is_required: bool = False
     is_list: bool = False
+    # -- If not None, the allowed values of the option.
+    choices: Optional[List[str]] = None
+
 
+# -- The values of the 'test-dump' option. With 'on-failure', 'apio test'
+# -- dumps only the signals of failing testbenches, same as 'apio test
+# -- --no-dump'.
+TEST_DUMP_MODES = ["always", "on-failure"]
 
 # -- Specification of the env options which can appear in env sections
 # -- or the common section of apio.ini.
@@ -80,6 +92,12 @@ ENV_OPTIONS_SPEC = {
         name="format-verible-options",
         is_list=True,
     ),
+    "fmax-regression-threshold": EnvOptionSpec(
+        name="fmax-regression-threshold",
+    ),
+    "utilization-regression-threshold": EnvOptionSpec(
+        name="utilization-regression-threshold",
+    ),
     "programmer-cmd": EnvOptionSpec(
         name="programmer-cmd",
     ),
@@ -102,6 +120,18 @@ ENV_OPTIONS_SPEC = {
     "constraint-file": EnvOptionSpec(
         name="constraint-file",
     ),
+    "waveform-format": EnvOptionSpec(
+        name="waveform-format",
+        choices=WAVEFORM_FORMATS,
+    ),
+    "test-dump": EnvOptionSpec(
+        name="test-dump",
+        choices=TEST_DUMP_MODES,
+    ),
+    "sim-engine": EnvOptionSpec(
+        name="sim-engine",
+        choices=SIM_ENGINES,
+    ),
 }
 
 
@@ -154,6 +184,11 @@ class Project:
         # -- Keep the names of all envs
         self.env_names = list(env_sections.keys())
 
+        # -- Keep the validated sections so we can select other envs later
+        # -- without reading and validating apio.ini again.
+        self._common_section = common_section
+        self._env_sections = env_sections
+
         # -- Determine the name of the active env.
         self.env_name = Project._determine_default_env_name(
             apio_section, env_sections, env_arg
@@ -270,6 +305,14 @@ class Project:
             cerror(f"Unknown board id '{board_id}' in apio.ini.")
             sys.exit(1)
 
+        # -- Check that options with a list of choices have a valid value.
+        for option, value in section_options.items():
+            choices = ENV_OPTIONS_SPEC[option].choices
+            if choices is not None and value not in choices:
+                cerror(f"Invalid {option} '{value}' in apio.ini.")
+                cout(f"Expecting one of: {', '.join(choices)}", style=INFO)
+                sys.exit(1)
+
     @staticmethod
     def _determine_default_env_name(
         apio_section: Dict[str, str],
@@ -373,6 +416,26 @@ class Project:
 
         return result
 
+    def with_env(self, env_name: str) -> "Project":
+        """Returns a copy of this project with the given env as the active
+        env. The env name must be one of self.env_names. This is used by
+        commands that process more than one env, such as
+        'apio build --all-envs'."""
+
+        # -- If this fails, this is a programming error.
+        assert env_name in self.env_names, f"Unknown env name: {env_name}"
+
+        # -- The sections were already validated by the constructor so we
+        # -- only need to expand the options of the new env.
+        result = copy.copy(self)
+        result.env_name = env_name
+        result.env_options = Project._parse_env_options(
+            env_name=env_name,
+            common_section=self._common_section,
+            env_sections=self._env_sections,
+        )
+        return result
+
     def get_str_option(
         self, option: str, default: Any = None
     ) -> Union[str, Any]:
@@ -8,9 +8,11 @@
 
 
 import re
+import json
 import threading
 from enum import Enum
 from typing import List, Optional, Tuple
+from apio.common import apio_events, apio_trace
 from apio.common.apio_console import cout, cunstyle, cwrite, cstyle
 from apio.common.apio_styles import INFO, WARNING, SUCCESS, ERROR
 from apio.utils import util
@@ -54,6 +56,14 @@ LINE_IGNORE_LIST = [
 ]
 
 
+# -- Matches a source location such as 'main.v:12' or 'main.v:12:5' in a
+# -- warning or an error message. The groups are the file, line and
+# -- optional column.
+SOURCE_LOCATION_REGEX = re.compile(
+    r"([^\s:'\"()\[\]]+\.(?:v|sv|vh|svh|pcf|lpf|cst|xdc)):(\d+)(?::(\d+))?"
+)
+
+
 class PipeId(Enum):
     """Represent the two output streams from the scons subprocess."""
 
@@ -158,6 +168,7 @@ class SconsFilter:
         # -- We cache the values to avoid reevaluating sys env.
         self._is_debug = util.is_debug(1)
         self._is_verbose_debug = util.is_debug(5)
+        self._is_tracing = apio_trace.is_enabled()
 
         # -- Accumulates string pieces until we write and flush them. This
         # -- mechanism is used to display progress bar correctly, Writing the
@@ -176,13 +187,28 @@ class SconsFilter:
         """Stdout pipe calls this on each line. Called from the stdout thread
         in AsyncPipe."""
         with self._thread_lock:
-            self.on_line(PipeId.STDOUT, line, terminator)
+            self._traced_on_line(PipeId.STDOUT, line, terminator)
 
     def on_stderr_line(self, line: str, terminator: str) -> None:
         """Stderr pipe calls this on each line. Called from the stderr thread
         in AsyncPipe."""
         with self._thread_lock:
-            self.on_line(PipeId.STDERR, line, terminator)
+            self._traced_on_line(PipeId.STDERR, line, terminator)
+
+    def _traced_on_line(self, pipe_id: PipeId, line: str, terminator) -> None:
+        """Calls on_line() and if tracing is enabled, records its execution
+        as a trace event."""
+        if not self._is_tracing:
+            self.on_line(pipe_id, line, terminator)
+            return
+        start_us = apio_trace.now_us()
+        self.on_line(pipe_id, line, terminator)
+        apio_trace.complete(
+            "filter line",
+            start_us=start_us,
+            cat="filter",
+            args={"pipe": pipe_id.name, "line": line[:80]},
+        )
 
     @staticmethod
     def _assign_line_color(
@@ -292,3 +318,94 @@ class SconsFilter:
         # -- Output the line in the appropriate style.
         line_color = self._assign_line_color(line, LINE_COLORING_TABLE)
         self._output_line(line, line_color, terminator)
+
+
+class JsonlFilter:
+    """Implements the '--output-format jsonl' handling of the stdout/err
+    streams of the scons subprocess. It has the same interface as
+    SconsFilter but instead of printing the lines, it writes to stdout the
+    events that they represent. The event marker lines of the scons
+    subprocess are forwarded, and the other lines are written as log,
+    warning and error events, the last two with the source location they
+    refer to, if any. All the events are tagged with the env name."""
+
+    def __init__(self, env_name: str):
+        self._env_name = env_name
+
+        # -- The stdout and stderr are called from independent threads, so we
+        # -- protect the handling method with this lock.
+        self._thread_lock = threading.Lock()
+
+    def on_stdout_line(self, line: str, terminator: str) -> None:
+        """Stdout pipe calls this on each line. Called from the stdout thread
+        in AsyncPipe."""
+        with self._thread_lock:
+            self.on_line(PipeId.STDOUT, line, terminator)
+
+    def on_stderr_line(self, line: str, terminator: str) -> None:
+        """Stderr pipe calls this on each line. Called from the stderr thread
+        in AsyncPipe."""
+        with self._thread_lock:
+            self.on_line(PipeId.STDERR, line, terminator)
+
+    def on_line(self, pipe_id: PipeId, line: str, terminator: str) -> None:
+        """A shared handler for stdout/err lines from the scons sub process.
+        For the possible values of terminator, see AsyncPipe.__init__()."""
+
+        # pylint: disable=protected-access
+
+        # -- Ignore progress bar updates, such as of the programmers.
+        if terminator == "\r":
+            return
+
+        stream = "stderr" if pipe_id == PipeId.STDERR else "stdout"
+
+        # -- Forward the events of the scons subprocess.
+        event = apio_events.parse_marker_line(line)
+        if event is not None:
+            event["env"] = self._env_name
+            apio_events.write_json(json.dumps(event, separators=(",", ":")))
+            return
+
+        # -- A corrupted marker line is passed as is, without classifying
+        # -- its text.
+        if apio_events.is_marker_line(line):
+            apio_events.emit(
+                "log",
+                env=self._env_name,
+                stream=stream,
+                text=line,
+            )
+            return
+
+        # -- Skip blank and ignored lines.
+        line = cunstyle(line)
+        if not line.strip():
+            return
+        for regex in LINE_IGNORE_LIST:
+            if re.search(regex, line, re.IGNORECASE):
+                return
+
+        # -- Classify the line by the same patterns that color it in the
+        # -- text output.
+        style = SconsFilter._assign_line_color(line, LINE_COLORING_TABLE)
+        if style == ERROR:
+            event_type = "error"
+        elif style == WARNING:
+            event_type = "warning"
+        else:
+            event_type = "log"
+
+        fields = {
+            "env": self._env_name,
+            "stream": stream,
+            "text": line,
+        }
+        if event_type != "log":
+            match = SOURCE_LOCATION_REGEX.search(line)
+            if match:
+                fields["file"] = match.group(1)
+                fields["line"] = int(match.group(2))
+                if match.group(3):
+                    fields["column"] = int(match.group(3))
+        apio_events.emit(event_type, **fields)
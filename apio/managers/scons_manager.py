@@ -6,21 +6,76 @@
 # -- Author Jesús Arroyo
 # -- License GPLv2
 
+# pylint: disable=too-many-lines
+
 import traceback
 import os
 import sys
 import time
 import shutil
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, replace
 from functools import wraps
 from datetime import datetime
-from typing import Optional
+from pathlib import Path
+from typing import Optional, List, Tuple
 from google.protobuf import text_format
-from apio.common import apio_console
-from apio.common.apio_console import cout, cerror, cstyle, cunstyle
-from apio.common.apio_styles import SUCCESS, ERROR, EMPH3, INFO
-from apio.utils import util
+from rich.table import Table
+from rich import box
+from apio.common import apio_console, apio_events, apio_trace
+from apio.common.apio_console import (
+    cout,
+    cerror,
+    cwarning,
+    cstyle,
+    cunstyle,
+    ctable,
+)
+from apio.common.apio_styles import (
+    SUCCESS,
+    ERROR,
+    EMPH1,
+    EMPH3,
+    INFO,
+    BORDER,
+)
+from apio.common.build_report import read_build_report
+from apio.common.build_history import (
+    BUILD_HISTORY_FILE_NAME,
+    SEED_SWEEP_FILE_NAME,
+    BuildHistory,
+    BuildRecord,
+    regression_thresholds,
+    find_regressions,
+    stage_durations,
+    nextpnr_seed,
+    read_sweep_seed,
+    git_commit,
+    file_sha256,
+)
+from apio.common.testbench_results import (
+    TEST_RESULTS_DIR_NAME,
+    SELECTED_TESTBENCHES_FILE_NAME,
+    read_testbench_results,
+    read_selected_testbenches,
+    junit_xml,
+)
+from apio.common.build_profile import (
+    BUILD_PROFILE_FILE_NAME,
+    BuildProfile,
+    read_build_profile,
+    write_build_profile,
+)
+from apio.common.common_util import (
+    env_build_path,
+    DEFAULT_WAVEFORM_FORMAT,
+    DEFAULT_SIM_ENGINE,
+)
+from apio.utils import util, env_options
 from apio.apio_context import ApioContext
-from apio.managers.scons_filter import SconsFilter
+from apio.managers.scons_filter import SconsFilter, JsonlFilter
 from apio.common.proto.apio_pb2 import (
     FORCE_PIPE,
     FORCE_TERMINAL,
@@ -41,6 +96,8 @@ from apio.common.proto.apio_pb2 import (
     SimParams,
     ApioTestParams,
     UploadParams,
+    BuildParams,
+    ReportParams,
 )
 
 # from apio.common import rich_lib_windows
@@ -82,6 +139,24 @@ def on_exception(*, exit_code: int):
     return decorator
 
 
+# -- The scons targets whose successful runs leave an up to date
+# -- hardware.pnr and are recorded in the build history.
+_BUILD_HISTORY_TARGETS = ["build", "upload", "report"]
+
+
+@dataclass(frozen=True)
+class EnvBuildResult:
+    """The result of building a single env with 'apio build --all-envs'.
+    'output_lines' contains the captured scons output as a list of
+    (is_stderr, line, terminator) tuples, in the order they were received."""
+
+    env_name: str
+    board_id: str
+    exit_code: int
+    duration: float
+    output_lines: List[Tuple[bool, str, str]]
+
+
 class SConsManager:
     """Class for managing the scons tools"""
 
@@ -154,9 +229,25 @@ class SConsManager:
         return self._run_scons_subprocess("sim", scons_params=scons_params)
 
     @on_exception(exit_code=1)
-    def test(self, test_params: ApioTestParams) -> Optional[int]:
+    def test(
+        self,
+        test_params: ApioTestParams,
+        junit_xml_path: Optional[Path] = None,
+    ) -> Optional[int]:
         """Runs a scons subprocess with the 'test' target. Returns process
-        exit code, 0 if ok."""
+        exit code, 0 if ok. If junit_xml_path is specified, the results of
+        the testbenches are written to it as a JUnit XML report."""
+
+        # -- Capture the testbenches results for the JUnit XML report. The
+        # -- scons process writes a fresh list of the selected testbenches.
+        if junit_xml_path:
+            params = ApioTestParams()
+            params.CopyFrom(test_params)
+            params.record_results = True
+            test_params = params
+            (
+                self.apio_ctx.env_build_path / SELECTED_TESTBENCHES_FILE_NAME
+            ).unlink(missing_ok=True)
 
         # -- Construct scons params with graph command info.
         scons_params = self.construct_scons_params(
@@ -164,15 +255,59 @@ class SConsManager:
         )
 
         # -- Run the scons process.
-        return self._run_scons_subprocess("test", scons_params=scons_params)
+        exit_code = self._run_scons_subprocess(
+            "test", scons_params=scons_params
+        )
+
+        # -- Write the JUnit XML report, also if some testbenches failed.
+        if junit_xml_path:
+            self._write_junit_xml(junit_xml_path)
+
+        return exit_code
+
+    def _write_junit_xml(self, junit_xml_path: Path) -> None:
+        """Writes the JUnit XML report of the testbenches results of the
+        last 'test' run. Selected testbenches without a result, e.g. because
+        they failed to compile, are reported as errors."""
+        build_path = self.apio_ctx.env_build_path
+        results = read_testbench_results(build_path / TEST_RESULTS_DIR_NAME)
+        tested = {r.testbench for r in results}
+        missing = [
+            tb
+            for tb in read_selected_testbenches(
+                build_path / SELECTED_TESTBENCHES_FILE_NAME
+            )
+            if tb not in tested
+        ]
+        try:
+            junit_xml_path.parent.mkdir(parents=True, exist_ok=True)
+            junit_xml_path.write_text(
+                junit_xml(self.apio_ctx.project.env_name, results, missing),
+                encoding="utf-8",
+            )
+        except OSError as e:
+            cerror(f"Failed to write '{junit_xml_path}': {e}")
+            sys.exit(1)
+        cout(
+            f"Wrote the results of {len(results) + len(missing)} testbenches "
+            f"to '{junit_xml_path}'.",
+            style=EMPH1,
+        )
+        if missing:
+            cwarning(f"{len(missing)} testbenches didn't run.")
 
     @on_exception(exit_code=1)
-    def build(self, verbosity: Verbosity) -> Optional[int]:
+    def build(
+        self, verbosity: Verbosity, build_params: Optional[BuildParams] = None
+    ) -> Optional[int]:
         """Runs a scons subprocess with the 'build' target. Returns process
         exit code, 0 if ok."""
 
         # -- Construct the scons params object.
         scons_params = self.construct_scons_params(
+            target_params=(
+                TargetParams(build=build_params) if build_params else None
+            ),
             verbosity=verbosity,
         )
 
@@ -180,12 +315,414 @@ class SConsManager:
         return self._run_scons_subprocess("build", scons_params=scons_params)
 
     @on_exception(exit_code=1)
-    def report(self, verbosity: Verbosity) -> Optional[int]:
+    def build_all_envs(
+        self,
+        verbosity: Verbosity,
+        max_jobs: int,
+        build_params: Optional[BuildParams] = None,
+    ) -> int:
+        """Builds all the envs of apio.ini by running concurrently up to
+        max_jobs scons 'build' subprocesses, each in its own _build/<env>
+        directory. The output of each env is printed as a single block once
+        the env completes, followed by a combined summary. Returns 0 if all
+        the envs were built successfully."""
+
+        # pylint: disable=too-many-locals
+        # pylint: disable=protected-access
+
+        # -- Create a shortcut.
+        apio_ctx = self.apio_ctx
+
+        # -- Set the env vars once, before forking the per env contexts. The
+        # -- forked contexts inherit the set state, so their calls to
+        # -- set_env_for_packages() in _prepare_scons_cmd() are no-ops.
+        apio_ctx.set_env_for_packages()
+
+        # -- Prepare the scons command of each env. This also writes the
+        # -- scons.params file of each env. The project and the definitions
+        # -- are loaded only once and are shared by all the envs.
+        env_cmds: List[Tuple[str, str, List[str]]] = []
+        for env_name in apio_ctx.project.env_names:
+            env_ctx = apio_ctx.with_env(env_name)
+            env_scons = SConsManager(env_ctx)
+            scons_params = env_scons.construct_scons_params(
+                target_params=(
+                    TargetParams(build=build_params) if build_params else None
+                ),
+                verbosity=verbosity,
+            )
+            cmd = env_scons._prepare_scons_cmd(
+                "build", scons_params=scons_params
+            )
+            env_cmds.append(
+                (env_name, env_ctx.project_resources.board_id, cmd)
+            )
+
+        # -- Get the terminal width (typically 80)
+        terminal_width = self._terminal_width()
+
+        # -- Read the time (for measuring how long does it take
+        # -- to execute the apio command)
+        start_time = time.time()
+
+        if apio_events.is_enabled():
+            apio_events.emit(
+                "command_start",
+                target="build",
+                envs=[env_name for env_name, _, _ in env_cmds],
+            )
+
+        # -- Run the env builds concurrently and print the output of each
+        # -- env as soon as it completes.
+        results: List[EnvBuildResult] = []
+        with ThreadPoolExecutor(max_workers=max_jobs) as executor:
+            futures = [
+                executor.submit(self._run_buffered_scons_cmd, *env_cmd)
+                for env_cmd in env_cmds
+            ]
+            for future in as_completed(futures):
+                env_result: EnvBuildResult = future.result()
+                results.append(env_result)
+                self._print_env_build_output(env_result, terminal_width)
+
+        # -- Preserve the apio.ini order in the summary.
+        env_order = [env_name for env_name, _, _ in env_cmds]
+        results.sort(key=lambda r: env_order.index(r.env_name))
+
+        # -- Print the combined summary.
+        self._print_all_envs_summary(results)
+
+        # -- Complete the build profiles of the envs and record the
+        # -- successful builds in the build history.
+        for r in results:
+            self._complete_build_profile(r.env_name, r.duration)
+            if r.exit_code == 0:
+                self._record_build_history(
+                    apio_ctx.with_env(r.env_name), r.duration
+                )
+                if apio_events.is_enabled():
+                    self._emit_utilization_event(r.env_name)
+
+        # -- Calculate the time it took to execute the command
+        duration = time.time() - start_time
+
+        failed = [r for r in results if r.exit_code != 0]
+        if apio_events.is_enabled():
+            apio_events.emit(
+                "command_end",
+                target="build",
+                exit_code=1 if failed else 0,
+                duration_sec=round(duration, 3),
+                failed_envs=[r.env_name for r in failed],
+            )
+
+        # -- Print the status line.
+        summary = (
+            f"{util.plurality(results, 'env')}, "
+            f"{len(failed)} failed, took {duration:.2f} seconds"
+        )
+        self._print_status_line(
+            is_error=bool(failed),
+            summary=summary,
+            terminal_width=terminal_width,
+        )
+
+        return 1 if failed else 0
+
+    @staticmethod
+    def _run_buffered_scons_cmd(
+        env_name: str, board_id: str, cmd: List[str]
+    ) -> EnvBuildResult:
+        """Runs a scons command and captures its output instead of
+        printing it. Called from a worker thread of build_all_envs()."""
+
+        # -- Both pipes append to the same list so we preserve the relative
+        # -- order of the stdout and stderr lines.
+        lines: List[Tuple[bool, str, str]] = []
+        lock = threading.Lock()
+
+        def on_line(is_stderr: bool, line: str, terminator: str) -> None:
+            with lock:
+                lines.append((is_stderr, line, terminator))
+
+        start_time = time.time()
+        with apio_trace.span(
+            "scons subprocess", cat="scons", args={"env": env_name}
+        ):
+            result = util.exec_command(
+                cmd,
+                stdout=util.AsyncPipe(
+                    lambda line, term: on_line(False, line, term)
+                ),
+                stderr=util.AsyncPipe(
+                    lambda line, term: on_line(True, line, term)
+                ),
+            )
+        duration = time.time() - start_time
+
+        return EnvBuildResult(
+            env_name=env_name,
+            board_id=board_id,
+            exit_code=result.exit_code,
+            duration=duration,
+            output_lines=lines,
+        )
+
+    @staticmethod
+    def _print_env_build_output(
+        env_result: EnvBuildResult, terminal_width: int
+    ) -> None:
+        """Prints the captured output of a single env build, passing it
+        through the standard scons output filter."""
+
+        # -- Print a horizontal line with the env name.
+        cout("-" * terminal_width)
+        styled_env_name = cstyle(env_result.env_name, style=EMPH1)
+        cout(f"Env {styled_env_name} ({env_result.board_id})")
+
+        # -- Replay the captured lines through a fresh filter, since the
+        # -- filter is stateful.
+        if apio_events.is_enabled():
+            scons_filter = JsonlFilter(env_result.env_name)
+        else:
+            scons_filter = SconsFilter(
+                colors_enabled=apio_console.is_colors_enabled()
+            )
+        for is_stderr, line, terminator in env_result.output_lines:
+            if is_stderr:
+                scons_filter.on_stderr_line(line, terminator)
+            else:
+                scons_filter.on_stdout_line(line, terminator)
+
+    @staticmethod
+    def _print_all_envs_summary(results: List[EnvBuildResult]) -> None:
+        """Prints a summary table of the 'apio build --all-envs' results."""
+
+        # -- Summary table
+        table = Table(
+            show_header=True,
+            show_lines=False,
+            box=box.SQUARE,
+            border_style=BORDER,
+            title="All envs build summary",
+            title_justify="left",
+            padding=(0, 2),
+        )
+
+        # -- Add columns.
+        table.add_column("ENV", no_wrap=True)
+        table.add_column("BOARD", no_wrap=True)
+        table.add_column("STATUS", no_wrap=True)
+        table.add_column("TIME", no_wrap=True, justify="right")
+        table.add_column("MAX USED RESOURCE", no_wrap=True)
+        table.add_column("MIN FMAX", no_wrap=True, justify="right")
+
+        # -- Add rows
+        for r in results:
+            max_resource_str = ""
+            min_fmax_str = ""
+            if r.exit_code == 0:
+                status = cstyle("OK", style=SUCCESS)
+                # -- The build report of a successful build is expected to
+                # -- exist.
+                report = read_build_report(
+                    env_build_path(r.env_name) / "hardware.pnr"
+                )
+                res = report.max_used_resource()
+                if res:
+                    max_resource_str = f"{res.name} {int(res.percentage)}%"
+                clk = report.min_fmax_clock()
+                if clk:
+                    min_fmax_str = f"{clk.fmax_mhz:.2f} MHz"
+            else:
+                status = cstyle("FAILED", style=ERROR)
+
+            table.add_row(
+                r.env_name,
+                r.board_id,
+                status,
+                f"{r.duration:.2f}s",
+                max_resource_str,
+                min_fmax_str,
+            )
+
+        # -- Render the table.
+        cout()
+        ctable(table)
+
+    @staticmethod
+    def _complete_build_profile(env_name: str, total_sec: float) -> None:
+        """Adds the total duration of the scons subprocess to the build
+        profile that the scons subprocess wrote for the given env and prints
+        it if APIO_PROFILE is defined."""
+
+        # -- Read the profile. It may not exist, for example if scons
+        # -- failed before executing any action.
+        profile_path = env_build_path(env_name) / BUILD_PROFILE_FILE_NAME
+        profile = read_build_profile(profile_path)
+        if not profile:
+            return
+
+        # -- Update the profile file with the total time.
+        profile = replace(profile, total_sec=total_sec)
+        write_build_profile(profile_path, profile)
+
+        # -- Print the profile table if requested.
+        if env_options.is_defined(env_options.APIO_PROFILE):
+            SConsManager._print_build_profile(profile)
+
+    @staticmethod
+    def _record_build_history(apio_ctx: ApioContext, total_sec: float) -> None:
+        """Appends the build report of a successful build of the context's
+        env to the build history, unless it's identical to the last build
+        of the env, e.g. if the build was up to date, and warns about
+        regressions compared to the last build. Database errors are
+        reported only in debug mode since the history should not fail the
+        command."""
+
+        env_name = apio_ctx.project.env_name
+        build_path = env_build_path(env_name)
+        pnr_path = build_path / "hardware.pnr"
+        if not pnr_path.is_file():
+            return
+
+        thresholds = regression_thresholds(
+            apio_ctx.project.get_str_option("fmax-regression-threshold"),
+            apio_ctx.project.get_str_option(
+                "utilization-regression-threshold"
+            ),
+        )
+
+        pnr_sha256 = file_sha256(pnr_path)
+
+        # -- The seed of a seed sweep overrides the apio.ini seed, which
+        # -- the sweep ignores.
+        seed = read_sweep_seed(build_path / SEED_SWEEP_FILE_NAME, pnr_sha256)
+        if seed is None:
+            seed = nextpnr_seed(
+                apio_ctx.project.get_list_option("nextpnr-extra-options", [])
+            )
+        db_path = apio_ctx.apio_home_dir / BUILD_HISTORY_FILE_NAME
+        try:
+            with BuildHistory(db_path) as history:
+                last = history.records(apio_ctx.project_dir, env_name, 1)
+                if last and last[0].pnr_sha256 == pnr_sha256:
+                    return
+                record = BuildRecord(
+                    env_name=env_name,
+                    board_id=apio_ctx.project_resources.board_id,
+                    timestamp=datetime.now().isoformat(timespec="seconds"),
+                    git_commit=git_commit(apio_ctx.project_dir),
+                    seed=seed,
+                    total_sec=total_sec,
+                    stages_sec=stage_durations(
+                        read_build_profile(
+                            build_path / BUILD_PROFILE_FILE_NAME
+                        )
+                    ),
+                    report=read_build_report(pnr_path),
+                    pnr_sha256=pnr_sha256,
+                )
+                history.add(apio_ctx.project_dir, record)
+        except (sqlite3.Error, OSError) as e:
+            if util.is_debug(1):
+                cout(f"Failed to update the build history: {e}")
+            return
+
+        # -- Warn about regressions.
+        if last:
+            for regression in find_regressions(
+                last[0].report, record.report, thresholds
+            ):
+                cwarning(f"Env '{env_name}' regressed: {regression.summary()}")
+
+    @staticmethod
+    def _emit_utilization_event(env_name: str) -> None:
+        """Writes the utilization event of a successful build of the given
+        env, for '--output-format jsonl'."""
+        pnr_path = env_build_path(env_name) / "hardware.pnr"
+        if not pnr_path.is_file():
+            return
+        report = read_build_report(pnr_path)
+        apio_events.emit(
+            "utilization",
+            env=env_name,
+            resources={
+                r.name: {
+                    "used": r.used,
+                    "available": r.available,
+                    "percentage": round(r.percentage, 2),
+                }
+                for r in report.resources
+            },
+            clocks={c.name: {"fmax_mhz": c.fmax_mhz} for c in report.clocks},
+        )
+
+    @staticmethod
+    def _print_build_profile(profile: BuildProfile) -> None:
+        """Prints a table with the resources used by each of the scons
+        actions of the build profile."""
+
+        # -- Profile table
+        table = Table(
+            show_header=True,
+            show_lines=False,
+            box=box.SQUARE,
+            border_style=BORDER,
+            title=f"Build profile of env '{profile.env_name}'",
+            title_justify="left",
+            padding=(0, 2),
+        )
+
+        # -- Add columns.
+        table.add_column("STAGE", no_wrap=True)
+        table.add_column("TOOL", no_wrap=True)
+        table.add_column("WALL", no_wrap=True, justify="right")
+        table.add_column("CPU", no_wrap=True, justify="right")
+        table.add_column("PEAK RSS", no_wrap=True, justify="right")
+
+        # -- Add a row per action. cpu and rss are not available on
+        # -- windows.
+        for a in profile.actions:
+            stage = (
+                a.stage
+                if a.exit_code == 0
+                else cstyle(f"{a.stage} (failed)", style=ERROR)
+            )
+            table.add_row(
+                stage,
+                a.tool,
+                f"{a.wall_sec:.2f}s",
+                "" if a.cpu_sec is None else f"{a.cpu_sec:.2f}s",
+                ("" if a.peak_rss_mb is None else f"{a.peak_rss_mb:.1f} MB"),
+            )
+
+        # -- Add a row with the time that was not spent in the actions,
+        # -- e.g. python startup, source scanning and dependency analysis.
+        if profile.total_sec is not None:
+            overhead = max(0.0, profile.total_sec - profile.actions_wall_sec)
+            table.add_row(
+                cstyle("apio/scons overhead", style=EMPH1),
+                "",
+                f"{overhead:.2f}s",
+                "",
+                "",
+            )
+
+        # -- Render the table.
+        cout()
+        ctable(table)
+
+    @on_exception(exit_code=1)
+    def report(
+        self, report_params: ReportParams, verbosity: Verbosity
+    ) -> Optional[int]:
         """Runs a scons subprocess with the 'report' target. Returns process
         exit code, 0 if ok."""
 
         # -- Construct the scons params object.
         scons_params = self.construct_scons_params(
+            target_params=TargetParams(report=report_params),
             verbosity=verbosity,
         )
 
@@ -322,6 +859,7 @@ class SConsManager:
                 terminal_mode=(
                     FORCE_TERMINAL
                     if apio_console.is_terminal()
+                    and not apio_events.is_enabled()
                     else FORCE_PIPE
                 ),
                 theme_name=apio_console.current_theme_name(),
@@ -331,6 +869,8 @@ class SConsManager:
                 scons_shell_id=apio_ctx.scons_shell_id,
                 xilinx_prjxray_db_path=openxc7_set_vars["PRJXRAY_DB_DIR"],
                 xilinx_chipdb_path=openxc7_set_vars["CHIPDB_DIR"],
+                cache_dir=str(apio_ctx.get_cache_dir()),
+                output_events=apio_events.is_enabled(),
             )
         )
         assert result.environment.IsInitialized(), result
@@ -359,6 +899,12 @@ class SConsManager:
                 constraint_file=apio_ctx.project.get_str_option(
                     "constraint-file", None
                 ),
+                waveform_format=apio_ctx.project.get_str_option(
+                    "waveform-format", DEFAULT_WAVEFORM_FORMAT
+                ),
+                sim_engine=apio_ctx.project.get_str_option(
+                    "sim-engine", DEFAULT_SIM_ENGINE
+                ),
             )
         )
         assert result.apio_env_params.IsInitialized(), result
@@ -372,12 +918,11 @@ class SConsManager:
         assert result.IsInitialized(), result
         return result
 
-    def _run_scons_subprocess(
+    def _prepare_scons_cmd(
         self, scons_target: str, *, scons_params: SconsParams
-    ) -> Optional[int]:
-        """Invoke an scons subprocess."""
-
-        # pylint: disable=too-many-locals
+    ) -> List[str]:
+        """Writes the scons params file of the env and returns the command
+        line of the scons subprocess."""
 
         # -- Create a shortcut.
         apio_ctx = self.apio_ctx
@@ -412,21 +957,6 @@ class SConsManager:
             cout(f"* scons params: \n{scons_params}")
             cout()
 
-        # -- Get the terminal width (typically 80)
-        terminal_width, _ = shutil.get_terminal_size()
-
-        # -- Read the time (for measuring how long does it take
-        # -- to execute the apio command)
-        start_time = time.time()
-
-        # -- Subtracting 1 to avoid line overflow on windows, Observed with
-        # -- Windows 10 and cmd.exe shell.
-        if apio_ctx.is_windows:
-            terminal_width -= 1
-
-        # -- Print a horizontal line
-        cout("-" * terminal_width)
-
         # -- Create the scons debug options. See details at
         # -- https://scons.org/doc/2.4.1/HTML/scons-man.html
         debug_options = (
@@ -435,6 +965,17 @@ class SConsManager:
             else []
         )
 
+        # -- With 'apio test --junit-xml', run all the testbenches also if
+        # -- some of them fail to compile or to pass, so all of them are
+        # -- reported. (keep_going can't be set with SetOption() in the
+        # -- SConstruct.)
+        keep_going_options = (
+            ["--keep-going"]
+            if scons_params.target.HasField("test")
+            and scons_params.target.test.record_results
+            else []
+        )
+
         # -- Construct the scons command line.
         # --
         # -- sys.executable is resolved to the full path of the python
@@ -448,15 +989,10 @@ class SConsManager:
             [sys.executable, "-m", "apio", "--scons"]
             + ["-Q", scons_target]
             + debug_options
+            + keep_going_options
             + variables
         )
 
-        # -- An output filter that manipulates the scons stdout/err lines as
-        # -- needed and write them to stdout.
-        scons_filter = SconsFilter(
-            colors_enabled=apio_console.is_colors_enabled()
-        )
-
         # -- Write the scons parameters to a temp file in the build
         # -- directory. It will be cleaned up as part of 'apio cleanup'.
         # -- At this point, the project is the current directory, even if
@@ -468,18 +1004,27 @@ class SConsManager:
         if util.is_debug(1):
             cout(f"\nFull scons command: {cmd}\n\n")
 
-        # -- Execute the scons builder!
-        result = util.exec_command(
-            cmd,
-            stdout=util.AsyncPipe(scons_filter.on_stdout_line),
-            stderr=util.AsyncPipe(scons_filter.on_stderr_line),
-        )
+        return cmd
 
-        # -- Is there an error? True/False
-        is_error = result.exit_code != 0
+    def _terminal_width(self) -> int:
+        """Returns the width to use for the horizontal separator lines."""
 
-        # -- Calculate the time it took to execute the command
-        duration = time.time() - start_time
+        # -- Get the terminal width (typically 80)
+        terminal_width, _ = shutil.get_terminal_size()
+
+        # -- Subtracting 1 to avoid line overflow on windows, Observed with
+        # -- Windows 10 and cmd.exe shell.
+        if self.apio_ctx.is_windows:
+            terminal_width -= 1
+
+        return terminal_width
+
+    @staticmethod
+    def _print_status_line(
+        is_error: bool, summary: str, terminal_width: int
+    ) -> None:
+        """Prints a centered status line such as
+        '===== [SUCCESS] Took 2.13 seconds ====='."""
 
         # -- Determine status message
         if is_error:
@@ -487,9 +1032,6 @@ class SConsManager:
         else:
             styled_status = cstyle("SUCCESS", style=SUCCESS)
 
-        # -- Determine the summary text
-        summary = f"Took {duration:.2f} seconds"
-
         # -- Construct the entire message.
         styled_msg = f" [{styled_status}] {summary} "
         msg_len = len(cunstyle(styled_msg))
@@ -503,5 +1045,78 @@ class SConsManager:
         # -- Print the entire line.
         cout(f"{'=' * pad1_len}{styled_msg}{'=' * pad2_len}")
 
+    def _run_scons_subprocess(
+        self, scons_target: str, *, scons_params: SconsParams
+    ) -> Optional[int]:
+        """Invoke an scons subprocess."""
+
+        # -- Construct the scons command and write the params file.
+        cmd = self._prepare_scons_cmd(scons_target, scons_params=scons_params)
+
+        # -- Get the terminal width (typically 80)
+        terminal_width = self._terminal_width()
+
+        # -- Read the time (for measuring how long does it take
+        # -- to execute the apio command)
+        start_time = time.time()
+
+        # -- Print a horizontal line
+        cout("-" * terminal_width)
+
+        # -- An output filter that manipulates the scons stdout/err lines as
+        # -- needed and write them to stdout, or with '--output-format jsonl',
+        # -- writes them as events.
+        env_name = self.apio_ctx.project.env_name
+        if apio_events.is_enabled():
+            apio_events.emit(
+                "command_start",
+                target=scons_target,
+                env=env_name,
+                board=self.apio_ctx.project_resources.board_id,
+            )
+            scons_filter = JsonlFilter(env_name)
+        else:
+            scons_filter = SconsFilter(
+                colors_enabled=apio_console.is_colors_enabled()
+            )
+
+        # -- Execute the scons builder!
+        with apio_trace.span(
+            "scons subprocess", cat="scons", args={"target": scons_target}
+        ):
+            result = util.exec_command(
+                cmd,
+                stdout=util.AsyncPipe(scons_filter.on_stdout_line),
+                stderr=util.AsyncPipe(scons_filter.on_stderr_line),
+            )
+
+        # -- Calculate the time it took to execute the command
+        duration = time.time() - start_time
+
+        # -- Complete the build profile that scons wrote.
+        self._complete_build_profile(env_name, duration)
+
+        # -- Record successful builds in the build history.
+        if result.exit_code == 0 and scons_target in _BUILD_HISTORY_TARGETS:
+            self._record_build_history(self.apio_ctx, duration)
+            if apio_events.is_enabled():
+                self._emit_utilization_event(env_name)
+
+        if apio_events.is_enabled():
+            apio_events.emit(
+                "command_end",
+                target=scons_target,
+                env=env_name,
+                exit_code=result.exit_code,
+                duration_sec=round(duration, 3),
+            )
+
+        # -- Print the status line.
+        self._print_status_line(
+            is_error=result.exit_code != 0,
+            summary=f"Took {duration:.2f} seconds",
+            terminal_width=terminal_width,
+        )
+
         # -- Return the exit code
         return result.exit_code
@@ -10,15 +10,42 @@
 """A class with common services for the apio scons handlers."""
 
 import os
-from typing import List, Optional, Any
+import sys
+import time
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+from typing import IO, List, Optional, Any
 from SCons.Script.SConscript import SConsEnvironment
 from SCons.Environment import BuilderWrapper
 import SCons.Defaults
+from apio.common import apio_events, apio_trace
 from apio.common.apio_console import cout
 from apio.common.apio_styles import EMPH3
 from apio.common.common_util import env_build_path
+from apio.common.build_profile import (
+    BUILD_PROFILE_FILE_NAME,
+    ActionProfile,
+    classify_action,
+    action_testbench,
+    new_build_profile,
+    write_build_profile,
+)
+from apio.common.testbench_results import (
+    TEST_RESULTS_DIR_NAME,
+    TESTBENCH_DURATIONS_FILE_NAME,
+    TestbenchResult,
+    write_testbench_result,
+    record_testbench_duration,
+)
 from apio.common.proto.apio_pb2 import SconsParams
 
+# -- An environment variable that marks the commands that rerun a failing
+# -- testbench to dump its signals, with 'apio test --no-dump'. They are
+# -- not recorded as runs of the testbench.
+DUMP_RERUN_ENV_VAR = "APIO_DUMP_RERUN"
+
 
 class ApioEnv:
     """Provides abstracted scons env and other user services."""
@@ -72,6 +99,11 @@ class ApioEnv:
         dir."""
         return env_build_path(self.env_name)
 
+    def seed_target(self, seed: int) -> str:
+        """Returns the base target of the place-and-route outputs of the
+        given nextpnr seed. Used by 'apio build --seed-sweep'."""
+        return str(self.env_build_path / "seeds" / f"seed-{seed}" / "hardware")
+
     @property
     def is_windows(self):
         """Returns True if we run on windows."""
@@ -140,6 +172,228 @@ class ApioEnv:
             self.scons_env.AlwaysBuild(target)
         return target
 
+    def enable_action_profiling(self) -> None:
+        """Wraps the scons spawn function such that the wall time, cpu time
+        and peak memory of each command action are recorded in the env's
+        build-profile.json file. The duration of each testbench run is also
+        recorded in testbench-durations.json, and with 'apio test
+        --junit-xml', its output and result in the test-results dir. Called
+        once by the scons handler, before any action is executed."""
+
+        # pylint: disable=too-many-statements
+
+        # -- The original spawn function of the platform.
+        original_spawn = self.scons_env["SPAWN"]
+
+        # -- Start with an empty profile, so stale results of a previous
+        # -- run are not reported if nothing needs to be rebuilt.
+        profile = new_build_profile(
+            self.env_name, ",".join(self.command_line_targets)
+        )
+        profile_path = self.env_build_path / BUILD_PROFILE_FILE_NAME
+        write_build_profile(profile_path, profile)
+
+        # -- The recorded durations of the testbenches, for balancing the
+        # -- shards of 'apio test --shard'.
+        durations_path = self.env_build_path / TESTBENCH_DURATIONS_FILE_NAME
+
+        # -- Actions may run in parallel (e.g. 'apio build --seed-sweep').
+        lock = threading.Lock()
+
+        # -- If true, write the actions events for '--output-format jsonl'.
+        output_events = self.params.environment.output_events
+
+        # -- If set, capture the output and the result of each testbench for
+        # -- 'apio test --junit-xml'. We start with an empty results dir,
+        # -- as with the profile.
+        results_dir = None
+        if (
+            self.params.target.HasField("test")
+            and self.params.target.test.record_results
+        ):
+            results_dir = self.env_build_path / TEST_RESULTS_DIR_NAME
+            shutil.rmtree(results_dir, ignore_errors=True)
+
+        def profiling_spawn(sh, escape, cmd, args, env):
+            # pylint: disable=too-many-locals
+
+            # -- The signals dump rerun of a failing testbench was already
+            # -- recorded as a testbench run.
+            if env and env.get(DUMP_RERUN_ENV_VAR):
+                return original_spawn(sh, escape, cmd, args, env)
+
+            stage, tool = classify_action(" ".join(args))
+            testbench = self._testbench_name(" ".join(args))
+            capture = results_dir is not None and testbench is not None
+            # -- Popen args that capture the merged stdout and stderr.
+            capture_args = (
+                {
+                    "stdout": subprocess.PIPE,
+                    "stderr": subprocess.STDOUT,
+                    "text": True,
+                    "errors": "replace",
+                }
+                if capture
+                else {}
+            )
+            output = ""
+            if output_events:
+                with lock:
+                    self._write_event("stage_start", stage=stage, tool=tool)
+            start_time = time.perf_counter()
+            start_us = apio_trace.now_us()
+            cpu_sec = None
+            peak_rss_mb = None
+            if hasattr(os, "wait4"):
+                # -- Same as the posix scons spawn, but collects the
+                # -- resource usage of the child process.
+                _ = (escape, cmd)
+                # pylint: disable=consider-using-with
+                proc = subprocess.Popen(
+                    [sh, "-c", " ".join(args)],
+                    env=env,
+                    close_fds=True,
+                    **capture_args,
+                )
+                if capture:
+                    output = self._tee_output(proc.stdout)
+                _, status, rusage = os.wait4(proc.pid, 0)
+                exit_code = os.waitstatus_to_exitcode(status)
+                # -- Let the Popen object know the process was reaped.
+                proc.returncode = exit_code
+                cpu_sec = rusage.ru_utime + rusage.ru_stime
+                # -- ru_maxrss is in bytes on macOS and in KB on linux.
+                rss_kb = (
+                    rusage.ru_maxrss / 1024
+                    if sys.platform == "darwin"
+                    else rusage.ru_maxrss
+                )
+                peak_rss_mb = rss_kb / 1024
+            elif capture:
+                # -- On windows, with the testbench output captured.
+                proc = subprocess.Popen(
+                    " ".join(args), shell=True, env=env, **capture_args
+                )
+                output = self._tee_output(proc.stdout)
+                exit_code = proc.wait()
+            else:
+                # -- On windows, we measure only the wall time.
+                exit_code = original_spawn(sh, escape, cmd, args, env)
+            wall_sec = time.perf_counter() - start_time
+
+            # -- Record the action and update the profile file.
+            apio_trace.complete(
+                f"{stage} ({tool})",
+                start_us=start_us,
+                cat="action",
+                args={
+                    "cmd": " ".join(args),
+                    "cpu_sec": cpu_sec,
+                    "peak_rss_mb": peak_rss_mb,
+                    "exit_code": exit_code,
+                },
+            )
+            with lock:
+                profile.actions.append(
+                    ActionProfile(
+                        stage=stage,
+                        tool=tool,
+                        wall_sec=wall_sec,
+                        cpu_sec=cpu_sec,
+                        peak_rss_mb=peak_rss_mb,
+                        exit_code=exit_code,
+                    )
+                )
+                write_build_profile(profile_path, profile)
+                if testbench:
+                    record_testbench_duration(
+                        durations_path, testbench, wall_sec
+                    )
+                if output_events:
+                    self._write_action_events(
+                        stage, tool, testbench, exit_code, wall_sec
+                    )
+
+            if capture:
+                write_testbench_result(
+                    results_dir,
+                    TestbenchResult(
+                        testbench=testbench,
+                        exit_code=exit_code,
+                        duration_sec=round(wall_sec, 3),
+                        output=output,
+                    ),
+                )
+
+            return exit_code
+
+        self.scons_env["SPAWN"] = profiling_spawn
+
+    @staticmethod
+    def _write_event(event: str, **fields: Any) -> None:
+        """Writes an event marker line to stdout, for the apio process. The
+        line is written with a single write, so it's not split by output of
+        other threads."""
+        sys.stdout.write(apio_events.marker_line(event, **fields) + "\n")
+        sys.stdout.flush()
+
+    @staticmethod
+    def _tee_output(stream: IO[str]) -> str:
+        """Copies the output of a command to stdout, as it arrives, and
+        returns it. Closes the stream at the end."""
+        lines = []
+        with stream:
+            for line in stream:
+                sys.stdout.write(line)
+                sys.stdout.flush()
+                lines.append(line)
+        return "".join(lines)
+
+    def _testbench_name(self, cmd: str) -> Optional[str]:
+        """If the command line of an action runs a testbench, returns the
+        testbench path relative to the env build dir, without suffix, e.g.
+        'main_tb' or 'tests/uart_tb'. Otherwise returns None."""
+        testbench = action_testbench(cmd)
+        if not testbench:
+            return None
+        build_path = self.env_build_path
+        if Path(testbench).is_absolute():
+            build_path = build_path.absolute()
+        tb_path = Path(testbench).with_suffix("")
+        if tb_path.is_relative_to(build_path):
+            tb_path = tb_path.relative_to(build_path)
+        return tb_path.as_posix()
+
+    def _write_action_events(
+        self,
+        stage: str,
+        tool: str,
+        testbench: Optional[str],
+        exit_code: int,
+        wall_sec: float,
+    ) -> None:
+        """Writes the events of a completed command action. testbench is the
+        name of the testbench that the action ran, if any."""
+
+        # pylint: disable=too-many-arguments
+        # pylint: disable=too-many-positional-arguments
+
+        self._write_event(
+            "stage_end",
+            stage=stage,
+            tool=tool,
+            exit_code=exit_code,
+            duration_sec=round(wall_sec, 3),
+        )
+
+        if testbench:
+            self._write_event(
+                "testbench",
+                testbench=testbench,
+                status="passed" if exit_code == 0 else "failed",
+                duration_sec=round(wall_sec, 3),
+            )
+
     def dump_env_vars(self) -> None:
         """Prints a list of the environment variables. For debugging."""
         sc = self.scons_env
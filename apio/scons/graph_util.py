@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2025 FPGAwars
+# -- License GPLv2
+"""Utilities of the 'apio graph' command. Each graph is generated by its own
+scons targets, a yosys .dot target and a graphviz rendering target, whose
+sources are the files that yosys reads for the graphed module. Scons
+regenerates a graph only if these files, the graphed module or the output
+type changed. With the per-module option, a graph is generated for each of
+the modules of the top module's hierarchy, optionally pruned by depth and
+by a module name pattern, and the graphs are generated in parallel."""
+
+import fnmatch
+import webbrowser
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Dict, Optional
+from SCons.Action import Action, FunctionAction
+from SCons.Node.FS import File
+from SCons.Node.Alias import Alias
+from SCons.Script.SConscript import SConsEnvironment
+from apio.common.apio_console import cout
+from apio.common.apio_styles import SUCCESS
+from apio.scons.source_facts import get_source_facts
+from apio.scons.lint_util import module_closure
+
+# -- The name of the construction variable with the name of the module that
+# -- a yosys .dot target graphs.
+GRAPH_TOP_VAR = "GRAPH_TOP"
+
+
+@dataclass(frozen=True)
+class GraphUnit:
+    """A module to graph and the source files that yosys reads for it."""
+
+    # -- The graphed module.
+    module: str
+    # -- The source files of the module's instantiation closure, sorted.
+    files: List[str]
+
+
+def module_depths(top_module: str, synth_srcs: List[str]) -> Dict[str, int]:
+    """Returns the modules of the top module's hierarchy and the number of
+    instantiation levels of each below the top module, which has depth 0.
+    The instantiations are resolved at file level, so a module is assumed
+    to instantiate the modules that any module of its file instantiates."""
+
+    # -- Map the declared modules to their files.
+    module_files: Dict[str, List[str]] = {}
+    for file in synth_srcs:
+        for module in get_source_facts(file).modules:
+            module_files.setdefault(module, []).append(file)
+
+    # -- Breadth first traversal of the instantiation graph.
+    depths = {top_module: 0}
+    pending = [top_module]
+    while pending:
+        module = pending.pop(0)
+        for file in module_files.get(module, []):
+            for instance in get_source_facts(file).instances:
+                if instance in module_files and instance not in depths:
+                    depths[instance] = depths[module] + 1
+                    pending.append(instance)
+    return depths
+
+
+def get_graph_units(
+    synth_srcs: List[str],
+    top_module: str,
+    *,
+    per_module: bool,
+    max_depth: Optional[int],
+    module_filter: Optional[str],
+) -> List[GraphUnit]:
+    """Returns the modules to graph. The graph of the top module reads all
+    the files, as the synthesis does. With the per-module option, the graph
+    of each module reads the files of its closure, or all the files if the
+    module is not declared in any file or its closure can't be resolved,
+    and yosys reports the errors."""
+
+    if not per_module:
+        return [GraphUnit(module=top_module, files=sorted(synth_srcs))]
+
+    def unit(module: str) -> GraphUnit:
+        """Returns the graph unit of the given module."""
+        roots = [
+            f for f in synth_srcs if module in get_source_facts(f).modules
+        ]
+        files = (
+            module_closure(roots, synth_srcs) if roots else sorted(synth_srcs)
+        )
+        return GraphUnit(module=module, files=files)
+
+    depths = module_depths(top_module, synth_srcs)
+    modules = [
+        module
+        for module, depth in sorted(depths.items(), key=lambda x: x[1])
+        if (max_depth is None or depth <= max_depth)
+        and (not module_filter or fnmatch.fnmatchcase(module, module_filter))
+    ]
+    return [unit(module) for module in modules]
+
+
+def graph_report_action(open_viewer: bool) -> FunctionAction:
+    """Returns an action that reports the rendered graph files, fresh or
+    cached, which are the sources of the action, and if requested and
+    there is a single graph, opens it in the default browser."""
+
+    def report_graphs(
+        target: List[Alias], source: List[File], env: SConsEnvironment
+    ) -> int:
+        """The action function."""
+        _ = (target, env)  # Unused
+        for graph_file in source:
+            cout(f"Generated {str(graph_file)}", style=SUCCESS)
+        if not source:
+            cout("No modules to graph.")
+        elif open_viewer and len(source) == 1:
+            cout("Opening default browser")
+            file_path = Path(source[0].get_abspath())
+            webbrowser.get().open(file_path.resolve().as_uri())
+        elif open_viewer:
+            cout("Not opening a viewer for multiple graphs")
+        else:
+            cout("User requested no graph viewer")
+        return 0
+
+    return Action(report_graphs, strfunction=None)
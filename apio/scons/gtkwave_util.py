@@ -5,8 +5,8 @@
 import re
 import sys
 from pathlib import Path
-from vcdvcd import VCDVCD
 from apio.common.apio_console import cerror
+from apio.scons.vcd_util import VcdHeaderError, read_vcd_header
 
 GTKW_AUTO_FILE_MARKER = "THIS FILE WAS GENERATED AUTOMATICALLY BY APIO"
 
@@ -34,25 +34,35 @@ def _get_gtkw_file_header(testbench_path: str) -> str:
 
 
 def create_gtkwave_file(
-    testbench_path: str, vcd_path: str, gtkw_path: str
+    testbench_path: str, waveform_path: str, gtkw_path: str
 ) -> None:
-    """Generates a GTKWave configuration file from a VCD file.
+    """Generates a GTKWave configuration file from a waveform file.
 
     Args:
         testbench_path (str): Path to the simulated testbench.
-        vcd_path (str): Path to the input VCD file.
+        waveform_path (str): Path to the input VCD, FST or LXT2 file.
         gtkw_path (str): Path to the output GTKWave configuration file.
     """
 
     # -- Pattern for top levels signals. E.g. 'testbench.CLK'.
     pattern = re.compile(r"^[^.]+[.][^.]+$")
 
-    # -- Parse the vcd file and load the signals that match the pattern.
-    # -- Do not load the actual signals values, just the metadata.
-    vcd = VCDVCD(vcd_path, signal_res=[pattern], store_tvs=False)
+    # -- Parse only the header of the waveform file, which is typically a
+    # -- tiny fraction of the file.
+    try:
+        vcd_header = read_vcd_header(waveform_path)
+    except (OSError, VcdHeaderError) as e:
+        cerror(f"Failed to read the signals of {waveform_path}", str(e))
+        sys.exit(1)
 
-    # -- Get a list with raw names of matching signals.
-    signals = list(vcd.references_to_ids.keys())
+    # -- Get a list with raw names of matching signals, without duplicates.
+    signals = list(
+        dict.fromkeys(
+            var.reference
+            for var in vcd_header.all_vars()
+            if pattern.match(var.reference)
+        )
+    )
 
     # -- Sort, case insensitive.
     signals.sort(key=str.casefold)
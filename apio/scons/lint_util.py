@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2025 FPGAwars
+# -- License GPLv2
+"""Utilities of 'apio lint --incremental'. The project is split into lint
+units, one for the top module and one per testbench, each with the source
+files of its module instantiation closure. Each unit is linted by a
+separate scons target whose result is cached in the build directory, so
+scons re-lints only the units whose files, include dependencies or
+verilator flags changed, and the cached results of the other units are
+replayed."""
+
+import json
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Dict, Optional
+from SCons.Action import Action, FunctionAction
+from SCons.Node.FS import File
+from SCons.Node.Alias import Alias
+from SCons.Script.SConscript import SConsEnvironment
+from apio.common.common_util import has_testbench_name
+from apio.scons.source_facts import get_source_facts
+
+# -- The name of the construction variable with the --top-module arg of
+# -- the verilator command of a lint unit.
+LINT_TOP_ARG_VAR = "LINT_TOP_ARG"
+
+# -- The suffix of the files with the cached lint results.
+LINT_RESULT_SUFFIX = ".lint"
+
+
+@dataclass(frozen=True)
+class LintUnit:
+    """A set of source files that is linted by a single verilator
+    invocation."""
+
+    # -- A unique name that is also the result file name, e.g. 'top' or
+    # -- 'tests/main_tb'.
+    name: str
+    # -- The top module of the unit, or None to let verilator find it.
+    top_module: Optional[str]
+    # -- The source files of the unit, sorted.
+    files: List[str]
+
+
+def module_closure(roots: List[str], files: List[str]) -> List[str]:
+    """Returns the sorted list of the given root files and the files of the
+    modules they instantiate and of the packages they reference, directly
+    or indirectly. The modules and packages are looked up in the given
+    files. If a file of the closure instantiates a module or references a
+    package that is not declared in the given files, e.g. a vendor
+    primitive or a name that the facts misread, the closure can't be
+    trusted and all the given files are returned."""
+
+    # -- Map the declared modules and packages to their files.
+    module_files: Dict[str, List[str]] = {}
+    package_files: Dict[str, List[str]] = {}
+    for file in files:
+        facts = get_source_facts(file)
+        for module in facts.modules:
+            module_files.setdefault(module, []).append(file)
+        for package in facts.packages:
+            package_files.setdefault(package, []).append(file)
+
+    # -- Traverse the instantiation and package reference graph.
+    result = set(roots)
+    pending = list(roots)
+    while pending:
+        facts = get_source_facts(pending.pop())
+        dependencies = []
+        for instance in facts.instances:
+            if instance not in module_files:
+                return sorted(set(roots) | set(files))
+            dependencies.extend(module_files[instance])
+        for package in facts.package_refs:
+            if package not in package_files:
+                return sorted(set(roots) | set(files))
+            dependencies.extend(package_files[package])
+        for dependency in dependencies:
+            if dependency not in result:
+                result.add(dependency)
+                pending.append(dependency)
+
+    return sorted(result)
+
+
+def get_lint_units(
+    synth_srcs: List[str], test_srcs: List[str], top_module: Optional[str]
+) -> List[LintUnit]:
+    """Returns the lint units of the project, a unit for the top module and
+    a unit per testbench."""
+
+    units: List[LintUnit] = []
+
+    # -- The top module unit. If the top module is not declared in any
+    # -- file, we lint all the synthesis files and let verilator report it.
+    top_files = [
+        f for f in synth_srcs if top_module in get_source_facts(f).modules
+    ]
+    units.append(
+        LintUnit(
+            name="top",
+            top_module=top_module,
+            files=(
+                module_closure(top_files, synth_srcs)
+                if top_files
+                else sorted(synth_srcs)
+            ),
+        )
+    )
+
+    # -- A unit per testbench. A testbench may instantiate modules of other
+    # -- testbench files, e.g. test helpers.
+    all_srcs = synth_srcs + test_srcs
+    for testbench in test_srcs:
+        assert has_testbench_name(testbench), testbench
+        units.append(
+            LintUnit(
+                name=str(Path(testbench).with_suffix("").as_posix()),
+                top_module=None,
+                files=module_closure([testbench], all_srcs),
+            )
+        )
+
+    return units
+
+
+def cached_lint_action(cmd_template: str) -> FunctionAction:
+    """Returns an action that runs the given verilator lint command and
+    writes its exit code and output to the target result file. The action
+    itself never fails so scons keeps the result and reuses it until the
+    unit changes. The command template is part of the action signature,
+    so changing the verilator flags re-lints the unit."""
+
+    def lint_unit(
+        target: List[File], source: List[File], env: SConsEnvironment
+    ) -> int:
+        """The action function."""
+        cmd = env.subst(cmd_template, target=target, source=source)
+        result = subprocess.run(
+            cmd,
+            shell=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors="replace",
+            check=False,
+        )
+        Path(target[0].get_path()).write_text(
+            json.dumps(
+                {"exit_code": result.returncode, "output": result.stdout}
+            ),
+            encoding="utf-8",
+        )
+        return 0
+
+    return Action(lint_unit, cmdstr=cmd_template, varlist=[LINT_TOP_ARG_VAR])
+
+
+def lint_report_action(unit_names: List[str]) -> FunctionAction:
+    """Returns an action that prints the lint results of the given units,
+    fresh or cached, in the given order, and fails if any of the units
+    failed. The sources of the action are the units result files, in the
+    same order."""
+
+    def report_lint_results(
+        target: List[Alias], source: List[File], env: SConsEnvironment
+    ) -> int:
+        """The action function."""
+        _ = (target, env)  # Unused
+        failed = False
+        for unit_name, result_file in zip(unit_names, source):
+            result = json.loads(
+                Path(result_file.get_path()).read_text(encoding="utf-8")
+            )
+            output: str = result["output"].strip()
+            if output:
+                print(f"[{unit_name}]")
+                print(output, flush=True)
+            failed = failed or result["exit_code"] != 0
+        return 1 if failed else 0
+
+    return Action(report_lint_results, strfunction=None)
@@ -10,10 +10,9 @@
 
 """Apio scons related utilities.."""
 
-from pathlib import Path
+import re
 from dataclasses import dataclass
-from typing import List, cast
-import webbrowser
+from typing import List, Optional, cast
 from SCons.Builder import BuilderBase, CompositeBuilder
 from SCons.Action import Action
 from SCons.Script import Builder
@@ -22,20 +21,26 @@ from SCons.Script.SConscript import SConsEnvironment
 
 # from SCons.Node.Alias import Alias
 from apio.common.apio_console import cout
-from apio.common.apio_styles import SUCCESS
+from apio.common.apio_styles import EMPH3
 from apio.common.common_util import SRC_SUFFIXES
-from apio.scons.apio_env import ApioEnv
+from apio.scons.apio_env import ApioEnv, DUMP_RERUN_ENV_VAR
 from apio.common.proto.apio_pb2 import GraphOutputType
+from apio.scons.graph_util import GRAPH_TOP_VAR
 from apio.scons.plugin_util import (
     verilog_src_scanner,
     get_constraint_file,
     get_define_flags,
+    is_verilator_test,
 )
 
 
 # -- Supported apio graph types.
 SUPPORTED_GRAPH_TYPES = ["svg", "pdf", "png"]
 
+# -- Matches a nextpnr '--seed N' or '--seed=N' option, e.g. in the
+# -- nextpnr-extra-options of apio.ini.
+_NEXTPNR_SEED_OPTION_REGEX = re.compile(r"\s--seed(?:=|\s+)\S+")
+
 
 @dataclass(frozen=True)
 class ArchPluginInfo:
@@ -81,10 +86,33 @@ class PluginBase:
         """Creates and returns the synth builder."""
         raise NotImplementedError("Implement in subclass.")
 
-    def pnr_builder(self) -> BuilderBase:  # pragma: no cover
-        """Creates and returns the pnr builder."""
+    def pnr_builder(
+        self, seed: Optional[int] = None
+    ) -> BuilderBase:  # pragma: no cover
+        """Creates and returns the pnr builder. If seed is specified, the
+        builder passes it to nextpnr and writes its report to the seed's
+        directory."""
         raise NotImplementedError("Implement in subclass.")
 
+    def pnr_report_path(self, seed: Optional[int]) -> str:
+        """Returns the path of the nextpnr report file of the pnr builder with
+        the given optional seed."""
+        if seed is None:
+            return self.apio_env.target + ".pnr"
+        return self.apio_env.seed_target(seed) + ".pnr"
+
+    @staticmethod
+    def pnr_seed_action(action: str, seed: Optional[int]) -> str:
+        """Adapts the nextpnr action string to the given optional seed. With a
+        seed, nextpnr is passed the seed and its errors are ignored by scons
+        (the '-' prefix) so a failing seed doesn't abort the seed sweep. A
+        seed option of the action, e.g. from nextpnr-extra-options, is
+        removed since nextpnr rejects a repeated option."""
+        if seed is None:
+            return action
+        action = _NEXTPNR_SEED_OPTION_REGEX.sub("", action)
+        return f"-{action} --seed {seed}"
+
     def bitstream_builder(self) -> BuilderBase:  # pragma: no cover
         """Creates and returns the bitstream builder."""
         raise NotImplementedError("Implement in subclass.")
@@ -102,15 +130,68 @@ class PluginBase:
             "sim"
         ) or self.apio_env.params.target.HasField("test")
 
+        # -- The waveform format, e.g. 'fst', is both the suffix of the
+        # -- output file and the vvp extended flag that selects it. The
+        # -- extended flags must come after the .out file.
+        waveform_format = self.apio_env.params.apio_env_params.waveform_format
+        dump_action = f"vvp $SOURCE -dumpfile=$TARGET -{waveform_format}"
+
+        # -- With verilator, the compiled testbench is an executable that
+        # -- is run as is. It doesn't dump signals.
+        if is_verilator_test(self.apio_env):
+            return Builder(
+                action='"${SOURCE.abspath}"',
+                suffix=f".{waveform_format}",
+                src_suffix=".out",
+            )
+
+        # -- Normal case, dump the signals.
+        params = self.apio_env.params
+        if not (params.target.HasField("test") and params.target.test.no_dump):
+            return Builder(
+                action=dump_action,
+                suffix=f".{waveform_format}",
+                src_suffix=".out",
+            )
+
+        # -- Here when 'apio test --no-dump'. We run the testbench with
+        # -- vvp's '-none' flag which disables the signals dumping and, if
+        # -- the testbench fails, run it again with dumping to provide the
+        # -- signals file for debugging. The flag is a run time flag so the
+        # -- same compiled testbench is used for both runs.
+        def no_dump_run_action(
+            target: List[File], source: List[File], env: SConsEnvironment
+        ) -> int:
+            """The action function of 'apio test --no-dump'."""
+            exit_code = env.Execute(
+                env.subst("vvp $SOURCE -none", target=target, source=source)
+            )
+            if exit_code:
+                cout(
+                    f"Testbench failed, running {source[0]} again "
+                    f"to generate {target[0]}.",
+                    style=EMPH3,
+                )
+                # -- Mark the rerun so it's not profiled as another run of
+                # -- the testbench.
+                rerun_env = env.Override(
+                    {"ENV": {**env["ENV"], DUMP_RERUN_ENV_VAR: "1"}}
+                )
+                rerun_env.Execute(
+                    env.subst(dump_action, target=target, source=source)
+                )
+            return exit_code
+
         return Builder(
-            action="vvp $SOURCE -dumpfile=$TARGET",
-            suffix=".vcd",
+            action=Action(no_dump_run_action, strfunction=None),
+            suffix=f".{waveform_format}",
             src_suffix=".out",
         )
 
     def yosys_dot_builder(self) -> BuilderBase | CompositeBuilder:
         """Creates and returns the yosys dot builder. Should be called
-        only when serving the graph command."""
+        only when serving the graph command. The graphed module is passed
+        to each target in the GRAPH_TOP construction variable."""
 
         # -- Sanity checks
         assert self.apio_env.targeting_one_of("graph")
@@ -119,26 +200,16 @@ class PluginBase:
         # -- Shortcuts.
         apio_env = self.apio_env
         params = apio_env.params
-        graph_params = params.target.graph
-
-        # -- Determine top module value. First priority is to the
-        # -- graph cmd param.
-        top_module = (
-            graph_params.top_module
-            if graph_params.top_module
-            else params.apio_env_params.top_module
-        )
 
         return Builder(
             # See https://tinyurl.com/yosys-sv-graph
             # For -wireshape see https://github.com/YosysHQ/yosys/pull/4252
             action=(
                 'yosys -p "read_verilog -sv $SOURCES; show -format dot'
-                ' -colors 1 -wireshape plaintext -prefix {0} {1}" '
-                "-DSYNTHESIZE {2} {3}"
+                " -colors 1 -wireshape plaintext -prefix ${{TARGET.base}}"
+                ' ${0}" -DSYNTHESIZE {1} {2}'
             ).format(
-                apio_env.graph_target,
-                top_module,
+                GRAPH_TOP_VAR,
                 "" if params.verbosity.all else "-q",
                 get_define_flags(apio_env),
             ),
@@ -149,7 +220,8 @@ class PluginBase:
 
     def graphviz_renderer_builder(self) -> BuilderBase:
         """Creates and returns the graphviz renderer builder. Should
-        be called only when serving the graph command."""
+        be called only when serving the graph command. The rendered files
+        are reported by the top level graph target."""
 
         # -- Sanity checks.
         assert self.apio_env.targeting_one_of("graph")
@@ -169,40 +241,11 @@ class PluginBase:
         type_str = type_map[graph_params.output_type]
         assert type_str, f"Unexpected graph type {graph_params.output_type}"
 
-        def completion_action(
-            target: List[File],
-            source: List[File],
-            env: SConsEnvironment,
-        ):  # noqa
-            """Action function that prints a completion message and if
-            requested, open a viewer on the output file.."""
-            _ = (source, env)  # Unused
-            # -- Get the rendered file.
-            target_file: File = target[0]
-            assert isinstance(target_file, File)
-            # -- Print a message
-            cout(f"Generated {str(target_file)}", style=SUCCESS)
-            # -- If requested, convert the file to URI and open it in the
-            # -- default browser.
-            if graph_params.open_viewer:
-                cout("Opening default browser")
-                file_path = Path(target_file.get_abspath())
-                file_uri = file_path.resolve().as_uri()
-                default_browser = webbrowser.get()
-                default_browser.open(file_uri)
-            else:
-                cout("User requested no graph viewer")
-
-        actions = [
-            f"dot -T{type_str} $SOURCES -o $TARGET",
-            Action(completion_action, "completion_action"),
-        ]
-
         graphviz_builder = cast(
             BuilderBase,
             Builder(
                 # Expecting graphviz dot to be installed and in the path.
-                action=actions,
+                action=f"dot -T{type_str} $SOURCES -o $TARGET",
                 suffix=f".{type_str}",
                 src_suffix=".dot",
             ),
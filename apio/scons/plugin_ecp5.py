@@ -13,6 +13,7 @@
 # pylint: disable=duplicate-code
 
 from pathlib import Path
+from typing import Optional
 from SCons.Script import Builder
 from SCons.Builder import BuilderBase, CompositeBuilder
 from apio.common.common_util import SRC_SUFFIXES
@@ -23,7 +24,7 @@ from apio.scons.plugin_util import (
     has_testbench_name,
     announce_testbench_action,
     source_files_issue_scanner_action,
-    iverilog_action,
+    compile_testbench_action,
     basename,
     make_verilator_config_builder,
     get_define_flags,
@@ -86,34 +87,46 @@ class PluginEcp5(PluginBase):
         )
 
     # @overrides
-    def pnr_builder(self) -> BuilderBase | CompositeBuilder:
+    def pnr_builder(
+        self, seed: Optional[int] = None
+    ) -> BuilderBase | CompositeBuilder:
         """Creates and returns the pnr builder."""
 
         # -- Keep short references.
         apio_env = self.apio_env
         params = apio_env.params
 
+        # -- The nextpnr report file.
+        report_path = self.pnr_report_path(seed)
+
         # -- We use an emmiter to add to the builder a second output file.
         def emitter(target, source, env):
             _ = env  # Unused
-            target.append(apio_env.target + ".pnr")
+            target.append(report_path)
             return target, source
 
         # -- Create the builder.
         return Builder(
-            action=(
-                "nextpnr-ecp5 --{0} --package {1} --speed {2} "
-                "--json $SOURCE --textcfg $TARGET "
-                "--report {3} --lpf {4} --timing-allow-fail --force "
-                "{5} {6}"
-            ).format(
-                params.fpga_info.ecp5_params.type,
-                params.fpga_info.ecp5_params.package,
-                params.fpga_info.ecp5_params.speed,
-                apio_env.target + ".pnr",
-                self.constrain_file(),
-                "" if params.verbosity.all or params.verbosity.pnr else "-q",
-                " ".join(params.apio_env_params.nextpnr_extra_options),
+            action=self.pnr_seed_action(
+                (
+                    "nextpnr-ecp5 --{0} --package {1} --speed {2} "
+                    "--json $SOURCE --textcfg $TARGET "
+                    "--report {3} --lpf {4} --timing-allow-fail --force "
+                    "{5} {6}"
+                ).format(
+                    params.fpga_info.ecp5_params.type,
+                    params.fpga_info.ecp5_params.package,
+                    params.fpga_info.ecp5_params.speed,
+                    report_path,
+                    self.constrain_file(),
+                    (
+                        ""
+                        if params.verbosity.all or params.verbosity.pnr
+                        else "-q"
+                    ),
+                    " ".join(params.apio_env_params.nextpnr_extra_options),
+                ),
+                seed,
             ),
             suffix=".config",
             src_suffix=".json",
@@ -159,7 +172,7 @@ class PluginEcp5(PluginBase):
                 # -- Scan source files for issues.
                 source_files_issue_scanner_action(),
                 # -- Perform the actual test or sim compilation.
-                iverilog_action(
+                compile_testbench_action(
                     apio_env,
                     verbose=params.verbosity.all,
                     vcd_output_name=testbench_name,
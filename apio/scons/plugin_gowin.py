@@ -13,6 +13,7 @@
 # pylint: disable=duplicate-code
 
 from pathlib import Path
+from typing import Optional
 from SCons.Script import Builder
 from SCons.Builder import BuilderBase, CompositeBuilder
 from apio.common.common_util import SRC_SUFFIXES
@@ -23,7 +24,7 @@ from apio.scons.plugin_util import (
     has_testbench_name,
     announce_testbench_action,
     source_files_issue_scanner_action,
-    iverilog_action,
+    compile_testbench_action,
     basename,
     make_verilator_config_builder,
     get_define_flags,
@@ -99,7 +100,9 @@ class PluginGowin(PluginBase):
         )
 
     # @overrides
-    def pnr_builder(self) -> BuilderBase | CompositeBuilder:
+    def pnr_builder(
+        self, seed: Optional[int] = None
+    ) -> BuilderBase | CompositeBuilder:
         """Creates and returns the pnr builder."""
 
         # -- Keep short references.
@@ -107,29 +110,39 @@ class PluginGowin(PluginBase):
         params = apio_env.params
         gowin_params = params.fpga_info.gowin_params
 
+        # -- The nextpnr report file.
+        report_path = self.pnr_report_path(seed)
+
         # -- We use an emmiter to add to the builder a second output file.
         def emitter(target, source, env):
             _ = env  # Unused
-            target.append(apio_env.target + ".pnr")
+            target.append(report_path)
             return target, source
 
         # -- Create the builder.
         return Builder(
-            action=(
-                "nextpnr-himbaechel --device {0} --json $SOURCE "
-                "--write $TARGET --report {1} {2} "
-                "--vopt cst={3} {4} {5}"
-            ).format(
-                params.fpga_info.part_num,
-                apio_env.target + ".pnr",
+            action=self.pnr_seed_action(
                 (
-                    f"--vopt family={gowin_params.nextpnr_family}"
-                    if gowin_params.nextpnr_family
-                    else ""
+                    "nextpnr-himbaechel --device {0} --json $SOURCE "
+                    "--write $TARGET --report {1} {2} "
+                    "--vopt cst={3} {4} {5}"
+                ).format(
+                    params.fpga_info.part_num,
+                    report_path,
+                    (
+                        f"--vopt family={gowin_params.nextpnr_family}"
+                        if gowin_params.nextpnr_family
+                        else ""
+                    ),
+                    self.constrain_file(),
+                    (
+                        ""
+                        if params.verbosity.all or params.verbosity.pnr
+                        else "-q"
+                    ),
+                    " ".join(params.apio_env_params.nextpnr_extra_options),
                 ),
-                self.constrain_file(),
-                "" if params.verbosity.all or params.verbosity.pnr else "-q",
-                " ".join(params.apio_env_params.nextpnr_extra_options),
+                seed,
             ),
             suffix=".pnr.json",
             src_suffix=".json",
@@ -176,7 +189,7 @@ class PluginGowin(PluginBase):
                 # -- Scan source files for issues.
                 source_files_issue_scanner_action(),
                 # -- Perform the actual test or sim compilation.
-                iverilog_action(
+                compile_testbench_action(
                     apio_env,
                     verbose=params.verbosity.all,
                     vcd_output_name=testbench_name,
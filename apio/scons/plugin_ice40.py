@@ -13,6 +13,7 @@
 # pylint: disable=duplicate-code
 
 from pathlib import Path
+from typing import Optional
 from SCons.Script import Builder
 from SCons.Builder import BuilderBase, CompositeBuilder
 from apio.common.common_util import SRC_SUFFIXES
@@ -23,7 +24,7 @@ from apio.scons.plugin_util import (
     has_testbench_name,
     announce_testbench_action,
     source_files_issue_scanner_action,
-    iverilog_action,
+    compile_testbench_action,
     basename,
     make_verilator_config_builder,
     get_define_flags,
@@ -76,31 +77,43 @@ class PluginIce40(PluginBase):
         )
 
     # @overrides
-    def pnr_builder(self) -> BuilderBase | CompositeBuilder:
+    def pnr_builder(
+        self, seed: Optional[int] = None
+    ) -> BuilderBase | CompositeBuilder:
         """Creates and returns the pnr builder."""
 
         # -- Keep short references.
         apio_env = self.apio_env
         params = apio_env.params
 
+        # -- The nextpnr report file.
+        report_path = self.pnr_report_path(seed)
+
         # -- We use an emmiter to add to the builder a second output file.
         def emitter(target, source, env):
             _ = env  # Unused
-            target.append(apio_env.target + ".pnr")
+            target.append(report_path)
             return target, source
 
         # -- Create the builder.
         return Builder(
-            action=(
-                "nextpnr-ice40 --{0} --package {1} --json $SOURCE "
-                "--asc $TARGET --report {2} --pcf {3} {4} {5}"
-            ).format(
-                params.fpga_info.ice40_params.type,
-                params.fpga_info.ice40_params.package,
-                apio_env.target + ".pnr",
-                self.constrain_file(),
-                "" if params.verbosity.all or params.verbosity.pnr else "-q",
-                " ".join(params.apio_env_params.nextpnr_extra_options),
+            action=self.pnr_seed_action(
+                (
+                    "nextpnr-ice40 --{0} --package {1} --json $SOURCE "
+                    "--asc $TARGET --report {2} --pcf {3} {4} {5}"
+                ).format(
+                    params.fpga_info.ice40_params.type,
+                    params.fpga_info.ice40_params.package,
+                    report_path,
+                    self.constrain_file(),
+                    (
+                        ""
+                        if params.verbosity.all or params.verbosity.pnr
+                        else "-q"
+                    ),
+                    " ".join(params.apio_env_params.nextpnr_extra_options),
+                ),
+                seed,
             ),
             suffix=".asc",
             src_suffix=".json",
@@ -144,7 +157,7 @@ class PluginIce40(PluginBase):
                 # -- Scan source files for issues.
                 source_files_issue_scanner_action(),
                 # -- Perform the actual test or sim compilation.
-                iverilog_action(
+                compile_testbench_action(
                     apio_env,
                     verbose=params.verbosity.all,
                     vcd_output_name=testbench_name,
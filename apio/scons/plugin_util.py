@@ -9,14 +9,14 @@
 # ---- License Apache v2
 """Helper functions for apio scons plugins."""
 
-from glob import glob
+# pylint: disable=too-many-lines
+
 import sys
 import os
-import re
 import subprocess
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Union
 from rich.table import Table
 from rich import box
 from SCons import Scanner
@@ -27,16 +27,39 @@ from SCons.Script.SConscript import SConsEnvironment
 from SCons.Node import NodeList
 from SCons.Node.Alias import Alias
 from apio.scons.apio_env import ApioEnv
-from apio.common.proto.apio_pb2 import SimParams, ApioTestParams
+from apio.common.proto.apio_pb2 import (
+    SimParams,
+    ApioTestParams,
+    ApioArch,
+    ReportParams,
+)
 from apio.common.common_util import (
     PROJECT_BUILD_PATH,
+    find_project_files,
     has_testbench_name,
     is_source_file,
 )
 from apio.common.apio_console import cout, cerror, ctable
 from apio.common.apio_styles import INFO, BORDER, EMPH1, EMPH2, EMPH3
 from apio.scons import gtkwave_util
-from apio.common.build_report import BuildReport, read_build_report
+from apio.scons.source_facts import get_source_facts
+from apio.scons.lint_util import cached_lint_action, LINT_TOP_ARG_VAR
+from apio.scons.sim_lib_util import (
+    SIM_LIB_MODULE_SUFFIX,
+    get_cached_sim_lib_dir,
+)
+from apio.common.build_report import (
+    BuildReport,
+    TimingReport,
+    read_pnr_json,
+    read_build_report,
+    read_timing_report,
+)
+from apio.common.testbench_results import (
+    TESTBENCH_DURATIONS_FILE_NAME,
+    read_testbench_durations,
+    durations_fingerprint,
+)
 
 TESTBENCH_HINT = "Testbench file names must end with '_tb.v' or '_tb.sv'."
 
@@ -115,13 +138,8 @@ def get_constraint_file(apio_env: ApioEnv, file_ext: str) -> str:
         return user_specified
 
     # -- No user specified constraint file, we will try to look for it
-    # -- in the project tree.
-    glob_files: List[str] = glob(f"**/*{file_ext}", recursive=True)
-
-    # -- Exclude files that are under _build
-    filtered_files: List[str] = [
-        f for f in glob_files if PROJECT_BUILD_PATH not in Path(f).parents
-    ]
+    # -- in the project tree. Files under _build are excluded.
+    filtered_files: List[str] = find_project_files([file_ext])
 
     # -- Handle by file count.
     n = len(filtered_files)
@@ -152,26 +170,6 @@ def verilog_src_scanner(apio_env: ApioEnv) -> Scanner.Base:
     """Creates and returns a scons Scanner object for scanning verilog
     files for dependencies.
     """
-    # A Regex to icestudio propriaetry references for *.list files.
-    # Example:
-    #   Text:      ' parameter v771499 = "v771499.list"'
-    #   Captures:  'v771499.list'
-    icestudio_list_re = re.compile(r"[\n|\s][^\/]?\"(.*\.list?)\"", re.M)
-
-    # A regex to match a verilog include directive.
-    # Example
-    #   Text:     `include "apio_testing.vh"
-    #   Capture:  'apio_testing.vh'
-    verilog_include_re = re.compile(r'`\s*include\s+["]([^"]+)["]', re.M)
-
-    # A regex for inclusion via $readmemh()
-    # Example
-    #   Test:      '$readmemh("my_data.hex", State_buff);'
-    #   Capture:   'my_data.hex'
-    readmemh_reference_re = re.compile(
-        r"\$readmemh\([\'\"]([^\'\"]+)[\'\"]", re.M
-    )
-
     # -- List of required and optional files that may require a rebuild if
     # -- changed.
     core_dependencies = [
@@ -206,20 +204,11 @@ def verilog_src_scanner(apio_env: ApioEnv) -> Scanner.Base:
         # file is in the project root.
         file_dir: str = file_node.get_dir().get_path()
 
-        # Prepare an empty set of dependencies.
-        candidates_raw_set = set()
-
-        # Read the file. This returns [] if the file doesn't exist.
-        file_content = file_node.get_text_contents()
-
-        # Get verilog includes references.
-        candidates_raw_set.update(verilog_include_re.findall(file_content))
-
-        # Get $readmemh() function references.
-        candidates_raw_set.update(readmemh_reference_re.findall(file_content))
-
-        # Get IceStudio references.
-        candidates_raw_set.update(icestudio_list_re.findall(file_content))
+        # Get the include, $readmemh() and IceStudio references. The facts
+        # are empty if the file doesn't exist.
+        candidates_raw_set = set(
+            get_source_facts(file_node.get_path()).references
+        )
 
         # Since we don't know if the dependency's path is relative to the file
         # location or the project root, we try both. We prefer to have high
@@ -309,8 +298,11 @@ def verilator_lint_action(
     # -- project and --novlt was not specified.
     using_vlt = lint_whole_project and (not lint_params.novlt)
 
-    # -- Determine the top module.
-    if lint_params.top_module:
+    # -- Determine the top module. With --incremental, it's determined per
+    # -- lint unit, see lint_util.py.
+    if lint_params.incremental:
+        top_module = None
+    elif lint_params.top_module:
         # -- Case 1: Top module was specified in the command line.
         top_module = lint_params.top_module
     elif lint_whole_project:
@@ -330,7 +322,11 @@ def verilator_lint_action(
         "" if lint_params.nosynth else "-DSYNTHESIZE",
         "" if lint_whole_project else "-Wno-MODMISSING",
         " ".join(params.apio_env_params.verilator_extra_options),
-        f"--top-module {top_module}" if top_module else "",
+        (
+            f"--top-module {top_module}"
+            if top_module
+            else f"${LINT_TOP_ARG_VAR}" if lint_params.incremental else ""
+        ),
         get_define_flags(apio_env),
         map_params(extra_params, "{}"),  # pyright: ignore[reportArgumentType]
         (
@@ -350,6 +346,13 @@ def verilator_lint_action(
         ),
     )
 
+    # -- With --incremental, the results are cached per lint unit.
+    if lint_params.incremental:
+        return [
+            source_files_issue_scanner_action(),
+            cached_lint_action(str(action)),
+        ]
+
     # pyright: ignore[reportReturnType]
     return [
         source_files_issue_scanner_action(),
@@ -432,14 +435,15 @@ def detached_action(
 def gtkwave_target(
     apio_env: ApioEnv,
     target_name: str,  # always 'sim'
-    vcd_file_target: NodeList,
+    waveform_file_target: NodeList,
     testbench_info: TestbenchInfo,
     sim_params: SimParams,
     gtkwave_extra_options: Optional[List[str]],
 ) -> List[Alias]:
     """Construct a target to launch the QTWave signal viewer.
-    vcd_file_target is the simulator target that generated the vcd file
-    with the signals. Returns the new targets.
+    waveform_file_target is the simulator target that generated the
+    waveform file (e.g. .vcd or .fst) with the signals. Returns the new
+    targets.
     """
 
     # pylint: disable=too-many-arguments
@@ -451,7 +455,7 @@ def gtkwave_target(
     # -- If needed, generate default .gtkw file to make sure the top level
     # -- signals are shown by default.
     gtkw_path: str = testbench_info.testbench_name + ".gtkw"
-    vcd_path = str(vcd_file_target[0])
+    waveform_path = str(waveform_file_target[0])
 
     def create_default_gtkw_file(
         target: List[Alias], source: List[File], env: SConsEnvironment
@@ -460,7 +464,7 @@ def gtkwave_target(
         _ = (target, source, env)  # Unused.
         cout(f"Generating default {gtkw_path}")
         gtkwave_util.create_gtkwave_file(
-            testbench_info.testbench_path, vcd_path, gtkw_path
+            testbench_info.testbench_path, waveform_path, gtkw_path
         )
 
     if gtkwave_util.is_user_gtkw_file(gtkw_path):
@@ -497,7 +501,7 @@ def gtkwave_target(
         gtkwave_cmd.append("--rcvar=do_initial_zoom_fit 1")
         if gtkwave_extra_options:
             gtkwave_cmd.extend(gtkwave_extra_options)
-        gtkwave_cmd.extend([vcd_path, gtkw_path])
+        gtkwave_cmd.extend([waveform_path, gtkw_path])
 
         # -- Handle the case where gtkwave is run as a detached app, not
         # -- waiting for it to close and not showing its output.
@@ -511,7 +515,7 @@ def gtkwave_target(
     # -- Define a target with the action(s) we created.
     target = apio_env.alias(
         target_name,
-        source=vcd_file_target,
+        source=waveform_file_target,
         action=actions,
         always_build=True,
     )
@@ -579,6 +583,52 @@ def get_apio_sim_testbench_info(
     return TestbenchInfo(testbench, build_testbench_name, srcs)
 
 
+def shard_testbenches(
+    testbenches: List[str],
+    shard_index: int,
+    shard_count: int,
+    durations: Optional[Dict[str, float]],
+) -> List[str]:
+    """Returns the testbenches of the shard_index'th of shard_count disjoint
+    shards, 1 based. The partition depends only on the arguments, so the
+    shards of all the machines that share the same durations cover all the
+    testbenches. Without durations, the sorted testbenches are dealt round
+    robin. With durations, keyed by the testbench paths without the file
+    extension, each testbench, longest first, is assigned to the shard with
+    the least total duration so far. Testbenches without a recorded
+    duration are assumed to take the average duration."""
+
+    assert 1 <= shard_index <= shard_count, (shard_index, shard_count)
+
+    testbenches = sorted(testbenches)
+
+    if durations is None:
+        first = shard_index - 1
+        return testbenches[first::shard_count]
+
+    def duration_key(tb: str) -> str:
+        return Path(basename(tb)).as_posix()
+
+    known = [
+        durations[duration_key(tb)]
+        for tb in testbenches
+        if duration_key(tb) in durations
+    ]
+    default_sec = sum(known) / len(known) if known else 1.0
+
+    def duration(tb: str) -> float:
+        return durations.get(duration_key(tb), default_sec)
+
+    loads = [0.0] * shard_count
+    shards: List[List[str]] = [[] for _ in range(shard_count)]
+    for tb in sorted(testbenches, key=lambda tb: (-duration(tb), tb)):
+        i = min(range(shard_count), key=lambda i: (loads[i], i))
+        loads[i] += duration(tb)
+        shards[i].append(tb)
+
+    return sorted(shards[shard_index - 1])
+
+
 def get_apio_test_testbenches_infos(
     apio_env: ApioEnv,
     test_params: ApioTestParams,
@@ -588,8 +638,10 @@ def get_apio_test_testbenches_infos(
     """Return a list of SimulationConfigs for each of the testbenches that
     need to be run for a 'apio test' command. If testbench is empty,
     all the testbenches in test_srcs will be tested. Otherwise, only the
-    testbench in testbench will be tested. synth_srcs and test_srcs are
-    source and test file lists as returned by get_project_source_files()."""
+    testbench in testbench will be tested. With a shard count in
+    test_params, only the testbenches of the selected shard are tested.
+    synth_srcs and test_srcs are source and test file lists as returned by
+    get_project_source_files()."""
     # List of testbenches to be tested.
 
     # -- Handle the testbench files selection. The end result is a list of one
@@ -629,6 +681,37 @@ def get_apio_test_testbenches_infos(
     # -- If this fails, it's a programming error.
     assert testbenches, "get_tests_configs(): no testbenches"
 
+    # -- Handle 'apio test --shard i/N'.
+    if test_params.shard_count:
+        durations = None
+        if test_params.balance_shards:
+            # -- The durations file of --durations is shared by all the
+            # -- shards, while the env's file is rewritten by each run.
+            durations_file = (
+                Path(test_params.durations_file)
+                if test_params.durations_file
+                else apio_env.env_build_path / TESTBENCH_DURATIONS_FILE_NAME
+            )
+            durations = read_testbench_durations(durations_file)
+            cout(
+                f"Balancing the shards by {len(durations)} durations "
+                f"from {durations_file.name}, "
+                f"fingerprint {durations_fingerprint(durations)}.",
+                style=EMPH1,
+            )
+        shard = shard_testbenches(
+            testbenches,
+            test_params.shard_index,
+            test_params.shard_count,
+            durations,
+        )
+        cout(
+            f"Shard {test_params.shard_index}/{test_params.shard_count}: "
+            f"testing {len(shard)} of {len(testbenches)} testbenches.",
+            style=EMPH1,
+        )
+        testbenches = shard
+
     # Construct a config for each testbench.
     configs = []
     for tb in testbenches:
@@ -674,9 +757,6 @@ def source_files_issue_scanner_action() -> FunctionAction:
     """Returns a SCons action that scans the source files and print
     error or warning messages about issues it finds."""
 
-    # A regex to identify "$dumpfile(" in testbenches.
-    testbench_dumpfile_re = re.compile(r"[$]dumpfile\s*[(]")
-
     def report_source_files_issues(
         target: List[Alias],
         source: List[File],
@@ -695,12 +775,9 @@ def source_files_issue_scanner_action() -> FunctionAction:
             ):
                 continue
 
-            # -- Read the testbench file text.
-            file_text = file.get_text_contents()
-
             # -- if contains $dumpfile, it's a fatal error. Apio sets the
             # -- default location of the testbenches output .vcd file.
-            if testbench_dumpfile_re.findall(file_text):
+            if get_source_facts(file.get_path()).has_dumpfile:
                 cerror(
                     f"The testbench file '{file.name}' contains '$dumpfile'."
                 )
@@ -801,11 +878,106 @@ def _print_pnr_report(
         cout("Use '--verbose' for additional details.", style=INFO)
 
 
-def report_action(verbose: bool) -> FunctionAction:
+def _print_timing_report(
+    timing_report: TimingReport, max_paths: int, verbose: bool
+) -> None:
+    """Emit a user friendly report of the critical paths and the delays
+    by module and by net. With verbose, the steps of the critical paths
+    are also listed."""
+
+    if not timing_report.paths:
+        cout()
+        cout("No critical paths were found in the design.", style=INFO)
+        return
+
+    # -- Critical paths table, worst first.
+    paths = timing_report.paths[:max_paths]
+    table = Table(
+        show_header=True,
+        show_lines=False,
+        box=box.SQUARE,
+        border_style=BORDER,
+        title="Critical paths",
+        title_justify="left",
+        padding=(0, 2),
+    )
+    table.add_column("FROM", no_wrap=True)
+    table.add_column("TO", no_wrap=True)
+    table.add_column("DELAY [ns]", no_wrap=True, justify="right", style=EMPH3)
+    table.add_column("CELLS [ns]", no_wrap=True, justify="right")
+    table.add_column("ROUTING [ns]", no_wrap=True, justify="right")
+    table.add_column("STEPS", no_wrap=True, justify="right")
+    for path in paths:
+        table.add_row(
+            path.from_clock,
+            path.to_clock,
+            f"{path.delay_ns:.2f}",
+            f"{path.cell_delay_ns:.2f}",
+            f"{path.routing_delay_ns:.2f}",
+            str(len(path.steps)),
+        )
+    cout()
+    ctable(table)
+
+    # -- The steps of each path.
+    if verbose:
+        for i, path in enumerate(paths, start=1):
+            table = Table(
+                show_header=True,
+                show_lines=False,
+                box=box.SQUARE,
+                border_style=BORDER,
+                title=f"Critical path {i}: {path.from_clock} -> "
+                f"{path.to_clock}",
+                title_justify="left",
+                padding=(0, 2),
+            )
+            table.add_column("TYPE", no_wrap=True)
+            table.add_column("CELL / NET")
+            table.add_column("DELAY [ns]", no_wrap=True, justify="right")
+            for step in path.steps:
+                table.add_row(
+                    step.kind,
+                    step.net if step.is_routing else step.cell,
+                    f"{step.delay_ns:.2f}",
+                    style=EMPH3 if step.is_routing else None,
+                )
+            cout()
+            ctable(table)
+
+    # -- Delays by module and by net tables.
+    for title, column, delays in [
+        ("Delay by module", "MODULE", timing_report.modules),
+        ("Routing delay by net", "NET", timing_report.nets),
+    ]:
+        if not delays:
+            continue
+        table = Table(
+            show_header=True,
+            show_lines=False,
+            box=box.SQUARE,
+            border_style=BORDER,
+            title=title,
+            title_justify="left",
+            padding=(0, 2),
+        )
+        table.add_column(column)
+        table.add_column(
+            "DELAY [ns]", no_wrap=True, justify="right", style=EMPH3
+        )
+        for delay in delays[:max_paths]:
+            table.add_row(delay.name or "(top)", f"{delay.delay_ns:.2f}")
+        cout()
+        ctable(table)
+
+
+def report_action(
+    verbose: bool, report_params: ReportParams
+) -> FunctionAction:
     """Returns a SCons action to format and print the PNR reort from the
     PNR json report file. Used by the 'apio report' command.
-    'script_id' identifies the calling SConstruct script and 'verbose'
-    indicates if the --verbose flag was invoked."""
+    'verbose' indicates if the --verbose flag was invoked and
+    'report_params' if the timing analysis was requested."""
 
     def print_pnr_report(
         target: List[Alias],
@@ -817,8 +989,15 @@ def report_action(verbose: bool) -> FunctionAction:
         _ = (target, env)  # Unused
         pnr_json_file: File = source[0]
         pnr_json_path: Path = Path(pnr_json_file.get_path())
-        build_report: BuildReport = read_build_report(pnr_json_path)
+        pnr_json = read_pnr_json(pnr_json_path)
+        build_report: BuildReport = read_build_report(pnr_json_path, pnr_json)
         _print_pnr_report(build_report, verbose)
+        if report_params.timing:
+            _print_timing_report(
+                read_timing_report(pnr_json_path, pnr_json),
+                report_params.max_paths,
+                verbose,
+            )
 
     return Action(
         print_pnr_report,  # pyright: ignore[reportReturnType]
@@ -855,6 +1034,51 @@ def get_define_flags(apio_env: ApioEnv) -> str:
     return " ".join(flags)
 
 
+def is_verilator_test(apio_env: ApioEnv) -> bool:
+    """Returns True if serving 'apio test' with the verilator simulation
+    engine. 'apio sim' always uses iverilog since it needs the signals
+    file for GTKWave."""
+    return (
+        apio_env.targeting_one_of("test")
+        and apio_env.params.apio_env_params.sim_engine == "verilator"
+    )
+
+
+def _sim_lib_args(
+    apio_env: ApioEnv,
+    *,
+    lib_dir_fmt: str,
+    lib_file_fmt: str,
+    extra_params: List[str] | None,
+    lib_dirs: List[Path] | None,
+    lib_files: List[Path] | None,
+) -> str:
+    """Returns the simulator args of the given library files. If possible,
+    the library files are replaced with a cached library dir such that the
+    simulator parses only the library modules that the design uses.
+    lib_dir_fmt and lib_file_fmt are the simulator's formats of library
+    dir and library file args respectively."""
+
+    # pylint: disable=too-many-arguments
+
+    if not lib_files:
+        return ""
+
+    # -- The defines may affect the library so they are part of the cache
+    # -- key.
+    sim_lib_dir = get_cached_sim_lib_dir(
+        apio_env,
+        arch=ApioArch.Name(apio_env.params.arch).lower(),
+        lib_files=lib_files,
+        include_dirs=lib_dirs or [],
+        flags=(extra_params or []) + get_define_flags(apio_env).split(),
+    )
+    if sim_lib_dir:
+        return lib_dir_fmt.format(sim_lib_dir)
+
+    return map_params(lib_files, lib_file_fmt)
+
+
 def iverilog_action(
     apio_env: ApioEnv,
     *,
@@ -865,7 +1089,9 @@ def iverilog_action(
     lib_dirs: List[Path] | None = None,
     lib_files: List[Path] | None = None,
 ) -> str:
-    """Construct an iverilog scons action string.
+    """Construct an iverilog scons action string. If possible, the library
+    files are replaced with a cached library dir such that iverilog parses
+    only the library modules that the design uses.
     * env: Rhe scons environment.
     * verbose: IVerilog will show extra info.
     * vcd_output_name: Value for the macro VCD_OUTPUT.
@@ -882,6 +1108,15 @@ def iverilog_action(
     # Escaping for windows. '\' -> '\\'
     escaped_vcd_output_name = vcd_output_name.replace("\\", "\\\\")
 
+    lib_args = _sim_lib_args(
+        apio_env,
+        lib_dir_fmt=f'-y"{{}}" -Y{SIM_LIB_MODULE_SUFFIX}',
+        lib_file_fmt='"{}"',
+        extra_params=extra_params,
+        lib_dirs=lib_dirs,
+        lib_files=lib_files,
+    )
+
     # -- Construct the action string.
     # -- The -g2012 is for system-verilog support.
     action = (
@@ -893,12 +1128,97 @@ def iverilog_action(
         f"-DAPIO_SIM={int(is_interactive)}",
         map_params(extra_params, "{}"),  # pyright: ignore[reportArgumentType]
         map_params(lib_dirs, '-I"{}"'),  # pyright: ignore[reportArgumentType]
-        map_params(lib_files, '"{}"'),  # pyright: ignore[reportArgumentType]
+        lib_args,
+    )
+
+    return action
+
+
+def verilator_sim_action(
+    apio_env: ApioEnv,
+    *,
+    extra_params: List[str] | None = None,
+    lib_dirs: List[Path] | None = None,
+    lib_files: List[Path] | None = None,
+) -> str:
+    """Construct a verilator scons action string that compiles a testbench
+    to an executable. The generated C++ and object files are kept in a
+    directory next to the executable so following compilations rebuild
+    only what changed.
+    * extra_params: Optional list of additional params.
+    * lib_dirs: Optional list of dir paths to include.
+    * lib_files: Optional list of library files to compile.
+    *
+    * Returns the scons action string for the Verilator command.
+    """
+
+    # -- Sanity check.
+    assert is_verilator_test(apio_env)
+
+    lib_args = _sim_lib_args(
+        apio_env,
+        lib_dir_fmt=f'-y "{{}}" +libext+{SIM_LIB_MODULE_SUFFIX}',
+        lib_file_fmt='-v "{}"',
+        extra_params=extra_params,
+        lib_dirs=lib_dirs,
+        lib_files=lib_files,
+    )
+
+    # -- Construct the action string. '--binary' generates a main()
+    # -- and builds the executable with make and the C++ compiler, '-j 0'
+    # -- uses all the cores for the build. The executable is the .out
+    # -- target, same as the iverilog's vvp file.
+    action = (
+        "verilator_bin --binary --timing --quiet -j 0 -Wno-fatal "
+        "-Wno-lint -Wno-style -Wno-TIMESCALEMOD "
+        '--Mdir "${{TARGET.base}}_verilator" -o "${{TARGET.abspath}}" '
+        "-DAPIO_SIM=0 {0} {1} {2} {3} {4} $SOURCES"
+    ).format(
+        " ".join(apio_env.params.apio_env_params.verilator_extra_options),
+        get_define_flags(apio_env),
+        map_params(extra_params, "{}"),  # pyright: ignore[reportArgumentType]
+        map_params(lib_dirs, '-I"{}"'),  # pyright: ignore[reportArgumentType]
+        lib_args,
     )
 
     return action
 
 
+def compile_testbench_action(
+    apio_env: ApioEnv,
+    *,
+    verbose: bool,
+    vcd_output_name: str,
+    is_interactive: bool,
+    extra_params: List[str] | None = None,
+    lib_dirs: List[Path] | None = None,
+    lib_files: List[Path] | None = None,
+) -> str:
+    """Construct the scons action string that compiles a testbench with
+    the selected simulation engine. The args are the same as of
+    iverilog_action()."""
+
+    # pylint: disable=too-many-arguments
+
+    if is_verilator_test(apio_env):
+        return verilator_sim_action(
+            apio_env,
+            extra_params=extra_params,
+            lib_dirs=lib_dirs,
+            lib_files=lib_files,
+        )
+
+    return iverilog_action(
+        apio_env,
+        verbose=verbose,
+        vcd_output_name=vcd_output_name,
+        is_interactive=is_interactive,
+        extra_params=extra_params,
+        lib_dirs=lib_dirs,
+        lib_files=lib_files,
+    )
+
+
 def basename(file_name: str) -> str:
     """Given a file name, returns it with the extension removed."""
     result, _ = os.path.splitext(file_name)
@@ -13,6 +13,7 @@
 # pylint: disable=duplicate-code
 
 from pathlib import Path
+from typing import Optional
 from SCons.Script import Builder
 from SCons.Builder import BuilderBase, CompositeBuilder
 from apio.common.common_util import SRC_SUFFIXES
@@ -23,7 +24,7 @@ from apio.scons.plugin_util import (
     has_testbench_name,
     announce_testbench_action,
     source_files_issue_scanner_action,
-    iverilog_action,
+    compile_testbench_action,
     basename,
     make_verilator_config_builder,
     get_define_flags,
@@ -89,7 +90,9 @@ class PluginXilinx(PluginBase):
         )
 
     # @overrides
-    def pnr_builder(self) -> BuilderBase | CompositeBuilder:
+    def pnr_builder(
+        self, seed: Optional[int] = None
+    ) -> BuilderBase | CompositeBuilder:
         """Creates and returns the pnr builder."""
 
         # -- Keep short references.
@@ -97,10 +100,13 @@ class PluginXilinx(PluginBase):
         params = apio_env.params
         xilinx_params = params.fpga_info.xilinx_params
 
+        # -- The nextpnr report file.
+        report_path = self.pnr_report_path(seed)
+
         # -- We use an emmiter to add to the builder a second output file.
         def emitter(target, source, env):
             _ = env  # Unused
-            target.append(apio_env.target + ".pnr")
+            target.append(report_path)
             return target, source
 
         # -- Get params.
@@ -112,15 +118,22 @@ class PluginXilinx(PluginBase):
 
         # -- Create the builder
         return Builder(
-            action=(
-                "nextpnr-xilinx --chipdb {0} --xdc {1} --json $SOURCE "
-                "--fasm $TARGET --report {2} {3} {4}"
-            ).format(
-                chipdb_file_path,
-                self.constrain_file(),
-                apio_env.target + ".pnr",
-                ("" if params.verbosity.all or params.verbosity.pnr else "-q"),
-                " ".join(params.apio_env_params.nextpnr_extra_options),
+            action=self.pnr_seed_action(
+                (
+                    "nextpnr-xilinx --chipdb {0} --xdc {1} --json $SOURCE "
+                    "--fasm $TARGET --report {2} {3} {4}"
+                ).format(
+                    chipdb_file_path,
+                    self.constrain_file(),
+                    report_path,
+                    (
+                        ""
+                        if params.verbosity.all or params.verbosity.pnr
+                        else "-q"
+                    ),
+                    " ".join(params.apio_env_params.nextpnr_extra_options),
+                ),
+                seed,
             ),
             suffix=".fasm",
             src_suffix=".json",
@@ -203,7 +216,7 @@ class PluginXilinx(PluginBase):
                 # -- Scan source files for issues.
                 source_files_issue_scanner_action(),
                 # -- Perform the actual test or sim compilation.
-                iverilog_action(
+                compile_testbench_action(
                     apio_env,
                     verbose=params.verbosity.all,
                     vcd_output_name=testbench_name,
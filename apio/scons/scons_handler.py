@@ -10,6 +10,7 @@
 
 """Apio scons related utilities.."""
 
+import os
 import sys
 from pathlib import Path
 from SCons.Script import ARGUMENTS, COMMAND_LINE_TARGETS
@@ -27,7 +28,7 @@ from apio.common.proto.apio_pb2 import (
     GOWIN,
     XILINX,
 )
-from apio.common import apio_console
+from apio.common import apio_console, apio_trace
 from apio.scons.apio_env import ApioEnv
 from apio.scons.plugin_base import PluginBase
 from apio.common import rich_lib_windows
@@ -37,9 +38,34 @@ from apio.scons.plugin_util import (
     gtkwave_target,
     report_action,
     get_programmer_cmd,
+    is_verilator_test,
     TestbenchInfo,
 )
+from apio.scons.seed_sweep_util import (
+    seed_sweep_action,
+    clear_seed_report_action,
+)
+from apio.scons.lint_util import (
+    get_lint_units,
+    lint_report_action,
+    LINT_TOP_ARG_VAR,
+    LINT_RESULT_SUFFIX,
+)
+from apio.scons.upload_util import (
+    UPLOAD_REGISTRY_PATH,
+    multi_upload_action,
+    single_upload_action,
+)
+from apio.scons.graph_util import (
+    get_graph_units,
+    graph_report_action,
+    GRAPH_TOP_VAR,
+)
 from apio.common.apio_console import cerror, cout
+from apio.common.testbench_results import (
+    SELECTED_TESTBENCHES_FILE_NAME,
+    write_selected_testbenches,
+)
 
 # -- Scons builders ids.
 SYNTH_BUILDER = "SYNTH_BUILDER"
@@ -92,6 +118,9 @@ class SconsHandler:
         # -- Create the apio environment.
         apio_env = ApioEnv(COMMAND_LINE_TARGETS, params)
 
+        # -- Record the resources used by each action in build-profile.json.
+        apio_env.enable_action_profiling()
+
         # -- Select the plugin.
         if params.arch == ICE40:
             plugin = PluginIce40(apio_env)
@@ -111,7 +140,8 @@ class SconsHandler:
         scons_handler = SconsHandler(apio_env, plugin)
 
         # -- Invoke the handler. This services the scons request.
-        scons_handler.execute()
+        with apio_trace.span("SconsHandler.execute", cat="scons"):
+            scons_handler.execute()
 
     def _register_common_targets(self, synth_srcs):
         """Register the common synth, pnr, and bitstream operations which
@@ -136,14 +166,17 @@ class SconsHandler:
         )
 
         # -- Place-and-route builder and target
-        apio_env.builder(PNR_BUILDER, plugin.pnr_builder())
+        if params.target.build.seed_sweep > 0:
+            pnr_target = self._register_seed_sweep_targets(synth_target)
+        else:
+            apio_env.builder(PNR_BUILDER, plugin.pnr_builder())
 
-        pnr_target = apio_env.builder_target(
-            builder_id=PNR_BUILDER,
-            target=apio_env.target,
-            sources=[synth_target, self.arch_plugin.constrain_file()],
-            always_build=(params.verbosity.all or params.verbosity.pnr),
-        )
+            pnr_target = apio_env.builder_target(
+                builder_id=PNR_BUILDER,
+                target=apio_env.target,
+                sources=[synth_target, self.arch_plugin.constrain_file()],
+                always_build=(params.verbosity.all or params.verbosity.pnr),
+            )
 
         # -- DEBUG
         # -- Special case for xilinx
@@ -185,6 +218,58 @@ class SconsHandler:
                 sources=pnr_target,
             )
 
+    def _register_seed_sweep_targets(self, synth_target):
+        """Registers a place-and-route target for each seed of a seed sweep
+        and a target that selects the best seed. The seeds are placed and
+        routed in parallel from the same synthesis output. Returns the
+        selection target which has the same files as a regular pnr
+        target."""
+
+        apio_env = self.apio_env
+        params = apio_env.params
+        plugin = self.arch_plugin
+        build_params = params.target.build
+
+        # -- Sanity check
+        assert apio_env.targeting_one_of("build")
+
+        # -- Create a pnr builder and target for each seed.
+        seeds = list(range(1, build_params.seed_sweep + 1))
+        seeds_targets = []
+        for seed in seeds:
+            builder_id = f"{PNR_BUILDER}_SEED_{seed}"
+            apio_env.builder(builder_id, plugin.pnr_builder(seed=seed))
+            seed_target = apio_env.builder_target(
+                builder_id=builder_id,
+                target=apio_env.seed_target(seed),
+                sources=[synth_target, plugin.constrain_file()],
+                always_build=(params.verbosity.all or params.verbosity.pnr),
+            )
+            # -- Delete the seed's report of a previous sweep, so a failing
+            # -- run is not taken for a successful one.
+            apio_env.scons_env.AddPreAction(
+                seed_target,
+                clear_seed_report_action(plugin.pnr_report_path(seed)),
+            )
+            seeds_targets.append(seed_target)
+
+        # -- Let scons run the seeds in parallel, one per cpu core.
+        apio_env.scons_env.SetOption(
+            "num_jobs", min(len(seeds), os.cpu_count() or 1)
+        )
+
+        # -- The selection target has the same files as each of the seeds
+        # -- targets, but in the env build directory.
+        selection_files = [
+            str(apio_env.env_build_path / node.name)
+            for node in seeds_targets[0]
+        ]
+        return apio_env.scons_env.Command(
+            selection_files,
+            seeds_targets,
+            seed_sweep_action(apio_env, seeds, build_params.seed_sweep_metric),
+        )
+
     def _register_apio_build_target(self, synth_srcs):
         """Register the 'build' target which creates the binary bitstream."""
         apio_env = self.apio_env
@@ -226,11 +311,38 @@ class SconsHandler:
         # -- Register the common targets for synth, pnr, and bitstream.
         self._register_common_targets(synth_srcs)
 
+        # -- Determine the upload action. When uploading to multiple
+        # -- devices, the bitstream is built once and then uploaded to the
+        # -- devices concurrently.
+        # -- The uploads are recorded in the upload registry in the apio cache
+        # -- dir, if the serial numbers of the devices are known.
+        upload_params = apio_env.params.target.upload
+        cache_dir = apio_env.params.environment.cache_dir
+        registry_file = (
+            Path(cache_dir) / UPLOAD_REGISTRY_PATH if cache_dir else None
+        )
+        if upload_params.devices:
+            action = multi_upload_action(
+                list(upload_params.devices),
+                upload_params.max_jobs or 1,
+                upload_params.skip_if_current,
+                registry_file,
+            )
+        elif upload_params.serial_num or upload_params.skip_if_current:
+            action = single_upload_action(
+                get_programmer_cmd(apio_env),
+                upload_params.serial_num,
+                upload_params.skip_if_current,
+                registry_file,
+            )
+        else:
+            action = get_programmer_cmd(apio_env)
+
         # -- Create the top level 'upload' target.
         apio_env.alias(
             "upload",
             source=apio_env.target + plugin_info.bitstream_file_suffix,
-            action=get_programmer_cmd(apio_env),
+            action=action,
             always_build=True,
         )
 
@@ -250,7 +362,7 @@ class SconsHandler:
         apio_env.alias(
             "report",
             source=apio_env.target + ".pnr",
-            action=report_action(params.verbosity.pnr),
+            action=report_action(params.verbosity.pnr, params.target.report),
             always_build=True,
         )
 
@@ -258,8 +370,9 @@ class SconsHandler:
         self,
         synth_srcs,
     ):
-        """Registers the 'graph' target which generates a .dot file using
-        yosys and renders it using graphviz."""
+        """Registers the 'graph' target which generates .dot files using
+        yosys and renders them using graphviz. The graphs are regenerated
+        only if their sources, graphed module or output type changed."""
         apio_env = self.apio_env
         params = apio_env.params
         plugin = self.arch_plugin
@@ -268,31 +381,64 @@ class SconsHandler:
         assert apio_env.targeting_one_of("graph")
         assert params.target.HasField("graph")
 
-        # -- Create the .dot generation builder and target.
-        apio_env.builder(YOSYS_DOT_BUILDER, plugin.yosys_dot_builder())
+        graph_params = params.target.graph
 
-        dot_target = apio_env.builder_target(
-            builder_id=YOSYS_DOT_BUILDER,
-            target=apio_env.graph_target,
-            sources=synth_srcs,
-            always_build=True,
+        # -- Determine top module value. First priority is to the
+        # -- graph cmd param.
+        top_module = (
+            graph_params.top_module or params.apio_env_params.top_module
         )
 
-        # -- Create the rendering builder and target.
+        # -- Determine the modules to graph.
+        units = get_graph_units(
+            [str(f) for f in synth_srcs],
+            top_module,
+            per_module=graph_params.per_module,
+            max_depth=(
+                graph_params.max_depth
+                if graph_params.HasField("max_depth")
+                else None
+            ),
+            module_filter=graph_params.module_filter or None,
+        )
+
+        # -- Create the builders.
+        apio_env.builder(YOSYS_DOT_BUILDER, plugin.yosys_dot_builder())
         apio_env.builder(
             GRAPHVIZ_RENDERER_BUILDER, plugin.graphviz_renderer_builder()
         )
-        graphviz_target = apio_env.builder_target(
-            builder_id=GRAPHVIZ_RENDERER_BUILDER,
-            target=apio_env.graph_target,
-            sources=dot_target,
-            always_build=True,
+        dot_builder = getattr(apio_env.scons_env, YOSYS_DOT_BUILDER)
+        renderer_builder = getattr(
+            apio_env.scons_env, GRAPHVIZ_RENDERER_BUILDER
         )
 
-        # -- Create the top level "graph" target.
+        # -- Create the .dot and rendering targets of each graph. The graph
+        # -- of the top module keeps its traditional name, the graphs of
+        # -- the per module mode are written to a sub directory.
+        graph_targets = []
+        for unit in units:
+            base_name = (
+                str(apio_env.env_build_path / "graphs" / unit.module)
+                if graph_params.per_module
+                else apio_env.graph_target
+            )
+            dot_target = dot_builder(
+                base_name, unit.files, **{GRAPH_TOP_VAR: unit.module}
+            )
+            graph_targets.append(renderer_builder(base_name, dot_target))
+
+        # -- Let scons generate the graphs in parallel, one per cpu core.
+        if len(units) > 1:
+            apio_env.scons_env.SetOption(
+                "num_jobs", min(len(units), os.cpu_count() or 1)
+            )
+
+        # -- Create the top level "graph" target. It always reports the
+        # -- graphs, fresh or cached.
         apio_env.alias(
             "graph",
-            source=graphviz_target,
+            source=graph_targets,
+            action=graph_report_action(graph_params.open_viewer),
             always_build=True,
         )
 
@@ -331,6 +477,13 @@ class SconsHandler:
         # -- Create the builder and target the lint operation.
         apio_env.builder(LINT_BUILDER, plugin.lint_builder())
 
+        # -- With --incremental, lint the project unit by unit.
+        if lint_params.incremental:
+            self._register_incremental_lint_targets(
+                synth_srcs, test_srcs, extra_dependencies
+            )
+            return
+
         # -- Determine the files that will be linted. If specific files were
         # -- not specified on the command line, we take all the source and
         # -- testbench files in the project.
@@ -355,6 +508,56 @@ class SconsHandler:
             always_build=True,
         )
 
+    def _register_incremental_lint_targets(
+        self, synth_srcs, test_srcs, extra_dependencies
+    ):
+        """Registers the 'lint' target of 'apio lint --incremental'. Each
+        lint unit has its own target with a cached result file and the
+        top level target prints the results of all the units."""
+
+        apio_env = self.apio_env
+        params = apio_env.params
+
+        # -- Determine the lint units.
+        top_module = (
+            params.target.lint.top_module or params.apio_env_params.top_module
+        )
+        units = get_lint_units(synth_srcs, test_srcs, top_module)
+
+        # -- Create a target per unit. Scons re-lints a unit only if its
+        # -- files, their dependencies or the verilator command changed.
+        units_targets = []
+        for unit in units:
+            top_arg = (
+                f"--top-module {unit.top_module}" if unit.top_module else ""
+            )
+            builder_wrapper = getattr(apio_env.scons_env, LINT_BUILDER)
+            unit_target = builder_wrapper(
+                str(
+                    apio_env.env_build_path
+                    / "lint"
+                    / (unit.name + LINT_RESULT_SUFFIX)
+                ),
+                unit.files,
+                **{LINT_TOP_ARG_VAR: top_arg},
+            )
+            for dependency in extra_dependencies:
+                apio_env.scons_env.Depends(unit_target, dependency)
+            units_targets.append(unit_target)
+
+        # -- Let scons lint the units in parallel, one per cpu core.
+        apio_env.scons_env.SetOption(
+            "num_jobs", min(len(units), os.cpu_count() or 1)
+        )
+
+        # -- The top level "lint" target.
+        apio_env.alias(
+            "lint",
+            source=units_targets,
+            action=lint_report_action([unit.name for unit in units]),
+            always_build=True,
+        )
+
     def _register_apio_sim_target(self, synth_srcs, test_srcs):
         """Registers the 'sim' targets which compiles and runs the
         simulation of a testbench."""
@@ -395,7 +598,7 @@ class SconsHandler:
 
         apio_env.builder(TESTBENCH_RUN_BUILDER, plugin.testbench_run_builder())
 
-        sim_vcd_target = apio_env.builder_target(
+        sim_waveform_target = apio_env.builder_target(
             builder_id=TESTBENCH_RUN_BUILDER,
             target=testbench_info.build_testbench_name,
             sources=[sim_out_target],
@@ -411,7 +614,7 @@ class SconsHandler:
         gtkwave_target(
             apio_env,
             "sim",
-            sim_vcd_target,
+            sim_waveform_target,
             testbench_info,
             sim_params,
             gtkwave_extra_options,
@@ -438,12 +641,29 @@ class SconsHandler:
             test_srcs,
         )
 
+        # -- With 'apio test --junit-xml', which runs scons with
+        # -- --keep-going, record the selected testbenches so the ones that
+        # -- don't produce a result, e.g. because they failed to compile, are
+        # -- reported.
+        if test_params.record_results:
+            write_selected_testbenches(
+                apio_env.env_build_path / SELECTED_TESTBENCHES_FILE_NAME,
+                [
+                    Path(info.testbench_name).as_posix()
+                    for info in testbenches_infos
+                ],
+            )
+
         # -- Create compilation and simulation targets.
         apio_env.builder(
             TESTBENCH_COMPILE_BUILDER, plugin.testbench_compile_builder()
         )
         apio_env.builder(TESTBENCH_RUN_BUILDER, plugin.testbench_run_builder())
 
+        # -- Verilator testbenches are compiled only if changed, since their
+        # -- compilation is significantly slower than their execution.
+        always_compile = not is_verilator_test(apio_env)
+
         # -- Create targets for each testbench we are testing.
         tests_targets = []
         for testbench_info in testbenches_infos:
@@ -453,11 +673,11 @@ class SconsHandler:
                 builder_id=TESTBENCH_COMPILE_BUILDER,
                 target=testbench_info.build_testbench_name,
                 sources=testbench_info.srcs,
-                always_build=True,
+                always_build=always_compile,
             )
 
             # -- Create the simulation target.
-            test_vcd_target = apio_env.builder_target(
+            test_waveform_target = apio_env.builder_target(
                 builder_id=TESTBENCH_RUN_BUILDER,
                 target=testbench_info.build_testbench_name,
                 sources=[test_out_target],
@@ -465,7 +685,7 @@ class SconsHandler:
             )
 
             # -- Append to the list of targets we need to execute.
-            tests_targets.append(test_vcd_target)
+            tests_targets.append(test_waveform_target)
 
         # -- The top level 'test' target.
         apio_env.alias("test", source=tests_targets, always_build=True)
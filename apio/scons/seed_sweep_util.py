@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2025 FPGAwars
+# -- License GPLv2
+"""Utilities for the nextpnr seed sweep of 'apio build --seed-sweep'."""
+
+import shutil
+import statistics
+from pathlib import Path
+from typing import Dict, List, Optional
+from rich.table import Table
+from rich import box
+from SCons.Action import FunctionAction, Action
+from SCons.Node.FS import File
+from SCons.Script.SConscript import SConsEnvironment
+from apio.scons.apio_env import ApioEnv
+from apio.common.proto.apio_pb2 import SeedSweepMetric, FMAX
+from apio.common.apio_console import cout, cerror, ctable
+from apio.common.apio_styles import INFO, BORDER, EMPH3
+from apio.common.build_report import BuildReport, read_build_report
+from apio.common.build_history import (
+    SEED_SWEEP_FILE_NAME,
+    file_sha256,
+    write_sweep_seed,
+)
+
+
+def seed_sweep_score(
+    build_report: BuildReport, metric: SeedSweepMetric
+) -> float:
+    """Returns the score of a seed sweep result. Higher is better. With the
+    FMAX metric, the score is the worst case fmax of the design and with
+    the UTILIZATION metric, it's the negative utilization of the most
+    used resource."""
+    if metric == FMAX:
+        clock = build_report.min_fmax_clock()
+        return clock.fmax_mhz if clock else 0.0
+
+    resource = build_report.max_used_resource()
+    return -resource.percentage if resource else 0.0
+
+
+def select_best_seed(
+    reports: Dict[int, Optional[BuildReport]], metric: SeedSweepMetric
+) -> Optional[int]:
+    """Given the build reports of a seed sweep, returns the seed with the
+    best score or None if all the seeds failed. Failed seeds have None
+    report. Ties are resolved in favor of the lower seed."""
+    candidates = [seed for seed, report in reports.items() if report]
+    if not candidates:
+        return None
+    return max(
+        sorted(candidates),
+        key=lambda seed: seed_sweep_score(reports[seed], metric),
+    )
+
+
+def _print_seed_sweep_report(
+    reports: Dict[int, Optional[BuildReport]],
+    best_seed: int,
+    metric: SeedSweepMetric,
+) -> None:
+    """Emit a user friendly report of a seed sweep."""
+
+    # -- Seeds table.
+    table = Table(
+        show_header=True,
+        show_lines=False,
+        box=box.SQUARE,
+        border_style=BORDER,
+        title="Seed sweep results",
+        title_justify="left",
+        padding=(0, 2),
+    )
+
+    # -- Add columns.
+    table.add_column("SEED", no_wrap=True, justify="right")
+    table.add_column("MIN FMAX [Mhz]", no_wrap=True, justify="right")
+    table.add_column("MAX USED RESOURCE", no_wrap=True)
+    table.add_column("", no_wrap=True)
+
+    # -- Add rows.
+    for seed, report in sorted(reports.items()):
+        if not report:
+            table.add_row(str(seed), "", "", "failed", style=INFO)
+            continue
+        clock = report.min_fmax_clock()
+        fmax_str = f"{clock.fmax_mhz:.2f}" if clock else ""
+        resource = report.max_used_resource()
+        resource_str = (
+            f"{resource.name} {int(resource.percentage)}%" if resource else ""
+        )
+        is_best = seed == best_seed
+        table.add_row(
+            str(seed),
+            fmax_str,
+            resource_str,
+            "best" if is_best else "",
+            style=EMPH3 if is_best else None,
+        )
+
+    # -- Render the table.
+    cout()
+    ctable(table)
+
+    # -- Print the distribution of the selection metric.
+    _print_seed_sweep_distribution(reports, metric)
+
+    # -- Print hints.
+    cout(f"Selected seed {best_seed}.", style=EMPH3)
+    cout(
+        f"To use this seed in regular builds, add '--seed {best_seed}' to "
+        "the 'nextpnr-extra-options' option in apio.ini.",
+        style=INFO,
+    )
+
+
+def _print_seed_sweep_distribution(
+    reports: Dict[int, Optional[BuildReport]], metric: SeedSweepMetric
+) -> None:
+    """Prints the distribution of the selection metric over the seeds that
+    didn't fail, and the number of failed seeds."""
+    scores = [
+        seed_sweep_score(report, metric)
+        for report in reports.values()
+        if report
+    ]
+    if metric == FMAX:
+        values = scores
+        units = "Mhz"
+        title = "Min fmax"
+    else:
+        values = [-x for x in scores]
+        units = "%"
+        title = "Max utilization"
+    cout(
+        f"{title} distribution over {len(values)} seeds: "
+        f"min {min(values):.2f}{units}, "
+        f"median {statistics.median(values):.2f}{units}, "
+        f"max {max(values):.2f}{units}."
+    )
+    failed = len(reports) - len(values)
+    if failed:
+        cout(f"{failed} seeds failed.", style=INFO)
+
+
+def clear_seed_report_action(report_path: str) -> FunctionAction:
+    """Returns a SCons action that deletes the nextpnr report of a seed, to
+    run before the seed is placed and routed. The seed sweep ignores the
+    nextpnr errors and treats seeds without a report as failed, so a stale
+    report of a previous sweep must not survive a failing run. SCons deletes
+    the target files of the seed by itself."""
+
+    def clear_report(
+        target: List[File], source: List[File], env: SConsEnvironment
+    ) -> int:
+        """The action function."""
+        _ = (target, source, env)  # Unused
+        Path(report_path).unlink(missing_ok=True)
+        return 0
+
+    return Action(clear_report, strfunction=None)
+
+
+def seed_sweep_action(
+    apio_env: ApioEnv, seeds: List[int], metric: SeedSweepMetric
+) -> FunctionAction:
+    """Returns a SCons action that selects the best result of a nextpnr seed
+    sweep, prints the distribution of the results, and copies the output
+    files of the best seed into the env build directory, where the
+    bitstream builder expects them. The selected seed is saved in the env
+    build directory for the build history. Used by 'apio build
+    --seed-sweep'."""
+
+    def select_seed(
+        target: List[File],
+        source: List[File],
+        env: SConsEnvironment,
+    ):
+        """Action function. Reads the seeds reports and copies the files
+        of the best seed."""
+        _ = (source, env)  # Unused
+
+        # -- Read the reports. Failed seeds have no report.
+        reports: Dict[int, Optional[BuildReport]] = {}
+        for seed in seeds:
+            report_path = Path(apio_env.seed_target(seed) + ".pnr")
+            reports[seed] = (
+                read_build_report(report_path)
+                if report_path.is_file()
+                else None
+            )
+
+        # -- Select the best seed.
+        best_seed = select_best_seed(reports, metric)
+        if best_seed is None:
+            cerror("All the nextpnr seeds failed.")
+            return 1
+
+        # -- Report the results.
+        _print_seed_sweep_report(reports, best_seed, metric)
+
+        # -- Copy the files of the best seed to the targets. The targets
+        # -- have the same file names as the seed's files.
+        best_dir = Path(apio_env.seed_target(best_seed)).parent
+        for node in target:
+            dst_path = Path(node.get_path())
+            shutil.copyfile(best_dir / dst_path.name, dst_path)
+
+        # -- Save the selected seed for the build history.
+        write_sweep_seed(
+            apio_env.env_build_path / SEED_SWEEP_FILE_NAME,
+            best_seed,
+            file_sha256(Path(apio_env.seed_target(best_seed) + ".pnr")),
+        )
+
+        return 0
+
+    return Action(
+        select_seed,  # pyright: ignore[reportReturnType]
+        "Selecting the best nextpnr seed.",
+    )
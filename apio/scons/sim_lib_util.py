@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2025 FPGAwars
+# -- License GPLv2
+"""Utilities for caching the vendor simulation libraries (e.g. the yosys
+cells_sim.v files) as iverilog library directories with one file per
+module. When iverilog is given such a directory with the -y flag, it parses
+only the modules that the design instantiates rather than the entire
+library, so the testbench compilation time scales with the user's code
+rather than with the vendor library size."""
+
+import os
+import re
+import shutil
+import hashlib
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import List, Optional, Dict
+from apio.common.apio_console import cout
+from apio.common.apio_styles import EMPH3
+from apio.scons.apio_env import ApioEnv
+
+# -- Incremented when the format of the cached library dirs changes.
+_SIM_LIB_CACHE_VERSION = 1
+
+# -- A file that is written last to a complete library dir.
+_COMPLETE_MARKER = "COMPLETE"
+
+# -- The suffix of the module files in the library dir. Passed to iverilog
+# -- with the -Y flag.
+SIM_LIB_MODULE_SUFFIX = ".v"
+
+# -- Matches the start and end of a module or a primitive definition in the
+# -- preprocessed library text.
+_BLOCK_START_REGEX = re.compile(
+    r"^\s*(?:module|macromodule|primitive)\s+(\\\S+|[A-Za-z_][\w$]*)"
+)
+_BLOCK_END_REGEX = re.compile(r"\b(?:endmodule|endprimitive)\b")
+
+# -- Directives outside of module definitions that apply to the following
+# -- modules and are copied to each module file.
+_STICKY_DIRECTIVE_REGEX = re.compile(
+    r"^\s*`(timescale|default_nettype|celldefine|endcelldefine)\b"
+)
+
+# -- Preprocessor line markers that iverilog -E emits.
+_LINE_DIRECTIVE_REGEX = re.compile(r"^\s*`line\b")
+
+
+def split_sim_lib(text: str) -> Optional[Dict[str, str]]:
+    """Splits a preprocessed verilog library into a dict of module name to
+    module text. The text of each module is prefixed with the sticky
+    directives, such as `timescale, that preceded it. Returns None if the
+    text contains anything else outside of the modules, in which case it's
+    not safe to split it."""
+
+    modules: Dict[str, str] = {}
+    sticky: Dict[str, str] = {}
+    block_name: Optional[str] = None
+    block_lines: List[str] = []
+
+    for line in text.splitlines():
+        if block_name is None:
+            # -- Outside of a module.
+            match = _BLOCK_START_REGEX.match(line)
+            if match:
+                # -- Start of a module.
+                block_name = match.group(1)
+                block_lines = list(sticky.values())
+            elif _STICKY_DIRECTIVE_REGEX.match(line):
+                directive = _STICKY_DIRECTIVE_REGEX.match(line).group(1)
+                sticky[directive] = line
+                continue
+            elif not line.strip() or _LINE_DIRECTIVE_REGEX.match(line):
+                continue
+            else:
+                # -- Unexpected text outside of a module.
+                return None
+
+        # -- A line of a module, possibly its first and last.
+        block_lines.append(line)
+        if _BLOCK_END_REGEX.search(line):
+            # -- A library with duplicate modules can't be split.
+            if block_name in modules:
+                return None
+            modules[block_name] = "\n".join(block_lines) + "\n"
+            block_name = None
+
+    # -- Fail on an unterminated module or no modules at all.
+    if block_name is not None or not modules:
+        return None
+
+    return modules
+
+
+def _cache_key(
+    lib_files: List[Path], include_dirs: List[Path], flags: List[str]
+) -> str:
+    """Returns a hash that identifies the given library files, their
+    versions and the flags that affect their preprocessing."""
+    hasher = hashlib.sha1()
+    hasher.update(f"v{_SIM_LIB_CACHE_VERSION}\n".encode())
+    for path in lib_files:
+        # -- A toolchain update changes the size or the mtime of the files.
+        stat = path.stat()
+        hasher.update(f"{path}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+    for path in include_dirs:
+        hasher.update(f"-I{path}\n".encode())
+    for flag in flags:
+        hasher.update(f"{flag}\n".encode())
+    return hasher.hexdigest()[:16]
+
+
+def _build_sim_lib_dir(
+    lib_dir: Path,
+    lib_files: List[Path],
+    include_dirs: List[Path],
+    flags: List[str],
+) -> bool:
+    """Preprocesses the library files with iverilog -E and writes their
+    modules to lib_dir. Returns True if successful."""
+
+    # -- Work in a temp dir next to the final dir and rename it when done,
+    # -- so concurrent scons processes never see a partial library.
+    lib_dir.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(dir=lib_dir.parent, prefix="tmp-"))
+    try:
+        preprocessed = tmp_dir / "preprocessed.v"
+        cmd = (
+            ["iverilog", "-g2012", "-E", "-o", str(preprocessed)]
+            + flags
+            + [f"-I{d}" for d in include_dirs]
+            + [str(f) for f in lib_files]
+        )
+        result = subprocess.run(
+            cmd, capture_output=True, text=True, check=False
+        )
+        if result.returncode != 0:
+            return False
+
+        modules = split_sim_lib(
+            preprocessed.read_text(encoding="utf-8", errors="replace")
+        )
+        if modules is None:
+            return False
+        preprocessed.unlink()
+
+        # -- Write a file per module. Escaped identifiers can't be used as
+        # -- file names, and iverilog wouldn't look them up anyway.
+        for name, text in modules.items():
+            if name.startswith("\\"):
+                continue
+            (tmp_dir / f"{name}{SIM_LIB_MODULE_SUFFIX}").write_text(
+                text, encoding="utf-8"
+            )
+        (tmp_dir / _COMPLETE_MARKER).touch()
+
+        try:
+            os.replace(tmp_dir, lib_dir)
+        except OSError:
+            # -- Another process completed the same library first.
+            pass
+        return (lib_dir / _COMPLETE_MARKER).is_file()
+
+    except OSError:
+        return False
+
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def get_cached_sim_lib_dir(
+    apio_env: ApioEnv,
+    *,
+    arch: str,
+    lib_files: List[Path],
+    include_dirs: List[Path],
+    flags: List[str],
+) -> Optional[Path]:
+    """Returns a cached iverilog library dir with the modules of the given
+    library files, creating it if needed. Flags are the iverilog flags,
+    such as -D defines, that affect the preprocessing of the library.
+    Returns None if the library can't be cached, in which case the caller
+    should compile the library files as is."""
+
+    # -- Caching requires a cache dir.
+    cache_dir = apio_env.params.environment.cache_dir
+    if not cache_dir:
+        return None
+
+    try:
+        key = _cache_key(lib_files, include_dirs, flags)
+    except OSError:
+        return None
+
+    lib_dir = Path(cache_dir) / "sim-libs" / f"{arch}-{key}"
+
+    # -- Cache hit.
+    if (lib_dir / _COMPLETE_MARKER).is_file():
+        return lib_dir
+
+    # -- Cache miss. Build the library dir. This happens once per
+    # -- architecture, toolchain version and flags.
+    if apio_env.is_debug(1):
+        cout(f"Caching simulation library {lib_dir}", style=EMPH3)
+    if _build_sim_lib_dir(lib_dir, lib_files, include_dirs, flags):
+        return lib_dir
+
+    if apio_env.is_debug(1):
+        cout("Simulation library caching failed, using the full library.")
+    return None
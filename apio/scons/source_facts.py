@@ -0,0 +1,354 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2025 FPGAwars
+# -- License GPLv2
+"""A single pass analysis of the project's [System]Verilog source files.
+Each file is read and scanned once for all the facts that apio needs, such
+as its include and memory file references, and the facts are memoized in
+memory and in a cache file in _build, keyed by the hash of the file
+content, so following commands don't scan unchanged files again.
+
+The facts are used by the scons dependencies scanner and by the source
+files issue checker of the sim, test and lint commands."""
+
+import os
+import re
+import json
+import time
+import atexit
+import hashlib
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import List, Dict, Any
+from apio.common.common_util import PROJECT_BUILD_PATH
+
+# -- The cache file, relative to the project dir.
+SOURCE_FACTS_CACHE_PATH = PROJECT_BUILD_PATH / "source-facts.json"
+
+# -- Incremented when the analysis or the format of the cache changes.
+_SOURCE_FACTS_CACHE_VERSION = 3
+
+# -- Files that were modified less than this time ago may be modified again
+# -- without a visible change of their mtime (coarse file system
+# -- timestamps), so we verify their content hash even if their size and
+# -- mtime didn't change.
+_RACY_MTIME_NS = 2_000_000_000
+
+# A Regex to icestudio propriaetry references for *.list files.
+# Example:
+#   Text:      ' parameter v771499 = "v771499.list"'
+#   Captures:  'v771499.list'
+_ICESTUDIO_LIST_RE = re.compile(r"[\n|\s][^\/]?\"(.*\.list?)\"", re.M)
+
+# A regex to match a verilog include directive.
+# Example
+#   Text:     `include "apio_testing.vh"
+#   Capture:  'apio_testing.vh'
+_VERILOG_INCLUDE_RE = re.compile(r'`\s*include\s+["]([^"]+)["]', re.M)
+
+# A regex for inclusion via $readmemh()
+# Example
+#   Test:      '$readmemh("my_data.hex", State_buff);'
+#   Capture:   'my_data.hex'
+_READMEMH_REFERENCE_RE = re.compile(
+    r"\$readmemh\([\'\"]([^\'\"]+)[\'\"]", re.M
+)
+
+# A regex to identify "$dumpfile(" in testbenches.
+_DUMPFILE_RE = re.compile(r"[$]dumpfile\s*[(]")
+
+# A regex for module declarations.
+# Example
+#   Text:      'module main #(parameter N = 8) ('
+#   Capture:   'main'
+_MODULE_DECLARATION_RE = re.compile(
+    r"^\s*(?:module|macromodule)\s+([A-Za-z_][\w$]*)", re.M
+)
+
+# A regex for SystemVerilog package declarations.
+# Example
+#   Text:      'package defs;'
+#   Capture:   'defs'
+_PACKAGE_DECLARATION_RE = re.compile(
+    r"^\s*package\s+(?:(?:automatic|static)\s+)?([A-Za-z_][\w$]*)", re.M
+)
+
+# A regex for references to SystemVerilog packages, by import declarations
+# or by scoped names. It may also match class scopes, so the references
+# should be matched against the declared packages.
+# Example
+#   Text:      'import defs::*;'
+#   Capture:   'defs'
+_PACKAGE_REFERENCE_RE = re.compile(r"(?<![\w$])([A-Za-z_][\w$]*)\s*::")
+
+# Packages that are built into the simulators and are not declared in the
+# source files.
+_BUILTIN_PACKAGES = {"std"}
+
+# A regex for candidate module instantiations, an identifier followed by
+# a parameters list or by an instance name, an optional instances array
+# range and a ports list. The instantiation may start a line or follow a
+# ';' and may have attributes. It may also match some non instantiations,
+# e.g. user defined type declarations, so the candidates should be matched
+# against the declared modules.
+# Example
+#   Text:      '(* keep *) counter #(.N(8)) counter1 [3:0] (.clk(clk));'
+#   Capture:   'counter'
+_INSTANTIATION_RE = re.compile(
+    r"(?:^|;)\s*(?:\(\*.*?\*\)\s*)*([A-Za-z_][\w$]*)\s*"
+    r"(?:#\s*\(|[A-Za-z_][\w$]*\s*(?:\[[^\]]*\]\s*)*\()",
+    re.M,
+)
+
+# Keywords that _INSTANTIATION_RE matches in declarations and statements,
+# and the built-in gate primitives, which are not module instantiations.
+_NON_INSTANCE_KEYWORDS = {
+    # -- Declarations.
+    "module",
+    "macromodule",
+    "primitive",
+    "interface",
+    "program",
+    "function",
+    "task",
+    "property",
+    "sequence",
+    "checker",
+    "class",
+    "covergroup",
+    # -- Statements and procedural blocks, e.g. 'else if (x)'.
+    "always",
+    "always_comb",
+    "always_ff",
+    "always_latch",
+    "initial",
+    "final",
+    "generate",
+    "begin",
+    "else",
+    "return",
+    "assert",
+    "assume",
+    "cover",
+    "restrict",
+    "expect",
+    "unique",
+    "unique0",
+    "priority",
+    "wait",
+    "disable",
+    # -- Gate primitives.
+    "and",
+    "nand",
+    "or",
+    "nor",
+    "xor",
+    "xnor",
+    "buf",
+    "not",
+    "bufif0",
+    "bufif1",
+    "notif0",
+    "notif1",
+    "pullup",
+    "pulldown",
+}
+
+
+@dataclass(frozen=True)
+class SourceFacts:
+    """The facts of a single source file that apio needs."""
+
+    # pylint: disable=too-many-instance-attributes
+
+    # -- The files referenced by `include directives.
+    includes: List[str]
+    # -- The files referenced by $readmemh() calls.
+    memory_files: List[str]
+    # -- The .list files referenced by icestudio generated code.
+    icestudio_lists: List[str]
+    # -- True if the file calls $dumpfile().
+    has_dumpfile: bool
+    # -- The names of the modules that the file declares.
+    modules: List[str]
+    # -- Names of modules that the file may instantiate. See
+    # -- _INSTANTIATION_RE.
+    instances: List[str]
+    # -- The names of the packages that the file declares.
+    packages: List[str]
+    # -- Names of packages that the file may reference. See
+    # -- _PACKAGE_REFERENCE_RE.
+    package_refs: List[str]
+
+    @property
+    def references(self) -> List[str]:
+        """All the file references, in no particular order and with possible
+        duplicates."""
+        return self.includes + self.memory_files + self.icestudio_lists
+
+
+# -- Facts of a file that doesn't exist.
+_NO_FACTS = SourceFacts(
+    includes=[],
+    memory_files=[],
+    icestudio_lists=[],
+    has_dumpfile=False,
+    modules=[],
+    instances=[],
+    packages=[],
+    package_refs=[],
+)
+
+
+def analyze_source_text(text: str) -> SourceFacts:
+    """Scans the text of a source file and returns its facts."""
+    return SourceFacts(
+        includes=_VERILOG_INCLUDE_RE.findall(text),
+        memory_files=_READMEMH_REFERENCE_RE.findall(text),
+        icestudio_lists=_ICESTUDIO_LIST_RE.findall(text),
+        has_dumpfile=_DUMPFILE_RE.search(text) is not None,
+        modules=list(dict.fromkeys(_MODULE_DECLARATION_RE.findall(text))),
+        instances=[
+            name
+            for name in dict.fromkeys(_INSTANTIATION_RE.findall(text))
+            if name not in _NON_INSTANCE_KEYWORDS
+        ],
+        packages=list(dict.fromkeys(_PACKAGE_DECLARATION_RE.findall(text))),
+        package_refs=[
+            name
+            for name in dict.fromkeys(_PACKAGE_REFERENCE_RE.findall(text))
+            if name not in _BUILTIN_PACKAGES
+        ],
+    )
+
+
+@dataclass
+class SourceFactsCache:
+    """The memoized facts of this process. Entries are keyed by the file
+    path and contain the file's size and mtime, the hash of its content
+    and its facts."""
+
+    # -- The project dir the file paths are relative to.
+    project_dir: str
+    entries: Dict[str, Dict[str, Any]]
+    # -- The facts of the files that were already checked by this process.
+    # -- Files are not expected to change while the process runs.
+    checked: Dict[str, SourceFacts] = field(default_factory=dict)
+    # -- True if entries were changed since the cache file was loaded.
+    dirty: bool = False
+
+
+# -- The memoized facts, or None if not loaded yet.
+_state: SourceFactsCache | None = None
+
+
+def _get_cache() -> SourceFactsCache:
+    """Returns the facts cache of the current project dir, loading it from
+    the cache file on first call."""
+
+    # pylint: disable=global-statement
+    global _state
+
+    # -- The scons process runs in a single project dir, but tests may
+    # -- change it.
+    project_dir = os.getcwd()
+    if _state is not None and _state.project_dir != project_dir:
+        _state = None
+
+    if _state is None:
+        entries = {}
+        try:
+            data = json.loads(
+                SOURCE_FACTS_CACHE_PATH.read_text(encoding="utf-8")
+            )
+            if data.get("version") == _SOURCE_FACTS_CACHE_VERSION:
+                entries = data["entries"]
+        except (OSError, ValueError, KeyError, AttributeError):
+            # -- Missing or invalid cache, start with an empty one.
+            pass
+        _state = SourceFactsCache(project_dir=project_dir, entries=entries)
+        atexit.register(save_source_facts_cache, _state)
+
+    return _state
+
+
+def get_source_facts(file_path: str) -> SourceFacts:
+    """Returns the facts of the given source file. The file is read only if
+    it changed since it was last analyzed and is scanned only if its content
+    is new."""
+
+    cache = _get_cache()
+
+    # -- Fastest path, the file was already checked by this process.
+    facts = cache.checked.get(file_path)
+    if facts is not None:
+        return facts
+
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return _NO_FACTS
+
+    entry = cache.entries.get(file_path)
+    stat_key = [stat.st_size, stat.st_mtime_ns]
+
+    # -- Fast path, the file was not touched since it was analyzed.
+    if (
+        entry
+        and entry["stat"] == stat_key
+        and stat.st_mtime_ns < time.time_ns() - _RACY_MTIME_NS
+    ):
+        facts = SourceFacts(**entry["facts"])
+        cache.checked[file_path] = facts
+        return facts
+
+    # -- Read the file and check if we analyzed this content before.
+    try:
+        with open(file_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return _NO_FACTS
+    digest = hashlib.sha1(data).hexdigest()
+
+    if entry and entry["sha1"] == digest:
+        facts = SourceFacts(**entry["facts"])
+    else:
+        facts = analyze_source_text(data.decode("utf-8-sig", errors="replace"))
+
+    cache.entries[file_path] = {
+        "stat": stat_key,
+        "sha1": digest,
+        "facts": asdict(facts),
+    }
+    cache.checked[file_path] = facts
+    cache.dirty = True
+    return facts
+
+
+def save_source_facts_cache(cache: SourceFactsCache) -> None:
+    """Writes the memoized facts to the cache file of their project, if they
+    changed. Called automatically on exit. The cache file is written only if
+    the _build directory exists, to not create it as a side effect."""
+
+    project_dir = Path(cache.project_dir)
+    build_dir = project_dir / PROJECT_BUILD_PATH
+    if not cache.dirty or not build_dir.is_dir():
+        return
+
+    # -- Drop the entries of files that no longer exist.
+    entries = {
+        k: v for k, v in cache.entries.items() if (project_dir / k).is_file()
+    }
+    data = {"version": _SOURCE_FACTS_CACHE_VERSION, "entries": entries}
+
+    # -- Write to a temp file and rename so a concurrent reader never sees
+    # -- a partial file.
+    cache_path = project_dir / SOURCE_FACTS_CACHE_PATH
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        tmp_path.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp_path, cache_path)
+        cache.dirty = False
+    except OSError:
+        # -- The cache is optional.
+        tmp_path.unlink(missing_ok=True)
@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2025 FPGAwars
+# -- License GPLv2
+"""Utilities of the upload target. Uploads the bitstream to multiple devices
+concurrently, with 'apio upload --all-matching' or with multiple
+'--serial-num' flags, and maintains the upload registry, which maps the
+serial numbers of the devices to the sha256 of the bitstream that apio most
+recently uploaded to them successfully, for 'apio upload
+--skip-if-current'."""
+
+import os
+import json
+import time
+import hashlib
+import subprocess
+from pathlib import Path
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+from rich.table import Table
+from rich import box
+from SCons.Action import FunctionAction, Action
+from SCons.Node.FS import File
+from SCons.Node.Alias import Alias
+from SCons.Script.SConscript import SConsEnvironment
+from apio.common.apio_console import cout, ctable
+from apio.common.apio_styles import BORDER, EMPH3, ERROR, INFO, SUCCESS
+from apio.common.proto.apio_pb2 import DeviceUpload
+
+# -- The upload registry file, relative to the apio cache dir.
+UPLOAD_REGISTRY_PATH = Path("devices") / "upload-registry.json"
+
+# -- Increment when the format of the registry file changes.
+_REGISTRY_VERSION = 1
+
+
+def bitstream_sha256(file_path: str) -> str:
+    """Returns the sha256 hex digest of the bitstream file."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_upload_registry(registry_file: Path) -> Dict[str, str]:
+    """Returns the upload registry, a mapping of device serial numbers to
+    bitstream sha256 digests. Returns an empty registry if there is no
+    valid registry file."""
+    try:
+        data = json.loads(registry_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != _REGISTRY_VERSION:
+        return {}
+    devices = data.get("devices", {})
+    if not isinstance(devices, dict):
+        return {}
+    return {k: v for k, v in devices.items() if isinstance(v, str)}
+
+
+def record_uploads(
+    registry_file: Path, serial_nums: List[str], sha256: str
+) -> None:
+    """Records in the upload registry that the bitstream with the given
+    sha256 was uploaded to the devices with the given serial numbers. The
+    registry is reloaded first, to preserve the uploads of concurrent apio
+    processes. Failures are ignored since the registry is only an
+    optimization."""
+    registry = load_upload_registry(registry_file)
+    for serial_num in serial_nums:
+        registry[serial_num] = sha256
+    try:
+        registry_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = registry_file.with_name(
+            f"{registry_file.name}.{os.getpid()}.tmp"
+        )
+        tmp_file.write_text(
+            json.dumps(
+                {"version": _REGISTRY_VERSION, "devices": registry}, indent=2
+            ),
+            encoding="utf-8",
+        )
+        os.replace(tmp_file, registry_file)
+    except OSError:
+        pass
+
+
+@dataclass(frozen=True)
+class DeviceUploadResult:
+    """The result of uploading the bitstream to a single device."""
+
+    device: str
+    exit_code: int
+    duration: float
+    output: str
+    # -- True if the upload was skipped since the device already holds the
+    # -- bitstream.
+    skipped: bool = False
+
+
+def _upload_to_device(cmd: str, device: str, env_vars) -> DeviceUploadResult:
+    """Runs the programmer command of a single device and returns its
+    result. The output of the command is captured."""
+    start_time = time.time()
+    result = subprocess.run(
+        cmd,
+        shell=True,
+        env=env_vars,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        errors="replace",
+        check=False,
+    )
+    return DeviceUploadResult(
+        device=device,
+        exit_code=result.returncode,
+        duration=time.time() - start_time,
+        output=result.stdout,
+    )
+
+
+def _print_device_upload_output(result: DeviceUploadResult) -> None:
+    """Prints the captured output of a device upload as a single block."""
+    if result.skipped:
+        cout(f"[{result.device}] SKIPPED, already current", style=INFO)
+        return
+    status = "OK" if result.exit_code == 0 else "FAILED"
+    cout(
+        f"[{result.device}] {status}",
+        style=SUCCESS if result.exit_code == 0 else ERROR,
+    )
+    output = result.output.rstrip()
+    if output:
+        cout(output)
+
+
+def _print_uploads_summary(
+    results: List[DeviceUploadResult], bitstream_size: int
+) -> None:
+    """Prints a summary table of the uploads to multiple devices."""
+
+    table = Table(
+        show_header=True,
+        show_lines=False,
+        box=box.SQUARE,
+        border_style=BORDER,
+        title="Upload results",
+        title_justify="left",
+        padding=(0, 2),
+    )
+
+    table.add_column("DEVICE", no_wrap=True, style=EMPH3)
+    table.add_column("STATUS", no_wrap=True)
+    table.add_column("TIME [sec]", no_wrap=True, justify="right")
+    table.add_column("THROUGHPUT [KB/s]", no_wrap=True, justify="right")
+
+    for result in results:
+        ok = result.exit_code == 0
+        if result.skipped:
+            table.add_row(result.device, "SKIPPED", "", "")
+            continue
+        throughput = (
+            f"{bitstream_size / 1024 / result.duration:.1f}"
+            if ok and result.duration > 0
+            else ""
+        )
+        table.add_row(
+            result.device,
+            "OK" if ok else "FAILED",
+            f"{result.duration:.2f}",
+            throughput,
+            style=None if ok else ERROR,
+        )
+
+    cout()
+    ctable(table)
+
+    failed = sum(1 for r in results if r.exit_code != 0)
+    skipped = sum(1 for r in results if r.skipped)
+    uploaded = len(results) - failed - skipped
+    skipped_msg = f", skipped {skipped} current devices" if skipped else ""
+    if failed:
+        cout(
+            f"Failed to upload to {failed} of {len(results)} "
+            f"devices{skipped_msg}."
+        )
+    else:
+        cout(f"Uploaded to {uploaded} devices{skipped_msg}.")
+
+
+def single_upload_action(
+    programmer_cmd: str,
+    serial_num: str,
+    skip_if_current: bool,
+    registry_file: Optional[Path],
+) -> FunctionAction:
+    """Returns a SCons action that uploads the bitstream, which is the
+    source of the action, to a single device, and records the upload in the
+    registry if the device's serial number is known. With skip_if_current,
+    the upload is skipped if the registry shows that the device already
+    holds the bitstream."""
+
+    def upload_to_device(
+        target: List[Alias], source: List[File], env: SConsEnvironment
+    ) -> int:
+        """The action function."""
+
+        sha256 = bitstream_sha256(source[0].get_path())
+
+        if skip_if_current and serial_num and registry_file:
+            if load_upload_registry(registry_file).get(serial_num) == sha256:
+                cout(
+                    f"Device {serial_num} already holds this bitstream, "
+                    "skipping the upload.",
+                    style=SUCCESS,
+                )
+                cout("Use --force to upload anyway.", style=INFO)
+                return 0
+        elif skip_if_current:
+            cout(
+                "The device has no known serial number, can't skip the "
+                "upload.",
+                style=INFO,
+            )
+
+        # -- Run the programmer command, as a command action would.
+        cmd = env.subst(programmer_cmd, target=target, source=source)
+        exit_code = env.Execute(cmd)
+
+        if exit_code == 0 and serial_num and registry_file:
+            record_uploads(registry_file, [serial_num], sha256)
+        return exit_code
+
+    return Action(upload_to_device, strfunction=None)
+
+
+def multi_upload_action(
+    devices: List[DeviceUpload],
+    max_jobs: int,
+    skip_if_current: bool,
+    registry_file: Optional[Path],
+) -> FunctionAction:
+    """Returns a SCons action that uploads the bitstream, which is the
+    source of the action, to the given devices, running up to max_jobs
+    programmer commands concurrently. The output of each device is printed
+    when its upload completes, followed by a summary table. The action
+    fails if any of the uploads failed. The successful uploads to devices
+    with known serial numbers are recorded in the registry and with
+    skip_if_current, devices that already hold the bitstream are
+    skipped."""
+
+    assert devices
+    assert max_jobs > 0, max_jobs
+
+    def upload_to_devices(
+        target: List[Alias], source: List[File], env: SConsEnvironment
+    ) -> int:
+        """The action function."""
+
+        # pylint: disable=too-many-locals
+
+        # -- Resolve $SOURCE in the commands to the bitstream file.
+        cmds = [
+            env.subst(d.programmer_cmd, target=target, source=source)
+            for d in devices
+        ]
+        bitstream_size = os.path.getsize(source[0].get_path())
+        sha256 = bitstream_sha256(source[0].get_path())
+        registry = load_upload_registry(registry_file) if registry_file else {}
+
+        # -- Skip the devices that already hold the bitstream.
+        results: List[DeviceUploadResult] = []
+        pending = []
+        for cmd, device in zip(cmds, devices):
+            if (
+                skip_if_current
+                and device.serial_num
+                and registry.get(device.serial_num) == sha256
+            ):
+                result = DeviceUploadResult(
+                    device=device.device,
+                    exit_code=0,
+                    duration=0,
+                    output="",
+                    skipped=True,
+                )
+                _print_device_upload_output(result)
+                results.append(result)
+            else:
+                pending.append((cmd, device))
+
+        cout(f"Uploading to {len(pending)} devices.")
+
+        # -- Run the commands and print the output of each device as it
+        # -- completes.
+        with ThreadPoolExecutor(max_workers=max_jobs) as executor:
+            futures = [
+                executor.submit(
+                    _upload_to_device, cmd, device.device, env["ENV"]
+                )
+                for cmd, device in pending
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                _print_device_upload_output(result)
+                results.append(result)
+
+        # -- Record the successful uploads.
+        uploaded = {
+            r.device for r in results if r.exit_code == 0 and not r.skipped
+        }
+        serial_nums = [
+            d.serial_num
+            for d in devices
+            if d.device in uploaded and d.serial_num
+        ]
+        if serial_nums and registry_file:
+            record_uploads(registry_file, serial_nums, sha256)
+
+        # -- Print the summary in the order of the devices.
+        order = {d.device: i for i, d in enumerate(devices)}
+        results.sort(key=lambda r: order[r.device])
+        _print_uploads_summary(results, bitstream_size)
+
+        return 0 if all(r.exit_code == 0 for r in results) else 1
+
+    return Action(upload_to_devices, strfunction=None)
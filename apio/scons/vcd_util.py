@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2025 FPGAwars
+# -- License GPLv2
+"""VCD (value change dump) related utilities for the Apio Scons sub
+process."""
+
+import mmap
+import subprocess
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Union, Iterator
+
+# -- The keyword that terminates the header of a VCD file.
+_END_DEFINITIONS = "$enddefinitions"
+
+# -- Maps the suffixes of the compressed waveform files to the GTKWave
+# -- utility that converts them to VCD text on stdout.
+_WAVEFORM_TO_VCD_TOOLS = {
+    ".fst": "fst2vcd",
+    ".lxt2": "lxt2vcd",
+}
+
+
+class VcdHeaderError(Exception):
+    """Raised when the header of a VCD file can't be parsed."""
+
+
+@dataclass(frozen=True)
+class VcdVar:
+    """A signal that is defined by a $var declaration."""
+
+    # -- The full signal name, including its scopes, e.g.
+    # -- "testbench.i[31:0]". Same as the VCDVCD reference names.
+    reference: str
+    # -- E.g. "wire", "reg", "integer".
+    var_type: str
+    # -- The width of the signal in bits.
+    size: int
+    # -- The short identifier of the signal in the value changes section.
+    id_code: str
+
+
+@dataclass
+class VcdScope:
+    """A scope, e.g. a module instance, defined by a $scope declaration."""
+
+    # -- The full scope name, e.g. "testbench.dut".
+    name: str
+    # -- E.g. "module", "task", "begin".
+    scope_type: str
+    scopes: List["VcdScope"] = field(default_factory=list)
+    vars: List[VcdVar] = field(default_factory=list)
+
+
+@dataclass
+class VcdHeader:
+    """The definitions of a VCD file."""
+
+    # -- The timescale, e.g. "1ns", or None if not specified.
+    timescale: Optional[str] = None
+    # -- The top level scopes.
+    scopes: List[VcdScope] = field(default_factory=list)
+    # -- Vars that are defined outside of any scope.
+    vars: List[VcdVar] = field(default_factory=list)
+
+    def all_vars(self) -> List[VcdVar]:
+        """Returns all the vars of the header, in definition order."""
+        result: List[VcdVar] = list(self.vars)
+        pending = list(reversed(self.scopes))
+        while pending:
+            scope = pending.pop()
+            result.extend(scope.vars)
+            pending.extend(reversed(scope.scopes))
+        return result
+
+
+def _read_header_bytes(vcd_path: Union[str, Path]) -> bytes:
+    """Returns the bytes of the VCD file up to the $enddefinitions keyword.
+    The file is memory mapped so only the pages of the header are read."""
+    with open(vcd_path, "rb") as f:
+        # -- mmap doesn't support empty files.
+        if f.seek(0, 2) == 0:
+            raise VcdHeaderError(f"{vcd_path} is empty.")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = mm.find(_END_DEFINITIONS.encode())
+            if end < 0:
+                raise VcdHeaderError(f"{vcd_path} has no {_END_DEFINITIONS}.")
+            return mm[:end]
+
+
+def _statements(tokens: Iterator[str]) -> Iterator[List[str]]:
+    """Groups the header tokens into statements, each starting with its
+    $keyword and without the terminating $end."""
+    statement: List[str] = []
+    for token in tokens:
+        if token == "$end":
+            if statement:
+                yield statement
+            statement = []
+        else:
+            statement.append(token)
+    if statement:
+        raise VcdHeaderError(f"Unterminated statement: {statement[:5]}")
+
+
+def _read_converted_header_text(waveform_path: Union[str, Path]) -> str:
+    """Returns the VCD header text of a compressed waveform file. The file
+    is converted to VCD text by a GTKWave utility and the conversion is
+    stopped once the header was read, so the value changes are never
+    expanded."""
+
+    suffix = Path(waveform_path).suffix
+    tool = _WAVEFORM_TO_VCD_TOOLS[suffix]
+    lines: List[str] = []
+    try:
+        with subprocess.Popen(
+            [tool, str(waveform_path)],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            errors="replace",
+        ) as process:
+            for line in process.stdout:
+                if _END_DEFINITIONS in line:
+                    break
+                lines.append(line)
+            else:
+                raise VcdHeaderError(
+                    f"{tool} output of {waveform_path} has no "
+                    f"{_END_DEFINITIONS}."
+                )
+            # -- We have the header, no need for the rest.
+            process.kill()
+    except FileNotFoundError as e:
+        raise VcdHeaderError(f"{tool} was not found.") from e
+
+    return "".join(lines)
+
+
+def read_vcd_header(vcd_path: Union[str, Path]) -> VcdHeader:
+    """Parses the definitions section of a VCD file without reading its
+    value changes section, which is the bulk of the file. FST and LXT2
+    files, identified by their suffix, are converted on the fly. Raises
+    VcdHeaderError if the header is malformed."""
+
+    if Path(vcd_path).suffix in _WAVEFORM_TO_VCD_TOOLS:
+        text = _read_converted_header_text(vcd_path)
+    else:
+        text = _read_header_bytes(vcd_path).decode("utf-8", errors="replace")
+
+    header = VcdHeader()
+    scopes_stack: List[VcdScope] = []
+
+    for statement in _statements(iter(text.split())):
+        keyword = statement[0]
+        if keyword == "$scope":
+            # -- E.g. ['$scope', 'module', 'testbench']
+            if len(statement) < 3:
+                raise VcdHeaderError(f"Invalid $scope: {statement}")
+            parent = scopes_stack[-1] if scopes_stack else None
+            name = statement[2]
+            scope = VcdScope(
+                name=f"{parent.name}.{name}" if parent else name,
+                scope_type=statement[1],
+            )
+            (parent.scopes if parent else header.scopes).append(scope)
+            scopes_stack.append(scope)
+        elif keyword == "$upscope":
+            if not scopes_stack:
+                raise VcdHeaderError("Unbalanced $upscope.")
+            scopes_stack.pop()
+        elif keyword == "$var":
+            # -- E.g. ['$var', 'reg', '32', '!', 'i', '[31:0]']. The bit
+            # -- range, if any, is joined to the name, same as VCDVCD.
+            if len(statement) < 5:
+                raise VcdHeaderError(f"Invalid $var: {statement}")
+            name = "".join(statement[4:])
+            parent = scopes_stack[-1] if scopes_stack else None
+            if not statement[2].isdigit():
+                raise VcdHeaderError(f"Invalid $var size: {statement}")
+            var = VcdVar(
+                reference=f"{parent.name}.{name}" if parent else name,
+                var_type=statement[1],
+                size=int(statement[2]),
+                id_code=statement[3],
+            )
+            (parent.vars if parent else header.vars).append(var)
+        elif keyword == "$timescale":
+            header.timescale = "".join(statement[1:])
+        # -- Other statements such as $date, $version and $comment are
+        # -- ignored.
+
+    return header
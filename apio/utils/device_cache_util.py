@@ -0,0 +1,169 @@
+"""A short lived cache of the usb and serial device scans of 'apio upload',
+so repeated uploads, e.g. in an edit/upload loop, don't enumerate the
+devices from scratch each time. A cached scan is used only if it is recent
+and the hotplug fingerprint, which is derived from the entries and the
+mtimes of the device directories, didn't change since the scan. The
+fingerprint is reliable only on Linux, so the cache is disabled on the
+other platforms."""
+
+import os
+import sys
+import json
+import time
+import hashlib
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from apio.common.apio_console import cout
+from apio.utils import util
+from apio.utils.usb_util import UsbDevice
+from apio.utils.serial_util import SerialDevice
+from apio.apio_context import ApioContext
+
+# -- The cache file, relative to the apio cache dir.
+DEVICE_SCAN_CACHE_PATH = Path("devices") / "device-scan-cache.json"
+
+# -- Increment when the format of the cache file changes.
+_CACHE_VERSION = 1
+
+# -- The max age of a cached scan, in secs.
+CACHE_TTL_SEC = 30
+
+# -- The dirs whose entries change when a usb or serial device is plugged
+# -- or unplugged. /dev/bus/usb has a sub dir per bus, with a node per
+# -- device, and a re-plugged device gets a new device number.
+_HOTPLUG_DIRS = [Path("/dev"), Path("/sys/bus/usb/devices")]
+_USB_BUS_DIRS = Path("/dev/bus/usb")
+
+
+def hotplug_fingerprint() -> Optional[str]:
+    """Returns a fingerprint of the connected devices state, or None if it
+    can't be computed reliably on this system, in which case the scans
+    should not be cached."""
+    if not sys.platform.startswith("linux"):
+        return None
+
+    dirs = list(_HOTPLUG_DIRS)
+    if _USB_BUS_DIRS.is_dir():
+        dirs.extend(sorted(p for p in _USB_BUS_DIRS.iterdir() if p.is_dir()))
+
+    digest = hashlib.sha256()
+    found = False
+    for path in dirs:
+        try:
+            mtime = path.stat().st_mtime_ns
+            names = sorted(os.listdir(path))
+        except OSError:
+            continue
+        found = True
+        digest.update(f"{path}:{mtime}:{','.join(names)}\n".encode())
+
+    # -- E.g. a container without /dev and /sys.
+    if not found:
+        return None
+    return digest.hexdigest()
+
+
+def usb_scan_key(ids: Tuple[Optional[str], Optional[str]]) -> str:
+    """Returns the cache key of a usb scan that is limited to the given
+    (VID, PID) filter ids, None meaning any."""
+    vid, pid = ids
+    return f"{vid or '*'}:{pid or '*'}"
+
+
+class DeviceScanCache:
+    """The device scans that are cached in the apio home dir. Use
+    load_device_scan_cache() to create an instance."""
+
+    def __init__(self, path: Path, fingerprint: Optional[str], data: Dict):
+        self._path = path
+        self._fingerprint = fingerprint
+        self._data = data
+        self._dirty = False
+
+    @property
+    def enabled(self) -> bool:
+        """True if the scans can be cached on this system."""
+        return self._fingerprint is not None
+
+    def _get(self, key: str) -> Optional[List[Dict]]:
+        """Returns the cached scan with the given key, or None if there is
+        no valid cached scan."""
+        if not self.enabled:
+            return None
+        entry = self._data.get("scans", {}).get(key)
+        if not entry or entry.get("fingerprint") != self._fingerprint:
+            return None
+        age = time.time() - entry.get("time", 0)
+        if not 0 <= age <= CACHE_TTL_SEC:
+            return None
+        if util.is_debug(1):
+            cout(f"Using cached device scan '{key}' ({age:.1f} secs old).")
+        return entry["devices"]
+
+    def _put(self, key: str, devices: List[Dict]) -> None:
+        """Caches a scan with the given key."""
+        if not self.enabled:
+            return
+        self._data.setdefault("scans", {})[key] = {
+            "fingerprint": self._fingerprint,
+            "time": time.time(),
+            "devices": devices,
+        }
+        self._dirty = True
+
+    def get_usb_devices(self, key: str) -> Optional[List[UsbDevice]]:
+        """Returns the cached usb scan with the given key, or None."""
+        devices = self._get(f"usb/{key}")
+        if devices is None:
+            return None
+        return [UsbDevice(**d) for d in devices]
+
+    def put_usb_devices(self, key: str, devices: List[UsbDevice]) -> None:
+        """Caches a usb scan with the given key."""
+        self._put(f"usb/{key}", [asdict(d) for d in devices])
+
+    def get_serial_devices(self) -> Optional[List[SerialDevice]]:
+        """Returns the cached serial scan, or None."""
+        devices = self._get("serial")
+        if devices is None:
+            return None
+        return [SerialDevice(**d) for d in devices]
+
+    def put_serial_devices(self, devices: List[SerialDevice]) -> None:
+        """Caches a serial scan."""
+        self._put("serial", [asdict(d) for d in devices])
+
+    def save(self) -> None:
+        """Writes the cache file, if it was modified. Failures are ignored
+        since the cache is only an optimization."""
+        if not self._dirty:
+            return
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(self._data), encoding="utf-8")
+            os.replace(tmp_path, self._path)
+            self._dirty = False
+        except OSError as e:
+            if util.is_debug(1):
+                cout(f"Failed to write the device scan cache: {e}")
+
+
+def load_device_scan_cache(apio_ctx: ApioContext) -> DeviceScanCache:
+    """Loads the device scan cache. Returns an empty cache if there is no
+    valid cache file."""
+    path = apio_ctx.get_cache_dir() / DEVICE_SCAN_CACHE_PATH
+    fingerprint = hotplug_fingerprint()
+    data = {"version": _CACHE_VERSION, "scans": {}}
+    if fingerprint is not None and path.is_file():
+        try:
+            loaded = json.loads(path.read_text(encoding="utf-8"))
+            if (
+                isinstance(loaded, dict)
+                and loaded.get("version") == _CACHE_VERSION
+            ):
+                data = loaded
+        except (OSError, ValueError):
+            pass
+    return DeviceScanCache(path, fingerprint, data)
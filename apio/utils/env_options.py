@@ -51,6 +51,18 @@ APIO_DEBUG = "APIO_DEBUG"
 #
 APIO_REMOTE_CONFIG_URL = "APIO_REMOTE_CONFIG_URL"
 
+# -- Env variable that if defined, causes the commands that run scons
+# -- (e.g. 'apio build') to print a table with the wall time, cpu time
+# -- and peak memory of each action. The profile is always written to
+# -- _build/<env>/build-profile.json, regardless of this variable.
+APIO_PROFILE = "APIO_PROFILE"
+
+# -- Env variable that if defined, contains the path of a Chrome trace event
+# -- json file to write with a timeline of the command execution. The file can
+# -- be viewed with chrome://tracing or https://ui.perfetto.dev. Read directly
+# -- by apio_trace.py since it's initialized before the rest of apio.
+APIO_TRACE = "APIO_TRACE"
+
 
 # -- List of all supported env options.
 _SUPPORTED_APIO_VARS = [
@@ -59,6 +71,8 @@ _SUPPORTED_APIO_VARS = [
     APIO_PLATFORM,
     APIO_REMOTE_CONFIG_URL,
     APIO_DEBUG,
+    APIO_PROFILE,
+    APIO_TRACE,
 ]
 
 
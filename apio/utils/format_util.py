@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2025 FPGAwars
+# -- License GPLv2
+"""Utilities of the 'apio format' command. Files are formatted in batches,
+with a verible invocation per batch, and the batches run concurrently. A
+cache file in _build records the hashes of the files that are known to be
+formatted with the current options and verible executable so they are
+skipped by the following invocations."""
+
+import os
+import json
+import shlex
+import shutil
+import hashlib
+import subprocess
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Optional
+from apio.common.common_util import PROJECT_BUILD_PATH
+
+# -- The cache file with the hashes of the formatted files. Relative to the
+# -- project dir.
+FORMAT_CACHE_PATH = PROJECT_BUILD_PATH / "format-cache.json"
+
+# -- Incremented when the format of the cache file changes.
+_FORMAT_CACHE_VERSION = 1
+
+# -- The max number of files per verible invocation. Limits the length of
+# -- the command line.
+MAX_BATCH_SIZE = 50
+
+# -- The formatter's executable.
+_VERIBLE_FORMAT = "verible-verilog-format"
+
+
+@dataclass
+class FormatCache:
+    """The hashes of the files that are known to be formatted with the
+    given verible options and executable."""
+
+    # -- Identifies the verible options and executable the hashes are valid
+    # -- for.
+    options_key: str
+    # -- Maps file paths to the hash of their formatted content.
+    files: Dict[str, str] = field(default_factory=dict)
+
+    def is_formatted(self, file: str, digest: str) -> bool:
+        """Returns True if the file with the given content hash is known to
+        be formatted."""
+        return self.files.get(file) == digest
+
+
+def file_digest(file: str) -> str:
+    """Returns the content hash of a file."""
+    return hashlib.sha1(Path(file).read_bytes()).hexdigest()
+
+
+def verible_options(cmd_options: List[str]) -> List[str]:
+    """Splits the apio.ini 'format-verible-options' lines into verible
+    args."""
+    return shlex.split(" ".join(cmd_options))
+
+
+def _verible_id() -> str:
+    """Returns the path and modification time of the verible executable in
+    PATH, so a verible upgrade invalidates the format cache. Returns an
+    empty string if it's not found."""
+    verible_path = shutil.which(_VERIBLE_FORMAT)
+    if not verible_path:
+        return ""
+    try:
+        return f"{verible_path}@{os.stat(verible_path).st_mtime_ns}"
+    except OSError:
+        return verible_path
+
+
+def load_format_cache(options: List[str]) -> FormatCache:
+    """Loads the format cache of the current project. Returns an empty
+    cache if the file doesn't exist, is invalid, or was created with other
+    verible options or another verible executable. The packages env must
+    be set, so verible is in PATH."""
+
+    options_key = hashlib.sha1(
+        "\0".join([_verible_id()] + options).encode()
+    ).hexdigest()
+    try:
+        data = json.loads(FORMAT_CACHE_PATH.read_text(encoding="utf-8"))
+        if (
+            data["version"] == _FORMAT_CACHE_VERSION
+            and data["options-key"] == options_key
+        ):
+            return FormatCache(options_key=options_key, files=data["files"])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return FormatCache(options_key=options_key)
+
+
+def save_format_cache(cache: FormatCache) -> None:
+    """Saves the format cache. The cache is saved only if the _build
+    directory exists, to not create it as a side effect."""
+    if not PROJECT_BUILD_PATH.is_dir():
+        return
+    data = {
+        "version": _FORMAT_CACHE_VERSION,
+        "options-key": cache.options_key,
+        "files": cache.files,
+    }
+    try:
+        FORMAT_CACHE_PATH.write_text(json.dumps(data), encoding="utf-8")
+    except OSError:
+        # -- The cache is optional.
+        pass
+
+
+def make_batches(files: List[str], num_workers: int) -> List[List[str]]:
+    """Splits the files into batches, at least one per worker when there
+    are enough files and at most MAX_BATCH_SIZE files each. The files of
+    each batch preserve their order."""
+    if not files:
+        return []
+    num_batches = max(
+        min(num_workers, len(files)),
+        -(-len(files) // MAX_BATCH_SIZE),
+    )
+    return [files[i::num_batches] for i in range(num_batches)]
+
+
+@dataclass(frozen=True)
+class FormatResult:
+    """The result of formatting or checking a single file."""
+
+    file: str
+    # -- True if the formatter succeeded.
+    ok: bool
+    # -- True if the file is not formatted. Set only in check mode.
+    needs_formatting: bool = False
+    # -- The formatter's error message, if failed.
+    error: Optional[str] = None
+
+
+def _run_verible(args: List[str]) -> subprocess.CompletedProcess:
+    """Runs the formatter with the given args, without a shell."""
+    return subprocess.run(
+        [_VERIBLE_FORMAT] + args,
+        capture_output=True,
+        text=True,
+        errors="replace",
+        check=False,
+    )
+
+
+def format_batch(files: List[str], options: List[str]) -> List[FormatResult]:
+    """Formats in place the given files with a single verible invocation.
+    If it fails, the files are formatted again one by one to identify the
+    failing files."""
+
+    base_args = ["--nofailsafe_success", "--inplace"] + options
+    result = _run_verible(base_args + files)
+    if result.returncode == 0:
+        return [FormatResult(file=f, ok=True) for f in files]
+
+    # -- Something failed, find out what.
+    results = []
+    for f in files:
+        result = _run_verible(base_args + [f])
+        results.append(
+            FormatResult(
+                file=f,
+                ok=result.returncode == 0,
+                error=result.stderr.strip() or None,
+            )
+        )
+    return results
+
+
+def check_file(file: str, options: List[str]) -> FormatResult:
+    """Checks if the file is formatted, without modifying it."""
+
+    result = _run_verible(["--nofailsafe_success"] + options + [file])
+    if result.returncode != 0:
+        return FormatResult(
+            file=file, ok=False, error=result.stderr.strip() or None
+        )
+    original = Path(file).read_text(encoding="utf-8", errors="replace")
+    return FormatResult(
+        file=file, ok=True, needs_formatting=result.stdout != original
+    )
+
+
+def format_files(
+    files: List[str], options: List[str], *, check: bool
+) -> List[FormatResult]:
+    """Formats, or with check=True only checks, the given files
+    concurrently. Returns the results in the order of the files."""
+
+    num_workers = os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        if check:
+            return list(executor.map(lambda f: check_file(f, options), files))
+        batches = make_batches(files, num_workers)
+        results_by_file: Dict[str, FormatResult] = {}
+        for batch_results in executor.map(
+            lambda b: format_batch(b, options), batches
+        ):
+            for result in batch_results:
+                results_by_file[result.file] = result
+    return [results_by_file[f] for f in files]
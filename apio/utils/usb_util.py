@@ -1,9 +1,13 @@
 """USB devices related utilities."""
 
+import os
 import sys
 import re
+import json
 from glob import glob
-from typing import List, Optional, Any
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
 import usb.core
 import usb.backend.libusb1
@@ -30,6 +34,19 @@ _USB_TYPES = {
     (0x0403, 0x8374): "FT4232",
 }
 
+# -- The timeout of the control transfers that read the string descriptors
+# -- of a device, in msecs, so a slow or unresponsive device doesn't delay
+# -- the scan.
+_STRING_DESCRIPTOR_TIMEOUT_MS = 500
+
+# -- The max number of devices whose string descriptors are read
+# -- concurrently.
+_MAX_CONCURRENT_DEVICES = 8
+
+# -- The cache of the resolved libusb backend files, relative to the apio
+# -- cache dir. Maps the glob patterns of the backend to the matching file.
+LIBUSB_PATH_CACHE_PATH = Path("devices") / "libusb-paths.json"
+
 
 def get_device_type(vid: int, pid: int) -> str:
     """Determine device type string. Try to match by (vid, pid) and if
@@ -93,22 +110,96 @@ def _get_usb_str(
         return default
 
 
-def scan_usb_devices(apio_ctx: ApioContext) -> List[UsbDevice]:
-    """Query and return a list with usb device info."""
-    # pylint: disable=too-many-locals
+def _read_usb_device(device: usb.core.Device) -> UsbDevice:
+    """Reads the string descriptors of the given device and returns its
+    info."""
+
+    # -- Bound the time of each string descriptor read.
+    device.default_timeout = _STRING_DESCRIPTOR_TIMEOUT_MS
+
+    # -- Lookup device type or "" if not found.
+    d = device
+    vid = d.idVendor  # pyright: ignore[reportAttributeAccessIssue]
+    pid = d.idProduct  # pyright: ignore[reportAttributeAccessIssue]
+    device_type = get_device_type(vid, pid)
+
+    # -- Create the device object.
+    unavail = "--unavail--"
+    man = d.iManufacturer  # pyright: ignore[reportAttributeAccessIssue]
+    iprod = d.iProduct  # pyright: ignore[reportAttributeAccessIssue]
+    iser = d.iSerialNumber  # pyright: ignore[reportAttributeAccessIssue]
+    return UsbDevice(
+        vendor_id=f"{vid:04X}",
+        product_id=f"{pid:04X}",
+        bus=device.bus,  # pyright: ignore[reportArgumentType]
+        device=device.address or 0,
+        manufacturer=_get_usb_str(device, man, default=unavail),
+        product=_get_usb_str(device, iprod, default=unavail),
+        serial_number=_get_usb_str(device, iser, default=""),
+        device_type=device_type,
+    )
+
+
+def _load_libusb_path_cache(cache_file: Path) -> Dict[str, str]:
+    """Loads the resolved libusb backend files. Returns an empty dict if
+    there is no valid cache file."""
+    try:
+        data = json.loads(cache_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {k: v for k, v in data.items() if isinstance(v, str)}
+
+
+def _save_libusb_path_cache(cache_file: Path, paths: Dict[str, str]) -> None:
+    """Saves the resolved libusb backend files. Failures are ignored since
+    the cache is only an optimization."""
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        cache_file.write_text(json.dumps(paths, indent=2), encoding="utf-8")
+    except OSError:
+        pass
+
+
+def _get_libusb_backend(apio_ctx: ApioContext) -> Any:
+    """Returns the libusb backend, using the library file in
+    oss-cad-suite/lib. Exits with an error if not found. The resolved file
+    is cached in the apio home dir so it's not looked up again by the next
+    scans."""
 
     # -- Track the names we searched for. For diagnostics.
     searched_names = []
 
+    # -- The backend files that were resolved by previous scans, loaded on
+    # -- the first lookup.
+    cache_file: Optional[Path] = None
+    cached_paths: Dict[str, str] = {}
+
     def find_library(name: str):
         """A callback for looking up the libusb backend file."""
 
+        nonlocal cache_file
+
         # -- Track searched names, for diagnostics
         searched_names.append(name)
 
+        if cache_file is None:
+            cache_file = apio_ctx.get_cache_dir() / LIBUSB_PATH_CACHE_PATH
+            cached_paths.update(_load_libusb_path_cache(cache_file))
+
         # -- Try to match to a lib in oss-cad-suite/lib.
         oss_dir = apio_ctx.get_package_dir("oss-cad-suite")
         pattern = oss_dir / "lib" / f"lib{name}*"
+
+        # -- Use the cached file if it still exists, e.g. the package was
+        # -- not reinstalled with a different version of the library.
+        cached_path = cached_paths.get(str(pattern))
+        if cached_path and os.path.isfile(cached_path):
+            if util.is_debug(1):
+                cout(f"Using cached libusb backend '{cached_path}'")
+            return cached_path
+
         files = glob(str(pattern))
 
         if util.is_debug(1):
@@ -123,10 +214,11 @@ def scan_usb_devices(apio_ctx: ApioContext) -> List[UsbDevice]:
             sys.exit(1)
 
         if files:
+            cached_paths[str(pattern)] = files[0]
+            _save_libusb_path_cache(cache_file, cached_paths)
             return files[0]
         return None
 
-    # -- Lookup libusb backend library file in oss-cad-suite/lib.
     backend = usb.backend.libusb1.get_backend(find_library=find_library)
 
     if not backend:
@@ -134,12 +226,28 @@ def scan_usb_devices(apio_ctx: ApioContext) -> List[UsbDevice]:
         cout(f"Searched names: {searched_names}", style=INFO)
         sys.exit(1)
 
+    return backend
+
+
+def scan_usb_devices(
+    apio_ctx: ApioContext, usb_filter: Optional["UsbDeviceFilter"] = None
+) -> List[UsbDevice]:
+    """Query and return a list with usb device info. If a filter is given,
+    devices whose VID or PID don't pass it are skipped without reading
+    their string descriptors. The filter's string constraints, such as the
+    serial number, are not applied and the caller should apply the filter
+    to the returned devices."""
+
+    # -- Lookup libusb backend library file in oss-cad-suite/lib.
+    backend = _get_libusb_backend(apio_ctx)
+
     # -- Find the usb devices.
     raw_devices = usb.core.find(find_all=True, backend=backend)
     devices: List[Any] = list(raw_devices) if raw_devices else []
 
-    # -- Collect the devices
-    result: List[UsbDevice] = []
+    # -- Select the candidate devices by their cheap device descriptor
+    # -- fields, which pyusb reads when enumerating the devices.
+    candidates: List[usb.core.Device] = []
     for device in devices:
         # -- Print entire raw device info for debugging.
         if util.is_debug(1):
@@ -155,43 +263,23 @@ def scan_usb_devices(apio_ctx: ApioContext) -> List[UsbDevice]:
         if d == 0x09:
             continue
 
-        # -- Lookup device type or "" if not found.
-        device_type = get_device_type(
-            device.idVendor,  # pyright: ignore[reportAttributeAccessIssue]
-            device.idProduct,  # pyright: ignore[reportAttributeAccessIssue]
-        )  # pyright: ignore[reportAttributeAccessIssue]
-
-        # -- Create the device object.
-        unavail = "--unavail--"
+        # -- Skip devices that don't pass the VID/PID filter.
         vid = device.idVendor  # pyright: ignore[reportAttributeAccessIssue]
         pid = device.idProduct  # pyright: ignore[reportAttributeAccessIssue]
+        if usb_filter and not usb_filter.passes_ids(
+            f"{vid:04X}", f"{pid:04X}"
+        ):
+            continue
 
-        d = device
-        man = d.iManufacturer  # pyright: ignore[reportAttributeAccessIssue]
-        iser = d.iSerialNumber  # pyright: ignore[reportAttributeAccessIssue]
-        item = UsbDevice(
-            vendor_id=f"{vid:04X}",
-            product_id=f"{pid:04X}",
-            bus=device.bus,  # pyright: ignore[reportArgumentType]
-            device=device.address or 0,
-            manufacturer=_get_usb_str(
-                device,  # pyright: ignore[reportArgumentType]
-                man,
-                default=unavail,
-            ),
-            product=_get_usb_str(
-                device,  # pyright: ignore[reportArgumentType]
-                device.iProduct,  # pyright: ignore[reportAttributeAccessIssue]
-                default=unavail,
-            ),
-            serial_number=_get_usb_str(
-                device,  # pyright: ignore[reportArgumentType]
-                iser,  # pyright: ignore[reportAttributeAccessIssue]
-                default="",
-            ),
-            device_type=device_type,
-        )
-        result.append(item)
+        candidates.append(device)
+
+    # -- Read the string descriptors of the candidates concurrently, since
+    # -- each read is a round trip to the device.
+    result: List[UsbDevice] = []
+    if candidates:
+        max_workers = min(len(candidates), _MAX_CONCURRENT_DEVICES)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            result = list(executor.map(_read_usb_device, candidates))
 
     # -- Sort by (vendor, product, bus, device).
     result = sorted(
@@ -265,16 +353,26 @@ class UsbDeviceFilter:
         self._serial_num = serial_num
         return self
 
-    def _eval(self, device: UsbDevice) -> bool:
-        """Test if the devices passes this field."""
-        if (self._vendor_id is not None) and (
-            self._vendor_id != device.vendor_id
-        ):
+    def ids(self) -> Tuple[Optional[str], Optional[str]]:
+        """Returns the VID and PID constraints of this filter, None for
+        no constraint."""
+        return (self._vendor_id, self._product_id)
+
+    def passes_ids(self, vendor_id: str, product_id: str) -> bool:
+        """Test if a device with the given VID and PID may pass this filter.
+        Requires only the device descriptor of the device, not its string
+        descriptors."""
+        if (self._vendor_id is not None) and (self._vendor_id != vendor_id):
             return False
 
-        if (self._product_id is not None) and (
-            self._product_id != device.product_id
-        ):
+        if (self._product_id is not None) and (self._product_id != product_id):
+            return False
+
+        return True
+
+    def _eval(self, device: UsbDevice) -> bool:
+        """Test if the devices passes this field."""
+        if not self.passes_ids(device.vendor_id, device.product_id):
             return False
 
         if (self.product_regex is not None) and not re.search(
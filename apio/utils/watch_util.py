@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+# -- This file is part of the Apio project
+# -- (C) 2016-2025 FPGAwars
+# -- License GPLv2
+"""Utilities of the --watch mode of the build and test commands. A file
+watcher reports the files that changed in the project tree, using inotify
+on Linux and polling elsewhere, and the watch loop re-runs the command
+after the changes settle down."""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from apio.common.apio_console import cout
+from apio.common.apio_styles import INFO, WARNING
+from apio.common.common_util import (
+    PROJECT_BUILD_PATH,
+    is_source_file,
+    has_testbench_name,
+)
+
+# -- The time that the project tree should be quiet after a change before
+# -- we re-run the command. Editors and tools often write a few files, or
+# -- the same file a few times, when saving.
+DEBOUNCE_SEC = 0.3
+
+# -- The interval at which the polling watcher scans the project tree.
+POLLING_INTERVAL_SEC = 0.5
+
+# -- A pseudo path that is reported when the watcher can't tell what
+# -- changed, e.g. on an inotify queue overflow.
+UNKNOWN_CHANGE = "."
+
+# -- Inotify constants, from /usr/include/linux/inotify.h.
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_IN_WATCH_MASK = (
+    _IN_MODIFY
+    | _IN_ATTRIB
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+)
+
+# -- The header of an inotify event, followed by the name.
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+
+def is_watched_path(rel_path: str) -> bool:
+    """Returns True if changes of the given file or dir, relative to the
+    project dir, should trigger a re-run. Changes of the build directory,
+    of hidden files and dirs, and of editor backup files are ignored."""
+    parts = Path(rel_path).parts
+    if not parts or parts[0] == PROJECT_BUILD_PATH.name:
+        return False
+    if any(part.startswith(".") for part in parts):
+        return False
+    name = parts[-1]
+    return not (name.endswith("~") or name.endswith((".swp", ".swx")))
+
+
+class FileWatcher:
+    """The base class of the file watchers."""
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        """Waits up to timeout seconds, or forever if None, for changes and
+        returns the paths of the changed files relative to the project dir,
+        or an empty set on timeout."""
+        raise NotImplementedError()
+
+    def close(self) -> None:
+        """Releases the resources of the watcher."""
+
+
+class PollingWatcher(FileWatcher):
+    """A watcher that periodically compares the sizes and the mtimes of the
+    project files. Works on all platforms."""
+
+    def __init__(self, root: Path):
+        self._root = root
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """Returns the sizes and mtimes of the watched files."""
+        result: Dict[str, Tuple[int, int]] = {}
+        for dir_path, dir_names, file_names in os.walk(self._root):
+            rel_dir = os.path.relpath(dir_path, self._root)
+            # -- Prune in place the dirs that we don't watch.
+            dir_names[:] = [
+                d
+                for d in dir_names
+                if is_watched_path(os.path.normpath(os.path.join(rel_dir, d)))
+            ]
+            for name in file_names:
+                rel_path = os.path.normpath(os.path.join(rel_dir, name))
+                if not is_watched_path(rel_path):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(dir_path, name))
+                except OSError:
+                    continue
+                result[Path(rel_path).as_posix()] = (
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                )
+        return result
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self._scan()
+            changes = {
+                path
+                for path in snapshot.keys() | self._snapshot.keys()
+                if snapshot.get(path) != self._snapshot.get(path)
+            }
+            self._snapshot = snapshot
+            if changes:
+                return changes
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return set()
+                time.sleep(min(POLLING_INTERVAL_SEC, remaining))
+            else:
+                time.sleep(POLLING_INTERVAL_SEC)
+
+
+class InotifyWatcher(FileWatcher):
+    """A watcher that uses the Linux inotify API, with a watch per project
+    directory. Changes are reported as soon as they happen without scanning
+    the project tree."""
+
+    def __init__(self, root: Path):
+        self._root = root
+        self._libc = ctypes.CDLL(
+            ctypes.util.find_library("c") or "libc.so.6", use_errno=True
+        )
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        # -- Maps watch descriptors to dir paths relative to the root.
+        self._dirs: Dict[int, str] = {}
+        self._add_tree(".")
+
+    def _add_tree(self, rel_dir: str) -> Set[str]:
+        """Adds watches to the given dir and to its sub dirs. Returns the
+        files that are already in these dirs, since they may have been
+        created before the watches were added."""
+        files: Set[str] = set()
+        top = self._root / rel_dir
+        for dir_path, dir_names, file_names in os.walk(top):
+            rel_path = os.path.normpath(os.path.relpath(dir_path, self._root))
+            wd = self._libc.inotify_add_watch(
+                self._fd, os.fsencode(dir_path), _IN_WATCH_MASK
+            )
+            if wd < 0:
+                # -- E.g. the dir was already deleted.
+                dir_names[:] = []
+                continue
+            self._dirs[wd] = rel_path
+            dir_names[:] = [
+                d
+                for d in dir_names
+                if is_watched_path(os.path.normpath(os.path.join(rel_path, d)))
+            ]
+            for name in file_names:
+                file = os.path.normpath(os.path.join(rel_path, name))
+                if is_watched_path(file):
+                    files.add(Path(file).as_posix())
+        return files
+
+    def _read_events(self) -> Set[str]:
+        """Reads the pending events and returns the changed files."""
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return set()
+            raise
+
+        changes: Set[str] = set()
+        offset = 0
+        while offset + _INOTIFY_EVENT.size <= len(data):
+            wd, mask, _, name_len = _INOTIFY_EVENT.unpack_from(data, offset)
+            offset += _INOTIFY_EVENT.size
+            name_end = offset + name_len
+            name = os.fsdecode(data[offset:name_end].rstrip(b"\0"))
+            offset = name_end
+
+            if mask & _IN_Q_OVERFLOW:
+                changes.add(UNKNOWN_CHANGE)
+                continue
+            if mask & _IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            rel_dir = self._dirs.get(wd)
+            if rel_dir is None or not name:
+                continue
+            rel_path = os.path.normpath(os.path.join(rel_dir, name))
+            if not is_watched_path(rel_path):
+                continue
+            if mask & _IN_ISDIR:
+                # -- A new dir needs its own watches.
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    changes |= self._add_tree(rel_path)
+                continue
+            changes.add(Path(rel_path).as_posix())
+        return changes
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = (
+                None if deadline is None else deadline - time.monotonic()
+            )
+            if remaining is not None and remaining <= 0:
+                return set()
+            readable, _, _ = select.select([self._fd], [], [], remaining)
+            if readable:
+                changes = self._read_events()
+                if changes:
+                    return changes
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_watcher(root: Path) -> FileWatcher:
+    """Returns the best watcher for this platform."""
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError):
+            # -- E.g. the inotify watches limit was reached.
+            pass
+    return PollingWatcher(root)
+
+
+def wait_for_changes(
+    watcher: FileWatcher, debounce_sec: float = DEBOUNCE_SEC
+) -> Set[str]:
+    """Waits for changes and returns them once the project tree was quiet
+    for debounce_sec seconds."""
+    changes = watcher.wait(None)
+    while True:
+        more_changes = watcher.wait(debounce_sec)
+        if not more_changes:
+            return changes
+        changes |= more_changes
+
+
+def changed_testbenches(changes: Set[str]) -> Optional[List[str]]:
+    """Returns the sorted list of the changed testbenches if all the changed
+    files are testbenches, or None otherwise."""
+    if all(is_source_file(f) and has_testbench_name(f) for f in changes):
+        return sorted(changes)
+    return None
+
+
+def warn_if_project_file_changed(changes: Set[str]) -> None:
+    """Warns that apio.ini changes are not applied by the running watch,
+    which keeps the project settings it started with."""
+    if "apio.ini" in changes:
+        cout(
+            "Warning: apio.ini changed, restart the command to apply it.",
+            style=WARNING,
+        )
+
+
+def watch_loop(
+    watcher: FileWatcher,
+    run: Callable[[Optional[Set[str]]], None],
+    debounce_sec: float = DEBOUNCE_SEC,
+) -> None:
+    """Calls run(None) and then run(changes) after each change of the
+    project files, until the user hits Ctrl-C."""
+    try:
+        run(None)
+        while True:
+            cout("Watching for changes, press Ctrl-C to exit.", style=INFO)
+            changes = wait_for_changes(watcher, debounce_sec)
+            run(changes)
+    except KeyboardInterrupt:
+        cout()
+    finally:
+        watcher.close()
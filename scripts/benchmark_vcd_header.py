@@ -0,0 +1,67 @@
+"""A python script that benchmarks the vcd header parser that 'apio sim' uses
+to generate the default .gtkw file. It creates synthetic vcd files with the
+same header and value change sections of increasing sizes and shows that
+the parsing time depends on the header size, not on the file size.
+
+Usage (from the repo root):
+  python scripts/benchmark_vcd_header.py [max-mb]
+"""
+
+import sys
+import time
+import tempfile
+from pathlib import Path
+from apio.scons.vcd_util import read_vcd_header
+
+# -- Number of top level signals in the synthetic header.
+NUM_SIGNALS = 200
+
+# -- Number of parsing repetitions per file. We report the best time.
+REPEATS = 5
+
+
+def write_vcd_file(path: Path, size_mb: int) -> None:
+    """Writes a synthetic vcd file of about the given size."""
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("$timescale 1ps $end\n$scope module testbench $end\n")
+        for i in range(NUM_SIGNALS):
+            f.write(f"$var wire 1 s{i} sig{i} $end\n")
+        f.write("$upscope $end\n$enddefinitions $end\n")
+
+        # -- Write the value changes in 1MB chunks.
+        chunk = "".join(f"#{t}\n1s{t % NUM_SIGNALS}\n" for t in range(100_000))
+        chunk = chunk[: 1024 * 1024]
+        for _ in range(size_mb):
+            f.write(chunk)
+
+
+def benchmark(path: Path) -> float:
+    """Returns the best parsing time of the file in seconds."""
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        header = read_vcd_header(path)
+        best = min(best, time.perf_counter() - start)
+        assert len(header.all_vars()) == NUM_SIGNALS
+    return best
+
+
+def main():
+    """Main."""
+
+    max_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+
+    print(f"{'FILE SIZE':>10}  {'PARSE TIME':>12}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "test.vcd"
+        size_mb = 1
+        while size_mb <= max_mb:
+            write_vcd_file(path, size_mb)
+            sec = benchmark(path)
+            print(f"{size_mb:>8}MB  {sec * 1000:>10.3f}ms")
+            size_mb *= 4
+
+
+if __name__ == "__main__":
+    main()
@@ -337,6 +337,10 @@ def test_apio_api_get_build_report(apio_runner: ApioRunner):
             == 7680
         )
         assert "fmax_mhz" in data["build-report"]["clocks"]["CLK"]
+        timing = data["build-report"]["timing"]
+        assert timing["critical_paths"]
+        assert "routing_delay_ns" in timing["critical_paths"][0]
+        assert timing["critical_paths"][0]["steps"]
 
 
 def test_apio_api_get_examples(apio_runner: ApioRunner):
@@ -64,6 +64,43 @@ def test_build_with_apio_ini(apio_runner: ApioRunner):
         )
 
 
+def test_build_options_errors(apio_runner: ApioRunner):
+    """Tests the sanity checks of the --all-envs, --jobs, --sweep-metric
+    and --watch options."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        # -- Run "apio build --all-envs --env default"
+        sb.write_apio_ini({"[env:default]": {"top-module": "main"}})
+        result = sb.invoke_apio_cmd(
+            apio, ["build", "--all-envs", "--env", "default"]
+        )
+        assert result.exit_code == 1, result.output
+        assert "--env and --all-envs cannot be combined" in result.output
+
+        # -- Run "apio build --jobs 2" without --all-envs.
+        result = sb.invoke_apio_cmd(apio, ["build", "--jobs", "2"])
+        assert result.exit_code == 1, result.output
+        assert "--jobs can be used only with --all-envs" in result.output
+
+        # -- Run "apio build --sweep-metric fmax" without --seed-sweep.
+        result = sb.invoke_apio_cmd(apio, ["build", "--sweep-metric", "fmax"])
+        assert result.exit_code == 1, result.output
+        assert (
+            "--sweep-metric can be used only with --seed-sweep"
+            in result.output
+        )
+
+        # -- Run "apio build --all-envs --jobs 0"
+        result = sb.invoke_apio_cmd(apio, ["build", "--all-envs", "-j", "0"])
+        assert result.exit_code != 0, result.output
+
+        # -- Run "apio build --all-envs --watch"
+        result = sb.invoke_apio_cmd(apio, ["build", "--all-envs", "--watch"])
+        assert result.exit_code == 1, result.output
+        assert "--all-envs and --watch cannot be combined" in result.output
+
+
 def test_build_with_env_arg_error(apio_runner: ApioRunner):
     """Tests the command with an invalid --env value. This error message
     confirms that the --env arg was propagated to the apio.ini loading
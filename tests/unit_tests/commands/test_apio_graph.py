@@ -29,3 +29,15 @@ def test_graph_with_env_arg_error(apio_runner: ApioRunner):
         assert (
             "Error: Env 'no-such-env' not found in apio.ini" in result.output
         )
+
+
+def test_graph_per_module_options_error(apio_runner: ApioRunner):
+    """Tests that --max-depth and --filter require --per-module."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        # -- Run "apio graph --max-depth 1"
+        sb.write_apio_ini({"[env:default]": {"top-module": "main"}})
+        result = sb.invoke_apio_cmd(apio, ["graph", "--max-depth", "1"])
+        assert result.exit_code == 1, result.output
+        assert "--max-depth and --filter require --per-module" in result.output
@@ -29,3 +29,30 @@ def test_report_with_env_arg_error(apio_runner: ApioRunner):
         assert (
             "Error: Env 'no-such-env' not found in apio.ini" in result.output
         )
+
+
+def test_report_history_with_verbose(apio_runner: ApioRunner):
+    """Tests that --history and --verbose can't be combined."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_apio_ini({"[env:default]": {"top-module": "main"}})
+        result = sb.invoke_apio_cmd(apio, ["report", "--history", "-v"])
+        assert result.exit_code != 0, result.output
+        assert "cannot be combined" in result.output
+
+
+def test_report_timing_usage_errors(apio_runner: ApioRunner):
+    """Tests the invalid combinations of the timing options."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_apio_ini({"[env:default]": {"top-module": "main"}})
+
+        result = sb.invoke_apio_cmd(apio, ["report", "--history", "--timing"])
+        assert result.exit_code != 0, result.output
+        assert "cannot be combined" in result.output
+
+        result = sb.invoke_apio_cmd(apio, ["report", "--top", "3"])
+        assert result.exit_code != 0, result.output
+        assert "--top can be used only with --timing" in result.output
@@ -32,3 +32,40 @@ def test_with_env_arg_error(apio_runner: ApioRunner):
         assert (
             "Error: Env 'no-such-env' not found in apio.ini" in result.output
         )
+
+
+def test_shard_usage_errors(apio_runner: ApioRunner):
+    """Tests the invalid uses of the --shard, --balanced and --durations
+    options."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_apio_ini({"[env:default]": {"top-module": "main"}})
+
+        for shard in ["0/4", "5/4", "2", "a/b", "1/0"]:
+            result = sb.invoke_apio_cmd(apio, ["test", "--shard", shard])
+            assert result.exit_code != 0, result.output
+            assert f"Invalid --shard '{shard}'" in result.output
+
+        result = sb.invoke_apio_cmd(apio, ["test", "--balanced"])
+        assert result.exit_code != 0, result.output
+        assert "--balanced can be used only with --shard" in result.output
+
+        sb.write_file("durations.json", "{}")
+        result = sb.invoke_apio_cmd(
+            apio, ["test", "--durations", "durations.json"]
+        )
+        assert result.exit_code != 0, result.output
+        assert "--durations can be used only with --shard" in result.output
+
+        result = sb.invoke_apio_cmd(
+            apio, ["test", "--shard", "1/2", "--durations", "no-such.json"]
+        )
+        assert result.exit_code != 0, result.output
+        assert "Durations file 'no-such.json' not found" in result.output
+
+        result = sb.invoke_apio_cmd(
+            apio, ["test", "--shard", "1/2", "main_tb.v"]
+        )
+        assert result.exit_code != 0, result.output
+        assert "cannot be combined" in result.output
@@ -34,3 +34,27 @@ def test_upload_with_env_arg_error(apio_runner: ApioRunner):
         assert (
             "Error: Env 'no-such-env' not found in apio.ini" in result.output
         )
+
+
+def test_upload_multiple_devices_usage_errors(apio_runner: ApioRunner):
+    """Tests the usage errors of the multiple devices options."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_apio_ini({"[env:default]": {"top-module": "main"}})
+
+        result = sb.invoke_apio_cmd(
+            apio, ["upload", "--all-matching", "-n", "FTXYA34Z"]
+        )
+        assert result.exit_code != 0, result.output
+        assert "cannot be combined" in result.output
+
+        result = sb.invoke_apio_cmd(
+            apio, ["upload", "--all-matching", "-s", "/dev/ttyUSB0"]
+        )
+        assert result.exit_code != 0, result.output
+        assert "--serial-port can't be used" in result.output
+
+        result = sb.invoke_apio_cmd(apio, ["upload", "-j", "2"])
+        assert result.exit_code != 0, result.output
+        assert "--jobs can be used only" in result.output
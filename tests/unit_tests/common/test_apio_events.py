@@ -0,0 +1,56 @@
+"""Test for apio_events.py."""
+
+import json
+from pytest import LogCaptureFixture
+from tests.conftest import ApioRunner
+from apio.common import apio_events
+from apio.common.apio_console import cout
+
+
+def test_marker_lines():
+    """Tests the writing and parsing of event marker lines."""
+
+    line = apio_events.marker_line("stage_start", stage="synth", tool="yosys")
+    assert "\n" not in line
+    event = apio_events.parse_marker_line(line)
+    assert event["event"] == "stage_start"
+    assert event["stage"] == "synth"
+    assert event["tool"] == "yosys"
+    assert isinstance(event["time"], float)
+
+    assert apio_events.parse_marker_line("yosys -p synth main.v") is None
+
+    # -- Corrupted marker lines.
+    assert apio_events.parse_marker_line(line[:-5]) is None
+    assert (
+        apio_events.parse_marker_line(line[: line.index("{")] + "[1]") is None
+    )
+
+
+def test_configure(apio_runner: ApioRunner, capsys: LogCaptureFixture):
+    """Tests the selection of the output format."""
+
+    with apio_runner.in_sandbox():
+        try:
+            # -- With jsonl, the events go to stdout and the console text to
+            # -- stderr.
+            apio_events.configure(apio_events.JSONL_FORMAT)
+            assert apio_events.is_enabled()
+            capsys.readouterr()  # Reset capture
+            cout("Some text")
+            apio_events.emit("log", text="hello")
+            captured = capsys.readouterr()
+            assert "Some text" in captured.err
+            assert "Some text" not in captured.out
+            event = json.loads(captured.out)
+            assert event["event"] == "log"
+            assert event["text"] == "hello"
+
+            # -- With text, the console text goes to stdout.
+            apio_events.configure(apio_events.TEXT_FORMAT)
+            assert not apio_events.is_enabled()
+            cout("Some text")
+            captured = capsys.readouterr()
+            assert "Some text" in captured.out
+        finally:
+            apio_events.configure(apio_events.TEXT_FORMAT)
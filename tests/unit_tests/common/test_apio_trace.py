@@ -0,0 +1,130 @@
+"""Test for apio_trace.py."""
+
+import os
+import json
+import atexit
+from pathlib import Path
+import pytest
+from pytest import LogCaptureFixture
+from tests.conftest import ApioRunner
+from apio.common import apio_trace
+
+
+def test_trace_disabled(apio_runner: ApioRunner, monkeypatch):
+    """Tests that nothing is recorded when APIO_TRACE is not defined."""
+
+    with apio_runner.in_sandbox():
+        monkeypatch.setattr(apio_trace, "_state", None)
+        monkeypatch.delenv("APIO_TRACE", raising=False)
+
+        apio_trace.init(is_scons_process=False)
+        assert not apio_trace.is_enabled()
+
+        # -- These should be no-ops.
+        with apio_trace.span("my-span"):
+            apio_trace.instant("my-instant")
+        assert apio_trace._state is None  # pylint: disable=protected-access
+
+
+def test_trace_merge(apio_runner: ApioRunner, monkeypatch):
+    """Tests the recording of events and the merging of the scons part
+    files into the trace file."""
+
+    # pylint: disable=protected-access
+
+    with apio_runner.in_sandbox():
+        trace_path = Path("trace.json").absolute()
+        monkeypatch.setattr(apio_trace, "_state", None)
+        monkeypatch.setenv("APIO_TRACE", str(trace_path))
+
+        # -- A stale part file from a previous command.
+        stale_part = Path("trace.json.111.part")
+        stale_part.write_text("[]", encoding="utf-8")
+
+        # -- Init as the apio process. This deletes the stale part.
+        apio_trace.init(is_scons_process=False)
+        atexit.unregister(apio_trace._on_exit)
+        assert apio_trace.is_enabled()
+        assert not stale_part.exists()
+
+        # -- Record a few events.
+        with apio_trace.span("my-span", args={"x": 1}):
+            start_us = apio_trace.now_us()
+            apio_trace.complete("my-complete", start_us=start_us, cat="c")
+
+        # -- Simulate a part file written by a scons subprocess.
+        Path("trace.json.222.part").write_text(
+            json.dumps([{"name": "scons-event", "ph": "i", "ts": 1}]),
+            encoding="utf-8",
+        )
+
+        # -- Write the trace file.
+        apio_trace._on_exit()
+
+        # -- Verify the trace file.
+        data = json.loads(trace_path.read_text(encoding="utf-8"))
+        events = data["traceEvents"]
+        names = [e["name"] for e in events]
+        assert names == [
+            "process_name",
+            "process start",
+            "my-span",
+            "my-complete",
+            "my-span",
+            "process exit",
+            "scons-event",
+        ]
+        assert [e["ph"] for e in events[2:5]] == ["B", "X", "E"]
+        assert events[2]["args"] == {"x": 1}
+        assert events[2]["pid"] == os.getpid()
+        assert events[3]["cat"] == "c"
+        assert events[3]["dur"] >= 0
+
+        # -- The part file was deleted.
+        assert not Path("trace.json.222.part").exists()
+
+
+def test_trace_span_exception(apio_runner: ApioRunner, monkeypatch):
+    """Tests that a span is ended also if the code it wraps raises."""
+
+    # pylint: disable=protected-access
+
+    with apio_runner.in_sandbox():
+        monkeypatch.setattr(apio_trace, "_state", None)
+        monkeypatch.setenv("APIO_TRACE", str(Path("trace.json").absolute()))
+        apio_trace.init(is_scons_process=False)
+        atexit.unregister(apio_trace._on_exit)
+
+        with pytest.raises(ValueError):
+            with apio_trace.span("my-span"):
+                raise ValueError("my-error")
+
+        events = apio_trace._state.events
+        assert [(e["name"], e["ph"]) for e in events[-2:]] == [
+            ("my-span", "B"),
+            ("my-span", "E"),
+        ]
+
+
+def test_trace_write_error(
+    apio_runner: ApioRunner, monkeypatch, capsys: LogCaptureFixture
+):
+    """Tests that a failure to write the trace file is reported as a
+    warning on stderr."""
+
+    # pylint: disable=protected-access
+
+    with apio_runner.in_sandbox():
+        # -- The trace path is a directory so it can't be written.
+        trace_path = Path("trace.json").absolute()
+        trace_path.mkdir()
+        monkeypatch.setattr(apio_trace, "_state", None)
+        monkeypatch.setenv("APIO_TRACE", str(trace_path))
+        apio_trace.init(is_scons_process=False)
+        atexit.unregister(apio_trace._on_exit)
+
+        capsys.readouterr()  # Reset capture
+        apio_trace._on_exit()
+        captured = capsys.readouterr()
+        assert not captured.out
+        assert "Warning: failed to write the apio trace file" in captured.err
@@ -0,0 +1,160 @@
+"""Test for build_history.py."""
+
+from pathlib import Path
+import pytest
+from tests.conftest import ApioRunner
+from apio.common.build_report import ResourceReport, ClockReport, BuildReport
+from apio.common.build_profile import ActionProfile, BuildProfile
+from apio.common.build_history import (
+    BuildHistory,
+    BuildRecord,
+    RegressionThresholds,
+    regression_thresholds,
+    find_regressions,
+    stage_durations,
+    nextpnr_seed,
+    write_sweep_seed,
+    read_sweep_seed,
+    git_commit,
+)
+
+
+def _report(lc_used: int, fmax_mhz: float) -> BuildReport:
+    """Returns a build report with a single resource and a single clock."""
+    return BuildReport(
+        resources=[
+            ResourceReport("ICESTORM_LC", 1000, lc_used, 100 * lc_used / 1000)
+        ],
+        clocks=[ClockReport("CLK", fmax_mhz)],
+    )
+
+
+def _record(report: BuildReport, pnr_sha256: str) -> BuildRecord:
+    """Returns a build record with the given report."""
+    return BuildRecord(
+        env_name="default",
+        board_id="alhambra-ii",
+        timestamp="2025-01-01T10:00:00",
+        git_commit="abc1234",
+        seed=3,
+        total_sec=12.5,
+        stages_sec={"synth": 4.0, "pnr": 8.0},
+        report=report,
+        pnr_sha256=pnr_sha256,
+    )
+
+
+def test_find_regressions():
+    """Tests the detection of regressions."""
+
+    thresholds = RegressionThresholds(fmax_pct=5, utilization_pct=5)
+
+    # -- Within the thresholds.
+    assert not find_regressions(
+        _report(100, 100.0), _report(140, 96.0), thresholds
+    )
+
+    # -- Beyond the thresholds.
+    regressions = find_regressions(
+        _report(100, 100.0), _report(160, 90.0), thresholds
+    )
+    assert [(r.kind, r.name) for r in regressions] == [
+        ("fmax", "CLK"),
+        ("utilization", "ICESTORM_LC"),
+    ]
+    assert regressions[0].summary() == "CLK fmax 100.00 -> 90.00 MHz (-10.0%)"
+    assert regressions[1].summary() == "ICESTORM_LC 10% -> 16% (+6.0 pts)"
+
+
+def test_regression_thresholds(apio_runner: ApioRunner, capsys):
+    """Tests the parsing of the apio.ini thresholds options."""
+
+    with apio_runner.in_sandbox():
+
+        assert regression_thresholds(None, None) == RegressionThresholds()
+        assert regression_thresholds("2.5", "0") == RegressionThresholds(
+            fmax_pct=2.5, utilization_pct=0
+        )
+
+        capsys.readouterr()  # Reset capture
+        with pytest.raises(SystemExit):
+            regression_thresholds("abc", None)
+        assert (
+            "Invalid fmax-regression-threshold value 'abc'"
+            in capsys.readouterr().out
+        )
+        with pytest.raises(SystemExit):
+            regression_thresholds(None, "-1")
+
+
+def test_stage_durations_and_seed():
+    """Tests the extraction of the stage timings and the seed."""
+
+    profile = BuildProfile(
+        env_name="default",
+        scons_target="build",
+        timestamp="2025-01-01T10:00:00",
+        actions=[
+            ActionProfile("synth", "yosys", 2.0, None, None, 0),
+            ActionProfile("pnr", "nextpnr-ice40", 3.0, None, None, 0),
+            ActionProfile("pnr", "nextpnr-ice40", 1.0, None, None, 0),
+        ],
+    )
+    assert stage_durations(profile) == {"synth": 2.0, "pnr": 4.0}
+    assert not stage_durations(None)
+
+    assert nextpnr_seed([]) is None
+    assert nextpnr_seed(["--freq 13"]) is None
+    assert nextpnr_seed(["--freq 13 --seed 7"]) == 7
+    assert nextpnr_seed(["--seed=9"]) == 9
+
+
+def test_sweep_seed(apio_runner: ApioRunner):
+    """Tests the file with the seed of a seed sweep."""
+
+    with apio_runner.in_sandbox() as sb:
+        path = sb.proj_dir / "_build/default/seed-sweep.json"
+        assert read_sweep_seed(path, "abc") is None
+
+        write_sweep_seed(path, 5, "abc")
+        assert read_sweep_seed(path, "abc") == 5
+
+        # -- The seed of another hardware.pnr is ignored.
+        assert read_sweep_seed(path, "def") is None
+
+        path.write_text("not json", encoding="utf-8")
+        assert read_sweep_seed(path, "abc") is None
+
+
+def test_git_commit(apio_runner: ApioRunner):
+    """Tests that there is no commit outside of a git repository."""
+
+    with apio_runner.in_sandbox() as sb:
+        assert git_commit(sb.proj_dir) is None
+
+
+def test_build_history(apio_runner: ApioRunner):
+    """Tests the adding and the reading of builds."""
+
+    with apio_runner.in_sandbox():
+
+        db_path = Path("home/build-history.db")
+        project_a = Path("a")
+        project_b = Path("b")
+
+        with BuildHistory(db_path) as history:
+            assert history.records(project_a, "default", 10) == []
+            history.add(project_a, _record(_report(100, 100.0), "sha1"))
+            history.add(project_a, _record(_report(110, 90.0), "sha2"))
+            history.add(project_b, _record(_report(120, 80.0), "sha3"))
+
+        # -- Builds are persistent, per project and env, oldest first.
+        with BuildHistory(db_path) as history:
+            records = history.records(project_a, "default", 10)
+            assert [r.pnr_sha256 for r in records] == ["sha1", "sha2"]
+            assert records[0] == _record(_report(100, 100.0), "sha1")
+            assert [
+                r.pnr_sha256 for r in history.records(project_a, "default", 1)
+            ] == ["sha2"]
+            assert history.records(project_a, "other", 10) == []
+            assert len(history.records(project_b, "default", 10)) == 1
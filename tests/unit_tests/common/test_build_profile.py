@@ -0,0 +1,110 @@
+"""Test for build_profile.py."""
+
+from pathlib import Path
+from tests.conftest import ApioRunner
+from apio.common.build_profile import (
+    ActionProfile,
+    BuildProfile,
+    classify_action,
+    action_testbench,
+    new_build_profile,
+    write_build_profile,
+    read_build_profile,
+)
+
+
+def test_classify_action():
+    """Tests the classify_action() function."""
+
+    assert classify_action("yosys -p 'synth_ice40 ...' main.v") == (
+        "synth",
+        "yosys",
+    )
+    assert classify_action(
+        "yosys -p 'read_verilog main.v; show -format dot' -q"
+    ) == ("graph", "yosys")
+    assert classify_action("nextpnr-ice40 --hx8k --json a.json") == (
+        "pnr",
+        "nextpnr-ice40",
+    )
+    assert classify_action("-nextpnr-ecp5 --seed 3") == (
+        "pnr",
+        "nextpnr-ecp5",
+    )
+    assert classify_action("/usr/bin/icepack a.asc a.bin") == (
+        "bitstream",
+        "icepack",
+    )
+    assert classify_action("iverilog.exe -o main_tb.out main_tb.v") == (
+        "testbench compile",
+        "iverilog",
+    )
+    assert classify_action("vvp main_tb.out") == ("testbench run", "vvp")
+    assert classify_action('"/proj/_build/default/main_tb.out"') == (
+        "testbench run",
+        "main_tb.out",
+    )
+    assert classify_action("verilator_bin --lint-only main.v") == (
+        "lint",
+        "verilator_bin",
+    )
+    assert classify_action("my_tool arg") == ("my_tool", "my_tool")
+    assert classify_action("") == ("", "")
+
+
+def test_action_testbench():
+    """Tests the action_testbench() function."""
+
+    assert (
+        action_testbench("vvp _build/default/main_tb.out -dumpfile=x.vcd")
+        == "_build/default/main_tb.out"
+    )
+    assert (
+        action_testbench('"/proj/_build/default/main_tb.out"')
+        == "/proj/_build/default/main_tb.out"
+    )
+    assert action_testbench("iverilog -o main_tb.out main_tb.v") is None
+    assert action_testbench("yosys -p 'synth_ice40' main.v") is None
+
+
+def test_build_profile_write_read(apio_runner: ApioRunner):
+    """Tests the writing and reading of a build profile file."""
+
+    with apio_runner.in_sandbox():
+
+        path = Path("_build/default/build-profile.json")
+
+        # -- Missing file.
+        assert read_build_profile(path) is None
+
+        # -- Write and read back a profile.
+        profile = new_build_profile("default", "build")
+        profile.actions.append(
+            ActionProfile(
+                stage="synth",
+                tool="yosys",
+                wall_sec=2.5,
+                cpu_sec=2.25,
+                peak_rss_mb=120.5,
+                exit_code=0,
+            )
+        )
+        profile.actions.append(
+            ActionProfile(
+                stage="pnr",
+                tool="nextpnr-ice40",
+                wall_sec=1.5,
+                cpu_sec=None,
+                peak_rss_mb=None,
+                exit_code=1,
+            )
+        )
+        write_build_profile(path, profile)
+        profile2: BuildProfile = read_build_profile(path)
+        assert profile2 == profile
+        assert profile2.total_sec is None
+        assert profile2.actions_wall_sec == 4.0
+
+        # -- Invalid file.
+        path.write_text("{}", encoding="utf-8")
+        assert read_build_profile(path) is None
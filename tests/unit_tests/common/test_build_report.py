@@ -1,5 +1,6 @@
 """Test for build_report.py."""
 
+import json
 from pathlib import Path
 import pytest
 from pytest import LogCaptureFixture
@@ -10,6 +11,9 @@ from apio.common.build_report import (
     ClockReport,
     BuildReport,
     read_build_report,
+    read_pnr_json,
+    read_timing_report,
+    cell_module,
 )
 
 # -- Test json for ECP5. Having 'TRELLIS' in a utilization key indicates
@@ -165,3 +169,148 @@ def test_hardware_pnr_parsing_failure(
         captured = capsys.readouterr()
         assert e.value.code == 1
         assert "Error: Failed parsing json file" in cunstyle(captured.out)
+
+
+def test_hardware_pnr_missing_section(
+    apio_runner: ApioRunner, capsys: LogCaptureFixture
+):
+    """Tests the case where hardware.pnr has no fmax section."""
+    with apio_runner.in_sandbox() as sb:
+        file_path = Path("_build/default/hardware.pnr")
+        sb.write_file(file_path, '{"utilization": {}}')
+        capsys.readouterr()  # Reset capture
+        with pytest.raises(SystemExit) as e:
+            read_build_report(file_path)
+        captured = capsys.readouterr()
+        assert e.value.code == 1
+        assert "Error: Missing 'fmax'" in cunstyle(captured.out)
+
+
+def _step(kind: str, cell: str, delay: float, net: str = "") -> dict:
+    """Returns a critical path step in the nextpnr report format."""
+    step = {
+        "type": kind,
+        "from": {"cell": "prev", "port": "O", "loc": [1, 2]},
+        "to": {"cell": cell, "port": "I0", "loc": [3, 4]},
+        "delay": delay,
+    }
+    if net:
+        step["net"] = net
+    return step
+
+
+def test_cell_module():
+    """Tests the extraction of the module instance of cells."""
+    assert cell_module("counter_SB_DFF_Q") == ""
+    assert cell_module("uart0.shift_SB_DFF_Q") == "uart0"
+    assert cell_module("uart0.tx.shift_SB_DFF_Q_1") == "uart0.tx"
+    assert cell_module("$abc$123$auto$blifparse.cc:396$45") == ""
+    assert cell_module("uart0.$auto$alumacc.cc:485$7") == "uart0"
+
+
+def test_read_timing_report(apio_runner: ApioRunner):
+    """Tests the parsing and aggregation of the critical paths."""
+    report = json.loads(NON_ECP5_TEST_SUMMARY)
+    report["critical_paths"] = [
+        {
+            "from": "posedge CLK",
+            "to": "posedge CLK",
+            "path": [
+                _step("clk-to-q", "cnt_SB_DFF_Q", 0.5),
+                _step("routing", "uart0.lut_SB_LUT4_O", 1.0, net="cnt[0]"),
+                _step("logic", "uart0.lut_SB_LUT4_O", 0.25),
+                _step("routing", "uart0.ff_SB_DFF_D", 2.0, net="uart0.n1"),
+                _step("setup", "uart0.ff_SB_DFF_D", 0.25),
+            ],
+        },
+        {
+            "from": "posedge CLK",
+            "to": "<async>",
+            "path": [
+                _step("clk-to-q", "cnt_SB_DFF_Q", 0.5),
+                _step("routing", "led_SB_IO_O", 3.0, net="cnt[0]"),
+            ],
+        },
+    ]
+    with apio_runner.in_sandbox() as sb:
+        file_path = Path("_build/default/hardware.pnr")
+        sb.write_file(file_path, json.dumps(report))
+        timing = read_timing_report(file_path)
+
+    # -- The paths, worst first.
+    assert [(p.to_clock, p.delay_ns) for p in timing.paths] == [
+        ("posedge CLK", 4.0),
+        ("<async>", 3.5),
+    ]
+    path = timing.paths[0]
+    assert path.routing_delay_ns == 3.0
+    assert path.cell_delay_ns == 1.0
+    assert [s.kind for s in path.steps] == [
+        "clk-to-q",
+        "routing",
+        "logic",
+        "routing",
+        "setup",
+    ]
+    assert path.steps[1].net == "cnt[0]"
+    assert path.steps[1].module == "uart0"
+
+    # -- The delays by module and by net, largest first.
+    assert [(d.name, d.delay_ns) for d in timing.modules] == [
+        ("", 4.0),
+        ("uart0", 3.5),
+    ]
+    assert [(d.name, d.delay_ns) for d in timing.nets] == [
+        ("cnt[0]", 4.0),
+        ("uart0.n1", 2.0),
+    ]
+
+
+def test_read_timing_report_no_paths(apio_runner: ApioRunner):
+    """Tests a report without critical paths."""
+    with apio_runner.in_sandbox() as sb:
+        file_path = Path("_build/default/hardware.pnr")
+        sb.write_file(file_path, NON_ECP5_TEST_SUMMARY)
+        timing = read_timing_report(file_path)
+    assert not timing.paths
+    assert not timing.modules
+    assert not timing.nets
+
+
+def test_read_timing_report_invalid(
+    apio_runner: ApioRunner, capsys: LogCaptureFixture
+):
+    """Tests a report with invalid critical paths."""
+    with apio_runner.in_sandbox() as sb:
+        file_path = Path("_build/default/hardware.pnr")
+        sb.write_file(file_path, '{"critical_paths": [{"from": "x"}]}')
+        capsys.readouterr()  # Reset capture
+        with pytest.raises(SystemExit) as e:
+            read_timing_report(file_path)
+        captured = capsys.readouterr()
+        assert e.value.code == 1
+        assert "Error: Invalid critical paths" in cunstyle(captured.out)
+
+
+def test_read_reports_from_parsed_json(apio_runner: ApioRunner):
+    """Tests reading the build and the timing reports from a single parse
+    of the file."""
+    report = json.loads(NON_ECP5_TEST_SUMMARY)
+    report["critical_paths"] = [
+        {
+            "from": "posedge CLK",
+            "to": "posedge CLK",
+            "path": [_step("routing", "uart0.ff_SB_DFF_D", 2.0, net="n1")],
+        }
+    ]
+    with apio_runner.in_sandbox() as sb:
+        file_path = Path("_build/default/hardware.pnr")
+        sb.write_file(file_path, json.dumps(report))
+        expected_build = read_build_report(file_path)
+        expected_timing = read_timing_report(file_path)
+
+        # -- The reports don't read the file again.
+        pnr_json = read_pnr_json(file_path)
+        file_path.unlink()
+        assert read_build_report(file_path, pnr_json) == expected_build
+        assert read_timing_report(file_path, pnr_json) == expected_timing
@@ -1,8 +1,13 @@
 """Test for common_utils.py."""
 
+import os
 from pathlib import Path
 from os.path import join
+from apio.common import common_util
 from apio.common.common_util import (
+    PROJECT_FILES_CACHE_PATH,
+    get_project_files,
+    find_project_files,
     sort_files,
     file_sort_key_func,
     is_source_file,
@@ -144,3 +149,83 @@ def test_get_source_files(apio_runner):
             "ccc_tb.v",
             join("subdir2", "eee_tb.v"),
         ]
+
+
+def test_find_project_files(apio_runner):
+    """Tests that find_project_files() skips hidden and _build dirs."""
+
+    with apio_runner.in_sandbox():
+
+        Path("main.v").touch()
+        Path("pins.pcf").touch()
+        Path(".hidden.v").touch()
+        Path(".git").mkdir()
+        Path(".git/x.v").touch()
+        Path("_build/default").mkdir(parents=True)
+        Path("_build/default/hardware.v").touch()
+        Path("sub/_build").mkdir(parents=True)
+        Path("sub/_build/lib.v").touch()
+        Path("sub/lib.sv").touch()
+
+        assert find_project_files([".v", ".sv"]) == [
+            "main.v",
+            join("sub", "lib.sv"),
+            join("sub", "_build", "lib.v"),
+        ]
+        assert find_project_files([".pcf"]) == ["pins.pcf"]
+        assert find_project_files([".lpf"]) == []
+
+
+def test_project_files_cache(apio_runner, monkeypatch):
+    """Tests the caching of the project files scan."""
+
+    # pylint: disable=protected-access
+
+    old_times = iter(range(1_000_000_000, 1_000_001_000))
+
+    def set_old_mtimes():
+        """Move the project dirs mtimes to the past, so they are not
+        considered racy. Each call uses a later time."""
+        t = next(old_times)
+        for d in [".", "sub"]:
+            os.utime(d, (t, t))
+
+    with apio_runner.in_sandbox():
+
+        Path("sub").mkdir()
+        Path("sub/a.v").touch()
+        set_old_mtimes()
+
+        # -- Without a _build dir, the cache is not created.
+        assert sorted(get_project_files()) == [join("sub", "a.v")]
+        assert not PROJECT_FILES_CACHE_PATH.exists()
+
+        # -- With a _build dir, the cache is created.
+        Path("_build").mkdir()
+        set_old_mtimes()
+        assert sorted(get_project_files()) == [join("sub", "a.v")]
+        assert PROJECT_FILES_CACHE_PATH.exists()
+
+        # -- A cache hit doesn't scan the project.
+        real_scan = common_util._scan_project_files
+        monkeypatch.setattr(common_util, "_scan_project_files", None)
+        assert sorted(get_project_files()) == [join("sub", "a.v")]
+        monkeypatch.setattr(common_util, "_scan_project_files", real_scan)
+
+        # -- Adding a file invalidates the cache. The dir was just modified
+        # -- so the new scan is not cached.
+        Path("sub/b.v").touch()
+        assert sorted(get_project_files()) == [
+            join("sub", "a.v"),
+            join("sub", "b.v"),
+        ]
+        set_old_mtimes()
+        assert sorted(get_project_files()) == [
+            join("sub", "a.v"),
+            join("sub", "b.v"),
+        ]
+
+        # -- The cache can be bypassed.
+        Path("sub/c.v").touch()
+        set_old_mtimes()
+        assert len(get_project_files(use_cache=False)) == 3
@@ -0,0 +1,146 @@
+"""Test for testbench_results.py."""
+
+from pathlib import Path
+from xml.etree import ElementTree
+from apio.common.testbench_results import (
+    TestbenchResult,
+    write_testbench_result,
+    read_testbench_results,
+    junit_xml,
+    write_selected_testbenches,
+    read_selected_testbenches,
+    read_testbench_durations,
+    record_testbench_duration,
+    durations_fingerprint,
+)
+
+
+def test_failure_message():
+    """Tests the extraction of the failure message from the output."""
+
+    def result(output: str) -> TestbenchResult:
+        return TestbenchResult(
+            testbench="main_tb", exit_code=1, duration_sec=0.5, output=output
+        )
+
+    assert (
+        result(
+            "VCD info: dumpfile main_tb.vcd opened for output.\n"
+            "ERROR: EXPECT_EQ failed - expected '3' but got '2' at "
+            "main_tb.v:30\n"
+            "FATAL: main_tb.v:30: \n"
+        ).failure_message
+        == "ERROR: EXPECT_EQ failed - expected '3' but got '2' at main_tb.v:30"
+    )
+    assert (
+        result("%Error: main_tb.v:12: Verilog $fatal\n").failure_message
+        == "%Error: main_tb.v:12: Verilog $fatal"
+    )
+    assert (
+        result("No errors here\n").failure_message
+        == "Testbench exited with code 1."
+    )
+
+
+def test_write_and_read_results(tmp_path: Path):
+    """Tests the writing and reading of the results files."""
+
+    results_dir = tmp_path / "test-results"
+    assert not read_testbench_results(results_dir)
+
+    write_testbench_result(
+        results_dir, TestbenchResult("tests/uart_tb", 0, 1.5, "ok\n")
+    )
+    write_testbench_result(
+        results_dir, TestbenchResult("main_tb", 1, 0.25, "failed\n")
+    )
+    # -- The first result of a testbench is kept.
+    write_testbench_result(
+        results_dir, TestbenchResult("main_tb", 1, 3.0, "dump run\n")
+    )
+
+    assert read_testbench_results(results_dir) == [
+        TestbenchResult("main_tb", 1, 0.25, "failed\n"),
+        TestbenchResult("tests/uart_tb", 0, 1.5, "ok\n"),
+    ]
+
+
+def test_junit_xml():
+    """Tests the generation of the JUnit XML report."""
+
+    results = [
+        TestbenchResult("main_tb", 1, 0.25, "\x1b[31mERROR: bad value\n"),
+        TestbenchResult("tests/uart_tb", 0, 1.5, "ok\n"),
+    ]
+    text = junit_xml("default", results)
+    assert text.startswith('<?xml version="1.0" encoding="UTF-8"?>\n')
+
+    testsuites = ElementTree.fromstring(text)
+    assert testsuites.tag == "testsuites"
+    assert testsuites.get("tests") == "2"
+    assert testsuites.get("failures") == "1"
+    assert testsuites.get("time") == "1.750"
+
+    testsuite = testsuites.find("testsuite")
+    assert testsuite.get("name") == "default"
+
+    testcases = testsuite.findall("testcase")
+    assert [t.get("name") for t in testcases] == ["main_tb", "tests/uart_tb"]
+    assert testcases[0].get("classname") == "default"
+    assert testcases[0].get("time") == "0.250"
+    failure = testcases[0].find("failure")
+    assert failure.get("message") == "ERROR: bad value"
+    assert testcases[0].find("system-out").text == "ERROR: bad value\n"
+    assert testcases[1].find("failure") is None
+    assert testcases[1].find("system-out").text == "ok\n"
+    assert testsuite.get("errors") == "0"
+
+
+def test_junit_xml_missing(tmp_path: Path):
+    """Tests the reporting of selected testbenches that have no result."""
+
+    selected_file = tmp_path / "test-selected-testbenches.json"
+    assert not read_selected_testbenches(selected_file)
+    write_selected_testbenches(selected_file, ["main_tb", "tests/uart_tb"])
+    assert read_selected_testbenches(selected_file) == [
+        "main_tb",
+        "tests/uart_tb",
+    ]
+
+    # -- The first testbench failed to compile, so there are no results.
+    text = junit_xml("default", [], ["main_tb", "tests/uart_tb"])
+    testsuites = ElementTree.fromstring(text)
+    assert testsuites.get("tests") == "2"
+    assert testsuites.get("failures") == "0"
+    assert testsuites.get("errors") == "2"
+    testcases = testsuites.find("testsuite").findall("testcase")
+    assert [t.get("name") for t in testcases] == ["main_tb", "tests/uart_tb"]
+    assert "didn't run" in testcases[0].find("error").get("message")
+
+
+def test_testbench_durations(tmp_path: Path):
+    """Tests the recording of the testbench durations."""
+
+    durations_file = tmp_path / "_build/default/testbench-durations.json"
+    assert not read_testbench_durations(durations_file)
+
+    record_testbench_duration(durations_file, "main_tb", 1.23456)
+    record_testbench_duration(durations_file, "tests/uart_tb", 2.0)
+    record_testbench_duration(durations_file, "main_tb", 3.5)
+    assert read_testbench_durations(durations_file) == {
+        "main_tb": 3.5,
+        "tests/uart_tb": 2.0,
+    }
+
+    # -- An invalid file is ignored.
+    durations_file.write_text("[1, 2]", encoding="utf-8")
+    assert not read_testbench_durations(durations_file)
+
+
+def test_durations_fingerprint():
+    """Tests the fingerprint of the testbench durations."""
+
+    fingerprint = durations_fingerprint({"a_tb": 1.0, "b_tb": 2.0})
+    assert len(fingerprint) == 8
+    assert durations_fingerprint({"b_tb": 2.0, "a_tb": 1.0}) == fingerprint
+    assert durations_fingerprint({"a_tb": 1.0, "b_tb": 2.5}) != fingerprint
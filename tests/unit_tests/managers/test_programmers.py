@@ -11,12 +11,13 @@ from apio.apio_context import (
     ProjectPolicy,
     RemoteConfigPolicy,
 )
-from apio.utils.usb_util import UsbDevice
+from apio.utils.usb_util import UsbDevice, UsbDeviceFilter
 from apio.utils.serial_util import SerialDevice
 
 from apio.managers.programmers import (
     _construct_cmd_template,
-    _construct_programmer_cmd,
+    _construct_device_programmer_cmd,
+    _construct_programmer_cmds,
     _DeviceScanner,
 )
 
@@ -34,10 +35,15 @@ class FakeDeviceScanner(_DeviceScanner):
         self._serial_devices = serial_devices
 
     # @override
-    def get_usb_devices(self) -> List[UsbDevice]:
-        """Returns the fake usb devices."""
+    def get_usb_devices(self, usb_filter: UsbDeviceFilter) -> List[UsbDevice]:
+        """Returns the fake usb devices that pass the VID/PID of the
+        filter, as the real scanner does."""
         assert self._usb_devices
-        return self._usb_devices
+        return [
+            d
+            for d in self._usb_devices
+            if usb_filter.passes_ids(d.vendor_id, d.product_id)
+        ]
 
     # @override
     def get_serial_devices(self) -> List[UsbDevice]:
@@ -202,9 +208,9 @@ def test_get_cmd_usb(apio_runner: ApioRunner, capsys: LogCaptureFixture):
         )
 
         # -- Call the tested function
-        cmd = _construct_programmer_cmd(
+        cmd = _construct_device_programmer_cmd(
             apio_ctx, scanner, serial_port_flag=None, serial_num_flag=None
-        )
+        ).programmer_cmd
 
         # -- Test the result programmer command.
         assert cmd == (
@@ -257,7 +263,7 @@ def test_get_cmd_usb_no_match(
         # -- Call the tested function
 
         with raises(SystemExit) as e:
-            _construct_programmer_cmd(
+            _construct_device_programmer_cmd(
                 apio_ctx, scanner, serial_port_flag=None, serial_num_flag=None
             )
 
@@ -305,7 +311,7 @@ def test_get_cmd_usb_multiple_matches(
 
         # -- Call the tested function
         with raises(SystemExit) as e:
-            _construct_programmer_cmd(
+            _construct_device_programmer_cmd(
                 apio_ctx, scanner, serial_port_flag=None, serial_num_flag=None
             )
 
@@ -357,9 +363,9 @@ def test_get_cmd_serial(apio_runner: ApioRunner, capsys: LogCaptureFixture):
         )
 
         # -- Call the tested function
-        cmd = _construct_programmer_cmd(
+        cmd = _construct_device_programmer_cmd(
             apio_ctx, scanner, serial_port_flag=None, serial_num_flag=None
-        )
+        ).programmer_cmd
 
         # -- Test the result programmer command.
         assert cmd == "my-programmer --port /dev/port2"
@@ -408,7 +414,7 @@ def test_get_cmd_serial_no_match(
 
         # -- Call the tested function
         with raises(SystemExit) as e:
-            _construct_programmer_cmd(
+            _construct_device_programmer_cmd(
                 apio_ctx, scanner, serial_port_flag=None, serial_num_flag=None
             )
 
@@ -456,7 +462,7 @@ def test_get_cmd_serial_multiple_matches(
 
         # -- Call the tested function
         with raises(SystemExit) as e:
-            _construct_programmer_cmd(
+            _construct_device_programmer_cmd(
                 apio_ctx, scanner, serial_port_flag=None, serial_num_flag=None
             )
 
@@ -509,9 +515,9 @@ def test_device_presence_ok(
         )
 
         # -- Call the tested function
-        cmd = _construct_programmer_cmd(
+        cmd = _construct_device_programmer_cmd(
             apio_ctx, scanner, serial_port_flag=None, serial_num_flag=None
-        )
+        ).programmer_cmd
 
         # -- Test the result programmer command.
         assert cmd == "my programmer command $SOURCE"
@@ -566,7 +572,7 @@ def test_device_presence_not_found(
 
         # -- Call the tested function
         with raises(SystemExit) as e:
-            _construct_programmer_cmd(
+            _construct_device_programmer_cmd(
                 apio_ctx, scanner, serial_port_flag=None, serial_num_flag=None
             )
 
@@ -577,3 +583,120 @@ def test_device_presence_not_found(
         assert "Checking device presence" in log
         assert 'FILTER [VID=0403, PID=6010, REGEX="^Alhambra II.*"]' in log
         assert "Error: No matching device." in log
+
+
+def _multi_device_apio_ctx(sb, programmer_cmd: str) -> ApioContext:
+    """Creates an alhambra-ii project with the given programmer command
+    and returns its apio context."""
+    sb.write_apio_ini(
+        {
+            "[env:default]": {
+                "board": "alhambra-ii",
+                "top-module": "main",
+                "programmer-cmd": programmer_cmd,
+            }
+        }
+    )
+    return ApioContext(
+        project_policy=ProjectPolicy.PROJECT_REQUIRED,
+        remote_config_policy=RemoteConfigPolicy.CACHED_OK,
+        packages_policy=PackagesPolicy.ENSURE_PACKAGES,
+    )
+
+
+def test_get_cmds_serial_nums(apio_runner: ApioRunner):
+    """Test the programmer commands of devices selected by serial numbers,
+    with duplicate serial numbers."""
+    with apio_runner.in_sandbox() as sb:
+
+        apio_ctx = _multi_device_apio_ctx(
+            sb, "my-programmer --sn ${SERIAL_NUM} ${BIN_FILE}"
+        )
+        scanner = FakeDeviceScanner(
+            usb_devices=[
+                fake_usb_device(dev=0, sn="SN001"),
+                fake_usb_device(dev=1, sn="SN002"),
+                fake_usb_device(dev=2, sn="SN003"),
+            ],
+        )
+
+        cmds = _construct_programmer_cmds(
+            apio_ctx, scanner, ["SN003", "SN001", "SN003"], False
+        )
+
+        assert [(c.device, c.programmer_cmd, c.serial_num) for c in cmds] == [
+            ("SN003", "my-programmer --sn SN003 $SOURCE", "SN003"),
+            ("SN001", "my-programmer --sn SN001 $SOURCE", "SN001"),
+        ]
+
+
+def test_get_cmds_all_matching(apio_runner: ApioRunner):
+    """Test the programmer commands of all the matching devices."""
+    with apio_runner.in_sandbox() as sb:
+
+        apio_ctx = _multi_device_apio_ctx(
+            sb, "my-programmer --busdev ${BUS}:${DEV} ${BIN_FILE}"
+        )
+        scanner = FakeDeviceScanner(
+            usb_devices=[
+                fake_usb_device(bus=1, dev=4, sn=""),
+                fake_usb_device(bus=1, dev=5, prod="non alhambra"),
+                fake_usb_device(bus=2, dev=4, sn=""),
+            ],
+        )
+
+        cmds = _construct_programmer_cmds(apio_ctx, scanner, [], True)
+
+        assert [(c.device, c.programmer_cmd) for c in cmds] == [
+            ("1:4", "my-programmer --busdev 1:4 $SOURCE"),
+            ("2:4", "my-programmer --busdev 2:4 $SOURCE"),
+        ]
+
+
+def test_get_cmds_no_device_vars(
+    apio_runner: ApioRunner, capsys: LogCaptureFixture
+):
+    """Test the error of a programmer command that doesn't identify a
+    specific device, with multiple devices."""
+    with apio_runner.in_sandbox() as sb:
+
+        apio_ctx = _multi_device_apio_ctx(
+            sb, "my-programmer --vid ${VID} --pid ${PID} --bus ${BUS}"
+        )
+        scanner = FakeDeviceScanner(
+            usb_devices=[
+                fake_usb_device(dev=0, sn="SN001"),
+                fake_usb_device(dev=1, sn="SN002"),
+            ],
+        )
+
+        with raises(SystemExit) as e:
+            _construct_programmer_cmds(apio_ctx, scanner, [], True)
+
+        assert e.value.code == 1
+        log = capsys.readouterr().out
+        assert "doesn't select a specific device" in log
+        assert "requires a programmer command" in log
+
+
+def test_get_cmds_same_cmd(apio_runner: ApioRunner, capsys: LogCaptureFixture):
+    """Test the error of multiple devices that get the same programmer
+    command."""
+    with apio_runner.in_sandbox() as sb:
+
+        apio_ctx = _multi_device_apio_ctx(
+            sb, "my-programmer --sn ${SERIAL_NUM} ${BIN_FILE}"
+        )
+        scanner = FakeDeviceScanner(
+            usb_devices=[
+                fake_usb_device(dev=0, sn=""),
+                fake_usb_device(dev=1, sn=""),
+            ],
+        )
+
+        with raises(SystemExit) as e:
+            _construct_programmer_cmds(apio_ctx, scanner, [], True)
+
+        assert e.value.code == 1
+        log = capsys.readouterr().out
+        assert "Some of the devices have the same programmer command" in log
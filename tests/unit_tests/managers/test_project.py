@@ -62,6 +62,8 @@ def test_all_options_env(apio_runner: ApioRunner, capsys: CaptureFixture[str]):
             "default-testbench": "main_tb.v",
             "defines": "\n  aaa=111\n  bbb=222",
             "format-verible-options": "\n  --aaa bbb\n  --ccc ddd",
+            "fmax-regression-threshold": "2.5",
+            "utilization-regression-threshold": "10",
             "programmer-cmd": "iceprog ${VID}:${PID}",
             "top-module": "my_module",
             "yosys-extra-options": "-dsp -xyz",
@@ -69,6 +71,9 @@ def test_all_options_env(apio_runner: ApioRunner, capsys: CaptureFixture[str]):
             "gtkwave-extra-options": "--rcvar=do_initial_zoom_fit 1",
             "verilator-extra-options": "-Wno-fatal",
             "constraint-file": "pinout.lpf",
+            "waveform-format": "fst",
+            "test-dump": "on-failure",
+            "sim-engine": "verilator",
         }
     }
 
@@ -88,6 +93,8 @@ def test_all_options_env(apio_runner: ApioRunner, capsys: CaptureFixture[str]):
         "default-testbench": "main_tb.v",
         "defines": ["aaa=111", "bbb=222"],
         "format-verible-options": ["--aaa bbb", "--ccc ddd"],
+        "fmax-regression-threshold": "2.5",
+        "utilization-regression-threshold": "10",
         "programmer-cmd": "iceprog ${VID}:${PID}",
         "top-module": "my_module",
         "yosys-extra-options": ["-dsp -xyz"],
@@ -95,12 +102,16 @@ def test_all_options_env(apio_runner: ApioRunner, capsys: CaptureFixture[str]):
         "gtkwave-extra-options": ["--rcvar=do_initial_zoom_fit 1"],
         "verilator-extra-options": ["-Wno-fatal"],
         "constraint-file": "pinout.lpf",
+        "waveform-format": "fst",
+        "test-dump": "on-failure",
+        "sim-engine": "verilator",
     }
 
     # -- Try a few as dict lookup on the project object.
     assert project.get_str_option("board") == "alhambra-ii"
     assert project.get_str_option("top-module") == "my_module"
     assert project.get_str_option("constraint-file") == "pinout.lpf"
+    assert project.get_str_option("waveform-format") == "fst"
 
 
 def test_required_options_only_env(
@@ -336,6 +347,38 @@ def test_env_selection_from_env_arg(
     }
 
 
+def test_with_env():
+    """Tests the selection of another env of a loaded project."""
+
+    project = Project(
+        apio_section={},
+        common_section={"default-testbench": "main_tb.v"},
+        env_sections={
+            "env1": {"board": "alhambra-ii", "top-module": "module1"},
+            "env2": {"board": "ice40-hx8k", "top-module": "module2"},
+        },
+        env_arg=None,
+        boards={"alhambra-ii": {}, "ice40-hx8k": {}},
+    )
+    assert project.env_names == ["env1", "env2"]
+    assert project.env_name == "env1"
+
+    project2 = project.with_env("env2")
+
+    # -- The new project has the options of env2.
+    assert project2.env_name == "env2"
+    assert project2.env_names == ["env1", "env2"]
+    assert project2.env_options == {
+        "default-testbench": "main_tb.v",
+        "board": "ice40-hx8k",
+        "top-module": "module2",
+    }
+
+    # -- The original project is not affected.
+    assert project.env_name == "env1"
+    assert project.get_str_option("top-module") == "module1"
+
+
 def error_tester(
     env_arg: Optional[str],
     apio_ini: Dict[str, Dict[str, str]],
@@ -399,6 +442,36 @@ def test_validation_errors(apio_runner: ApioRunner, capsys: CaptureFixture):
         capsys=capsys,
     )
 
+    # -- Invalid waveform format.
+    error_tester(
+        env_arg=None,
+        apio_ini={
+            "[env:default]": {
+                "board": "alhambra-ii",
+                "top-module": "main",
+                "waveform-format": "ghw",
+            }
+        },
+        expected_error="Error: Invalid waveform-format 'ghw' in apio.ini",
+        apio_runner=apio_runner,
+        capsys=capsys,
+    )
+
+    # -- Invalid test dump mode.
+    error_tester(
+        env_arg=None,
+        apio_ini={
+            "[env:default]": {
+                "board": "alhambra-ii",
+                "top-module": "main",
+                "test-dump": "never",
+            }
+        },
+        expected_error="Error: Invalid test-dump 'never' in apio.ini",
+        apio_runner=apio_runner,
+        capsys=capsys,
+    )
+
     # -- Env name has an invalid char (Uppercase).
     error_tester(
         env_arg=None,
@@ -2,7 +2,10 @@
 Tests of scons_filters.py
 """
 
-from apio.managers.scons_filter import PnrRangeDetector, PipeId
+import json
+from pytest import LogCaptureFixture
+from apio.common import apio_events
+from apio.managers.scons_filter import PnrRangeDetector, PipeId, JsonlFilter
 
 # TODO: Add testing of on_line() including line coloring and line ignoring.
 
@@ -29,3 +32,70 @@ def test_pnr_range_detector():
 
     # -- out of range.
     assert not rd.update(PipeId.STDOUT, "bla bla")
+
+
+def test_jsonl_filter(capsys: LogCaptureFixture):
+    """Tests the conversion of the scons output lines to events."""
+
+    jsonl_filter = JsonlFilter("env1")
+    capsys.readouterr()  # Reset capture
+
+    # -- A forwarded event marker line.
+    jsonl_filter.on_stdout_line(
+        apio_events.marker_line("stage_start", stage="pnr", tool="nextpnr"),
+        "\n",
+    )
+    # -- Plain lines.
+    jsonl_filter.on_stdout_line("yosys -p synth_ice40 main.v", "\n")
+    jsonl_filter.on_stderr_line("%Warning-WIDTH: main.v:12:5: Bad width", "\n")
+    jsonl_filter.on_stderr_line("tests/main_tb.v:30: error: Unknown x", "\n")
+    jsonl_filter.on_stderr_line("ERROR: Max frequency not met", "\n")
+    # -- Skipped lines.
+    jsonl_filter.on_stdout_line("   ", "\n")
+    jsonl_filter.on_stdout_line("50%", "\r")
+    jsonl_filter.on_stderr_line(
+        "Numpy is not available, performance will be degraded", "\n"
+    )
+
+    events = [
+        json.loads(line) for line in capsys.readouterr().out.splitlines()
+    ]
+    assert [e["event"] for e in events] == [
+        "stage_start",
+        "log",
+        "warning",
+        "error",
+        "error",
+    ]
+    assert all(e["env"] == "env1" for e in events)
+    assert events[0]["stage"] == "pnr"
+    assert events[1]["stream"] == "stdout"
+    assert events[1]["text"] == "yosys -p synth_ice40 main.v"
+    assert events[2]["stream"] == "stderr"
+    assert (events[2]["file"], events[2]["line"], events[2]["column"]) == (
+        "main.v",
+        12,
+        5,
+    )
+    assert (events[3]["file"], events[3]["line"]) == ("tests/main_tb.v", 30)
+    assert "column" not in events[3]
+    assert "file" not in events[4]
+
+
+def test_jsonl_filter_corrupted_marker(capsys: LogCaptureFixture):
+    """Tests that a corrupted event marker line is written as a log
+    event."""
+
+    jsonl_filter = JsonlFilter("env1")
+    capsys.readouterr()  # Reset capture
+
+    line = apio_events.marker_line("stage_end", stage="pnr", error="ERROR")
+    jsonl_filter.on_stdout_line(line[:-5], "\n")
+
+    events = [
+        json.loads(line) for line in capsys.readouterr().out.splitlines()
+    ]
+    assert len(events) == 1
+    assert events[0]["event"] == "log"
+    assert events[0]["env"] == "env1"
+    assert events[0]["text"] == line[:-5]
@@ -3,7 +3,13 @@ Tests of the scons manager scons.py
 """
 
 from google.protobuf import text_format
+from pytest import LogCaptureFixture
 from tests.conftest import ApioRunner
+from apio.common.apio_console import cunstyle
+from apio.common.build_profile import (
+    BUILD_PROFILE_FILE_NAME,
+    read_build_profile,
+)
 from apio.common.proto.apio_pb2 import (
     SconsParams,
     Verbosity,
@@ -58,6 +64,7 @@ environment {
   scons_shell_id: ""
   xilinx_prjxray_db_path: "TBD"
   xilinx_chipdb_path: "TBD"
+  cache_dir: "TBD"
 }
 apio_env_params {
   env_name: "default"
@@ -67,6 +74,8 @@ apio_env_params {
   nextpnr_extra_options: "--freq 13"
   gtkwave_extra_options: '--rcvar=do_initial_zoom_fit 1'
   verilator_extra_options: "-Wno-fatal",
+  waveform_format: "vcd"
+  sim_engine: "iverilog"
 }
 """
 
@@ -105,6 +114,8 @@ apio_env_params {
   nextpnr_extra_options: "--freq 13"
   gtkwave_extra_options: '--rcvar=do_initial_zoom_fit 1'
   verilator_extra_options: "-Wno-fatal"
+  waveform_format: "vcd"
+  sim_engine: "iverilog"
 }
 target {
   lint {
@@ -153,6 +164,7 @@ def test_default_params(apio_runner: ApioRunner):
         expected.environment.xilinx_chipdb_path = str(
             sb.packages_dir / "openxc7/chipdb"
         )
+        expected.environment.cache_dir = str(apio_ctx.get_cache_dir())
 
         # -- Compare actual to expected values.
         assert str(scons_params) == str(expected)
@@ -205,6 +217,51 @@ def test_explicit_params(apio_runner: ApioRunner):
         expected.environment.xilinx_chipdb_path = str(
             sb.packages_dir / "openxc7/chipdb"
         )
+        expected.environment.cache_dir = str(apio_ctx.get_cache_dir())
 
         # -- Compare actual to expected values.
         assert str(scons_params) == str(expected)
+
+
+def test_run_scons_subprocess(
+    apio_runner: ApioRunner, capsys: LogCaptureFixture
+):
+    """Runs an actual scons subprocess, end to end, and checks that the
+    apio process completed the build profile that scons wrote."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        # -- Setup a project and a Scons object.
+        sb.write_apio_ini(
+            {"[env:default]": {"board": "alhambra-ii", "top-module": "main"}}
+        )
+        sb.write_file(
+            "main.v",
+            """
+            module main (input a, output b);
+              assign b = a;
+            endmodule
+            """,
+        )
+        apio_ctx = ApioContext(
+            project_policy=ProjectPolicy.PROJECT_REQUIRED,
+            remote_config_policy=RemoteConfigPolicy.CACHED_OK,
+            packages_policy=PackagesPolicy.ENSURE_PACKAGES,
+        )
+        scons = SConsManager(apio_ctx)
+
+        # -- Run the scons subprocess with the lint target.
+        capsys.readouterr()  # Reset capture
+        exit_code = scons.lint(LintParams(top_module="main"))
+        output = cunstyle(capsys.readouterr().out)
+        assert exit_code == 0, output
+        assert "SUCCESS" in output
+        assert "Error" not in output
+
+        # -- The apio process added the total time to the build profile.
+        profile = read_build_profile(
+            apio_ctx.env_build_path / BUILD_PROFILE_FILE_NAME
+        )
+        assert profile
+        assert profile.actions
+        assert profile.total_sec > 0
@@ -2,9 +2,18 @@
 Tests of the scons ApioEnv.
 """
 
+import os
+import sys
+import json
+from pathlib import Path
+import pytest
+from pytest import LogCaptureFixture
 from tests.unit_tests.scons.testing import make_test_apio_env
 from tests.conftest import ApioRunner
-from apio.scons.apio_env import ApioEnv
+from apio.scons.apio_env import ApioEnv, DUMP_RERUN_ENV_VAR
+from apio.common.build_profile import read_build_profile
+from apio.common import apio_events
+from apio.common.testbench_results import read_testbench_results
 
 
 def test_env_is_debug(apio_runner: ApioRunner):
@@ -44,3 +53,155 @@ def test_targeting_one_if():
     assert apio_env.targeting_one_of("build")
     assert apio_env.targeting_one_of("upload", "build")
     assert not apio_env.targeting_one_of("upload")
+
+
+def test_enable_action_profiling(apio_runner: ApioRunner):
+    """Tests the recording of the actions in the build profile file."""
+
+    with apio_runner.in_sandbox():
+
+        apio_env = make_test_apio_env()
+        apio_env.enable_action_profiling()
+
+        # -- An empty profile is written upon start.
+        profile_path = Path("_build/default/build-profile.json")
+        profile = read_build_profile(profile_path)
+        assert profile.env_name == "default"
+        assert profile.scons_target == "build"
+        assert not profile.actions
+
+        # -- Run two actions via the scons spawn function.
+        scons_env = apio_env.scons_env
+        spawn = scons_env["SPAWN"]
+        sh = scons_env["SHELL"]
+        escape = scons_env["ESCAPE"]
+        exit_code = spawn(sh, escape, "python", ["python", "-c", "0"], None)
+        assert exit_code == 0
+        exit_code = spawn(
+            sh,
+            escape,
+            "python",
+            ["python", "-c", '"import sys; sys.exit(3)"'],
+            None,
+        )
+        assert exit_code == 3
+
+        # -- Verify the profile.
+        profile = read_build_profile(profile_path)
+        assert [a.tool for a in profile.actions] == ["python", "python"]
+        assert [a.exit_code for a in profile.actions] == [0, 3]
+        for action in profile.actions:
+            assert action.wall_sec > 0
+            # -- Not available on windows.
+            if hasattr(os, "wait4"):
+                assert action.cpu_sec is not None
+                assert action.peak_rss_mb > 0
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Uses a shell script.")
+def test_action_events(apio_runner: ApioRunner, capsys: LogCaptureFixture):
+    """Tests the action events for '--output-format jsonl'."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        # -- A fake compiled testbench that fails.
+        sb.write_file("_build/default/main_tb.out", "#!/bin/sh\nexit 1\n")
+        os.chmod("_build/default/main_tb.out", 0o755)
+
+        apio_env = make_test_apio_env(targets=["test"])
+        apio_env.params.environment.output_events = True
+        apio_env.enable_action_profiling()
+
+        scons_env = apio_env.scons_env
+        spawn = scons_env["SPAWN"]
+        sh = scons_env["SHELL"]
+        escape = scons_env["ESCAPE"]
+        capsys.readouterr()  # Reset capture
+        exit_code = spawn(
+            sh,
+            escape,
+            "_build/default/main_tb.out",
+            ["_build/default/main_tb.out"],
+            None,
+        )
+        assert exit_code == 1
+
+        events = [
+            apio_events.parse_marker_line(line)
+            for line in capsys.readouterr().out.splitlines()
+        ]
+        assert [e["event"] for e in events] == [
+            "stage_start",
+            "stage_end",
+            "testbench",
+        ]
+        assert events[0]["stage"] == "testbench run"
+        assert events[1]["exit_code"] == 1
+        assert events[1]["duration_sec"] >= 0
+        assert events[2]["testbench"] == "main_tb"
+        assert events[2]["status"] == "failed"
+        assert json.dumps(events[2])
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Uses a shell script.")
+def test_record_testbench_results(
+    apio_runner: ApioRunner, capsys: LogCaptureFixture
+):
+    """Tests the capture of the testbenches results for --junit-xml."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        # -- A fake compiled testbench that fails.
+        sb.write_file(
+            "_build/default/main_tb.out",
+            "#!/bin/sh\necho 'ERROR: EXPECT_EQ failed'\nexit 1\n",
+        )
+        os.chmod("_build/default/main_tb.out", 0o755)
+
+        # -- A stale result of a previous run.
+        sb.write_file("_build/default/test-results/old_tb.json", "{}")
+
+        apio_env = make_test_apio_env(targets=["test"])
+        apio_env.params.target.test.record_results = True
+        apio_env.enable_action_profiling()
+
+        scons_env = apio_env.scons_env
+        spawn = scons_env["SPAWN"]
+        sh = scons_env["SHELL"]
+        escape = scons_env["ESCAPE"]
+        capsys.readouterr()  # Reset capture
+        exit_code = spawn(
+            sh,
+            escape,
+            "_build/default/main_tb.out",
+            ["_build/default/main_tb.out"],
+            None,
+        )
+        assert exit_code == 1
+
+        # -- The output is still printed.
+        assert "ERROR: EXPECT_EQ failed" in capsys.readouterr().out
+
+        results_dir = Path("_build/default/test-results")
+        results = read_testbench_results(results_dir)
+        assert len(results) == 1
+        assert results[0].testbench == "main_tb"
+        assert results[0].exit_code == 1
+        assert results[0].output == "ERROR: EXPECT_EQ failed\n"
+        assert results[0].failure_message == "ERROR: EXPECT_EQ failed"
+
+        # -- A dump rerun of the testbench is not recorded as another run.
+        durations_path = Path("_build/default/testbench-durations.json")
+        durations = durations_path.read_text(encoding="utf-8")
+        exit_code = spawn(
+            sh,
+            escape,
+            "_build/default/main_tb.out",
+            ["_build/default/main_tb.out"],
+            {**os.environ, DUMP_RERUN_ENV_VAR: "1"},
+        )
+        assert exit_code == 1
+        assert durations_path.read_text(encoding="utf-8") == durations
+        assert len(read_testbench_results(results_dir)) == 1
+        profile = read_build_profile(Path("_build/default/build-profile.json"))
+        assert len(profile.actions) == 1
@@ -0,0 +1,138 @@
+"""
+Tests of graph_util.py
+"""
+
+from tests.unit_tests.scons.testing import make_test_apio_env
+from tests.conftest import ApioRunner
+from apio.scons.graph_util import (
+    GraphUnit,
+    module_depths,
+    get_graph_units,
+    graph_report_action,
+)
+
+
+def test_get_graph_units(apio_runner: ApioRunner):
+    """Tests the selection of the modules to graph."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("main.v", "module main;\n  uart_tx #(.N(8)) t1 ();\n")
+        sb.write_file("uart_tx.v", "module uart_tx;\n  counter c1 (.x(1));\n")
+        sb.write_file("counter.v", "module counter;\nendmodule\n")
+        sb.write_file("unused.v", "module unused;\nendmodule\n")
+
+        synth_srcs = ["counter.v", "main.v", "uart_tx.v", "unused.v"]
+
+        assert module_depths("main", synth_srcs) == {
+            "main": 0,
+            "uart_tx": 1,
+            "counter": 2,
+        }
+
+        # -- A single graph of the top module, with all the files.
+        assert get_graph_units(
+            synth_srcs,
+            "main",
+            per_module=False,
+            max_depth=None,
+            module_filter=None,
+        ) == [GraphUnit(module="main", files=synth_srcs)]
+
+        # -- A graph per module.
+        units = get_graph_units(
+            synth_srcs,
+            "main",
+            per_module=True,
+            max_depth=None,
+            module_filter=None,
+        )
+        assert [u.module for u in units] == ["main", "uart_tx", "counter"]
+        assert units[0].files == ["counter.v", "main.v", "uart_tx.v"]
+        assert units[1].files == ["counter.v", "uart_tx.v"]
+        assert units[2].files == ["counter.v"]
+
+        # -- Pruned by depth.
+        units = get_graph_units(
+            synth_srcs,
+            "main",
+            per_module=True,
+            max_depth=1,
+            module_filter=None,
+        )
+        assert [u.module for u in units] == ["main", "uart_tx"]
+
+        # -- Pruned by name.
+        units = get_graph_units(
+            synth_srcs,
+            "main",
+            per_module=True,
+            max_depth=None,
+            module_filter="uart_*",
+        )
+        assert [u.module for u in units] == ["uart_tx"]
+
+        # -- An undeclared top module reads all the files.
+        units = get_graph_units(
+            synth_srcs,
+            "no_such_module",
+            per_module=False,
+            max_depth=None,
+            module_filter=None,
+        )
+        assert units[0].files == synth_srcs
+
+
+def test_get_graph_units_packages(apio_runner: ApioRunner):
+    """Tests that the graphs read the package files."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("defs.sv", "package defs;\nendpackage\n")
+        sb.write_file("main.sv", "module main;\n  import defs::*;\n")
+        sb.write_file("unused.sv", "module unused;\nendmodule\n")
+
+        synth_srcs = ["defs.sv", "main.sv", "unused.sv"]
+
+        # -- The default graph reads all the files.
+        units = get_graph_units(
+            synth_srcs,
+            "main",
+            per_module=False,
+            max_depth=None,
+            module_filter=None,
+        )
+        assert units == [GraphUnit(module="main", files=synth_srcs)]
+
+        # -- The per module graphs read the referenced packages.
+        units = get_graph_units(
+            synth_srcs,
+            "main",
+            per_module=True,
+            max_depth=None,
+            module_filter=None,
+        )
+        assert units == [
+            GraphUnit(module="main", files=["defs.sv", "main.sv"])
+        ]
+
+
+def test_graph_report_action(apio_runner: ApioRunner, capsys):
+    """Tests the reporting of the generated graphs."""
+
+    with apio_runner.in_sandbox():
+
+        apio_env = make_test_apio_env(targets=["graph"])
+        env = apio_env.scons_env
+        graphs = [env.File("graphs/main.svg"), env.File("graphs/uart.svg")]
+
+        action = graph_report_action(open_viewer=True)
+        assert action.execfunction(["graph"], graphs, env) == 0
+        output = capsys.readouterr().out
+        assert "Generated graphs/main.svg" in output
+        assert "Generated graphs/uart.svg" in output
+        assert "Not opening a viewer for multiple graphs" in output
+
+        action = graph_report_action(open_viewer=False)
+        assert action.execfunction(["graph"], graphs[:1], env) == 0
+        assert "User requested no graph viewer" in capsys.readouterr().out
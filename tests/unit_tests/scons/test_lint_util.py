@@ -0,0 +1,126 @@
+"""
+Tests of lint_util.py
+"""
+
+import json
+from tests.unit_tests.scons.testing import make_test_apio_env
+from tests.conftest import ApioRunner
+from apio.scons.lint_util import (
+    LintUnit,
+    module_closure,
+    get_lint_units,
+    cached_lint_action,
+    lint_report_action,
+)
+
+
+def test_get_lint_units(apio_runner: ApioRunner):
+    """Tests the split of a project into lint units."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("main.v", "module main;\n  counter #(.N(8)) c1 ();\n")
+        sb.write_file("counter.v", "module counter;\n  adder a1 (.x(1));\n")
+        sb.write_file("adder.v", "module adder;\nendmodule\n")
+        sb.write_file("unused.v", "module unused;\nendmodule\n")
+        sb.write_file("tests/helper_tb.v", "module helper;\nendmodule\n")
+        sb.write_file(
+            "tests/adder_tb.v",
+            "module adder_tb;\n  adder dut ();\n  helper h ();\n",
+        )
+
+        synth_srcs = ["adder.v", "counter.v", "main.v", "unused.v"]
+        test_srcs = ["tests/adder_tb.v", "tests/helper_tb.v"]
+
+        assert module_closure(["main.v"], synth_srcs) == [
+            "adder.v",
+            "counter.v",
+            "main.v",
+        ]
+
+        assert get_lint_units(synth_srcs, test_srcs, "main") == [
+            LintUnit(
+                name="top",
+                top_module="main",
+                files=["adder.v", "counter.v", "main.v"],
+            ),
+            LintUnit(
+                name="tests/adder_tb",
+                top_module=None,
+                files=["adder.v", "tests/adder_tb.v", "tests/helper_tb.v"],
+            ),
+            LintUnit(
+                name="tests/helper_tb",
+                top_module=None,
+                files=["tests/helper_tb.v"],
+            ),
+        ]
+
+        # -- An undeclared top module lints all the synthesis files.
+        units = get_lint_units(synth_srcs, [], "no_such_module")
+        assert units[0].files == synth_srcs
+
+
+def test_module_closure_packages_and_fallback(apio_runner: ApioRunner):
+    """Tests the package references of the module closure and its fallback
+    to all the files for unresolved names."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("defs.sv", "package defs;\nendpackage\n")
+        sb.write_file(
+            "main.sv",
+            "module main import defs::*; ();\n  (* keep *) uart u1 ();\n",
+        )
+        sb.write_file("uart.sv", "module uart;\nendmodule\n")
+        sb.write_file("pll.sv", "module pll;\n  SB_PLL40_CORE p1 ();\n")
+        sb.write_file("ext.sv", "module ext;\n  import ext_pkg::*;\n")
+        sb.write_file("unused.sv", "module unused;\nendmodule\n")
+
+        files = ["defs.sv", "ext.sv", "main.sv", "pll.sv", "uart.sv"]
+        files.append("unused.sv")
+
+        assert module_closure(["main.sv"], files) == [
+            "defs.sv",
+            "main.sv",
+            "uart.sv",
+        ]
+
+        # -- An undeclared module or package, here a vendor primitive and
+        # -- an external package, returns all the files.
+        assert module_closure(["pll.sv"], files) == files
+        assert module_closure(["ext.sv"], files) == files
+
+
+def test_cached_lint_action(apio_runner: ApioRunner, capsys):
+    """Tests the caching and the reporting of lint results."""
+
+    with apio_runner.in_sandbox():
+
+        apio_env = make_test_apio_env(targets=["lint"])
+        env = apio_env.scons_env
+        fs_file = env.File
+
+        # -- A unit that passes and a unit that fails.
+        action = cached_lint_action("echo $SOURCE")
+        assert action.execfunction([fs_file("ok.lint")], ["a.v"], env) == 0
+        assert json.loads(fs_file("ok.lint").get_text_contents()) == {
+            "exit_code": 0,
+            "output": "a.v\n",
+        }
+        action = cached_lint_action("echo failed && exit 3")
+        assert action.execfunction([fs_file("bad.lint")], [], env) == 0
+        assert (
+            json.loads(fs_file("bad.lint").get_text_contents())["exit_code"]
+            == 3
+        )
+
+        # -- The report prints the cached outputs and fails if any unit
+        # -- failed.
+        capsys.readouterr()
+        report = lint_report_action(["ok", "bad"])
+        sources = [fs_file("ok.lint"), fs_file("bad.lint")]
+        assert report.execfunction([], sources, env) == 1
+        assert capsys.readouterr().out == "[ok]\na.v\n[bad]\nfailed\n"
+
+        assert report.execfunction([], sources[:1], env) == 0
@@ -0,0 +1,140 @@
+"""
+Tests of the scons plugin_base.py functions.
+"""
+
+from SCons.Action import CommandAction, FunctionAction
+from tests.unit_tests.scons.testing import make_test_apio_env
+from tests.conftest import ApioRunner
+from apio.common.proto.apio_pb2 import (
+    TargetParams,
+    ApioTestParams,
+    ApioEnvParams,
+)
+from apio.scons.apio_env import DUMP_RERUN_ENV_VAR
+from apio.scons.plugin_base import PluginBase
+
+
+def test_testbench_run_builder(apio_runner: ApioRunner):
+    """Tests the testbench run builder with and without dumping."""
+
+    with apio_runner.in_sandbox():
+
+        # -- Default, vcd dump.
+        apio_env = make_test_apio_env(
+            targets=["test"],
+            target_params=TargetParams(
+                test=ApioTestParams(default_option=False)
+            ),
+        )
+        builder = PluginBase(apio_env).testbench_run_builder()
+        assert isinstance(builder.action, CommandAction)
+        assert str(builder.action) == "vvp $SOURCE -dumpfile=$TARGET -vcd"
+        assert builder.get_suffix(apio_env.scons_env) == ".vcd"
+
+        # -- FST dump.
+        apio_env = make_test_apio_env(
+            targets=["test"],
+            apio_env_params=ApioEnvParams(waveform_format="fst"),
+            target_params=TargetParams(
+                test=ApioTestParams(default_option=False)
+            ),
+        )
+        builder = PluginBase(apio_env).testbench_run_builder()
+        assert str(builder.action) == "vvp $SOURCE -dumpfile=$TARGET -fst"
+        assert builder.get_suffix(apio_env.scons_env) == ".fst"
+
+        # -- No dump, the action function runs vvp with -none.
+        apio_env = make_test_apio_env(
+            targets=["test"],
+            target_params=TargetParams(
+                test=ApioTestParams(default_option=False, no_dump=True)
+            ),
+        )
+        builder = PluginBase(apio_env).testbench_run_builder()
+        assert isinstance(builder.action, FunctionAction)
+        assert builder.get_suffix(apio_env.scons_env) == ".vcd"
+
+        # -- Run the action function with a fake env that records the
+        # -- commands and fails the first one.
+        class FakeEnv:
+            """A fake scons env for the action function."""
+
+            def __init__(self, exit_codes, cmds=None, environ=None):
+                self.exit_codes = exit_codes
+                self.cmds = [] if cmds is None else cmds
+                self.environ = environ or {"PATH": "/bin"}
+
+            def __getitem__(self, key):
+                assert key == "ENV"
+                return self.environ
+
+            def Override(self, overrides):  # pylint: disable=invalid-name
+                """Returns a fake env with the overridden ENV."""
+                return FakeEnv(self.exit_codes, self.cmds, overrides["ENV"])
+
+            def subst(self, cmd, target, source):
+                """Expands $SOURCE and $TARGET."""
+                return cmd.replace("$SOURCE", source[0]).replace(
+                    "$TARGET", target[0]
+                )
+
+            def Execute(self, cmd):  # pylint: disable=invalid-name
+                """Records the command, marked if it's a dump rerun, and
+                returns its exit code."""
+                if self.environ.get(DUMP_RERUN_ENV_VAR):
+                    cmd = "rerun: " + cmd
+                self.cmds.append(cmd)
+                return self.exit_codes.pop(0)
+
+        func = builder.action.execfunction
+
+        # -- Passing testbench, no rerun.
+        env = FakeEnv([0])
+        assert func(["tb.vcd"], ["tb.out"], env) == 0
+        assert env.cmds == ["vvp tb.out -none"]
+
+        # -- Failing testbench, rerun with dump.
+        env = FakeEnv([1, 1])
+        assert func(["tb.vcd"], ["tb.out"], env) == 1
+        assert env.cmds == [
+            "vvp tb.out -none",
+            "rerun: vvp tb.out -dumpfile=tb.vcd -vcd",
+        ]
+
+
+def test_verilator_testbench_run_builder(apio_runner: ApioRunner):
+    """Tests the testbench run builder with the verilator engine."""
+
+    with apio_runner.in_sandbox():
+
+        # -- Verilator test, the compiled testbench is run as is.
+        apio_env = make_test_apio_env(
+            targets=["test"],
+            apio_env_params=ApioEnvParams(sim_engine="verilator"),
+            target_params=TargetParams(
+                test=ApioTestParams(default_option=False, no_dump=True)
+            ),
+        )
+        builder = PluginBase(apio_env).testbench_run_builder()
+        assert str(builder.action) == '"${SOURCE.abspath}"'
+
+
+def test_pnr_seed_action():
+    """Tests the adaptation of the nextpnr action to a seed."""
+
+    action = "nextpnr-ice40 --json $SOURCE --asc $TARGET"
+    assert PluginBase.pnr_seed_action(action, None) == action
+    assert PluginBase.pnr_seed_action(action, 3) == (
+        "-nextpnr-ice40 --json $SOURCE --asc $TARGET --seed 3"
+    )
+
+    # -- A seed of the extra options is replaced by the sweep's seed.
+    for extra_options in ["--seed 7", "--seed=7", "--seed   7"]:
+        assert PluginBase.pnr_seed_action(
+            f"nextpnr-ice40 --json $SOURCE {extra_options} --freq 12",
+            3,
+        ) == ("-nextpnr-ice40 --json $SOURCE --freq 12 --seed 3")
+    assert (
+        PluginBase.pnr_seed_action("nextpnr-ice40 --seed 7", None)
+        == "nextpnr-ice40 --seed 7"
+    )
@@ -4,6 +4,8 @@ Tests of the scons plugin_util.py functions.
 
 import re
 import os
+import json
+from pathlib import Path
 from os.path import isfile, exists, join
 import pytest
 from SCons.Node.FS import FS
@@ -18,6 +20,8 @@ from apio.common.proto.apio_pb2 import (
     UploadParams,
     LintParams,
     ApioEnvParams,
+    ApioTestParams,
+    ReportParams,
 )
 from apio.scons.plugin_util import (
     get_constraint_file,
@@ -26,6 +30,10 @@ from apio.scons.plugin_util import (
     map_params,
     make_verilator_config_builder,
     verilator_lint_action,
+    compile_testbench_action,
+    report_action,
+    shard_testbenches,
+    get_apio_test_testbenches_infos,
 )
 
 
@@ -327,3 +335,221 @@ def test_verilator_lint_action_max(apio_runner: ApioRunner):
             f'_build{os.sep}default{os.sep}hardware.vlt "file1" "file2" '
             "$SOURCES" == normalized_cmd
         )
+
+
+def test_compile_testbench_action(apio_runner: ApioRunner):
+    """Tests the compile_testbench_action() selection of the simulator."""
+
+    with apio_runner.in_sandbox():
+
+        for sim_engine in ["iverilog", "verilator"]:
+            # -- Create apio scons env.
+            apio_env = make_test_apio_env(
+                targets=["test"],
+                apio_env_params=ApioEnvParams(
+                    defines=["DEBUG"], sim_engine=sim_engine
+                ),
+                target_params=TargetParams(
+                    test=ApioTestParams(default_option=False)
+                ),
+            )
+
+            # -- Call the tested function. The test params have no cache
+            # -- dir so the library files are used as is.
+            action = compile_testbench_action(
+                apio_env,
+                verbose=False,
+                vcd_output_name="main_tb",
+                is_interactive=False,
+                extra_params=["-DEXTRA"],
+                lib_dirs=[Path("lib")],
+                lib_files=[Path("lib/cells_sim.v")],
+            )
+            normalized_cmd = re.sub(r"\s+", " ", action)
+
+            lib_file = str(Path("lib/cells_sim.v"))
+            if sim_engine == "iverilog":
+                assert normalized_cmd == (
+                    "iverilog -g2012 -o $TARGET -DVCD_OUTPUT=main_tb "
+                    '-DDEBUG -DAPIO_SIM=0 -DEXTRA -I"lib" '
+                    f'"{lib_file}" $SOURCES'
+                )
+            else:
+                assert normalized_cmd == (
+                    "verilator_bin --binary --timing --quiet -j 0 "
+                    "-Wno-fatal -Wno-lint -Wno-style -Wno-TIMESCALEMOD "
+                    '--Mdir "${TARGET.base}_verilator" '
+                    '-o "${TARGET.abspath}" -DAPIO_SIM=0 -DDEBUG -DEXTRA '
+                    f'-I"lib" -v "{lib_file}" $SOURCES'
+                )
+
+
+def test_verilator_lint_action_incremental(apio_runner: ApioRunner):
+    """Tests the verilator_lint_action() function with --incremental."""
+
+    with apio_runner.in_sandbox():
+
+        # -- Create apio scons env.
+        apio_env = make_test_apio_env(
+            targets=["lint"],
+            target_params=TargetParams(lint=LintParams(incremental=True)),
+        )
+
+        action = verilator_lint_action(apio_env)
+
+        # -- The command is run by a function that caches its results and
+        # -- the top module is set per lint unit.
+        assert isinstance(action[1], FunctionAction)
+        assert "$LINT_TOP_ARG" in action[1].cmdstr
+        assert "--top-module" not in action[1].cmdstr
+
+
+def test_report_action_timing(
+    apio_runner: ApioRunner, capsys: LogCaptureFixture
+):
+    """Tests the timing analysis of the report action."""
+
+    def step(kind: str, cell: str, delay: float, net: str = "") -> dict:
+        return {"type": kind, "to": {"cell": cell}, "delay": delay, "net": net}
+
+    report = {
+        "utilization": {"ICESTORM_LC": {"available": 7680, "used": 90}},
+        "fmax": {"CLK$SB_IO_IN_$glb_clk": {"achieved": 119.15}},
+        "critical_paths": [
+            {
+                "from": "posedge CLK",
+                "to": "posedge CLK",
+                "path": [
+                    step("clk-to-q", "cnt_SB_DFF_Q", 0.5),
+                    step("routing", "uart0.tx_SB_LUT4_O", 1.75, net="cnt[3]"),
+                    step("setup", "uart0.tx_SB_LUT4_O", 0.25),
+                ],
+            },
+            {
+                "from": "posedge CLK",
+                "to": "<async>",
+                "path": [step("routing", "led_SB_IO", 0.5, net="led")],
+            },
+        ],
+    }
+
+    with apio_runner.in_sandbox() as sb:
+        sb.write_file("hardware.pnr", json.dumps(report))
+        apio_env = make_test_apio_env(targets=["report"])
+        env = apio_env.scons_env
+        pnr_file = [env.File("hardware.pnr")]
+
+        # -- Without --timing.
+        action = report_action(False, ReportParams())
+        capsys.readouterr()  # Reset capture
+        action.execfunction(["report"], pnr_file, env)
+        assert "Critical paths" not in cunstyle(capsys.readouterr().out)
+
+        # -- With --timing --top 1 --verbose. Only the worst path is
+        # -- reported.
+        action = report_action(True, ReportParams(timing=True, max_paths=1))
+        capsys.readouterr()  # Reset capture
+        action.execfunction(["report"], pnr_file, env)
+        output = cunstyle(capsys.readouterr().out)
+        assert "Critical paths" in output
+        assert "2.50" in output
+        assert "<async>" not in output
+        assert "Critical path 1: posedge CLK -> posedge CLK" in output
+        assert "Delay by module" in output
+        assert "uart0" in output
+        assert "Routing delay by net" in output
+        assert "cnt[3]" in output
+
+
+def test_shard_testbenches():
+    """Tests the partition of the testbenches into shards."""
+
+    testbenches = ["d_tb.v", "a_tb.v", "c_tb.v", "b_tb.v", "e_tb.v"]
+
+    # -- Round robin on the sorted testbenches.
+    assert shard_testbenches(testbenches, 1, 2, None) == [
+        "a_tb.v",
+        "c_tb.v",
+        "e_tb.v",
+    ]
+    assert shard_testbenches(testbenches, 2, 2, None) == ["b_tb.v", "d_tb.v"]
+    assert shard_testbenches(testbenches, 1, 1, None) == sorted(testbenches)
+    assert not shard_testbenches(["a_tb.v"], 2, 2, None)
+
+    # -- Balanced by durations. 'e_tb' has no duration and is assumed to
+    # -- take the average, 3 secs.
+    durations = {"a_tb": 9.0, "b_tb": 1.0, "c_tb": 1.0, "d_tb": 1.0}
+    shards = [shard_testbenches(testbenches, i, 2, durations) for i in (1, 2)]
+    assert shards == [["a_tb.v"], ["b_tb.v", "c_tb.v", "d_tb.v", "e_tb.v"]]
+
+    # -- The shards are disjoint and cover all the testbenches.
+    for count in range(1, 7):
+        for durations_arg in (None, durations):
+            all_tbs = []
+            for i in range(1, count + 1):
+                all_tbs.extend(
+                    shard_testbenches(testbenches, i, count, durations_arg)
+                )
+            assert sorted(all_tbs) == sorted(testbenches)
+
+
+def test_get_testbenches_infos_shard(
+    apio_runner: ApioRunner, capsys: LogCaptureFixture
+):
+    """Tests the selection of the testbenches of a shard."""
+
+    with apio_runner.in_sandbox():
+
+        test_params = ApioTestParams(
+            default_option=False, shard_index=2, shard_count=2
+        )
+        apio_env = make_test_apio_env(
+            targets=["test"],
+            target_params=TargetParams(test=test_params),
+        )
+        capsys.readouterr()  # Reset capture
+        infos = get_apio_test_testbenches_infos(
+            apio_env,
+            test_params,
+            ["main.v"],
+            ["main_tb.v", "util/led_tb.v", "uart_tb.v"],
+        )
+        assert [info.testbench_path for info in infos] == ["uart_tb.v"]
+        assert "Shard 2/2: testing 1 of 3 testbenches" in cunstyle(
+            capsys.readouterr().out
+        )
+
+
+def test_get_testbenches_infos_durations_file(
+    apio_runner: ApioRunner, capsys: LogCaptureFixture
+):
+    """Tests the balancing of the shards by a given durations file, which
+    takes precedence over the env's durations file."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file(
+            "_build/default/testbench-durations.json", '{"uart_tb": 1.0}'
+        )
+        sb.write_file("durations.json", '{"uart_tb": 9.0, "main_tb": 1.0}')
+        test_params = ApioTestParams(
+            default_option=False,
+            shard_index=1,
+            shard_count=2,
+            balance_shards=True,
+            durations_file=str(sb.proj_dir / "durations.json"),
+        )
+        apio_env = make_test_apio_env(
+            targets=["test"],
+            target_params=TargetParams(test=test_params),
+        )
+        capsys.readouterr()  # Reset capture
+        infos = get_apio_test_testbenches_infos(
+            apio_env,
+            test_params,
+            ["main.v"],
+            ["main_tb.v", "util/led_tb.v", "uart_tb.v"],
+        )
+        assert [info.testbench_path for info in infos] == ["uart_tb.v"]
+        output = cunstyle(capsys.readouterr().out)
+        assert "by 2 durations from durations.json, fingerprint" in output
@@ -0,0 +1,169 @@
+"""
+Tests of the scons seed_sweep_util.py functions.
+"""
+
+from pathlib import Path
+from SCons.Node.FS import FS
+from pytest import LogCaptureFixture
+from tests.unit_tests.scons.testing import make_test_apio_env
+from tests.conftest import ApioRunner
+from apio.common.apio_console import cunstyle
+from apio.common.build_report import (
+    BuildReport,
+    ClockReport,
+    ResourceReport,
+)
+from apio.common.build_history import read_sweep_seed, file_sha256
+from apio.common.proto.apio_pb2 import (
+    TargetParams,
+    BuildParams,
+    FMAX,
+    UTILIZATION,
+)
+from apio.scons.seed_sweep_util import (
+    seed_sweep_score,
+    select_best_seed,
+    seed_sweep_action,
+    clear_seed_report_action,
+)
+
+# -- A hardware.pnr file content with a given fmax and LC utilization.
+PNR_TEMPLATE = """
+{{
+  "utilization": {{
+    "ICESTORM_LC": {{ "available": 100, "used": {used} }},
+    "ICESTORM_RAM": {{ "available": 32, "used": 4 }}
+  }},
+  "fmax": {{
+    "CLK$SB_IO_IN_$glb_clk": {{ "achieved": {fmax}, "constraint": 12 }}
+  }}
+}}
+"""
+
+
+def _report(fmax: float, used: int) -> BuildReport:
+    """Returns a build report with the given fmax and LC utilization."""
+    return BuildReport(
+        resources=[
+            ResourceReport("ICESTORM_LC", 100, used, float(used)),
+            ResourceReport("ICESTORM_RAM", 32, 4, 12.5),
+        ],
+        clocks=[
+            ClockReport("CLK", fmax),
+            ClockReport("CLK2", fmax + 100),
+        ],
+    )
+
+
+def test_seed_sweep_score():
+    """Tests the seed_sweep_score() function."""
+
+    report = _report(fmax=50.0, used=30)
+
+    # -- The worst case fmax.
+    assert seed_sweep_score(report, FMAX) == 50.0
+
+    # -- Negative utilization of the most used resource.
+    assert seed_sweep_score(report, UTILIZATION) == -30.0
+
+    # -- No clocks and no resources.
+    assert seed_sweep_score(BuildReport([], []), FMAX) == 0.0
+    assert seed_sweep_score(BuildReport([], []), UTILIZATION) == 0.0
+
+
+def test_select_best_seed():
+    """Tests the select_best_seed() function."""
+
+    reports = {
+        1: _report(fmax=50.0, used=30),
+        2: _report(fmax=70.0, used=40),
+        3: None,
+        4: _report(fmax=60.0, used=20),
+        5: _report(fmax=70.0, used=40),
+    }
+
+    # -- Best fmax. Tie of seeds 2 and 5 is resolved to the lower seed.
+    assert select_best_seed(reports, FMAX) == 2
+
+    # -- Lowest utilization.
+    assert select_best_seed(reports, UTILIZATION) == 4
+
+    # -- All seeds failed.
+    assert select_best_seed({1: None, 2: None}, FMAX) is None
+
+
+def test_seed_sweep_action(apio_runner: ApioRunner, capsys: LogCaptureFixture):
+    """Tests the seed selection action."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        apio_env = make_test_apio_env(
+            target_params=TargetParams(build=BuildParams(seed_sweep=3))
+        )
+
+        # -- Create the output files of the seeds. Seed 3 failed.
+        for seed, fmax, used in [(1, 40.0, 20), (2, 80.0, 25)]:
+            seed_target = apio_env.seed_target(seed)
+            sb.write_file(
+                seed_target + ".pnr",
+                PNR_TEMPLATE.format(fmax=fmax, used=used),
+            )
+            sb.write_file(seed_target + ".asc", f"asc of seed {seed}")
+
+        # -- Invoke the action.
+        fs = FS()
+        target = [
+            fs.File("_build/default/hardware.asc"),
+            fs.File("_build/default/hardware.pnr"),
+        ]
+        action = seed_sweep_action(apio_env, [1, 2, 3], FMAX)
+        capsys.readouterr()  # Reset capture
+        result = action(target, [], apio_env.scons_env)
+        assert result == 0
+
+        # -- Check the report.
+        output = cunstyle(capsys.readouterr().out)
+        assert "Seed sweep results" in output
+        assert (
+            "Min fmax distribution over 2 seeds: min 40.00Mhz, "
+            "median 60.00Mhz, max 80.00Mhz." in output
+        )
+        assert "1 seeds failed." in output
+        assert "Selected seed 2." in output
+
+        # -- Check that the files of seed 2 were copied.
+        assert (
+            Path("_build/default/hardware.asc").read_text(encoding="utf-8")
+            == "asc of seed 2"
+        )
+        assert "80.0" in Path("_build/default/hardware.pnr").read_text(
+            encoding="utf-8"
+        )
+
+        # -- Check that the selected seed was saved.
+        pnr_path = Path("_build/default/hardware.pnr")
+        assert (
+            read_sweep_seed(
+                Path("_build/default/seed-sweep.json"), file_sha256(pnr_path)
+            )
+            == 2
+        )
+
+
+def test_clear_seed_report_action(apio_runner: ApioRunner):
+    """Tests the deletion of a stale seed report before the seed runs."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        apio_env = make_test_apio_env(
+            target_params=TargetParams(build=BuildParams(seed_sweep=2))
+        )
+        report_path = apio_env.seed_target(1) + ".pnr"
+        sb.write_file(report_path, PNR_TEMPLATE.format(fmax=50.0, used=10))
+
+        action = clear_seed_report_action(report_path)
+        assert action([], [], apio_env.scons_env) == 0
+        assert not Path(report_path).exists()
+
+        # -- Ok if there is no report.
+        assert action([], [], apio_env.scons_env) == 0
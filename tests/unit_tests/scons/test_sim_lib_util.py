@@ -0,0 +1,139 @@
+"""
+Tests of sim_lib_util.py
+"""
+
+from pathlib import Path
+from tests.unit_tests.scons.testing import make_test_apio_env
+from tests.conftest import ApioRunner
+from apio.scons import sim_lib_util
+from apio.scons.sim_lib_util import split_sim_lib, get_cached_sim_lib_dir
+
+# -- A preprocessed library, as emitted by iverilog -E.
+TEST_LIB_TEXT = """`line 1 "cells_sim.v" 0
+`timescale 1ps / 1ps
+
+module SB_IO (
+  input D
+);
+  wire x;
+endmodule
+
+`line 20 "cells_sim.v" 0
+`default_nettype none
+primitive UDP (q, a); output q; input a; endprimitive
+module SB_GB (input I, output O); assign O = I; endmodule
+"""
+
+
+def test_split_sim_lib():
+    """Tests the split_sim_lib() function."""
+
+    modules = split_sim_lib(TEST_LIB_TEXT)
+    assert list(modules.keys()) == ["SB_IO", "UDP", "SB_GB"]
+    assert modules["SB_IO"] == (
+        "`timescale 1ps / 1ps\n"
+        "module SB_IO (\n"
+        "  input D\n"
+        ");\n"
+        "  wire x;\n"
+        "endmodule\n"
+    )
+    assert modules["SB_GB"] == (
+        "`timescale 1ps / 1ps\n"
+        "`default_nettype none\n"
+        "module SB_GB (input I, output O); assign O = I; endmodule\n"
+    )
+
+    # -- Text outside of modules.
+    assert split_sim_lib(TEST_LIB_TEXT + "function f; endfunction\n") is None
+
+    # -- Unterminated module.
+    assert split_sim_lib(TEST_LIB_TEXT + "module X;\n") is None
+
+    # -- Duplicate module.
+    assert split_sim_lib(TEST_LIB_TEXT + "module SB_GB; endmodule\n") is None
+
+    # -- No modules.
+    assert split_sim_lib("`timescale 1ps / 1ps\n") is None
+
+
+def test_get_cached_sim_lib_dir(apio_runner: ApioRunner, monkeypatch):
+    """Tests the get_cached_sim_lib_dir() function, with a fake iverilog."""
+
+    with apio_runner.in_sandbox():
+
+        lib_file = Path("cells_sim.v").absolute()
+        lib_file.write_text("// Not used by the fake iverilog.\n")
+
+        apio_env = make_test_apio_env()
+
+        # -- Without a cache dir, nothing is cached.
+        assert (
+            get_cached_sim_lib_dir(
+                apio_env,
+                arch="ice40",
+                lib_files=[lib_file],
+                include_dirs=[],
+                flags=[],
+            )
+            is None
+        )
+
+        # -- A fake iverilog -E that writes the preprocessed text.
+        calls = []
+
+        def fake_run(cmd, **kwargs):
+            _ = kwargs
+            calls.append(cmd)
+            output = Path(cmd[cmd.index("-o") + 1])
+            output.write_text(TEST_LIB_TEXT, encoding="utf-8")
+
+            class Result:
+                """A fake subprocess result."""
+
+                returncode = 0
+
+            return Result()
+
+        monkeypatch.setattr(sim_lib_util.subprocess, "run", fake_run)
+        apio_env.params.environment.cache_dir = str(Path("cache").absolute())
+
+        # -- First call, creates the library dir.
+        lib_dir = get_cached_sim_lib_dir(
+            apio_env,
+            arch="ice40",
+            lib_files=[lib_file],
+            include_dirs=[],
+            flags=["-DXYZ"],
+        )
+        assert len(calls) == 1
+        assert "-DXYZ" in calls[0]
+        assert lib_dir.parent == Path("cache/sim-libs").absolute()
+        assert lib_dir.name.startswith("ice40-")
+        assert sorted(f.name for f in lib_dir.glob("*.v")) == [
+            "SB_GB.v",
+            "SB_IO.v",
+            "UDP.v",
+        ]
+
+        # -- Second call, a cache hit.
+        lib_dir2 = get_cached_sim_lib_dir(
+            apio_env,
+            arch="ice40",
+            lib_files=[lib_file],
+            include_dirs=[],
+            flags=["-DXYZ"],
+        )
+        assert lib_dir2 == lib_dir
+        assert len(calls) == 1
+
+        # -- Different flags, a different library.
+        lib_dir3 = get_cached_sim_lib_dir(
+            apio_env,
+            arch="ice40",
+            lib_files=[lib_file],
+            include_dirs=[],
+            flags=[],
+        )
+        assert lib_dir3 != lib_dir
+        assert len(calls) == 2
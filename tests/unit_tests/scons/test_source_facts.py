@@ -0,0 +1,139 @@
+"""
+Tests of source_facts.py
+"""
+
+import os
+import json
+import time
+import pytest
+from tests.conftest import ApioRunner
+from apio.scons import source_facts
+from apio.scons.source_facts import (
+    SOURCE_FACTS_CACHE_PATH,
+    analyze_source_text,
+    get_source_facts,
+    save_source_facts_cache,
+)
+
+TEST_SOURCE = """
+`include "apio_testing.vh"
+module main_tb;
+  reg [7:0] mem [0:15];
+  initial $readmemh("data.hex", mem);
+  parameter v771499 = "v771499.list";
+  initial begin
+    $dumpfile("main_tb.vcd");
+    $dumpvars(0, main_tb);
+  end
+endmodule
+
+module helper #(parameter N = 8) ();
+endmodule
+"""
+
+
+def test_analyze_source_text():
+    """Tests the extraction of the facts of a source file."""
+
+    facts = analyze_source_text(TEST_SOURCE)
+    assert facts.includes == ["apio_testing.vh"]
+    assert facts.memory_files == ["data.hex"]
+    assert facts.icestudio_lists == ["v771499.list"]
+    assert facts.has_dumpfile
+    assert facts.modules == ["main_tb", "helper"]
+    assert sorted(facts.references) == [
+        "apio_testing.vh",
+        "data.hex",
+        "v771499.list",
+    ]
+
+    facts = analyze_source_text("module main;\nendmodule\n")
+    assert not facts.has_dumpfile
+    assert facts.references == []
+    assert not facts.instances
+    assert not facts.packages
+    assert not facts.package_refs
+
+    facts = analyze_source_text(
+        "module main (input clk);\n"
+        "  counter #(.N(8)) counter1 (.clk(clk));\n"
+        "  adder\n    adder1\n    (.a(1));\n"
+        "  always @(posedge clk) if (x) y <= 1;\n"
+        "endmodule\n"
+    )
+    assert facts.modules == ["main"]
+    assert facts.instances == ["counter", "adder"]
+
+    # -- Instance arrays, attributes, instances that follow a ';' on the
+    # -- same line, and statements and gate primitives that look like
+    # -- instantiations.
+    facts = analyze_source_text(
+        "module top; counter u1 (.clk(clk)); endmodule\n"
+        "module arr;\n"
+        "  adder u_add[3:0] (.a(a));\n"
+        "  (* keep *) (* a = 1 *) mux u_mux (.s(s));\n"
+        "  else if (x) y <= 1;\n"
+        "  and g1 (y, a, b);\n"
+        "endmodule\n"
+    )
+    assert facts.modules == ["top", "arr"]
+    assert facts.instances == ["counter", "adder", "mux"]
+
+    # -- Package declarations and references.
+    facts = analyze_source_text(
+        "package automatic defs;\n"
+        "  typedef logic [7:0] byte_t;\n"
+        "endpackage\n"
+        "module main import cfg::*; (input defs::byte_t x);\n"
+        "  initial void'(std::randomize(x));\n"
+        "  initial $display($unit::N);\n"
+        "endmodule\n"
+    )
+    assert facts.packages == ["defs"]
+    assert facts.package_refs == ["cfg", "defs"]
+
+
+def test_source_facts_cache(
+    apio_runner: ApioRunner, monkeypatch: pytest.MonkeyPatch
+):
+    """Tests the memoization of the facts in the cache file."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        # -- A source file that was modified a while ago.
+        sb.write_file("main_tb.v", TEST_SOURCE)
+        old_time = time.time() - 100
+        os.utime("main_tb.v", (old_time, old_time))
+        os.mkdir("_build")
+
+        # -- A missing file has no facts.
+        assert get_source_facts("no-such-file.v").references == []
+
+        # -- First call analyzes the file and the cache is saved.
+        facts = get_source_facts("main_tb.v")
+        assert facts.modules == ["main_tb", "helper"]
+        # pylint: disable=protected-access
+        save_source_facts_cache(source_facts._state)
+        data = json.loads(SOURCE_FACTS_CACHE_PATH.read_text(encoding="utf-8"))
+        assert list(data["entries"].keys()) == ["main_tb.v"]
+
+        # -- Simulate a new process. The facts are loaded from the cache
+        # -- file without analyzing the file.
+        def fail_analysis(_text):
+            assert False, "Unexpected analysis."
+
+        monkeypatch.setattr(source_facts, "_state", None)
+        monkeypatch.setattr(source_facts, "analyze_source_text", fail_analysis)
+        assert get_source_facts("main_tb.v") == facts
+
+        # -- Touching the file without changing its content requires no
+        # -- analysis since its hash is unchanged.
+        monkeypatch.setattr(source_facts, "_state", None)
+        os.utime("main_tb.v", (old_time + 10, old_time + 10))
+        assert get_source_facts("main_tb.v") == facts
+
+        # -- Changing the content of the file requires analysis.
+        monkeypatch.undo()
+        monkeypatch.setattr(source_facts, "_state", None)
+        sb.write_file("main_tb.v", "module main;\nendmodule\n", exists_ok=True)
+        assert get_source_facts("main_tb.v").modules == ["main"]
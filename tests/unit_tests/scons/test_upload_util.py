@@ -0,0 +1,160 @@
+"""
+Tests of upload_util.py
+"""
+
+import sys
+from pathlib import Path
+import pytest
+from tests.unit_tests.scons.testing import make_test_apio_env
+from tests.conftest import ApioRunner
+from apio.common.proto.apio_pb2 import DeviceUpload
+from apio.scons.upload_util import (
+    UPLOAD_REGISTRY_PATH,
+    bitstream_sha256,
+    load_upload_registry,
+    record_uploads,
+    single_upload_action,
+    multi_upload_action,
+)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Uses shell commands.")
+def test_multi_upload_action(apio_runner: ApioRunner, capsys):
+    """Tests the concurrent upload to multiple devices."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("hardware.bin", "x" * 2048)
+        apio_env = make_test_apio_env(targets=["upload"])
+        env = apio_env.scons_env
+        bitstream = [env.File("hardware.bin")]
+
+        # -- All the uploads succeed. $SOURCE is resolved to the bitstream.
+        devices = [
+            DeviceUpload(device="SN1", programmer_cmd="echo flash-1 $SOURCE"),
+            DeviceUpload(device="SN2", programmer_cmd="echo flash-2 $SOURCE"),
+        ]
+        action = multi_upload_action(
+            devices, max_jobs=2, skip_if_current=False, registry_file=None
+        )
+        assert action.execfunction(["upload"], bitstream, env) == 0
+        output = capsys.readouterr().out
+        assert "Uploading to 2 devices." in output
+        assert "[SN1] OK" in output
+        assert "flash-1 hardware.bin" in output
+        assert "[SN2] OK" in output
+        assert "flash-2 hardware.bin" in output
+        assert "Upload results" in output
+        assert "Uploaded to 2 devices." in output
+
+        # -- One of the uploads fails.
+        devices = [
+            DeviceUpload(device="SN1", programmer_cmd="echo flash-1"),
+            DeviceUpload(device="1:5", programmer_cmd="echo oops; exit 1"),
+        ]
+        action = multi_upload_action(
+            devices, max_jobs=1, skip_if_current=False, registry_file=None
+        )
+        assert action.execfunction(["upload"], bitstream, env) == 1
+        output = capsys.readouterr().out
+        assert "[1:5] FAILED" in output
+        assert "oops" in output
+        assert "Failed to upload to 1 of 2 devices." in output
+
+
+def test_upload_registry(apio_runner: ApioRunner):
+    """Tests the loading and the updating of the upload registry."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        registry_file = Path("cache") / UPLOAD_REGISTRY_PATH
+
+        # -- No registry file.
+        assert load_upload_registry(registry_file) == {}
+
+        # -- Record uploads.
+        record_uploads(registry_file, ["SN1", "SN2"], "aaaa")
+        record_uploads(registry_file, ["SN2"], "bbbb")
+        assert load_upload_registry(registry_file) == {
+            "SN1": "aaaa",
+            "SN2": "bbbb",
+        }
+
+        # -- An invalid registry file is ignored.
+        sb.write_file(registry_file, "[1, 2", exists_ok=True)
+        assert load_upload_registry(registry_file) == {}
+
+        # -- The sha256 of a bitstream file.
+        sb.write_file("hardware.bin", "abc")
+        assert bitstream_sha256("hardware.bin") == (
+            "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad"
+        )
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Uses shell commands.")
+def test_single_upload_action(apio_runner: ApioRunner, capsys):
+    """Tests the upload to a single device with the upload registry."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("hardware.bin", "x" * 2048)
+        registry_file = Path("cache") / UPLOAD_REGISTRY_PATH
+        apio_env = make_test_apio_env(targets=["upload"])
+        env = apio_env.scons_env
+        bitstream = [env.File("hardware.bin")]
+
+        # -- The first upload is recorded.
+        action = single_upload_action(
+            "echo flash $SOURCE", "SN1", True, registry_file
+        )
+        assert action.execfunction(["upload"], bitstream, env) == 0
+        assert "already holds" not in capsys.readouterr().out
+        assert load_upload_registry(registry_file) == {
+            "SN1": bitstream_sha256("hardware.bin")
+        }
+
+        # -- The second upload is skipped.
+        assert action.execfunction(["upload"], bitstream, env) == 0
+        assert "already holds" in capsys.readouterr().out
+
+        # -- A failed upload is not recorded.
+        sb.write_file("hardware.bin", "y" * 2048, exists_ok=True)
+        action = single_upload_action("exit 1", "SN1", True, registry_file)
+        assert action.execfunction(["upload"], bitstream, env) != 0
+        assert load_upload_registry(registry_file)["SN1"] != bitstream_sha256(
+            "hardware.bin"
+        )
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Uses shell commands.")
+def test_multi_upload_action_skip_if_current(apio_runner: ApioRunner, capsys):
+    """Tests the skipping of current devices when uploading to multiple
+    devices."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file("hardware.bin", "x" * 2048)
+        registry_file = Path("cache") / UPLOAD_REGISTRY_PATH
+        record_uploads(
+            registry_file, ["SN1"], bitstream_sha256("hardware.bin")
+        )
+        apio_env = make_test_apio_env(targets=["upload"])
+        env = apio_env.scons_env
+        bitstream = [env.File("hardware.bin")]
+
+        devices = [
+            DeviceUpload(
+                device="SN1", programmer_cmd="echo flash-1", serial_num="SN1"
+            ),
+            DeviceUpload(
+                device="SN2", programmer_cmd="echo flash-2", serial_num="SN2"
+            ),
+        ]
+        action = multi_upload_action(devices, 2, True, registry_file)
+        assert action.execfunction(["upload"], bitstream, env) == 0
+        output = capsys.readouterr().out
+        assert "[SN1] SKIPPED" in output
+        assert "flash-1" not in output
+        assert "[SN2] OK" in output
+        assert "Uploaded to 1 devices, skipped 1 current devices." in output
+        assert set(load_upload_registry(registry_file)) == {"SN1", "SN2"}
@@ -0,0 +1,131 @@
+"""
+Tests of vcd_util.py
+"""
+
+import os
+import sys
+from pathlib import Path
+import pytest
+from tests.conftest import ApioRunner
+from apio.scons.vcd_util import (
+    VcdHeaderError,
+    VcdVar,
+    read_vcd_header,
+)
+
+# -- A vcd header, as generated by iverilog, with a nested scope and a
+# -- multi line $timescale.
+TEST_VCD_HEADER = """$date
+\tMon Jan  6 10:00:00 2025
+$end
+$version
+\tIcarus Verilog
+$end
+$timescale
+\t1ps
+$end
+$scope module testbench $end
+$var wire 1 ! LED1 $end
+$var reg 1 " CLK $end
+$var integer 32 # i [31:0] $end
+$scope module dut $end
+$var wire 1 $ clk $end
+$upscope $end
+$upscope $end
+$enddefinitions $end
+"""
+
+
+def test_read_vcd_header(apio_runner: ApioRunner):
+    """Tests the parsing of a vcd header."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_file(
+            "test.vcd", TEST_VCD_HEADER + "#0\n$dumpvars\n0!\n#10\n1!\n"
+        )
+        header = read_vcd_header("test.vcd")
+
+        assert header.timescale == "1ps"
+        assert header.vars == []
+        assert [s.name for s in header.scopes] == ["testbench"]
+        testbench = header.scopes[0]
+        assert testbench.scope_type == "module"
+        assert [s.name for s in testbench.scopes] == ["testbench.dut"]
+        assert header.all_vars() == [
+            VcdVar("testbench.LED1", "wire", 1, "!"),
+            VcdVar("testbench.CLK", "reg", 1, '"'),
+            VcdVar("testbench.i[31:0]", "integer", 32, "#"),
+            VcdVar("testbench.dut.clk", "wire", 1, "$"),
+        ]
+
+
+def test_read_vcd_header_only(apio_runner: ApioRunner):
+    """Tests that the value changes section is not parsed."""
+
+    with apio_runner.in_sandbox():
+
+        # -- A value changes section that is not even valid text.
+        path = Path("test.vcd")
+        path.write_bytes(
+            TEST_VCD_HEADER.encode() + os.urandom(1_000_000) + b"$end"
+        )
+        header = read_vcd_header(path)
+        assert len(header.all_vars()) == 4
+
+
+def test_read_vcd_header_errors(apio_runner: ApioRunner):
+    """Tests the handling of invalid vcd files."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        # -- Empty file.
+        sb.write_file("test.vcd", "")
+        with pytest.raises(VcdHeaderError, match="is empty"):
+            read_vcd_header("test.vcd")
+
+        # -- No $enddefinitions.
+        sb.write_file("test.vcd", "$scope module tb $end\n", exists_ok=True)
+        with pytest.raises(VcdHeaderError, match="enddefinitions"):
+            read_vcd_header("test.vcd")
+
+        # -- Unbalanced $upscope.
+        sb.write_file(
+            "test.vcd", "$upscope $end\n$enddefinitions $end\n", exists_ok=True
+        )
+        with pytest.raises(VcdHeaderError, match="Unbalanced"):
+            read_vcd_header("test.vcd")
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Uses a shell script.")
+def test_read_converted_header(
+    apio_runner: ApioRunner, monkeypatch: pytest.MonkeyPatch
+):
+    """Tests the parsing of the header of an fst file, using a fake fst2vcd
+    that outputs the content of the file as is."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        # -- Create a fake fst2vcd in a dir that is first in PATH.
+        bin_dir = Path("bin").absolute()
+        sb.write_file(bin_dir / "fst2vcd", '#!/bin/sh\ncat "$1"\n')
+        (bin_dir / "fst2vcd").chmod(0o755)
+        monkeypatch.setenv(
+            "PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}"
+        )
+
+        # -- A valid header.
+        sb.write_file("test.fst", TEST_VCD_HEADER + "#0\n1!\n")
+        header = read_vcd_header("test.fst")
+        assert len(header.all_vars()) == 4
+
+        # -- No $enddefinitions.
+        sb.write_file("test.fst", "$scope module tb $end\n", exists_ok=True)
+        with pytest.raises(VcdHeaderError, match="enddefinitions"):
+            read_vcd_header("test.fst")
+
+        # -- No lxt2vcd in PATH.
+        monkeypatch.setenv("PATH", str(bin_dir))
+        sb.write_file("test.lxt2", TEST_VCD_HEADER)
+        with pytest.raises(VcdHeaderError, match="lxt2vcd was not found"):
+            read_vcd_header("test.lxt2")
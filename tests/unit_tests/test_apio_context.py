@@ -49,6 +49,38 @@ def test_init(apio_runner: ApioRunner):
         assert apio_ctx.env_build_path == Path("_build/default")
 
 
+def test_set_env_for_packages_with_env(apio_runner: ApioRunner):
+    """Tests that the contexts that with_env() forks don't set the packages
+    env vars again."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        sb.write_apio_ini(
+            {
+                "[env:env1]": {"board": "alhambra-ii", "top-module": "main"},
+                "[env:env2]": {"board": "icezum", "top-module": "main"},
+            }
+        )
+
+        apio_ctx = ApioContext(
+            project_policy=ProjectPolicy.PROJECT_REQUIRED,
+            remote_config_policy=RemoteConfigPolicy.CACHED_OK,
+            packages_policy=PackagesPolicy.ENSURE_PACKAGES,
+        )
+        apio_ctx.set_env_for_packages(quiet=True)
+
+        # -- The forked context doesn't collect the env mutations again.
+        env_ctx = apio_ctx.with_env("env2")
+        assert env_ctx.env_was_already_set
+
+        def fail():
+            assert False, "Unexpected env mutations collection."
+
+        # pylint: disable=protected-access
+        env_ctx._get_env_mutations_for_packages = fail
+        env_ctx.set_env_for_packages()
+
+
 def test_home_dir_with_a_bad_character(
     apio_runner: ApioRunner, capsys: LogCaptureFixture
 ):
@@ -0,0 +1,127 @@
+"""
+Tests of device_cache_util.py
+"""
+
+import sys
+from pathlib import Path
+from unittest.mock import Mock
+import pytest
+from tests.conftest import ApioRunner
+from apio.apio_context import ApioContext
+from apio.utils import device_cache_util
+from apio.utils.device_cache_util import (
+    DEVICE_SCAN_CACHE_PATH,
+    hotplug_fingerprint,
+    usb_scan_key,
+    load_device_scan_cache,
+)
+from apio.utils.usb_util import UsbDevice
+from apio.utils.serial_util import SerialDevice
+
+USB_DEVICE = UsbDevice(
+    vendor_id="0403",
+    product_id="6010",
+    bus=1,
+    device=5,
+    manufacturer="AlhambraBits",
+    product="Alhambra II v1.0A",
+    serial_number="SN0001",
+    device_type="FT2232H",
+)
+
+SERIAL_DEVICE = SerialDevice(
+    port="/dev/ttyUSB0",
+    port_name="ttyUSB0",
+    vendor_id="0403",
+    product_id="6010",
+    manufacturer="AlhambraBits",
+    product="Alhambra II v1.0A",
+    serial_number="SN0001",
+    device_type="FT2232H",
+    location="1-1:1.0",
+)
+
+
+def _fake_apio_ctx() -> ApioContext:
+    """Returns a fake apio context with a cache dir in the current dir."""
+    apio_ctx = Mock(spec=ApioContext)
+    apio_ctx.get_cache_dir.return_value = Path("cache").absolute()
+    return apio_ctx
+
+
+@pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="Linux only cache."
+)
+def test_hotplug_fingerprint():
+    """Tests that the fingerprint is stable when nothing is plugged."""
+    fingerprint = hotplug_fingerprint()
+    if fingerprint is not None:
+        assert fingerprint == hotplug_fingerprint()
+
+
+def test_usb_scan_key():
+    """Tests the keys of the usb scans."""
+    assert usb_scan_key((None, None)) == "*:*"
+    assert usb_scan_key(("0403", None)) == "0403:*"
+    assert usb_scan_key(("0403", "6010")) == "0403:6010"
+
+
+def test_device_scan_cache(
+    apio_runner: ApioRunner, monkeypatch: pytest.MonkeyPatch
+):
+    """Tests the caching and the invalidation of the device scans."""
+
+    with apio_runner.in_sandbox():
+
+        apio_ctx = _fake_apio_ctx()
+        cache_file = Path("cache") / DEVICE_SCAN_CACHE_PATH
+        fingerprint = ["fp1"]
+        now = [1000.0]
+        monkeypatch.setattr(
+            device_cache_util, "hotplug_fingerprint", lambda: fingerprint[0]
+        )
+        monkeypatch.setattr(device_cache_util.time, "time", lambda: now[0])
+
+        # -- Initially nothing is cached.
+        cache = load_device_scan_cache(apio_ctx)
+        assert cache.enabled
+        assert cache.get_usb_devices("0403:*") is None
+        assert cache.get_serial_devices() is None
+
+        # -- Cache and save the scans.
+        cache.put_usb_devices("0403:*", [USB_DEVICE])
+        cache.put_serial_devices([SERIAL_DEVICE])
+        cache.save()
+        assert cache_file.is_file()
+
+        # -- Loaded from the file.
+        now[0] += 5
+        cache = load_device_scan_cache(apio_ctx)
+        assert cache.get_usb_devices("0403:*") == [USB_DEVICE]
+        assert cache.get_usb_devices("*:*") is None
+        assert cache.get_serial_devices() == [SERIAL_DEVICE]
+
+        # -- Expired.
+        now[0] += device_cache_util.CACHE_TTL_SEC
+        cache = load_device_scan_cache(apio_ctx)
+        assert cache.get_usb_devices("0403:*") is None
+        assert cache.get_serial_devices() is None
+
+        # -- A device was plugged or unplugged.
+        now[0] -= device_cache_util.CACHE_TTL_SEC
+        fingerprint[0] = "fp2"
+        cache = load_device_scan_cache(apio_ctx)
+        assert cache.get_usb_devices("0403:*") is None
+
+        # -- Disabled if there is no fingerprint.
+        fingerprint[0] = None
+        cache = load_device_scan_cache(apio_ctx)
+        assert not cache.enabled
+        cache.put_serial_devices([SERIAL_DEVICE])
+        assert cache.get_serial_devices() is None
+
+        # -- An invalid cache file is ignored.
+        fingerprint[0] = "fp1"
+        cache_file.write_text("[1, 2", encoding="utf-8")
+        cache = load_device_scan_cache(apio_ctx)
+        assert cache.get_serial_devices() is None
@@ -0,0 +1,175 @@
+"""
+Tests of format_util.py
+"""
+
+import os
+import sys
+from pathlib import Path
+import pytest
+from tests.conftest import ApioRunner
+from apio.utils import format_util
+from apio.utils.format_util import (
+    FORMAT_CACHE_PATH,
+    MAX_BATCH_SIZE,
+    make_batches,
+    load_format_cache,
+    save_format_cache,
+    format_files,
+)
+
+# -- A fake verible-verilog-format that 'formats' files by removing trailing
+# -- spaces and fails on files that contain the word SYNTAX_ERROR.
+FAKE_VERIBLE = r"""#!/bin/sh
+inplace=0
+status=0
+for arg in "$@"; do
+  case "$arg" in
+    --inplace) inplace=1 ;;
+    --*) ;;
+    *)
+      if grep -q SYNTAX_ERROR "$arg"; then
+        echo "$arg: syntax error" >&2
+        status=1
+      elif [ $inplace = 1 ]; then
+        sed -i 's/ *$//' "$arg"
+      else
+        sed 's/ *$//' "$arg"
+      fi
+      ;;
+  esac
+done
+exit $status
+"""
+
+
+def test_make_batches():
+    """Tests the splitting of the files into batches."""
+
+    assert make_batches([], 4) == []
+    assert make_batches(["a", "b"], 4) == [["a"], ["b"]]
+    assert make_batches(["a", "b", "c", "d", "e"], 2) == [
+        ["a", "c", "e"],
+        ["b", "d"],
+    ]
+
+    # -- The batch size is limited.
+    files = [f"f{i}" for i in range(3 * MAX_BATCH_SIZE + 1)]
+    batches = make_batches(files, 1)
+    assert len(batches) == 4
+    assert max(len(b) for b in batches) <= MAX_BATCH_SIZE
+    assert sorted(f for b in batches for f in b) == sorted(files)
+
+
+def test_format_cache(apio_runner: ApioRunner):
+    """Tests the loading and saving of the format cache."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        # -- No cache file.
+        cache = load_format_cache(["--column_limit=80"])
+        assert cache.files == {}
+        cache.files["main.v"] = "1234"
+
+        # -- Not saved if there is no _build dir.
+        save_format_cache(cache)
+        assert not FORMAT_CACHE_PATH.exists()
+
+        # -- Saved and loaded with the same options.
+        Path("_build").mkdir()
+        save_format_cache(cache)
+        cache = load_format_cache(["--column_limit=80"])
+        assert cache.is_formatted("main.v", "1234")
+        assert not cache.is_formatted("main.v", "5678")
+
+        # -- Ignored with other options.
+        cache = load_format_cache(["--column_limit=100"])
+        assert cache.files == {}
+
+        # -- Ignored if invalid.
+        sb.write_file(FORMAT_CACHE_PATH, "[1, 2", exists_ok=True)
+        cache = load_format_cache(["--column_limit=80"])
+        assert cache.files == {}
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Uses a shell script.")
+def test_format_cache_verible_change(
+    apio_runner: ApioRunner, monkeypatch: pytest.MonkeyPatch
+):
+    """Tests that the format cache is ignored after verible changes."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        # -- Create a fake verible in a dir that is first in PATH.
+        verible = Path("bin/verible-verilog-format").absolute()
+        sb.write_file(verible, FAKE_VERIBLE)
+        verible.chmod(0o755)
+        monkeypatch.setenv(
+            "PATH", f"{verible.parent}{os.pathsep}{os.environ['PATH']}"
+        )
+
+        Path("_build").mkdir()
+        cache = load_format_cache([])
+        cache.files["main.v"] = "1234"
+        save_format_cache(cache)
+        assert load_format_cache([]).is_formatted("main.v", "1234")
+
+        # -- Simulate a verible upgrade.
+        mtime_ns = verible.stat().st_mtime_ns
+        os.utime(verible, ns=(mtime_ns, mtime_ns + 10**9))
+        assert load_format_cache([]).files == {}
+
+
+def test_verible_options():
+    """Tests the parsing of the apio.ini verible options."""
+
+    assert format_util.verible_options(
+        ["--column_limit=80", "--indentation_spaces=4 --port_declarations=x"]
+    ) == [
+        "--column_limit=80",
+        "--indentation_spaces=4",
+        "--port_declarations=x",
+    ]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Uses a shell script.")
+def test_format_files(
+    apio_runner: ApioRunner, monkeypatch: pytest.MonkeyPatch
+):
+    """Tests formatting and checking of files with a fake verible."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        # -- Create a fake verible in a dir that is first in PATH.
+        bin_dir = Path("bin").absolute()
+        sb.write_file(bin_dir / "verible-verilog-format", FAKE_VERIBLE)
+        (bin_dir / "verible-verilog-format").chmod(0o755)
+        monkeypatch.setenv(
+            "PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}"
+        )
+
+        sb.write_file("a.v", "module a;  \nendmodule\n")
+        sb.write_file("b.v", "module b;\nendmodule\n")
+        sb.write_file("c.v", "SYNTAX_ERROR\n")
+        files = ["a.v", "b.v", "c.v"]
+
+        # -- Check mode doesn't modify the files.
+        results = format_files(files, [], check=True)
+        assert [r.file for r in results] == files
+        assert [r.ok for r in results] == [True, True, False]
+        assert [r.needs_formatting for r in results] == [True, False, False]
+        assert "syntax error" in results[2].error
+        assert (
+            Path("a.v").read_text(encoding="utf-8").startswith("module a;  \n")
+        )
+
+        # -- Format mode. The failure of c.v is attributed to it.
+        results = format_files(files, [], check=False)
+        assert [r.file for r in results] == files
+        assert [r.ok for r in results] == [True, True, False]
+        assert Path("a.v").read_text(encoding="utf-8") == (
+            "module a;\nendmodule\n"
+        )
+
+        # -- Now a.v is formatted.
+        results = format_files(["a.v"], [], check=True)
+        assert results[0].ok and not results[0].needs_formatting
@@ -1,9 +1,20 @@
 """Tests of usb_util.py"""
 
+from glob import glob
+from pathlib import Path
 from typing import List
+from unittest.mock import Mock
+import pytest
+import usb.core
+import usb.backend.libusb1
+from tests.conftest import ApioRunner
+from apio.apio_context import ApioContext
+from apio.utils import usb_util
 from apio.utils.usb_util import (
     UsbDevice,
     UsbDeviceFilter,
+    scan_usb_devices,
+    _get_libusb_backend,
 )
 
 
@@ -77,3 +88,116 @@ def test_filtering():
     filt = UsbDeviceFilter().set_vendor_id("0403").set_product_id("6010")
     assert filt.summary() == "[VID=0403, PID=6010]"
     assert filt.filter(devs) == [devs[0], devs[4]]
+
+
+def test_filter_ids():
+    """Test the VID/PID only filtering."""
+
+    filt = UsbDeviceFilter().set_vendor_id("0403").set_serial_num("sn0")
+    assert filt.ids() == ("0403", None)
+    assert filt.passes_ids("0403", "6010")
+    assert not filt.passes_ids("0405", "6010")
+
+    filt = UsbDeviceFilter()
+    assert filt.ids() == (None, None)
+    assert filt.passes_ids("0405", "6010")
+
+
+def _fake_raw_device(vid: int, pid: int, device_class: int = 0) -> Mock:
+    """Create a fake pyusb device."""
+    device = Mock(spec=usb.core.Device)
+    device.idVendor = vid
+    device.idProduct = pid
+    device.bDeviceClass = device_class
+    device.bus = 1
+    device.address = pid & 0xFF
+    device.iManufacturer = 1
+    device.iProduct = 2
+    device.iSerialNumber = 3
+    return device
+
+
+def test_scan_usb_devices(monkeypatch: pytest.MonkeyPatch):
+    """Tests that the string descriptors are read only for devices that pass
+    the VID/PID filter, with a timeout."""
+
+    raw_devices = [
+        _fake_raw_device(0x0403, 0x6010),
+        _fake_raw_device(0x0403, 0x6014),
+        _fake_raw_device(0x1D6B, 0x0002, device_class=0x09),  # A hub.
+        _fake_raw_device(0x046D, 0xC52B),
+    ]
+    read_devices = []
+
+    def fake_get_usb_str(device, index, default):
+        _ = default  # Unused
+        read_devices.append(device)
+        assert device.default_timeout > 0
+        return f"str{index}-{device.idProduct:04X}"
+
+    monkeypatch.setattr(
+        usb.backend.libusb1, "get_backend", lambda **_: object()
+    )
+    monkeypatch.setattr(usb.core, "find", lambda **_: iter(raw_devices))
+    monkeypatch.setattr(usb_util, "_get_usb_str", fake_get_usb_str)
+
+    # -- With a filter, only the FTDI devices are read.
+    filt = UsbDeviceFilter().set_vendor_id("0403")
+    devices = scan_usb_devices(None, filt)
+    assert [d.product_id for d in devices] == ["6010", "6014"]
+    assert devices[0].product == "str2-6010"
+    assert devices[0].serial_number == "str3-6010"
+    assert devices[0].device_type == "FT2232H"
+    assert set(map(id, read_devices)) == {id(d) for d in raw_devices[:2]}
+
+    # -- Without a filter, all the devices but the hub are read.
+    read_devices.clear()
+    devices = scan_usb_devices(None)
+    assert [d.vendor_id for d in devices] == ["0403", "0403", "046D"]
+    assert len(read_devices) == 9
+
+
+def test_libusb_backend_path_cache(
+    apio_runner: ApioRunner, monkeypatch: pytest.MonkeyPatch
+):
+    """Tests that the resolved libusb backend file is cached."""
+
+    with apio_runner.in_sandbox() as sb:
+
+        lib_file = Path("oss-cad-suite/lib/libusb-1.0.so.0").absolute()
+        sb.write_file(lib_file, "")
+        apio_ctx = Mock(spec=ApioContext)
+        apio_ctx.get_cache_dir.return_value = Path("cache").absolute()
+        apio_ctx.get_package_dir.return_value = Path(
+            "oss-cad-suite"
+        ).absolute()
+
+        globbed = []
+
+        def fake_glob(pattern):
+            globbed.append(pattern)
+            return glob(pattern)
+
+        def fake_get_backend(find_library):
+            return find_library("usb-1.0")
+
+        monkeypatch.setattr(usb_util, "glob", fake_glob)
+        monkeypatch.setattr(
+            usb.backend.libusb1, "get_backend", fake_get_backend
+        )
+
+        # -- The first lookup globs and caches the file.
+        assert _get_libusb_backend(apio_ctx) == str(lib_file)
+        assert len(globbed) == 1
+        assert (Path("cache") / usb_util.LIBUSB_PATH_CACHE_PATH).is_file()
+
+        # -- The next lookup uses the cached file.
+        assert _get_libusb_backend(apio_ctx) == str(lib_file)
+        assert len(globbed) == 1
+
+        # -- The cached file is ignored if it doesn't exist anymore.
+        lib_file.unlink()
+        new_lib_file = lib_file.with_name("libusb-1.0.so.1")
+        sb.write_file(new_lib_file, "")
+        assert _get_libusb_backend(apio_ctx) == str(new_lib_file)
+        assert len(globbed) == 2
@@ -0,0 +1,121 @@
+"""
+Tests of watch_util.py
+"""
+
+import sys
+from pathlib import Path
+from typing import List, Optional, Set
+import pytest
+from tests.conftest import ApioRunner
+from apio.utils import watch_util
+from apio.utils.watch_util import (
+    FileWatcher,
+    PollingWatcher,
+    InotifyWatcher,
+    is_watched_path,
+    changed_testbenches,
+    wait_for_changes,
+    watch_loop,
+)
+
+
+class FakeWatcher(FileWatcher):
+    """A watcher that returns predefined changes."""
+
+    def __init__(self, changes: List[Set[str]]):
+        self.changes = changes
+        self.closed = False
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        if not self.changes:
+            if timeout is None:
+                raise KeyboardInterrupt()
+            return set()
+        return self.changes.pop(0)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_is_watched_path():
+    """Tests the filtering of the watched paths."""
+
+    assert is_watched_path("main.v")
+    assert is_watched_path("apio.ini")
+    assert is_watched_path("tests/main_tb.v")
+    assert not is_watched_path(".")
+    assert not is_watched_path("_build")
+    assert not is_watched_path("_build/default/hardware.json")
+    assert not is_watched_path(".git/index")
+    assert not is_watched_path("src/.main.v.swp")
+    assert not is_watched_path("main.v~")
+
+
+def test_changed_testbenches():
+    """Tests the detection of testbench only changes."""
+
+    assert changed_testbenches({"b_tb.v", "a_tb.sv"}) == ["a_tb.sv", "b_tb.v"]
+    assert changed_testbenches({"main_tb.v", "main.v"}) is None
+    assert changed_testbenches({"main_tb.gtkw"}) is None
+    assert changed_testbenches({watch_util.UNKNOWN_CHANGE}) is None
+
+
+def _check_watcher(watcher: FileWatcher) -> None:
+    """Checks that the watcher reports changes of the project files."""
+
+    try:
+        # -- No changes.
+        assert watcher.wait(0.2) == set()
+
+        # -- Modified file.
+        Path("main.v").write_text("module main; endmodule\n", encoding="utf-8")
+        assert "main.v" in wait_for_changes(watcher, 0.2)
+
+        # -- New file in a new dir.
+        Path("tests").mkdir()
+        Path("tests/main_tb.v").write_text("// tb\n", encoding="utf-8")
+        assert "tests/main_tb.v" in wait_for_changes(watcher, 0.2)
+
+        # -- Changes of the build dir are ignored.
+        Path("_build/hardware.json").write_text("{}", encoding="utf-8")
+        assert watcher.wait(0.2) == set()
+
+        # -- Deleted file.
+        Path("tests/main_tb.v").unlink()
+        assert "tests/main_tb.v" in wait_for_changes(watcher, 0.2)
+    finally:
+        watcher.close()
+
+
+def test_polling_watcher(apio_runner: ApioRunner):
+    """Tests the polling watcher."""
+
+    with apio_runner.in_sandbox() as sb:
+        sb.write_file("main.v", "// empty\n")
+        Path("_build").mkdir()
+        _check_watcher(PollingWatcher(Path(".")))
+
+
+@pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="Uses inotify."
+)
+def test_inotify_watcher(apio_runner: ApioRunner):
+    """Tests the inotify watcher."""
+
+    with apio_runner.in_sandbox() as sb:
+        sb.write_file("main.v", "// empty\n")
+        Path("_build").mkdir()
+        _check_watcher(InotifyWatcher(Path(".")))
+
+
+def test_watch_loop():
+    """Tests the watch loop with a fake watcher."""
+
+    # -- Two bursts of changes, the first in two parts.
+    watcher = FakeWatcher([{"a.v"}, {"b.v"}, set(), {"c.v"}])
+    runs = []
+    watch_loop(watcher, runs.append, debounce_sec=0)
+
+    # -- The loop ended with the Ctrl-C of the fake watcher.
+    assert runs == [None, {"a.v", "b.v"}, {"c.v"}]
+    assert watcher.closed